@@ -1,19 +1,137 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy import event, exc, text
+from contextvars import ContextVar
+from typing import Optional
+import logging
 import os
+import time
 
 DATABASE_URL = os.getenv('DATABASE_URL')
 
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set")
 
+# Pool sizing (per worker process): size + overflow must fit into Postgres max_connections
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))  # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))  # seconds before a connection is replaced
+# Commit and give the connection back to the pool while waiting for slow AI calls
+# (chat/voice turns then commit twice instead of once)
+DB_RELEASE_DURING_AI = os.getenv('DB_RELEASE_DURING_AI', 'false').lower() in ('1', 'true', 'yes')
+
+# Optional read replica for reporting endpoints (get_read_db / get_read_db_session)
+REPLICA_DATABASE_URL = os.getenv('REPLICA_DATABASE_URL')
+REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG', '10'))  # seconds of replay lag before falling back
+REPLICA_CHECK_INTERVAL = float(os.getenv('REPLICA_CHECK_INTERVAL', '5'))
+
+# ASGI scope of the request being served (set by middleware in main.py), used to
+# attribute connection hold time to an endpoint
+request_scope: ContextVar[Optional[dict]] = ContextVar('request_scope', default=None)
+
+
+class PoolStats:
+    """Connection wait/hold counters for /metrics/db-pool"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.hold = {}  # endpoint -> [checkouts, total_ms, max_ms]
+
+    def record_wait(self, ms: float):
+        self.checkouts += 1
+        self.total_wait_ms += ms
+        self.max_wait_ms = max(self.max_wait_ms, ms)
+
+    def record_hold(self, endpoint: str, ms: float):
+        entry = self.hold.setdefault(endpoint, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += ms
+        entry[2] = max(entry[2], ms)
+
+
+POOL_STATS = PoolStats()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that measures how long callers wait for a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            POOL_STATS.timeouts += 1
+            raise
+        finally:
+            POOL_STATS.record_wait((time.perf_counter() - started) * 1000)
+
+
 engine = create_async_engine(
     DATABASE_URL,
     echo=False,
-    pool_pre_ping=True
+    pool_pre_ping=True,
+    poolclass=InstrumentedPool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE
 )
 
+
+def _endpoint_label() -> str:
+    scope = request_scope.get()
+    if scope is None:
+        return 'background'
+    route = scope.get('route')
+    return f"{scope.get('method', '')} {getattr(route, 'path', None) or scope.get('path', '')}"
+
+
+@event.listens_for(engine.sync_engine.pool, 'checkout')
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info['checked_out_at'] = time.perf_counter()
+    connection_record.info['endpoint'] = _endpoint_label()
+
+
+@event.listens_for(engine.sync_engine.pool, 'checkin')
+def _on_checkin(dbapi_connection, connection_record):
+    started = connection_record.info.pop('checked_out_at', None)
+    if started is not None:
+        POOL_STATS.record_hold(connection_record.info.pop('endpoint', 'background'), (time.perf_counter() - started) * 1000)
+
+
+def get_pool_stats() -> dict:
+    """Current pool occupancy plus wait and per-endpoint hold times"""
+    pool = engine.sync_engine.pool
+    s = POOL_STATS
+    return {
+        'config': {
+            'pool_size': DB_POOL_SIZE,
+            'max_overflow': DB_MAX_OVERFLOW,
+            'pool_timeout_s': DB_POOL_TIMEOUT,
+            'pool_recycle_s': DB_POOL_RECYCLE,
+            'release_during_ai': DB_RELEASE_DURING_AI,
+        },
+        'checked_out': pool.checkedout(),
+        'checked_in': pool.checkedin(),
+        'overflow': pool.overflow(),
+        'checkouts': s.checkouts,
+        'timeouts': s.timeouts,
+        'avg_wait_ms': round(s.total_wait_ms / s.checkouts, 2) if s.checkouts else 0.0,
+        'max_wait_ms': round(s.max_wait_ms, 2),
+        'replica': replica_router.stats(),
+        'hold_by_endpoint': {
+            endpoint: {'checkouts': n, 'avg_ms': round(total / n, 1), 'max_ms': round(peak, 1)}
+            for endpoint, (n, total, peak) in sorted(s.hold.items(), key=lambda kv: -kv[1][1])
+        },
+    }
+
+
 SessionLocal = sessionmaker(
     autocommit=False, 
     autoflush=False, 
@@ -29,6 +147,15 @@ async def get_db():
 Base = declarative_base()
 
 
+async def release_connection(db: AsyncSession):
+    """
+    Before a slow external call (LLM, speech-to-text): end the session's transaction
+    so its connection goes back to the pool. No-op unless DB_RELEASE_DURING_AI.
+    """
+    if DB_RELEASE_DURING_AI and db.in_transaction():
+        await db.commit()
+
+
 # Context manager for background tasks
 from contextlib import asynccontextmanager
 
@@ -36,3 +163,103 @@ from contextlib import asynccontextmanager
 async def get_db_session():
     async with SessionLocal() as session:
         yield session
+
+
+# === Read replica ===
+
+replica_engine = create_async_engine(
+    REPLICA_DATABASE_URL,
+    echo=False,
+    pool_pre_ping=True,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    connect_args={'timeout': 5}  # an unreachable replica must not stall requests
+) if REPLICA_DATABASE_URL else None
+
+ReplicaSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=replica_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+) if replica_engine else None
+
+# 0 on a caught-up standby or on a standalone server (e.g. a second local instance)
+_REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaRouter:
+    """Decides per read-only request whether the replica is usable (configured, reachable, lag within bounds)"""
+
+    def __init__(self):
+        self.healthy = False
+        self.lag = None
+        self.error = None
+        self.checked_at = 0.0
+        self.routed = 0
+        self.fallbacks = 0
+
+    async def use_replica(self) -> bool:
+        if ReplicaSessionLocal is None:
+            return False
+        if time.monotonic() - self.checked_at >= REPLICA_CHECK_INTERVAL:
+            await self._check()
+        if self.healthy:
+            self.routed += 1
+        else:
+            self.fallbacks += 1
+        return self.healthy
+
+    async def _check(self):
+        # Stamp first: concurrent requests keep the previous verdict instead of piling up checks
+        self.checked_at = time.monotonic()
+        was_healthy = self.healthy
+        try:
+            async with replica_engine.connect() as conn:
+                self.lag = float((await conn.execute(_REPLICA_LAG_SQL)).scalar() or 0)
+            self.error = None
+            self.healthy = self.lag <= REPLICA_MAX_LAG
+        except Exception as e:
+            self.error = str(e)
+            self.healthy = False
+        if was_healthy and not self.healthy:
+            logging.warning(f'⚠️ Read replica unusable (lag={self.lag}, error={self.error}), reads go to primary')
+        elif self.healthy and not was_healthy:
+            logging.info(f'✅ Read replica in use (lag={self.lag:.1f}s)')
+
+    def stats(self) -> dict:
+        return {
+            'configured': ReplicaSessionLocal is not None,
+            'healthy': self.healthy,
+            'lag_s': self.lag,
+            'max_lag_s': REPLICA_MAX_LAG,
+            'error': self.error,
+            'routed': self.routed,
+            'fallbacks': self.fallbacks,
+        }
+
+
+replica_router = ReplicaRouter()
+
+
+async def get_read_db():
+    """Dependency for read-only endpoints: replica when usable, primary otherwise"""
+    factory = ReplicaSessionLocal if await replica_router.use_replica() else SessionLocal
+    async with factory() as session:
+        yield session
+
+
+@asynccontextmanager
+async def get_read_db_session():
+    """Context manager counterpart of get_read_db (raw-SQL routers)"""
+    factory = ReplicaSessionLocal if await replica_router.use_replica() else SessionLocal
+    async with factory() as session:
+        yield session
@@ -1,6 +1,5 @@
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine, Base
 from routers import companies, sales_agent, widget, crm, whatsapp
 import logging
 import os
@@ -30,6 +29,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class TrackDBEndpoint:
+    """
+    Expose the request to pool events so connection hold time is reported per endpoint.
+    Plain ASGI: BaseHTTPMiddleware would add a task and wrap every response stream (SSE, exports).
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        from database import request_scope
+        token = request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_scope.reset(token)
+
+app.add_middleware(TrackDBEndpoint)
+
 app.include_router(companies.router)
 app.include_router(sales_agent.router)
 app.include_router(widget.router)
@@ -38,18 +57,36 @@ app.include_router(whatsapp.router)
 
 @app.on_event("startup")
 async def startup():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-        from sqlalchemy import text
-        try:
-            await conn.execute(text("ALTER TABLE leads ADD COLUMN IF NOT EXISTS sales_agent_session_id UUID"))
-            await conn.execute(text("ALTER TABLE leads ADD COLUMN IF NOT EXISTS product_match_score FLOAT"))
-            await conn.execute(text("ALTER TABLE leads ADD COLUMN IF NOT EXISTS selection_criteria JSONB DEFAULT '{}'"))
-            await conn.execute(text("ALTER TABLE leads ADD COLUMN IF NOT EXISTS conversation_summary TEXT"))
-            await conn.execute(text("ALTER TABLE leads ADD COLUMN IF NOT EXISTS recommended_products JSONB DEFAULT '[]'"))
-            await conn.commit()
-        except Exception as e:
-            logging.warning(f"Migration warning: {e}")
+    # Schema changes are applied out of band: `python migrate.py` (see migrations/)
+    try:
+        from migrate import pending_migrations
+        pending = await pending_migrations()
+        if pending:
+            logging.warning(f"⚠️ Pending DB migrations: {pending} - run `python migrate.py`")
+    except Exception as e:
+        logging.warning(f"Migration check failed: {e}")
+    
+    # Post-confirmation jobs (summary, notifications, Bitrix24); handlers register on router import
+    # Background services need the migrated schema: without it the API still serves, they stay off
+    try:
+        from services.job_queue import job_queue
+        await job_queue.start()
+    except Exception as e:
+        logging.warning(f"⚠️ Job queue not started: {e} - run `python migrate.py`")
+    
+    # Tier usage counters: periodic recount against leads/widgets
+    try:
+        from services.usage_counters import usage_counters
+        await usage_counters.start()
+    except Exception as e:
+        logging.warning(f"⚠️ Usage counters not started: {e} - run `python migrate.py`")
+
+    # Move quiet conversations to interactions_archive
+    try:
+        from services.interaction_archive import interaction_archive
+        await interaction_archive.start()
+    except Exception as e:
+        logging.warning(f"⚠️ Interaction archive not started: {e} - run `python migrate.py`")
 
 @app.get("/")
 @limiter.limit("10/minute")
@@ -75,3 +112,86 @@ async def check_widget_enabled():
     import os
     enabled = os.path.exists('/var/www/bizdnai/widget_enabled.txt')
     return {"enabled": enabled}
+
+@app.get("/metrics/turns")
+async def get_turn_metrics():
+    """DB round trips per chat/voice turn"""
+    from services.unit_of_work import get_turn_stats
+    return get_turn_stats()
+
+@app.get("/metrics/stages")
+async def get_stage_metrics():
+    """p50/p95 timings per chat pipeline stage"""
+    from services.turn_pipeline import get_stage_stats
+    return get_stage_stats()
+
+@app.get("/metrics/ai-clients")
+async def get_ai_client_metrics():
+    """Per-tenant AI client registry stats"""
+    from services.ai_service import ai_client_registry
+    return ai_client_registry.stats()
+
+@app.get("/metrics/history-cache")
+async def get_history_cache_metrics():
+    """Conversation history ring-buffer cache stats"""
+    from services.history_store import history_store
+    return history_store.stats()
+
+@app.get("/metrics/tenant-cache")
+async def get_tenant_cache_metrics():
+    """Tenant config cache stats"""
+    from services.tenant_cache import tenant_cache
+    return tenant_cache.stats()
+
+@app.get("/metrics/http-clients")
+async def get_http_client_metrics():
+    """Outbound HTTP clients per upstream: requests, latency, pool usage"""
+    from services.http_clients import http_clients
+    return http_clients.stats()
+
+@app.get("/metrics/jobs")
+async def get_job_metrics():
+    """Background job queue depth per type and status"""
+    from services.job_queue import job_queue
+    return await job_queue.stats()
+
+@app.get("/metrics/leaderboard-cache")
+async def get_leaderboard_cache_metrics():
+    """Leaderboard response cache hit rate"""
+    from services.manager_stats import manager_stats
+    return manager_stats.stats()
+
+@app.get("/metrics/status-graph")
+async def get_status_graph_metrics():
+    """CRM status graph cache hit rate"""
+    from services.status_graph import status_graphs
+    return status_graphs.stats()
+
+@app.get("/metrics/db-pool")
+async def get_db_pool_metrics():
+    """DB connection pool occupancy, wait time and per-endpoint hold time"""
+    from database import get_pool_stats
+    return get_pool_stats()
+
+@app.get("/metrics/usage-counters")
+async def get_usage_counter_metrics():
+    """Tier usage counter reconcile runs and corrections"""
+    from services.usage_counters import usage_counters
+    return usage_counters.stats()
+
+@app.get("/metrics/interaction-archive")
+async def get_interaction_archive_metrics():
+    """Archival runs and cold storage size"""
+    from services.interaction_archive import interaction_archive
+    return await interaction_archive.stats()
+
+@app.on_event("shutdown")
+async def shutdown():
+    from services.interaction_archive import interaction_archive
+    await interaction_archive.stop()
+    from services.usage_counters import usage_counters
+    await usage_counters.stop()
+    from services.job_queue import job_queue
+    await job_queue.stop()
+    from services.http_clients import http_clients
+    await http_clients.aclose()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations (run out of band, not on app startup).
+
+    python migrate.py            # apply pending migrations (same as `up`)
+    python migrate.py status     # applied / pending / changed files
+    python migrate.py check      # verify hot queries use an index (EXPLAIN)
+
+Migrations are migrations/NNN_name.sql, applied once in version order and
+recorded in schema_migrations. Each file runs in one transaction unless it
+contains the line `-- migrate: no-transaction` (needed for CREATE INDEX
+CONCURRENTLY); such files are run statement by statement and must be idempotent.
+A failed concurrent build leaves an INVALID index that IF NOT EXISTS would skip:
+it is dropped and rebuilt on the next run, and an index still invalid after its
+statement fails the migration. ORM-managed tables are created with
+metadata.create_all before the files run, under the same advisory lock.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+
+from database import engine, Base
+import models  # noqa: F401  (registers ORM tables on Base.metadata)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+NO_TRANSACTION_MARKER = '-- migrate: no-transaction'
+_FILE_RE = re.compile(r'^(\d{3,})_(\w+)\.sql$')
+_CONCURRENT_INDEX_RE = re.compile(r'CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)', re.IGNORECASE)
+# pg_advisory_lock key so two deploys cannot migrate at the same time
+_LOCK_KEY = 7410021
+
+# Hot queries and the table whose sequential scan would mean a missing index.
+# Sample literals stand in for bind parameters.
+EXPECTED_PLANS = [
+    ('history tail', 'interactions',
+     "SELECT content, outcome FROM interactions WHERE lead_id = 1 ORDER BY created_at DESC LIMIT 30"),
+    ('archive candidates', 'interactions',
+     "SELECT DISTINCT lead_id FROM interactions WHERE created_at < NOW() - INTERVAL '90 days' LIMIT 200"),
+    ('archived conversation', 'interactions_archive',
+     "SELECT payload FROM interactions_archive WHERE lead_id = 1"),
+    ('crm lead list', 'leads',
+     "SELECT id FROM leads WHERE company_id = 1 ORDER BY created_at DESC LIMIT 50"),
+    ('web visitor lookup', 'leads',
+     "SELECT id FROM leads WHERE company_id = 1 AND visitor_id = 'v'"),
+    ('crm lead page', 'leads',
+     "SELECT id FROM leads WHERE company_id = 1 AND (COALESCE(contact_info ->> 'name', '') <> '' "
+     "OR COALESCE(contact_info ->> 'phone', '') <> '') AND (created_at, id) < (NOW(), 1) "
+     "ORDER BY created_at DESC, id DESC LIMIT 6"),
+    ('my leads page', 'leads',
+     "SELECT id FROM leads WHERE company_id = 1 AND assigned_user_id = 1 "
+     "ORDER BY created_at DESC, id DESC LIMIT 6"),
+    ('lead export', 'leads',
+     "SELECT id FROM leads WHERE company_id = 1 ORDER BY created_at, id"),
+    ('lead source report', 'leads',
+     "SELECT source, COUNT(*) FROM leads WHERE company_id = 1 AND created_at >= NOW() - INTERVAL '7 days' "
+     "GROUP BY source"),
+    ('manager lead count', 'leads',
+     "SELECT COUNT(*) FROM leads WHERE company_id = 1 AND assigned_user_id = 1"),
+    ('reminder poll', 'lead_events_schedule',
+     "SELECT id FROM lead_events_schedule WHERE status = 'pending' AND reminder_sent = FALSE AND scheduled_at > NOW()"),
+    ('leaderboard period', 'manager_daily_stats',
+     "SELECT manager_id, SUM(coins) FROM manager_daily_stats WHERE company_id = 1 "
+     "AND day > CURRENT_DATE - 7 GROUP BY manager_id"),
+    ('lead deals', 'lead_deals',
+     "SELECT id FROM lead_deals WHERE lead_id = 1 ORDER BY deal_number"),
+    ('lead notes', 'lead_notes',
+     "SELECT content FROM lead_notes WHERE lead_id = 1 ORDER BY created_at DESC LIMIT 5"),
+    ('manager lookup', 'company_managers',
+     "SELECT full_name FROM company_managers WHERE company_id = 1 AND user_id = 1"),
+    ('job claim', 'background_jobs',
+     "SELECT id FROM background_jobs WHERE status = 'pending' AND run_at <= NOW() ORDER BY run_at LIMIT 1"),
+]
+
+
+def discover() -> list:
+    """[(version, name, path, checksum)] sorted by version"""
+    found = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = _FILE_RE.match(filename)
+        if not match:
+            continue
+        path = os.path.join(MIGRATIONS_DIR, filename)
+        with open(path, 'rb') as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        found.append((int(match.group(1)), match.group(2), path, checksum))
+    return sorted(found)
+
+
+def split_statements(sql: str) -> list:
+    """Split a no-transaction file on ';' at line end (no $$ bodies allowed there)"""
+    body = '\n'.join(line for line in sql.splitlines() if not line.strip().startswith('--'))
+    return [stmt.strip() for stmt in re.split(r';\s*$', body, flags=re.MULTILINE) if stmt.strip()]
+
+
+async def _raw(conn):
+    """asyncpg connection behind a SQLAlchemy connection (multi-statement scripts need it)"""
+    return (await conn.get_raw_connection()).driver_connection
+
+
+async def _ensure_table(raw):
+    await raw.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            checksum VARCHAR(64) NOT NULL,
+            applied_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+async def _applied(raw) -> dict:
+    rows = await raw.fetch("SELECT version, checksum FROM schema_migrations")
+    return {r['version']: r['checksum'] for r in rows}
+
+
+async def _index_valid(raw, name: str):
+    """pg_index.indisvalid of an index, None if it does not exist"""
+    return await raw.fetchval("""
+        SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = $1 AND pg_table_is_visible(c.oid)
+    """, name)
+
+
+async def _run_no_transaction(raw, stmt: str):
+    index = _CONCURRENT_INDEX_RE.match(stmt)
+    if index and await _index_valid(raw, index.group(1)) is False:
+        print(f"♻️ Dropping invalid index {index.group(1)} left by a failed build")
+        await raw.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index.group(1)}")
+    await raw.execute(stmt)
+    if index and not await _index_valid(raw, index.group(1)):
+        raise RuntimeError(f"Index {index.group(1)} is invalid after a concurrent build; rerun migrate.py")
+
+
+async def pending_migrations() -> list:
+    """Versions not applied yet (cheap; used by the app to warn on startup)"""
+    async with engine.connect() as conn:
+        raw = await _raw(conn)
+        exists = await raw.fetchval("SELECT to_regclass('schema_migrations') IS NOT NULL")
+        applied = await _applied(raw) if exists else {}
+    return [version for version, *_ in discover() if version not in applied]
+
+
+async def migrate_up():
+    async with engine.connect() as conn:
+        raw = await _raw(conn)
+        await raw.execute("SELECT pg_advisory_lock($1)", _LOCK_KEY)
+        try:
+            # ORM tables first, so the SQL files can reference them on a fresh database
+            async with engine.begin() as ddl:
+                await ddl.run_sync(Base.metadata.create_all)
+            await _ensure_table(raw)
+            applied = await _applied(raw)
+            todo = [m for m in discover() if m[0] not in applied]
+            if not todo:
+                print("✅ Schema is up to date")
+            for version, name, path, checksum in todo:
+                with open(path, encoding='utf-8') as f:
+                    sql = f.read()
+                print(f"🔧 Applying {version:03d}_{name}...")
+                if NO_TRANSACTION_MARKER in sql:
+                    for stmt in split_statements(sql):
+                        await _run_no_transaction(raw, stmt)
+                    await raw.execute(
+                        "INSERT INTO schema_migrations (version, name, checksum) VALUES ($1, $2, $3)",
+                        version, name, checksum
+                    )
+                else:
+                    async with raw.transaction():
+                        await raw.execute(sql)
+                        await raw.execute(
+                            "INSERT INTO schema_migrations (version, name, checksum) VALUES ($1, $2, $3)",
+                            version, name, checksum
+                        )
+                print(f"✅ {version:03d}_{name} applied")
+        finally:
+            await raw.execute("SELECT pg_advisory_unlock($1)", _LOCK_KEY)
+
+
+async def migrate_status():
+    async with engine.connect() as conn:
+        raw = await _raw(conn)
+        await _ensure_table(raw)
+        applied = await _applied(raw)
+    for version, name, _, checksum in discover():
+        if version not in applied:
+            state = 'pending'
+        elif applied[version] != checksum:
+            state = 'applied (file changed since!)'
+        else:
+            state = 'applied'
+        print(f"{version:03d}_{name}: {state}")
+
+
+def _seq_scans(plan: dict, table: str) -> list:
+    """Seq Scan nodes on `table` anywhere in an EXPLAIN (FORMAT JSON) plan"""
+    found = []
+    if plan.get('Node Type') == 'Seq Scan' and plan.get('Relation Name') == table:
+        found.append(plan)
+    for child in plan.get('Plans', []):
+        found.extend(_seq_scans(child, table))
+    return found
+
+
+def _index_names(plan: dict) -> list:
+    names = [plan['Index Name']] if 'Index Name' in plan else []
+    for child in plan.get('Plans', []):
+        names.extend(_index_names(child))
+    return names
+
+
+async def check_indexes() -> list:
+    """
+    EXPLAIN each hot query with sequential scans disabled: if the planner still
+    has to seq-scan the table, no index can serve the query.
+    """
+    report = []
+    async with engine.connect() as conn:
+        raw = await _raw(conn)
+        for name, table, query in EXPECTED_PLANS:
+            async with raw.transaction():
+                await raw.execute("SET LOCAL enable_seqscan = off")
+                try:
+                    result = await raw.fetchval(f"EXPLAIN (FORMAT JSON) {query}")
+                except Exception as e:
+                    report.append({'query': name, 'table': table, 'ok': False, 'error': str(e)})
+                    continue
+            plan = (json.loads(result) if isinstance(result, str) else result)[0]['Plan']
+            report.append({
+                'query': name,
+                'table': table,
+                'ok': not _seq_scans(plan, table),
+                'indexes': _index_names(plan),
+            })
+    return report
+
+
+async def main(command: str):
+    try:
+        if command == 'up':
+            await migrate_up()
+        elif command == 'status':
+            await migrate_status()
+        elif command == 'check':
+            missing = 0
+            for row in await check_indexes():
+                mark = '✅' if row['ok'] else '❌'
+                detail = row.get('error') or ', '.join(row['indexes']) or 'seq scan'
+                print(f"{mark} {row['query']} ({row['table']}): {detail}")
+                missing += not row['ok']
+            if missing:
+                print(f"⚠️ {missing} hot quer{'y' if missing == 1 else 'ies'} without a usable index")
+                sys.exit(1)
+        else:
+            print(__doc__)
+            sys.exit(2)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else 'up'))
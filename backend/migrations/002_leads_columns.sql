@@ -0,0 +1,23 @@
+-- Migration: Leads extension columns
+-- Version: 002
+-- Date: 2026-10-18
+-- Purpose: Columns previously added by ALTER TABLE on every startup, plus the
+--          CRM columns the routers update with raw SQL
+
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS sales_agent_session_id UUID;
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS product_match_score FLOAT;
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS selection_criteria JSONB DEFAULT '{}';
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS conversation_summary TEXT;
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS recommended_products JSONB DEFAULT '[]';
+
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS ai_summary TEXT;
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS temperature VARCHAR(30);
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS assigned_user_id BIGINT;
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS assigned_user_name VARCHAR(255);
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS status_emoji VARCHAR(10);
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS status_name VARCHAR(100);
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS status_changed_at TIMESTAMP WITH TIME ZONE;
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS current_deal_id INTEGER;
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS current_deal_status VARCHAR(30);
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS deal_amount NUMERIC(14, 2);
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS deal_currency VARCHAR(10);
@@ -0,0 +1,83 @@
+-- Migration: CRM tables
+-- Version: 003
+-- Date: 2026-10-18
+-- Purpose: Managed schema for tables used only through raw SQL in crm.py,
+--          companies.py and the bot (no-op where they already exist)
+
+CREATE TABLE IF NOT EXISTS lead_status_settings (
+  id SERIAL PRIMARY KEY,
+  company_id INTEGER NOT NULL REFERENCES companies(id) ON DELETE CASCADE,
+  emoji VARCHAR(10),
+  name VARCHAR(100) NOT NULL,
+  coins INTEGER DEFAULT 0,
+  sort_order INTEGER DEFAULT 0,
+  is_final BOOLEAN DEFAULT FALSE
+);
+
+CREATE TABLE IF NOT EXISTS company_managers (
+  id SERIAL PRIMARY KEY,
+  company_id INTEGER NOT NULL REFERENCES companies(id) ON DELETE CASCADE,
+  user_id BIGINT NOT NULL,
+  telegram_username VARCHAR(100),
+  full_name VARCHAR(255),
+  is_active BOOLEAN DEFAULT TRUE,
+  coins INTEGER DEFAULT 0,
+  deals_count INTEGER DEFAULT 0,
+  total_deal_amount NUMERIC(14, 2) DEFAULT 0,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS lead_events (
+  id SERIAL PRIMARY KEY,
+  company_id INTEGER NOT NULL,
+  lead_id INTEGER NOT NULL,
+  event_type VARCHAR(50) NOT NULL,
+  data JSONB DEFAULT '{}',
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS lead_deals (
+  id SERIAL PRIMARY KEY,
+  lead_id INTEGER NOT NULL,
+  company_id INTEGER NOT NULL,
+  manager_id BIGINT,
+  manager_name VARCHAR(255),
+  deal_number INTEGER DEFAULT 1,
+  deal_amount NUMERIC(14, 2),
+  deal_currency VARCHAR(10) DEFAULT 'KZT',
+  status VARCHAR(30) DEFAULT 'pending_amount',
+  confirmed BOOLEAN DEFAULT FALSE,
+  confirmed_at TIMESTAMP WITH TIME ZONE,
+  payment_date DATE,
+  payment_doc_number VARCHAR(100),
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS lead_events_schedule (
+  id SERIAL PRIMARY KEY,
+  company_id INTEGER NOT NULL,
+  lead_id INTEGER,
+  user_id BIGINT,
+  event_type VARCHAR(30),
+  title VARCHAR(255),
+  description TEXT,
+  scheduled_at TIMESTAMP NOT NULL,
+  remind_before_minutes INTEGER DEFAULT 15,
+  status VARCHAR(20) DEFAULT 'pending',
+  reminder_sent BOOLEAN DEFAULT FALSE,
+  is_recurring BOOLEAN DEFAULT FALSE,
+  recurring_pattern VARCHAR(50),
+  created_by_user_id BIGINT,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS lead_notes (
+  id SERIAL PRIMARY KEY,
+  company_id INTEGER NOT NULL,
+  lead_id INTEGER NOT NULL,
+  user_id BIGINT,
+  user_name VARCHAR(255),
+  content TEXT,
+  is_voice BOOLEAN DEFAULT FALSE,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
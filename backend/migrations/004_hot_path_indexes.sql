@@ -0,0 +1,31 @@
+-- Migration: Hot-path index pack
+-- Version: 004
+-- Date: 2026-10-18
+-- Purpose: Indexes for the queries run on every chat turn, CRM list and reminder poll.
+--          Built CONCURRENTLY so production tables are not locked for writes.
+-- migrate: no-transaction
+
+-- Conversation history tail (history_store.load_window)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_interactions_lead_created ON interactions (lead_id, created_at);
+
+-- CRM lead list / lead count per period
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_leads_company_created ON leads (company_id, created_at DESC);
+
+-- Manager profile: leads assigned to a manager
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_leads_company_assigned ON leads (company_id, assigned_user_id);
+
+-- Reminder scheduler poll (/crm/pending-reminders)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_events_schedule_reminders ON lead_events_schedule (status, reminder_sent, scheduled_at);
+
+-- Leaderboard per period
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_lead_deals_company_status_created ON lead_deals (company_id, status, created_at);
+
+-- Lead card: deals and notes of a lead
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_lead_deals_lead ON lead_deals (lead_id, deal_number);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_lead_notes_lead_created ON lead_notes (lead_id, created_at DESC);
+
+-- Manager lookups by (company, telegram user)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_company_managers_company_user ON company_managers (company_id, user_id);
+
+-- Status settings per company
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_lead_status_settings_company ON lead_status_settings (company_id, sort_order);
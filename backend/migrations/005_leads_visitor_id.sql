@@ -0,0 +1,24 @@
+-- Migration: Web visitor identity column
+-- Version: 005
+-- Date: 2026-10-18
+-- Purpose: First-class (company_id, visitor_id) identity for web/widget leads,
+--          backfilled from contact_info->>'visitor_id'
+
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS visitor_id VARCHAR;
+
+-- One lead per (company, visitor) gets the identity: the oldest, which is the one
+-- the previous JSONB scan returned first. Later duplicates keep it only in contact_info.
+UPDATE leads l
+SET visitor_id = d.visitor_id
+FROM (
+  SELECT DISTINCT ON (company_id, contact_info ->> 'visitor_id')
+         id, contact_info ->> 'visitor_id' AS visitor_id
+  FROM leads
+  WHERE telegram_user_id IS NULL AND contact_info ->> 'visitor_id' IS NOT NULL
+  ORDER BY company_id, contact_info ->> 'visitor_id', id
+) d
+WHERE l.id = d.id
+  AND l.visitor_id IS NULL
+  AND NOT EXISTS (
+    SELECT 1 FROM leads x WHERE x.company_id = l.company_id AND x.visitor_id = d.visitor_id
+  );
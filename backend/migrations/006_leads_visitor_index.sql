@@ -0,0 +1,8 @@
+-- Migration: Unique visitor identity index
+-- Version: 006
+-- Date: 2026-10-18
+-- Purpose: Single index lookup for web leads and protection against duplicate
+--          leads from concurrent first messages (INSERT ... ON CONFLICT)
+-- migrate: no-transaction
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_leads_company_visitor ON leads (company_id, visitor_id) WHERE visitor_id IS NOT NULL;
@@ -0,0 +1,25 @@
+-- Migration: Tier usage counters
+-- Version: 007
+-- Date: 2026-10-18
+-- Purpose: Widget counters next to leads_used_this_month, backfilled from the
+--          source tables (kept up to date by services/usage_counters.py)
+
+ALTER TABLE companies ADD COLUMN IF NOT EXISTS leads_used_this_month INTEGER DEFAULT 0;
+ALTER TABLE companies ADD COLUMN IF NOT EXISTS leads_reset_date TIMESTAMP;
+ALTER TABLE companies ADD COLUMN IF NOT EXISTS web_widgets_used INTEGER DEFAULT 0;
+ALTER TABLE companies ADD COLUMN IF NOT EXISTS social_widgets_used INTEGER DEFAULT 0;
+ALTER TABLE companies ADD COLUMN IF NOT EXISTS avatar_widgets_used INTEGER DEFAULT 0;
+
+UPDATE companies c SET
+    leads_used_this_month = (
+        SELECT COUNT(*) FROM leads l
+        WHERE l.company_id = c.id
+          AND l.created_at >= date_trunc('month', now() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+    ),
+    leads_reset_date = date_trunc('month', now() AT TIME ZONE 'UTC'),
+    web_widgets_used = (SELECT COUNT(*) FROM web_widgets w WHERE w.company_id = c.id AND w.is_active = TRUE),
+    social_widgets_used = (SELECT COUNT(*) FROM social_widgets s WHERE s.company_id = c.id AND s.is_active = TRUE),
+    avatar_widgets_used = (
+        SELECT COUNT(*) FROM social_widgets s
+        WHERE s.company_id = c.id AND s.is_active = TRUE AND s.widget_type = 'avatar'
+    );
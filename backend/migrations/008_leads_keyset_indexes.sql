@@ -0,0 +1,20 @@
+-- Migration: Keyset pagination indexes for the CRM lead list
+-- Version: 008
+-- Date: 2026-10-18
+-- Purpose: /crm/{company_id}/leads/page walks (created_at, id) newest first with
+--          server-side filters; each page is one short index range scan.
+--          The (company_id, created_at) / (company_id, assigned_user_id) indexes
+--          from 004 are prefixes of the new ones and are dropped.
+-- migrate: no-transaction
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_leads_company_page ON leads (company_id, created_at DESC, id DESC);
+
+-- "Leads with a name or phone" (bot list); predicate must match crm.HAS_CONTACT_SQL
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_leads_company_contact_page ON leads (company_id, created_at DESC, id DESC)
+    WHERE (COALESCE(contact_info ->> 'name', '') <> '' OR COALESCE(contact_info ->> 'phone', '') <> '');
+
+-- "My leads" and manager lead counts
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_leads_company_assigned_page ON leads (company_id, assigned_user_id, created_at DESC, id DESC);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_leads_company_created;
+DROP INDEX CONCURRENTLY IF EXISTS idx_leads_company_assigned;
@@ -0,0 +1,25 @@
+-- Migration: Manager daily stats buckets
+-- Version: 009
+-- Date: 2026-10-18
+-- Purpose: Per-day coins / completed deals / deal amount per manager for the
+--          week and month leaderboards (services/manager_stats.py)
+
+CREATE TABLE IF NOT EXISTS manager_daily_stats (
+  company_id INTEGER NOT NULL,
+  manager_id BIGINT NOT NULL,
+  day DATE NOT NULL,
+  coins INTEGER NOT NULL DEFAULT 0,
+  deals_count INTEGER NOT NULL DEFAULT 0,
+  deal_amount NUMERIC(14, 2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (company_id, manager_id, day)
+);
+
+CREATE INDEX IF NOT EXISTS idx_manager_daily_stats_company_day ON manager_daily_stats (company_id, day);
+
+-- Completed deals are backfilled from lead_deals; coin history starts now
+INSERT INTO manager_daily_stats (company_id, manager_id, day, deals_count, deal_amount)
+SELECT company_id, manager_id, created_at::date, COUNT(*), COALESCE(SUM(deal_amount), 0)
+FROM lead_deals
+WHERE status = 'completed' AND manager_id IS NOT NULL AND created_at IS NOT NULL
+GROUP BY company_id, manager_id, created_at::date
+ON CONFLICT (company_id, manager_id, day) DO NOTHING;
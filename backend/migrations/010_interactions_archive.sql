@@ -0,0 +1,15 @@
+-- Migration: Cold storage for quiet conversations
+-- Version: 010
+-- Date: 2026-10-18
+-- Purpose: Conversations with no messages for ARCHIVE_AFTER_DAYS are moved out of
+--          interactions into one compressed row per lead (services/interaction_archive.py)
+
+CREATE TABLE IF NOT EXISTS interactions_archive (
+  lead_id INTEGER PRIMARY KEY REFERENCES leads(id) ON DELETE CASCADE,
+  company_id INTEGER,
+  message_count INTEGER NOT NULL,
+  first_at TIMESTAMPTZ,
+  last_at TIMESTAMPTZ,
+  archived_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  payload BYTEA NOT NULL  -- zlib(JSON [[content, outcome, type, created_at], ...]), oldest first
+);
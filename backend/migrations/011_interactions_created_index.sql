@@ -0,0 +1,7 @@
+-- Migration: Archival candidate index
+-- Version: 011
+-- Date: 2026-10-18
+-- Purpose: Lets the archival job find old interactions without scanning the table
+-- migrate: no-transaction
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_interactions_created ON interactions (created_at);
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Float, Text, JSON, BigInteger
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Float, Text, JSON, BigInteger, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID, JSONB, INET, ARRAY
@@ -44,8 +44,12 @@ class Company(Base):
     ai_package = Column(String(20), default='basic')
     web_avatar_enabled = Column(Boolean, default=False)  # Web avatar widget enabled
     avatar_limit = Column(Integer, nullable=True)  # Individual company avatar limit override
+    # Usage counters for tier limits (services/usage_counters.py)
     leads_used_this_month = Column(Integer, default=0)
-    leads_reset_date = Column(DateTime, nullable=True)
+    leads_reset_date = Column(DateTime, nullable=True)  # period of leads_used_this_month (UTC month start)
+    web_widgets_used = Column(Integer, default=0)
+    social_widgets_used = Column(Integer, default=0)
+    avatar_widgets_used = Column(Integer, default=0)
     
     
     
@@ -143,7 +147,15 @@ class Lead(Base):
     conversation_summary = Column(Text, nullable=True)
     recommended_products = Column(JSONB, default=lambda: [])
     
+    # Web/widget visitor identity; unique per company (see migrations 005/006)
+    visitor_id = Column(String, nullable=True)
+    
     company = relationship("Company", back_populates="leads")
+    
+    __table_args__ = (
+        Index('uq_leads_company_visitor', 'company_id', 'visitor_id', unique=True,
+              postgresql_where=visitor_id.isnot(None)),
+    )
 
 class Employee(Base):
     __tablename__ = "employees"
@@ -319,3 +331,22 @@ class AIAgentPackage(Base):
     sort_order = Column(Integer, default=0)
     is_active = Column(Boolean, default=True)
     updated_at = Column(DateTime, server_default=func.now())
+
+class BackgroundJob(Base):
+    """Durable job for work that runs after the response (summary, notifications, CRM export)"""
+    __tablename__ = 'background_jobs'
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String(50), nullable=False)
+    payload = Column(JSONB, default={})
+    status = Column(String(20), default='pending')  # pending, running, done, failed
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=5)
+    run_at = Column(DateTime(timezone=True), server_default=func.now())
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('ix_background_jobs_status_run_at', 'status', 'run_at'),
+    )
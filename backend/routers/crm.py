@@ -1,8 +1,16 @@
 """CRM Router - Clean version without duplicates"""
 from fastapi import APIRouter, HTTPException, Body, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy import text
 from typing import Optional
-from database import get_db_session
+from datetime import datetime, timedelta, timezone
+import csv
+import io
+import json
+from database import get_db_session, get_read_db_session
+from services.manager_stats import manager_stats
+from services.interaction_archive import interaction_archive, unpack
+from services.status_graph import status_graphs, TransitionError
 
 router = APIRouter(prefix='/crm', tags=['CRM'])
 
@@ -39,6 +47,227 @@ async def get_leads(company_id: int, limit: int = Query(default=50, le=200)):
         return leads
 
 
+# Keyset pagination: cursor = "<created_at µs since epoch, hex>.<id, hex>" (short enough for bot callback_data)
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# Same expression as the partial index idx_leads_company_contact_page (migration 008)
+HAS_CONTACT_SQL = "(COALESCE(contact_info ->> 'name', '') <> '' OR COALESCE(contact_info ->> 'phone', '') <> '')"
+# The summary job fills leads.temperature; older leads only have it in contact_info
+TEMPERATURE_SQL = "COALESCE(temperature, contact_info ->> 'temperature')"
+
+
+def encode_lead_cursor(created_at: datetime, lead_id: int) -> str:
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return f"{(created_at - _EPOCH) // timedelta(microseconds=1):x}.{lead_id:x}"
+
+
+def decode_lead_cursor(cursor: str):
+    try:
+        micros, lead_id = cursor.split('.')
+        return _EPOCH + timedelta(microseconds=int(micros, 16)), int(lead_id, 16)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/{company_id}/leads/page")
+async def get_leads_page(
+    company_id: int,
+    limit: int = Query(default=5, ge=1, le=100),
+    cursor: Optional[str] = None,
+    direction: str = 'next',
+    has_contact: bool = False,
+    assigned_user_id: Optional[int] = None,
+    status: Optional[str] = None,
+    source: Optional[str] = None,
+    temperature: Optional[str] = None
+):
+    """
+    Newest-first page of leads in a compact projection.
+    `next` continues after the cursor (older leads), `prev` goes back (newer leads).
+    """
+    if direction not in ('next', 'prev'):
+        raise HTTPException(status_code=400, detail="direction must be 'next' or 'prev'")
+    where = ["company_id = :cid"]
+    params = {'cid': company_id, 'lim': limit + 1}
+    if has_contact:
+        where.append(HAS_CONTACT_SQL)
+    if assigned_user_id is not None:
+        where.append("assigned_user_id = :uid")
+        params['uid'] = assigned_user_id
+    if status:
+        where.append("status = :status")
+        params['status'] = status
+    if source:
+        where.append("source = :source")
+        params['source'] = source
+    if temperature:
+        where.append(f"{TEMPERATURE_SQL} = :temp")
+        params['temp'] = temperature
+    
+    backwards = cursor is not None and direction == 'prev'
+    if cursor:
+        params['cursor_ts'], params['cursor_id'] = decode_lead_cursor(cursor)
+        op = '>' if backwards else '<'
+        where.append(f"(created_at, id) {op} (:cursor_ts, :cursor_id)")
+    order = "created_at ASC, id ASC" if backwards else "created_at DESC, id DESC"
+    
+    async with get_db_session() as db:
+        result = await db.execute(text(f"""
+            SELECT id, contact_info ->> 'name', contact_info ->> 'phone', status, status_emoji, status_name,
+                   source, {TEMPERATURE_SQL}, assigned_user_id, assigned_user_name, created_at
+            FROM leads WHERE {' AND '.join(where)}
+            ORDER BY {order} LIMIT :lim
+        """), params)
+        rows = result.fetchall()
+    
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+    items = [{
+        'id': row[0],
+        'name': row[1],
+        'phone': row[2],
+        'status': row[3],
+        'status_emoji': row[4] or '🆕',
+        'status_name': row[5] or 'Новый',
+        'source': row[6],
+        'temperature': row[7],
+        'assigned_user_id': row[8],
+        'assigned_user_name': row[9],
+        'created_at': str(row[10]) if row[10] else None
+    } for row in rows]
+    
+    # Older leads exist if this page filled up going forward (or we came back from them)
+    has_next = (not backwards and more) or backwards
+    has_prev = (backwards and more) or (cursor is not None and not backwards)
+    return {
+        'items': items,
+        'next_cursor': encode_lead_cursor(rows[-1][10], rows[-1][0]) if rows and has_next else None,
+        'prev_cursor': encode_lead_cursor(rows[0][10], rows[0][0]) if rows and has_prev else None
+    }
+
+
+EXPORT_BATCH = 500  # rows fetched from the server-side cursor per round trip
+EXPORT_COLUMNS = ['id', 'created_at', 'name', 'phone', 'source', 'status', 'status_name', 'temperature',
+                  'assigned_user_name', 'ai_summary', 'conversation_summary']
+
+
+def _export_row(row, include_transcript: bool) -> dict:
+    contact = row[1] or {}
+    item = {
+        'id': row[0],
+        'created_at': row[2].isoformat() if row[2] else None,
+        'name': contact.get('name'),
+        'phone': contact.get('phone'),
+        'source': row[3],
+        'status': row[4],
+        'status_name': row[5] or 'Новый',
+        'temperature': row[6],
+        'assigned_user_name': row[7],
+        'ai_summary': row[8],
+        'conversation_summary': row[9],
+    }
+    if include_transcript:
+        # Archived messages first, then the hot ones (same order as the full report)
+        messages = [(m[0], m[1]) for m in unpack(row[10])] if row[10] else []
+        hot = row[11]
+        if isinstance(hot, str):
+            hot = json.loads(hot)
+        messages.extend((m[0], m[1]) for m in hot or [])
+        transcript = []
+        for content, outcome in messages:
+            if content:
+                transcript.append({"sender": "user", "text": content})
+            if outcome:
+                transcript.append({"sender": "bot", "text": outcome})
+        item['transcript'] = transcript
+    return item
+
+
+def _csv_line(values: list) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerow(values)
+    return buf.getvalue()
+
+
+@router.get("/{company_id}/leads/export")
+async def export_leads(
+    company_id: int,
+    format: str = 'csv',
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    status: Optional[str] = None,
+    source: Optional[str] = None,
+    include_transcript: bool = False
+):
+    """
+    All matching leads as CSV or NDJSON, oldest first.
+    Rows are streamed from a server-side cursor, so memory does not grow with the number of leads.
+    """
+    if format not in ('csv', 'ndjson'):
+        raise HTTPException(status_code=400, detail="format must be 'csv' or 'ndjson'")
+    where = ["l.company_id = :cid"]
+    params = {'cid': company_id}
+    if date_from:
+        where.append("l.created_at >= :date_from")
+        params['date_from'] = date_from
+    if date_to:
+        where.append("l.created_at < :date_to")
+        params['date_to'] = date_to
+    if status:
+        where.append("l.status = :status")
+        params['status'] = status
+    if source:
+        where.append("l.source = :source")
+        params['source'] = source
+    
+    transcript_sql = ""
+    transcript_join = ""
+    if include_transcript:
+        transcript_sql = ", a.payload, t.messages"
+        transcript_join = """
+            LEFT JOIN interactions_archive a ON a.lead_id = l.id
+            LEFT JOIN LATERAL (
+                SELECT json_agg(json_build_array(i.content, i.outcome) ORDER BY i.created_at, i.id) AS messages
+                FROM interactions i WHERE i.lead_id = l.id
+            ) t ON TRUE"""
+    query = text(f"""
+        SELECT l.id, l.contact_info, l.created_at, l.source, l.status, l.status_name,
+               COALESCE(l.temperature, l.contact_info ->> 'temperature'),
+               l.assigned_user_name, l.ai_summary, l.conversation_summary{transcript_sql}
+        FROM leads l{transcript_join}
+        WHERE {' AND '.join(where)}
+        ORDER BY l.created_at, l.id
+    """)
+    
+    async def generate():
+        columns = EXPORT_COLUMNS + (['transcript'] if include_transcript else [])
+        if format == 'csv':
+            # BOM so Excel opens Cyrillic text as UTF-8
+            yield '\ufeff' + _csv_line(columns)
+        async with get_read_db_session() as db:
+            result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH), params)
+            async for rows in result.partitions(EXPORT_BATCH):
+                chunk = []
+                for row in rows:
+                    item = _export_row(row, include_transcript)
+                    if format == 'ndjson':
+                        chunk.append(json.dumps(item, ensure_ascii=False, default=str) + '\n')
+                    else:
+                        if include_transcript:
+                            item['transcript'] = '\n'.join(
+                                f"{'Клиент' if m['sender'] == 'user' else 'Бот'}: {m['text']}" for m in item['transcript']
+                            )
+                        chunk.append(_csv_line([item[c] for c in columns]))
+                yield ''.join(chunk)
+    
+    media_type = 'text/csv; charset=utf-8' if format == 'csv' else 'application/x-ndjson'
+    filename = f"leads_{company_id}_{datetime.now(timezone.utc):%Y%m%d}.{format}"
+    return StreamingResponse(generate(), media_type=media_type,
+                             headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+
 @router.get("/{company_id}/leads/{lead_id}")
 async def get_lead_details(company_id: int, lead_id: int):
     """Get single lead with all details"""
@@ -129,6 +358,7 @@ async def assign_lead(company_id: int, lead_id: int, data: dict = Body(...)):
             UPDATE company_managers SET coins = coins + 1 
             WHERE company_id = :cid AND user_id = :uid
         """), {'cid': company_id, 'uid': user_id})
+        await manager_stats.record(db, company_id, user_id, coins=1)
         
         # Записать событие
         await db.execute(text("""
@@ -137,184 +367,88 @@ async def assign_lead(company_id: int, lead_id: int, data: dict = Body(...)):
         """), {'cid': company_id, 'lid': lead_id, 'data': f'{{"user_id": {user_id}, "user_name": "{user_name}"}}'})
         
         await db.commit()
+        manager_stats.invalidate(company_id)
         return {"status": "ok", "coins_earned": 1}
 
 
 
-async def get_sort_order(db, company_id: int, status_id) -> int:
-    """Get sort_order by status_id for multi-tenancy support"""
-    result = await db.execute(text("""
-        SELECT sort_order FROM lead_status_settings 
-        WHERE company_id = :cid AND id = :sid
-    """), {'cid': company_id, 'sid': int(status_id)})
-    return result.scalar() or 0
-
-async def get_status_id_by_sort(db, company_id: int, sort_order: int) -> int:
-    """Get status_id by sort_order for multi-tenancy support"""
-    result = await db.execute(text("""
-        SELECT id FROM lead_status_settings 
-        WHERE company_id = :cid AND sort_order = :sort
-    """), {'cid': company_id, 'sort': sort_order})
-    return result.scalar() or 0
-
 @router.patch("/{company_id}/leads/{lead_id}/status")
 async def update_lead_status(company_id: int, lead_id: int, data: dict = Body(...)):
     """Update lead status and award coins (with protection)"""
-    new_status = data.get('status')
-    original_new_status = str(new_status)  # Запомнить до сброса
     manager_id = data.get('manager_id')
     
-    # Определение sort_order будет внутри async with
-    original_sort_order = 0
-
-    
     async with get_db_session() as db:
-        # 0. Определить sort_order для нового статуса (мультитенантность)
-        if str(new_status).isdigit():
-            original_sort_order = await get_sort_order(db, company_id, int(new_status))
-        
-        # "Повторная сделка" (sort_order=21) → сбросить на "В работе" (sort_order=2)
-        if original_sort_order == 21:
-            in_progress_id = await get_status_id_by_sort(db, company_id, 2)
-            if in_progress_id:
-                new_status = str(in_progress_id)
+        # Statuses, sort orders and coins come from the cached per-company graph
+        graph = await status_graphs.get(db, company_id)
         
-        # 1. Получить ТЕКУЩИЙ статус лида
+        # Row lock: a double click cannot award coins twice
         current_result = await db.execute(text("""
-            SELECT status FROM leads WHERE id = :lid AND company_id = :cid
+            SELECT status FROM leads WHERE id = :lid AND company_id = :cid FOR UPDATE
         """), {'lid': lead_id, 'cid': company_id})
-        current_status = current_result.scalar() or '4'
         
-        # 2. Тот же статус — игнорировать
-        if str(new_status) == str(current_status):
+        try:
+            move = graph.transition(current_result.scalar(), data.get('status'))
+        except TransitionError as e:
+            return {"status": "error", "message": str(e)}
+        if move is None:
             return {"status": "same", "message": "Статус не изменился"}
         
-        # 3. Преобразовать текстовые статусы в числа
-        status_map = {'new': 4, 'in_progress': 8, 'negotiation': 12, 'awaiting_payment': 16, 'completed': 20, 'rejected': 24}
-        if not str(current_status).isdigit():
-            current_status = status_map.get(current_status, 4)
-        if not str(new_status).isdigit():
-            new_status = status_map.get(new_status, 4)
-        
-        # Получить sort_order и coins для обоих статусов
-        orders_result = await db.execute(text("""
-            SELECT id, sort_order, coins, emoji, name FROM lead_status_settings 
-            WHERE company_id = :cid AND id IN (:current, :new)
-        """), {'cid': company_id, 'current': int(current_status), 'new': int(new_status)})
-        orders = {r[0]: {'sort': r[1], 'coins': r[2], 'emoji': r[3], 'name': r[4]} for r in orders_result.fetchall()}
-        
-        current_data = orders.get(int(current_status), {'sort': 0, 'coins': 0})
-        new_data = orders.get(int(new_status), {'sort': 0, 'coins': 0, 'emoji': '🆕', 'name': 'Новый'})
-        
-        current_order = current_data['sort']
-        new_order = new_data['sort']
-        
-        # 4. Проверка на переходы между статусами
-        # Используем original_new_status для проверки (до сброса 28→8)
-        new_status_int = int(original_new_status) if original_new_status.isdigit() else int(new_status)
-        current_status_int = int(current_status)
-        
-        # Получить sort_order для текущего статуса
-        current_sort = await get_sort_order(db, company_id, current_status_int) if str(current_status).isdigit() else 0
-        new_sort = original_sort_order  # Уже получен выше
-        
-        # Отказ (sort=6) — можно нажать в любой момент
-        if new_sort == 6:
-            pass  # Всегда разрешён
-        # Повторная сделка (sort=21) — разрешена из Завершён (sort=5) или Отказ (sort=6)
-        elif new_sort == 21:
-            if current_sort not in [5, 6]:
-                return {"status": "error", "message": "Повторная сделка только после Завершён или Отказ"}
-        # Из Завершён (sort=5) можно только в Отказ или Повторную
-        elif current_sort == 5:
-            if new_sort not in [6, 21]:
-                return {"status": "error", "message": "Из Завершён только Отказ или Повторная"}
-        # Из Отказа (sort=6) можно только в Повторную
-        elif current_sort == 6:
-            if new_sort != 21:
-                return {"status": "error", "message": "Из Отказа только Повторная сделка"}
-        # Обычные статусы — только последовательно (разница ≤ 1)
-        elif abs(new_order - current_order) > 1:
-            return {"status": "error", "message": "Нельзя перепрыгивать статусы"}
-        
-        # 5. Определить изменение монет
-        # Повторная сделка (sort=21) — брать coins из этого статуса
-        if original_sort_order == 21:
-            repeat_id = await get_status_id_by_sort(db, company_id, 21)
-            repeat_result = await db.execute(text("""
-                SELECT coins FROM lead_status_settings WHERE company_id = :cid AND id = :rid
-            """), {'cid': company_id, 'rid': repeat_id})
-            coins_change = repeat_result.scalar() or 0
-        elif new_order > current_order:
-            coins_change = new_data['coins']  # Вперёд: +coins нового
+        params = {
+            'lid': lead_id, 'cid': company_id, 'mid': manager_id,
+            'status': str(move.status_id), 'emoji': move.emoji, 'name': move.name, 'coins': move.coins
+        }
+        award_coins = """
+            UPDATE company_managers SET coins = coins + :coins
+            WHERE company_id = :cid AND user_id = :mid AND :coins <> 0
+        """
+        if not move.creates_deal:
+            # Status + coins in one statement
+            await db.execute(text(f"""
+                WITH award AS ({award_coins})
+                UPDATE leads SET status = :status, status_emoji = :emoji, status_name = :name,
+                       status_changed_at = NOW()
+                WHERE id = :lid AND company_id = :cid
+            """), params)
+            deal_id = currency = None
         else:
-            coins_change = -current_data['coins']  # Назад: -coins текущего
-        
-        emoji = new_data.get('emoji', '🆕')
-        name = new_data.get('name', 'Новый')
-        status_id = int(new_status)
-        
-        # 6. Update lead
-        await db.execute(text("""
-            UPDATE leads SET status = :status, status_emoji = :emoji, status_name = :name,
-                   status_changed_at = NOW()
-            WHERE id = :lid AND company_id = :cid
-        """), {'status': new_status, 'emoji': emoji, 'name': name, 'lid': lead_id, 'cid': company_id})
-        
-        # 7. Award/deduct coins
-        if coins_change and manager_id:
-            await db.execute(text("""
-                UPDATE company_managers SET coins = coins + :coins 
-                WHERE company_id = :cid AND user_id = :uid
-            """), {'coins': coins_change, 'cid': company_id, 'uid': manager_id})
-        
+            # "Завершён": status, coins and a deal awaiting its amount in one statement
+            result = await db.execute(text(f"""
+                WITH award AS ({award_coins}),
+                deal AS (
+                    INSERT INTO lead_deals (lead_id, company_id, manager_id, manager_name, deal_number, deal_currency, status)
+                    SELECT :lid, :cid, :mid,
+                           COALESCE((SELECT full_name FROM company_managers WHERE company_id = :cid AND user_id = :mid), 'Менеджер'),
+                           (SELECT COUNT(*) FROM lead_deals WHERE lead_id = :lid) + 1,
+                           COALESCE((SELECT currency FROM companies WHERE id = :cid), 'KZT'),
+                           'pending_amount'
+                    RETURNING id, deal_currency
+                ),
+                lead_update AS (
+                    UPDATE leads SET status = :status, status_emoji = :emoji, status_name = :name,
+                           status_changed_at = NOW(),
+                           current_deal_id = (SELECT id FROM deal), current_deal_status = 'pending_amount'
+                    WHERE id = :lid AND company_id = :cid
+                )
+                SELECT id, deal_currency FROM deal
+            """), params)
+            deal_id, currency = result.fetchone()
+        
+        if move.coins and manager_id:
+            await manager_stats.record(db, company_id, manager_id, coins=move.coins)
         await db.commit()
+        manager_stats.invalidate(company_id)
         
-        # Если статус "Завершён" (sort=5) — создать сделку и запросить сумму
-        if new_order == 5:
-            # Получить валюту компании
-            curr_result = await db.execute(text("""
-                SELECT currency FROM companies WHERE id = :cid
-            """), {'cid': company_id})
-            currency = curr_result.scalar() or 'KZT'
-            
-            # Определить номер сделки
-            count_result = await db.execute(text("""
-                SELECT COUNT(*) FROM lead_deals WHERE lead_id = :lid
-            """), {'lid': lead_id})
-            deal_count = count_result.scalar() or 0
-            deal_number = deal_count + 1
-            
-            # Получить имя менеджера
-            mgr_result = await db.execute(text("""
-                SELECT full_name FROM company_managers WHERE company_id = :cid AND user_id = :uid
-            """), {'cid': company_id, 'uid': manager_id})
-            mgr_name = mgr_result.scalar() or 'Менеджер'
-            
-            # Создать запись сделки (без суммы)
-            deal_result = await db.execute(text("""
-                INSERT INTO lead_deals (lead_id, company_id, manager_id, manager_name, deal_number, deal_currency, status)
-                VALUES (:lid, :cid, :mid, :mname, :dnum, :curr, 'pending_amount')
-                RETURNING id
-            """), {'lid': lead_id, 'cid': company_id, 'mid': manager_id, 'mname': mgr_name, 'dnum': deal_number, 'curr': currency})
-            deal_id = deal_result.scalar()
-            
-            # Обновить текущий deal_id в leads
-            await db.execute(text("""
-                UPDATE leads SET current_deal_id = :did, current_deal_status = 'pending_amount' WHERE id = :lid
-            """), {'did': deal_id, 'lid': lead_id})
-            await db.commit()
-            
+        if move.creates_deal:
             return {
                 "status": "ok", 
-                "status_name": name, 
-                "coins_earned": coins_change or 0,
+                "status_name": move.name, 
+                "coins_earned": move.coins,
                 "requires_amount": True,
                 "deal_id": deal_id,
                 "currency": currency
             }
         
-        return {"status": "ok", "status_name": name, "coins_earned": coins_change or 0}
+        return {"status": "ok", "status_name": move.name, "coins_earned": move.coins}
 
 
 
@@ -334,11 +468,12 @@ async def save_deal_amount(company_id: int, lead_id: int, deal_id: int, data: di
         
         # 2. Получить deal_number и currency
         result = await db.execute(text("""
-            SELECT deal_number, deal_currency FROM lead_deals WHERE id = :did
+            SELECT deal_number, deal_currency, manager_id FROM lead_deals WHERE id = :did
         """), {'did': deal_id})
         row = result.fetchone()
         deal_number = row[0] if row else 1
         currency = row[1] if row else 'KZT'
+        deal_manager_id = row[2] if row else None
         
         # 3. Обновить leads.deal_amount и статус
         await db.execute(text("""
@@ -347,13 +482,18 @@ async def save_deal_amount(company_id: int, lead_id: int, deal_id: int, data: di
         """), {'amount': amount, 'curr': currency, 'lid': lead_id})
         
         # 4. Обновить статистику менеджера
-        if manager_id:
+        # All-time totals and period buckets credit the same manager: the deal's, else the caller
+        credited_id = deal_manager_id or manager_id
+        if credited_id:
             await db.execute(text("""
                 UPDATE company_managers 
                 SET total_deal_amount = COALESCE(total_deal_amount, 0) + :amount,
                     deals_count = COALESCE(deals_count, 0) + 1
                 WHERE company_id = :cid AND user_id = :mid
-            """), {'amount': amount, 'cid': company_id, 'mid': manager_id})
+            """), {'amount': amount, 'cid': company_id, 'mid': credited_id})
+        
+        # Period buckets (by the deal's creation day)
+        await manager_stats.record(db, company_id, credited_id, deals=1, amount=float(amount or 0), deal_id=deal_id)
         
         # 5. Получить данные лида и менеджера для уведомления
         lead_result = await db.execute(text("""
@@ -376,6 +516,7 @@ async def save_deal_amount(company_id: int, lead_id: int, deal_id: int, data: di
         manager_name = mgr_row[0] if mgr_row else 'Менеджер'
         
         await db.commit()
+        manager_stats.invalidate(company_id)
         
         return {
             "status": "ok", 
@@ -506,61 +647,10 @@ async def get_leaderboard(company_id: int, period: str = 'all', sort: str = 'coi
     period: week, month, all
     sort: coins, amount, deals
     """
-    from datetime import datetime, timedelta
-    
-    async with get_db_session() as db:
-        # Определить дату начала периода
-        if period == 'week':
-            start_date = datetime.now() - timedelta(days=7)
-        elif period == 'month':
-            start_date = datetime.now() - timedelta(days=30)
-        else:
-            start_date = None
-        
-        # Получить базовую инфо менеджеров
-        result = await db.execute(text("""
-            SELECT user_id, full_name, coins, deals_count, total_deal_amount
-            FROM company_managers 
-            WHERE company_id = :cid AND is_active = TRUE
-        """), {'cid': company_id})
-        managers = {r[0]: {
-            "user_id": r[0], 
-            "full_name": r[1], 
-            "coins": r[2] or 0,
-            "deals_count": r[3] or 0,
-            "total_deal_amount": float(r[4]) if r[4] else 0
-        } for r in result.fetchall()}
-        
-        # Если период — пересчитать сделки за период
-        if start_date and managers:
-            deals_result = await db.execute(text("""
-                SELECT manager_id, COUNT(*), COALESCE(SUM(deal_amount), 0)
-                FROM lead_deals 
-                WHERE company_id = :cid AND status = 'completed' AND created_at >= :start
-                GROUP BY manager_id
-            """), {'cid': company_id, 'start': start_date})
-            
-            for r in deals_result.fetchall():
-                if r[0] in managers:
-                    managers[r[0]]["deals_count"] = r[1] or 0
-                    managers[r[0]]["total_deal_amount"] = float(r[2]) if r[2] else 0
-            
-            # Для периода — обнулить тех у кого нет сделок за период
-            for m in managers.values():
-                if start_date:
-                    # Это временно - берём из lead_deals за период
-                    pass
-        
-        # Сортировка
-        managers_list = list(managers.values())
-        if sort == 'amount':
-            managers_list.sort(key=lambda x: x['total_deal_amount'], reverse=True)
-        elif sort == 'deals':
-            managers_list.sort(key=lambda x: x['deals_count'], reverse=True)
-        else:  # coins
-            managers_list.sort(key=lambda x: x['coins'], reverse=True)
-        
-        return managers_list[:10]
+    # Right after this process changed the stats, read (and cache) them from the primary
+    session = get_db_session if manager_stats.needs_primary(company_id) else get_read_db_session
+    async with session() as db:
+        return await manager_stats.leaderboard(db, company_id, period, sort)
 
 
 @router.patch("/{company_id}/statuses/{status_id}")
@@ -577,6 +667,7 @@ async def update_status_coins(company_id: int, status_id: int, data: dict):
             WHERE id = :sid AND company_id = :cid
         """), {'coins': coins, 'sid': status_id, 'cid': company_id})
         await db.commit()
+        status_graphs.invalidate(company_id)
         return {"status": "ok", "coins": coins}
 
 
@@ -632,42 +723,49 @@ async def delete_manager(company_id: int, user_id: int):
 @router.get("/{company_id}/leads/{lead_id}/full_report")
 async def get_full_report(company_id: int, lead_id: int):
     """Get full AI report with conversation history"""
-    async with get_db_session() as db:
-        # Lead info
-        result = await db.execute(text("""
-            SELECT contact_info, ai_summary, conversation_summary, temperature
-            FROM leads WHERE company_id = :cid AND id = :lid
-        """), {'cid': company_id, 'lid': lead_id})
-        row = result.fetchone()
-        if not row:
-            raise HTTPException(status_code=404, detail="Lead not found")
-        
-        contact = row[0] or {}
-        name = contact.get('name', 'Клиент')
-        phone = contact.get('phone', '')
-        temp = contact.get('temperature', '')
-        ai_summary = row[1] or ''
-        
-        # Conversation history
-        history_result = await db.execute(text("""
-            SELECT content, outcome FROM interactions 
-            WHERE lead_id = :lid ORDER BY created_at
-        """), {'lid': lead_id})
-        rows = history_result.fetchall()
-        conversation = []
-        for r in rows:
-            if r[0]:  # user message
-                conversation.append({"sender": "user", "text": r[0]})
-            if r[1]:  # bot response
-                conversation.append({"sender": "bot", "text": r[1]})
-        
-        return {
-            "name": name,
-            "phone": phone,
-            "temperature": temp,
-            "ai_summary": ai_summary,
-            "conversation_history": conversation
-        }
+    async with get_read_db_session() as db:
+        report = await build_full_report(db, company_id, lead_id)
+    if report is None:
+        # Just-created lead may not have reached the replica yet
+        async with get_db_session() as db:
+            report = await build_full_report(db, company_id, lead_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Lead not found")
+    return report
+
+
+async def build_full_report(db, company_id: int, lead_id: int) -> Optional[dict]:
+    # Lead info
+    result = await db.execute(text("""
+        SELECT contact_info, ai_summary, conversation_summary, temperature
+        FROM leads WHERE company_id = :cid AND id = :lid
+    """), {'cid': company_id, 'lid': lead_id})
+    row = result.fetchone()
+    if not row:
+        return None
+    
+    contact = row[0] or {}
+    name = contact.get('name', 'Клиент')
+    phone = contact.get('phone', '')
+    temp = contact.get('temperature', '')
+    ai_summary = row[1] or ''
+    
+    # Conversation history (archived part first, then recent messages)
+    rows = await interaction_archive.conversation(db, lead_id)
+    conversation = []
+    for r in rows:
+        if r[0]:  # user message
+            conversation.append({"sender": "user", "text": r[0]})
+        if r[1]:  # bot response
+            conversation.append({"sender": "bot", "text": r[1]})
+    
+    return {
+        "name": name,
+        "phone": phone,
+        "temperature": temp,
+        "ai_summary": ai_summary,
+        "conversation_history": conversation
+    }
 
 # === СОБЫТИЯ И НАПОМИНАНИЯ ===
 
@@ -1,10 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request, BackgroundTasks
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request, BackgroundTasks, Query
+from fastapi.responses import HTMLResponse, StreamingResponse
 import httpx
 import os
 import logging
 import asyncio
-import aiohttp
 import asyncio
 
 async def analyze_lead_temperature(history: list) -> str:
@@ -15,25 +14,25 @@ async def analyze_lead_temperature(history: list) -> str:
 Диалог:
 {conversation}
 Температура:"""
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {os.getenv('OPENROUTER_API_KEY')}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "openai/gpt-oss-120b:exacto",
-                    "messages": [{"role": "user", "content": prompt}],
-                    "max_tokens": 20
-                }
-            )
-            if resp.status_code == 200:
-                temp = resp.json().get("choices", [{}])[0].get("message", {}).get("content", "").strip().lower()
-                if "горяч" in temp:
-                    return "🔥 ГОРЯЧИЙ"
-                elif "холод" in temp:
-                    return "❄️ холодный"
+        resp = await http_clients.get('openrouter').post(
+            "/chat/completions",
+            headers={
+                "Authorization": f"Bearer {os.getenv('OPENROUTER_API_KEY')}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": "openai/gpt-oss-120b:exacto",
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": 20
+            },
+            timeout=10
+        )
+        if resp.status_code == 200:
+            temp = resp.json().get("choices", [{}])[0].get("message", {}).get("content", "").strip().lower()
+            if "горяч" in temp:
+                return "🔥 ГОРЯЧИЙ"
+            elif "холод" in temp:
+                return "❄️ холодный"
         return "🌤 теплый"
     except Exception as e:
         logging.error(f"Temperature error: {e}")
@@ -41,19 +40,33 @@ async def analyze_lead_temperature(history: list) -> str:
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.attributes import flag_modified
 from sqlalchemy.future import select
-from database import get_db
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from database import get_db, get_db_session, get_read_db, release_connection
 from models import SalesAgentConfig, ProductSelectionSession, VoiceMessage, Lead, Interaction, UserPreference, Company, Company, SocialWidget, WebWidget
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
+from datetime import datetime
 import uuid
 import logging
 import os
 import httpx
 import re
-from services.ai_service import ai_service, get_ai_service
+import json
+import time
+from services.ai_service import ai_service, get_ai_service, ai_client_registry
 from services.voice_service import voice_service
 from services.telegram_service import telegram_service
 from services.email_service import email_service
+from services.unit_of_work import TurnUnitOfWork
+from services.intent_classifier import intent_classifier, YES
+from services.entity_extraction import entity_extractor, CONTACT_KEYS
+from services.turn_pipeline import TurnPipeline
+from services.history_store import history_store
+from services.tenant_cache import tenant_cache
+from services.job_queue import job_queue, JobContext, PermanentJobError
+from services.http_clients import http_clients
+from services.usage_counters import usage_counters
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
@@ -61,44 +74,60 @@ limiter = Limiter(key_func=get_remote_address)
 router = APIRouter(prefix='/sales', tags=['sales_agent'])
 
 
-async def send_lead_to_bitrix24(lead_id: int, company_id: int, db: AsyncSession):
-    """Send lead to Bitrix24 as DEAL with contact info and AI summary"""
+# Failures where the request never reached Bitrix24; anything else after sending may have created the record
+_BITRIX_NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+async def _bitrix24_add(client, url: str, fields: dict):
+    """POST a crm.*.add call; an error after the request may have been accepted is not retryable"""
+    try:
+        return await client.post(url, json={'fields': fields})
+    except _BITRIX_NOT_SENT:
+        raise
+    except Exception as e:
+        raise PermanentJobError(f'Bitrix24 outcome unknown ({type(e).__name__}: {e}), not retried to avoid duplicates') from e
+
+
+async def send_lead_to_bitrix24(lead_id: int, company_id: int, db: AsyncSession, ai_summary: str = None,
+                                progress: dict = None, checkpoint=None):
+    """
+    Send lead to Bitrix24 as DEAL with contact info and AI summary (reused if already generated).
+    Returns True on success, False on failure, None if there is nothing to send.
+    progress (the job payload) keeps the created contact/deal ids, saved via checkpoint(), so a retry
+    skips the steps that already succeeded instead of creating duplicates.
+    """
+    progress = progress if progress is not None else {}
+    if progress.get('bitrix_deal_id'):
+        return True
     try:
         from models import Company, Lead, Interaction
         from services.ai_service import ai_service
         
-        result = await db.execute(select(Company).where(Company.id == company_id))
-        company = result.scalars().first()
+        company = await tenant_cache.get(db, company_id)
         if not company or not company.integration_enabled or company.integration_type != 'bitrix24' or not company.bitrix24_webhook_url:
             logging.info(f'🔌 Bitrix24 not enabled for company {company_id}')
-            return False
+            return None
         
         result = await db.execute(select(Lead).where(Lead.id == lead_id))
         lead = result.scalars().first()
         if not lead:
-            return False
+            return None
         
         contact_info = lead.contact_info or {}
         name = contact_info.get('name', '')
         phone = contact_info.get('phone', '')
         
-        # Get conversation history for AI summary
-        result = await db.execute(select(Interaction).where(Interaction.lead_id == lead_id).order_by(Interaction.created_at.asc()))
-        interactions = result.scalars().all()
-        history = []
-        for i in interactions:
-            if i.content and i.content not in ['received', 'sent', '[system: request confirmation]']:
-                history.append({'sender': 'user', 'text': i.content})
-            if i.outcome and i.outcome not in ['received', 'sent']:
-                history.append({'sender': 'bot', 'text': i.outcome})
-        
-        # Generate AI summary
-        ai_summary = "Новый лид"
-        if history:
-            try:
-                ai_summary = await ai_service.generate_conversation_summary(history[-20:], 'ru', manager_language='ru')
-            except:
-                ai_summary = "Ошибка генерации AI анализа"
+        # Generate AI summary unless the caller already has one
+        if not ai_summary:
+            ai_summary = "Новый лид"
+            # Get conversation history for AI summary
+            history = await history_store.get(db, lead_id, limit=20)
+        
+            if history:
+                try:
+                    ai_summary = await ai_service.generate_conversation_summary(history[-20:], 'ru', manager_language='ru')
+                except:
+                    ai_summary = "Ошибка генерации AI анализа"
         
         # Create DEAL in Bitrix24
         source_name = lead.source if lead.source and not str(lead.source).isdigit() else f"Widget #{lead.source}"
@@ -109,25 +138,36 @@ async def send_lead_to_bitrix24(lead_id: int, company_id: int, db: AsyncSession)
             'COMMENTS': ai_summary
         }
         
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            # First create contact
+        client = http_clients.get('bitrix24')
+        # First create contact (once: a retry reuses the contact an earlier attempt created)
+        contact_id = progress.get('bitrix_contact_id')
+        if not contact_id:
             contact_data = {'NAME': name, 'PHONE': [{'VALUE': phone, 'VALUE_TYPE': 'WORK'}]}
-            contact_resp = await client.post(f"{company.bitrix24_webhook_url}crm.contact.add.json", json={'fields': contact_data})
-            
+            contact_resp = await _bitrix24_add(client, f"{company.bitrix24_webhook_url}crm.contact.add.json", contact_data)
             if contact_resp.status_code == 200:
                 contact_id = contact_resp.json().get('result')
-                deal_data['CONTACT_ID'] = contact_id
-            
-            # Create deal
-            deal_resp = await client.post(f"{company.bitrix24_webhook_url}crm.deal.add.json", json={'fields': deal_data})
-            
-            if deal_resp.status_code == 200:
-                deal_id = deal_resp.json().get('result', 'unknown')
-                logging.info(f'✅ Lead {lead_id} sent to Bitrix24 as DEAL #{deal_id} for company {company_id}')
-                return True
-            else:
-                logging.error(f'❌ Bitrix24 API error: {deal_resp.status_code} - {deal_resp.text[:100]}')
-                return False
+                if contact_id:
+                    progress['bitrix_contact_id'] = contact_id
+                    if checkpoint:
+                        await checkpoint()
+        if contact_id:
+            deal_data['CONTACT_ID'] = contact_id
+        
+        # Create deal
+        deal_resp = await _bitrix24_add(client, f"{company.bitrix24_webhook_url}crm.deal.add.json", deal_data)
+        
+        if deal_resp.status_code == 200:
+            deal_id = deal_resp.json().get('result', 'unknown')
+            progress['bitrix_deal_id'] = deal_id
+            if checkpoint:
+                await checkpoint()
+            logging.info(f'✅ Lead {lead_id} sent to Bitrix24 as DEAL #{deal_id} for company {company_id}')
+            return True
+        else:
+            logging.error(f'❌ Bitrix24 API error: {deal_resp.status_code} - {deal_resp.text[:100]}')
+            return False
+    except PermanentJobError:
+        raise
     except Exception as e:
         logging.error(f'❌ send_lead_to_bitrix24: {e}')
         import traceback
@@ -149,28 +189,28 @@ async def translate_greeting(text: str, target_lang: str) -> str:
         return text
     
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            resp = await client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {os.getenv('OPENROUTER_API_KEY')}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "openai/gpt-oss-120b:exacto",
-                    "messages": [{
-                        "role": "user",
-                        "content": f"Translate this text to {lang_map[target_lang]}. Keep the same tone, style and formatting (line breaks). Return ONLY the translation with nothing else:\\n\\n{text}"
-                    }],
-                    "max_tokens": 500
-                }
-            )
-            if resp.status_code == 200:
-                translated = resp.json()["choices"][0]["message"]["content"].strip()
-                logging.info(f'✅ Translated to {target_lang}: {translated[:50]}...')
-                return translated
-            else:
-                logging.error(f'Translation API error: {resp.status_code}')
+        resp = await http_clients.get('openrouter').post(
+            "/chat/completions",
+            headers={
+                "Authorization": f"Bearer {os.getenv('OPENROUTER_API_KEY')}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": "openai/gpt-oss-120b:exacto",
+                "messages": [{
+                    "role": "user",
+                    "content": f"Translate this text to {lang_map[target_lang]}. Keep the same tone, style and formatting (line breaks). Return ONLY the translation with nothing else:\\n\\n{text}"
+                }],
+                "max_tokens": 500
+            },
+            timeout=30
+        )
+        if resp.status_code == 200:
+            translated = resp.json()["choices"][0]["message"]["content"].strip()
+            logging.info(f'✅ Translated to {target_lang}: {translated[:50]}...')
+            return translated
+        else:
+            logging.error(f'Translation API error: {resp.status_code}')
     except Exception as e:
         logging.error(f'Translation error [{target_lang}]: {e}')
     
@@ -193,15 +233,6 @@ class ChatMessage(BaseModel):
     new_session: Optional[bool] = False
     source: Optional[str] = None  # 'telegram' or 'web'
 
-def extract_phone_number(text: str) -> Optional[str]:
-    cleaned = re.sub(r'[\s\-\(\)]', '', text)
-    patterns = [r'\+?\d{10,15}', r'\d{3,4}\d{6,7}']
-    for pattern in patterns:
-        match = re.search(pattern, cleaned)
-        if match:
-            return match.group(0)
-    return None
-
 @router.post('/{company_id}/configure')
 @limiter.limit('5/minute')
 async def configure_sales_agent(request: Request, company_id: int, config: SalesConfigUpdate, db: AsyncSession = Depends(get_db)):
@@ -220,6 +251,7 @@ async def get_or_create_lead(db: AsyncSession, company_id: int, user_id: str, us
     uid_val = int(user_id) if user_id and user_id.isdigit() else None
     logging.info(f'🔧 get_or_create_lead: user_id={user_id}, uid_val={uid_val}, new_session={new_session}')
     lead = None
+    created = False
     
     if uid_val is not None:
         # Telegram user - search by telegram_user_id
@@ -233,43 +265,58 @@ async def get_or_create_lead(db: AsyncSession, company_id: int, user_id: str, us
             from sqlalchemy import delete
             # Delete interactions first (foreign key)
             await db.execute(delete(Interaction).where(Interaction.lead_id == lead.id))
+            history_store.invalidate(lead.id)
+            await usage_counters.lead_deleted(db, lead)
             # Delete the lead itself
             await db.execute(delete(Lead).where(Lead.id == lead.id))
-            await db.commit()
             logging.info(f'✅ Lead {lead.id} deleted, will create new one')
             # Don't return - fall through to create new lead below
             lead = None
-    else:
-        # Web user - search by visitor_id in contact_info
-        from sqlalchemy import cast, String
-        result = await db.execute(
-            select(Lead).where(
-                Lead.company_id == company_id,
-                Lead.contact_info['visitor_id'].astext == user_id
-            )
-        )
+    elif user_id:
+        # Web user - (company_id, visitor_id) is a unique index lookup
+        result = await db.execute(select(Lead).where(Lead.company_id == company_id, Lead.visitor_id == user_id))
         lead = result.scalars().first()
+        if not lead:
+            # Atomic upsert: of two concurrent first messages only one inserts
+            result = await db.execute(
+                pg_insert(Lead)
+                .values(
+                    company_id=company_id,
+                    visitor_id=user_id,
+                    contact_info={'username': username, 'visitor_id': user_id},
+                    status='new',
+                    source=source or 'web'
+                )
+                .on_conflict_do_nothing(index_elements=['company_id', 'visitor_id'], index_where=Lead.visitor_id.isnot(None))
+                .returning(Lead.id)
+            )
+            created = result.scalar() is not None
+            # The row is committed by the other request if we lost the race
+            result = await db.execute(select(Lead).where(Lead.company_id == company_id, Lead.visitor_id == user_id))
+            lead = result.scalars().one()
 
     if not lead:
-        contact_info = {'username': username, 'visitor_id': user_id} if user_id else {'username': username}
+        contact_info = {'username': username}
         source = source or ('telegram' if uid_val else 'web')
         lead = Lead(company_id=company_id, telegram_user_id=uid_val, contact_info=contact_info, status='new', source=source)
         db.add(lead)
-        await db.commit()
+        # Flush only to get lead.id - the caller commits once at the end of the turn
         await db.flush()
-        
+        created = True
+    
+    if created:
+        await usage_counters.lead_created(db, company_id)
         # Notify managers if internal CRM is enabled
         try:
-            company_result = await db.execute(select(Company).where(Company.id == company_id))
-            company = company_result.scalars().first()
+            company = await tenant_cache.get(db, company_id)
             if company and company.crm_type == 'internal':
                 logging.info(f"📢 Internal CRM: notifying managers for lead {lead.id}")
-                # Create lead event
-                await db.execute(text("""
-                    INSERT INTO lead_events (company_id, lead_id, event_type, data)
-                    VALUES (:cid, :lid, 'created', '{}')
-                """), {'cid': company_id, 'lid': lead.id})
-                await db.commit()
+                # Create lead event (savepoint: a failure here must not abort the turn transaction)
+                async with db.begin_nested():
+                    await db.execute(text("""
+                        INSERT INTO lead_events (company_id, lead_id, event_type, data)
+                        VALUES (:cid, :lid, 'created', '{}')
+                    """), {'cid': company_id, 'lid': lead.id})
         except Exception as e:
             logging.error(f"CRM notification error: {e}")
     return lead
@@ -282,20 +329,7 @@ async def get_user_language(db: AsyncSession, user_id: str):
     return pref.language_code if pref else 'ru'
 
 async def get_conversation_history(db: AsyncSession, lead_id: int, limit: int = 20):
-    result = await db.execute(
-        select(Interaction)
-        .where(Interaction.lead_id == lead_id)
-        .order_by(Interaction.created_at.asc())
-    )
-    interactions = result.scalars().all()
-    history = []
-    for interaction in interactions:
-        if interaction.content and interaction.content not in ['received', 'sent']:
-            history.append({'sender': 'user', 'text': interaction.content})
-        if interaction.outcome and interaction.outcome not in ['received', 'sent']:
-            history.append({'sender': 'bot', 'text': interaction.outcome})
-    logging.info(f'📚 Loaded history: {len(history)} messages for lead {lead_id}')
-    return history[-limit:]
+    return await history_store.get(db, lead_id, limit=limit)
 
 async def background_send_notifications(lead_contact: str, history: list, summary: str, phone: str, company_id: int = 1, lead_id: int = None):
     """
@@ -324,8 +358,7 @@ async def background_send_notifications(lead_contact: str, history: list, summar
         from models import Company
         
         async with get_db_session() as db:
-            result = await db.execute(select(Company).where(Company.id == company_id))
-            company = result.scalars().first()
+            company = await tenant_cache.get(db, company_id)
         
         if company:
             company_bot_token = company.bot_token
@@ -345,28 +378,27 @@ async def background_send_notifications(lead_contact: str, history: list, summar
                     WHERE company_id = :cid AND is_active = true
                 """), {'cid': company_id})
                 managers = result.fetchall()
-                
-                if managers:
-                    async with aiohttp.ClientSession() as session:
-                        for mgr in managers:
-                            mgr_user_id, mgr_name = mgr[0], mgr[1]
-                            try:
-                                bot_url = f"https://api.telegram.org/bot{company_bot_token}/sendMessage"
-                                await session.post(bot_url, json={
-                                    'chat_id': mgr_user_id,
-                                    'text': f"🔔 Новый лид от {company.name}",
-                                    'reply_markup': {
-                                        'inline_keyboard': [[{
-                                            'text': f"🆕 {lead_contact}",
-                                            'callback_data': f"new_lead:{lead_id}"
-                                        }]]
-                                    }
-                                })
-                                logging.info(f'✅ Notification sent to manager {mgr_user_id} ({mgr_name})')
-                            except Exception as e:
-                                logging.error(f'Manager {mgr_user_id} notify error: {e}')
-                else:
-                    logging.warning(f'No active managers for company {company_id}')
+            
+            if managers:
+                telegram = http_clients.get('telegram')
+                for mgr in managers:
+                    mgr_user_id, mgr_name = mgr[0], mgr[1]
+                    try:
+                        await telegram.post(f"/bot{company_bot_token}/sendMessage", json={
+                            'chat_id': mgr_user_id,
+                            'text': f"🔔 Новый лид от {company.name}",
+                            'reply_markup': {
+                                'inline_keyboard': [[{
+                                    'text': f"🆕 {lead_contact}",
+                                    'callback_data': f"new_lead:{lead_id}"
+                                }]]
+                            }
+                        })
+                        logging.info(f'✅ Notification sent to manager {mgr_user_id} ({mgr_name})')
+                    except Exception as e:
+                        logging.error(f'Manager {mgr_user_id} notify error: {e}')
+            else:
+                logging.warning(f'No active managers for company {company_id}')
         except Exception as e:
             logging.error(f'❌ Managers notification failed: {e}')
         
@@ -387,248 +419,340 @@ async def background_send_notifications(lead_contact: str, history: list, summar
     except Exception as e:
         logging.error(f'❌ Background notification task failed: {e}')
 
-@router.post('/{company_id}/chat')
-@limiter.limit('100/minute')
-async def sales_chat(request: Request, company_id: int, chat_data: ChatMessage, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db)):
-    try:
-        session_id = chat_data.session_id
-        user_id = chat_data.user_id or 'web_user'
-        
-        source = chat_data.source or 'web'
-        logging.info(f'📥 Incoming: user_id={user_id}, source={source}, username={chat_data.username}')
+def detect_temperature(summary: str) -> str:
+    """Extract lead temperature from AI summary"""
+    summary_lower = summary.lower()
+    if 'горячий' in summary_lower or 'hot' in summary_lower or '🔥' in summary:
+        return '🔥 горячий'
+    elif 'холодный' in summary_lower or 'cold' in summary_lower or '❄️' in summary:
+        return '❄️ холодный'
+    return '🌤 теплый'
+
+@job_queue.handler('lead_summary', concurrency=4, max_attempts=3)
+async def job_lead_summary(payload: dict, job: JobContext):
+    """
+    Post-confirmation step 1: AI summary + temperature.
+    Notifications and Bitrix24 export are enqueued in the same transaction as the temperature.
+    """
+    summary = await ai_service.generate_conversation_summary(
+        payload['history'], payload['language'], manager_language=payload['manager_language']
+    )
+    if summary.startswith('Ошибка') and not job.last_attempt:
+        # generate_conversation_summary reports failures as text; retry before giving up
+        raise RuntimeError(summary)
+    
+    temperature = detect_temperature(summary)
+    # Добавляем температуру в начало если её там нет
+    if '🌡 Температура:' not in summary:
+        summary = f"🌡 Температура: {temperature}\n\n" + summary
+    
+    lead_id = payload['lead_id']
+    async with get_db_session() as db:
+        # Save temperature to the column (CRM filters on it) and to contact_info (bot/report readers)
+        await db.execute(text("""
+            UPDATE leads SET temperature = :temp,
+                contact_info = jsonb_set(COALESCE(contact_info, '{}'::jsonb), '{temperature}', to_jsonb(CAST(:temp AS TEXT)))
+            WHERE id = :lid
+        """), {'temp': temperature, 'lid': lead_id})
+        await job_queue.enqueue(db, 'lead_notify', {
+            'lead_id': lead_id,
+            'company_id': payload['company_id'],
+            'lead_contact': payload['lead_contact'],
+            'phone': payload['phone'],
+            'history': payload['history'],
+            'summary': summary,
+        })
+        await job_queue.enqueue(db, 'bitrix24_export', {
+            'lead_id': lead_id,
+            'company_id': payload['company_id'],
+            'summary': summary,
+        })
+        await db.commit()
+    job_queue.wake()
+    logging.info(f'🌡 Temperature saved: {temperature}')
+
+# Single attempt: delivery errors are handled (and logged) per recipient inside,
+# and re-running would notify managers who already got the message
+@job_queue.handler('lead_notify', concurrency=4, max_attempts=1)
+async def job_lead_notify(payload: dict, job: JobContext):
+    """Post-confirmation step 2: Telegram managers + email"""
+    await background_send_notifications(
+        lead_contact=payload['lead_contact'],
+        history=payload['history'],
+        summary=payload['summary'],
+        phone=payload['phone'],
+        company_id=payload['company_id'],
+        lead_id=payload['lead_id']
+    )
+
+@job_queue.handler('bitrix24_export', concurrency=2, max_attempts=5)
+async def job_bitrix24_export(payload: dict, job: JobContext):
+    """Post-confirmation step 2: Bitrix24 deal (if integration enabled)"""
+    async with get_db_session() as db:
+        sent = await send_lead_to_bitrix24(
+            payload['lead_id'], payload['company_id'], db, ai_summary=payload['summary'],
+            progress=payload, checkpoint=lambda: job_queue.checkpoint(job.id, payload)
+        )
+    if sent is False:
+        raise RuntimeError(f'Bitrix24 export failed for lead {payload["lead_id"]}')
+
+CONFIRMATION_PROMPT = """Пользователь ответил: "{message}"
+
+Это положительное подтверждение (да, согласен, верно, ok и т.д.) или отрицание?
+Ответь ОДНИМ словом: ДА или НЕТ"""
+
+async def prepare_chat_turn(db: AsyncSession, uow: TurnUnitOfWork, pipeline: TurnPipeline, company_id: int, chat_data: ChatMessage) -> dict:
+    """Load lead, history and tenant AI for a chat turn and pre-compute the confirmation check"""
+    session_id = chat_data.session_id
+    user_id = chat_data.user_id or 'web_user'
+    
+    source = chat_data.source or 'web'
+    logging.info(f'📥 Incoming: user_id={user_id}, source={source}, username={chat_data.username}')
+    async with pipeline.stage('load'):
         lead = await get_or_create_lead(db, company_id, user_id, chat_data.username, chat_data.new_session)
         logging.info(f'📊 Lead created/found: id={lead.id}, telegram_user_id={lead.telegram_user_id}')
         if lead.source != source:
             lead.source = source
-            await db.commit()
-        lead_id = lead.id
         
         # Use language from request, fallback to DB
         language = chat_data.language or await get_user_language(db, user_id)
 
         if not session_id:
-            new_session = ProductSelectionSession(company_id=company_id, user_id=user_id)
-            db.add(new_session)
-            await db.flush()
+            # Client-side UUID: no flush round trip needed to learn the id
+            new_session = ProductSelectionSession(id=uuid.uuid4(), company_id=company_id, user_id=user_id)
+            uow.add(new_session)
             session_id = str(new_session.id)
         
-        history = await get_conversation_history(db, lead_id, limit=20)
-        logging.info(f"📚🔍 DEBUG company_id={company_id}, lead_id={lead_id}, history len={len(history)}")
+        history = await get_conversation_history(db, lead.id, limit=20)
+        logging.info(f"📚🔍 DEBUG company_id={company_id}, lead_id={lead.id}, history len={len(history)}")
         
         # 🏢 MULTITENANCY: Get company-specific AI service
-        result = await db.execute(select(Company).where(Company.id == company_id))
-        company = result.scalars().first()
+        company = await tenant_cache.get(db, company_id)
         if company and company.ai_endpoint and company.ai_api_key:
-            company_ai = get_ai_service(company_id, company.ai_endpoint, company.ai_api_key)
+            company_ai = get_ai_service(company.ai_endpoint, company.ai_api_key)
         else:
             company_ai = ai_service  # Fallback to default
-        
-        catalog = []
-        ai_response = await company_ai.get_product_recommendation(
-            user_query=chat_data.message,
-            history=history,
-            product_catalog=catalog,
-            language=language
-        )
-        
-        interaction = Interaction(
-            company_id=company_id, 
-            lead_id=lead_id, 
-            type='text', 
-            content=chat_data.message,
-            outcome=ai_response
-        )
-        db.add(interaction)
-        await db.commit()
-        
-        logging.info(f'💾 Saved: User=\'{chat_data.message[:30]}...\' Bot=\'{ai_response[:30]}...\'')
-        
-        
-        # Extract name from AI confirmation message (most reliable)
-        import re
-        extracted_name = None
-        full_messages = history + [{'sender': 'bot', 'text': ai_response}]
-        
-        logging.info(f'🔍 Extracting name from {len(full_messages)} messages')
-        
-        # FIRST: Try to extract from AI confirmation messages (most accurate)
-        for msg in reversed(full_messages):
-            if msg.get('sender') == 'bot':
-                text = msg.get('text', '')
-                # Look for "Вас зовут: Имя" or "зовут: Имя"
-                match = re.search(r'(?:Вас\s+)?зовут[:\s]+([А-ЯЁA-Z][а-яёa-z]+)', text, re.IGNORECASE)
-                if match:
-                    extracted_name = match.group(1).capitalize()
-                    logging.info(f'✨ Found name from AI confirmation: {extracted_name}')
-                    break
-        
-        # SECOND: If no confirmation yet, try user direct answers
-        if not extracted_name:
-            for msg in reversed(full_messages):
-                if msg.get('sender') == 'user':
-                    text = msg.get('text', '').strip()
-                    
-                    # Only simple patterns to avoid false positives
-                    patterns = [
-                        (r'меня зовут\s+([А-ЯЁA-Z][а-яёa-z]+)', 'меня зовут'),
-                        (r'^([А-ЯЁA-Z][а-яёa-z]{2,})$', 'single name')
-                    ]
-                    
-                    for pattern, desc in patterns:
-                        match = re.search(pattern, text)
-                        if match:
-                            candidate = match.group(1).capitalize()
-                            # Strong filter
-                            if len(candidate) > 2 and candidate.lower() not in ['да', 'нет', 'ок', 'уже', 'три', 'раза', 'хорошо', 'спасибо', 'привет']:
-                                extracted_name = candidate
-                                logging.info(f'✨ Found name from user: {extracted_name} via {desc}')
-                                break
-                    
-                    if extracted_name:
-                        break
-        
-        if extracted_name:
-            if not lead.contact_info:
-                lead.contact_info = {}
-            lead.contact_info['name'] = extracted_name
-            flag_modified(lead, 'contact_info')
-            await db.commit()
-            logging.info(f'💾 Name saved to DB: {extracted_name}')
-        else:
-            logging.info('⚠️ No name extracted from conversation')
+    
+    # Everything the confirmation check needs is known before the reply:
+    # the phone (saved or in this message) and the bot's last question
+    phone_number = chat_data.phone or entity_extractor.phone(chat_data.message)
+    saved_phone = (lead.contact_info or {}).get('phone') or phone_number
+    
+    # Check if bot asked for confirmation in recent messages
+    # (multilingual confirmation keywords or a phone pattern in the summary message)
+    has_confirm_q = entity_extractor.has_confirmation_question(lead.contact_info, history)
+    
+    # Detect confirmation locally; the LLM is asked only when the lexicon is unsure
+    is_confirmed = False
+    needs_llm_confirm = False
+    if saved_phone and has_confirm_q and lead.status != 'confirmed':
+        intent = intent_classifier.classify(chat_data.message, language)
+        is_confirmed = intent.label == YES
+        needs_llm_confirm = not intent.confident
+        logging.info(f'🧠 Local intent: "{chat_data.message}" → {intent.label} ({intent.confidence}, {intent.language})')
+    
+    return {
+        'session_id': session_id,
+        'user_id': user_id,
+        'lead': lead,
+        'language': language,
+        'history': history,
+        'company': company,
+        'company_ai': company_ai,
+        'phone_number': phone_number,
+        'saved_phone': saved_phone,
+        'has_confirm_q': has_confirm_q,
+        'is_confirmed': is_confirmed,
+        'needs_llm_confirm': needs_llm_confirm,
+    }
 
-        phone_number = chat_data.phone or extract_phone_number(chat_data.message)
-        
-        # Save phone to contact_info
-        if phone_number:
-            if not lead.contact_info:
-                lead.contact_info = {}
-            if 'phone' not in lead.contact_info:
-                lead.contact_info['phone'] = phone_number
-                flag_modified(lead, 'contact_info')
-                await db.commit()
-                logging.info(f'✅ Phone saved: {phone_number}')
-        
-        
-        saved_phone = lead.contact_info.get('phone') if lead.contact_info else None
-        
-        # Use AI to detect if user confirmed (works in ANY language!)
-        is_confirmed = False
-        if saved_phone:
-            confirmation_prompt = f"""Пользователь ответил: "{chat_data.message}"
+def llm_confirmation_call(turn: dict, message: str):
+    """Coroutine for the fallback "ДА или НЕТ" LLM check, or None if the local answer is confident"""
+    if not turn['needs_llm_confirm']:
+        return None
+    return ai_service.get_product_recommendation(
+        user_query=CONFIRMATION_PROMPT.format(message=message),
+        history=[],
+        product_catalog=[]
+    )
 
-Это положительное подтверждение (да, согласен, верно, ok и т.д.) или отрицание?
-Ответь ОДНИМ словом: ДА или НЕТ"""
+def apply_llm_confirmation(turn: dict, message: str, confirm_check):
+    if isinstance(confirm_check, Exception):
+        # Keep the low-confidence local answer
+        logging.error(f'❌ AI confirmation check failed: {confirm_check}')
+        return
+    turn['is_confirmed'] = 'да' in confirm_check.lower() or 'yes' in confirm_check.lower()
+    logging.info(f'🤖 AI confirmation check: "{message}" → {confirm_check} → {turn["is_confirmed"]}')
+
+async def finalize_chat_turn(uow: TurnUnitOfWork, pipeline: TurnPipeline, company_id: int, chat_data: ChatMessage, turn: dict, ai_response: str):
+    """Stage the interaction, extracted contacts and confirmation; queue post-confirmation jobs"""
+    lead = turn['lead']
+    history = turn['history']
+    phone_number = turn['phone_number']
+    saved_phone = turn['saved_phone']
+    
+    interaction = Interaction(
+        company_id=company_id, 
+        lead_id=lead.id, 
+        type='text', 
+        content=chat_data.message,
+        outcome=ai_response
+    )
+    uow.add(interaction)
+    uow.on_commit(lambda: history_store.append(lead.id, interaction.content, interaction.outcome))
+    
+    logging.info(f'💾 Staged: User=\'{chat_data.message[:30]}...\' Bot=\'{ai_response[:30]}...\'')
+    
+    async with pipeline.stage('extract'):
+        # Only this turn's messages are scanned; earlier results live in contact_info
+        if not lead.contact_info:
+            lead.contact_info = {}
+        changes = entity_extractor.update(lead.contact_info, chat_data.message, ai_response, phone=phone_number)
+        if changes:
+            # Merged, not rewritten: the summary job may be setting contact_info.temperature meanwhile
+            uow.merge(lead, 'contact_info', CONTACT_KEYS)
+            logging.info(f'💾 Extracted: {changes}')
+    
+    is_confirmed = turn['is_confirmed']
+    has_confirm_q = turn['has_confirm_q']
+    
+    # DEBUG: Log confirmation conditions
+    logging.info(f'🔍 Confirm check: phone={saved_phone}, confirmed={is_confirmed}, has_q={has_confirm_q}, status={lead.status}')
+    logging.info(f'🔍 History last 3: {[m.get("text", "")[:50] for m in history[-3:]]}')
+    
+    # Send report ONLY after explicit confirmation
+    if saved_phone and is_confirmed and has_confirm_q and lead.status != 'confirmed':
+        lead.status = 'confirmed'
+        logging.info(f'✅ CONFIRMED: {saved_phone}')
+        
+        full_history = history + [
+            {'sender': 'user', 'text': chat_data.message},
+            {'sender': 'bot', 'text': ai_response}
+        ]
+        company = turn['company']
+        
+        # Summary, notifications and Bitrix24 run as durable jobs, committed together with the confirmation
+        await job_queue.enqueue(uow.db, 'lead_summary', {
+            'lead_id': lead.id,
+            'company_id': company_id,
+            'history': full_history,
+            'language': turn['language'],
+            'manager_language': company.default_language if company and company.default_language else "ru",
+            'lead_contact': (lead.contact_info.get('name') if lead.contact_info else None) or chat_data.username or turn['user_id'],
+            'phone': lead.contact_info.get('phone') if lead.contact_info else phone_number,
+        })
+        uow.on_commit(job_queue.wake)
+        logging.info(f'📬 Job queued for summary, Telegram & Email notifications')
+
+@router.post('/{company_id}/chat')
+@limiter.limit('100/minute')
+async def sales_chat(request: Request, company_id: int, chat_data: ChatMessage, db: AsyncSession = Depends(get_db)):
+    pipeline = TurnPipeline('chat')
+    try:
+        # All lead/interaction/session writes of this turn are committed once, on exit
+        async with TurnUnitOfWork(db, 'chat') as uow:
+            turn = await prepare_chat_turn(db, uow, pipeline, company_id, chat_data)
             
-            try:
-                confirm_check = await ai_service.get_product_recommendation(
-                    user_query=confirmation_prompt,
-                    history=[],
-                    product_catalog=[]
+            catalog = []
+            ai_calls = {
+                'reply': turn['company_ai'].get_product_recommendation(
+                    user_query=chat_data.message,
+                    history=turn['history'],
+                    product_catalog=catalog,
+                    language=turn['language'],
+                    company_id=company_id
                 )
-                is_confirmed = 'да' in confirm_check.lower() or 'yes' in confirm_check.lower()
-                logging.info(f'🤖 AI confirmation check: "{chat_data.message}" → {confirm_check} → {is_confirmed}')
-            except Exception as e:
-                logging.error(f'❌ AI confirmation check failed: {e}')
-                # Fallback to simple keywords for critical cases
-                simple_confirms = ['да', 'yes', 'ок', 'ok', '+', '👍']
-                is_confirmed = any(w in chat_data.message.lower() for w in simple_confirms)
-        
-        # Check if bot asked for confirmation in recent messages
-        # More robust: check if bot message contains both phone and name (confirmation pattern)
-        has_confirm_q = False
-        for msg in history[-3:]:
-            if msg.get('sender') == 'bot':
-                bot_text = msg.get('text', '').lower()
-                # Check for multilingual confirmation keywords
-                confirm_keywords = ['верно', 'правильно', 'подтвердите', 'correct', 'confirm', 
-                                   'дұрыс', 'рас', 'туура', 'to\'g\'ri', 'вірно']  # KZ, KG, UZ, UA
-                # OR check if message contains phone pattern (summary message)
-                has_keyword = any(kw in bot_text for kw in confirm_keywords)
-                has_phone_pattern = bool(re.search(r'\+?\d[\d\s()-]{7,}', bot_text))
-                
-                if has_keyword or has_phone_pattern:
-                    has_confirm_q = True
-                    break
-        
-        # DEBUG: Log confirmation conditions
-        logging.info(f'🔍 Confirm check: phone={saved_phone}, confirmed={is_confirmed}, has_q={has_confirm_q}, status={lead.status}')
-        logging.info(f'🔍 History last 3: {[m.get("text", "")[:50] for m in history[-3:]]}')
-        
-        # Send report ONLY after explicit confirmation
-        if saved_phone and is_confirmed and has_confirm_q and lead.status != 'confirmed':
-            lead.status = 'confirmed'
-            flag_modified(lead, 'status')
-            await db.commit()
-            logging.info(f'✅ CONFIRMED: {saved_phone}')
-            
-            full_history = history + [
-                {'sender': 'user', 'text': chat_data.message},
-                {'sender': 'bot', 'text': ai_response}
-            ]
-            
-            # Получаем язык менеджера из компании
-            company_result = await db.execute(select(Company).where(Company.id == company_id))
-            company_obj = company_result.scalars().first()
-            manager_lang = company_obj.default_language if company_obj and company_obj.default_language else "ru"
-            
-            summary = await ai_service.generate_conversation_summary(full_history, language, manager_language=manager_lang)
-            
-            # Extract temperature from AI summary
-            summary_lower = summary.lower()
-            if 'горячий' in summary_lower or 'hot' in summary_lower or '🔥' in summary:
-                temperature = '🔥 горячий'
-            elif 'холодный' in summary_lower or 'cold' in summary_lower or '❄️' in summary:
-                temperature = '❄️ холодный'
-            else:
-                temperature = '🌤 теплый'
-            
-            # Добавляем температуру в начало если её там нет
-            if '🌡 Температура:' not in summary:
-                summary = f"🌡 Температура: {temperature}\n\n" + summary
-            # Save temperature to lead contact_info
-            if not lead.contact_info:
-                lead.contact_info = {}
-            lead.contact_info['temperature'] = temperature
-            flag_modified(lead, 'contact_info')
-            
-            # Сохранить AI summary в БД
-            lead.ai_summary = summary
-            lead.conversation_summary = summary[:500]  # краткая версия
+            }
+            confirm_call = llm_confirmation_call(turn, chat_data.message)
+            if confirm_call:
+                ai_calls['confirm'] = confirm_call
             
-            await db.commit()
-            logging.info(f'🌡 Temperature saved: {temperature}')
-            logging.info(f'💾 AI summary saved: {len(summary)} chars')
+            # Main reply and confirmation check run concurrently
+            await uow.release()
+            ai_results = await pipeline.gather(**ai_calls)
+            ai_response = ai_results['reply']
+            if isinstance(ai_response, Exception):
+                raise ai_response
+            if 'confirm' in ai_results:
+                apply_llm_confirmation(turn, chat_data.message, ai_results['confirm'])
             
-            background_tasks.add_task(
-                background_send_notifications,
-                lead_contact=(lead.contact_info.get('name') if lead.contact_info else None) or chat_data.username or user_id,
-                history=full_history,
-                summary=summary,
-                phone=lead.contact_info.get('phone') if lead.contact_info else phone_number,
-                company_id=company_id,
-                lead_id=lead.id
-            )
-            logging.info(f'📬 Background task added for Telegram & Email notifications')
-            # Send to Bitrix24 CRM if integration enabled
-            try:
-                asyncio.create_task(send_lead_to_bitrix24(lead_id, company_id, db))
-            except Exception as e:
-                logging.error(f"Bitrix24 task error: {e}")
-        
-        return {'session_id': session_id, 'response': ai_response, 'action': 'continue'}
+            await finalize_chat_turn(uow, pipeline, company_id, chat_data, turn, ai_response)
         
+        pipeline.finish()
+        return {'session_id': turn['session_id'], 'response': ai_response, 'action': 'continue'}
+
     except Exception as e:
         import traceback
         traceback.print_exc()
         logging.error(f'Backend Error: {e}')
         raise HTTPException(status_code=500, detail=f'Internal Server Error: {str(e)}')
 
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post('/{company_id}/chat/stream')
+@limiter.limit('100/minute')
+async def sales_chat_stream(request: Request, company_id: int, chat_data: ChatMessage):
+    """
+    Streaming variant of /chat (Server-Sent Events).
+    Events: `meta` (session_id), `delta` (text chunk), `done` (full response) or `error`.
+    The Interaction is persisted only after the stream completes.
+    """
+    async def event_stream():
+        pipeline = TurnPipeline('chat_stream')
+        try:
+            # Own session: request-scoped dependencies are closed before the body is streamed
+            async with get_db_session() as db:
+                async with TurnUnitOfWork(db, 'chat_stream') as uow:
+                    turn = await prepare_chat_turn(db, uow, pipeline, company_id, chat_data)
+                    yield sse_event('meta', {'session_id': turn['session_id']})
+                    
+                    # Confirmation fallback runs while the reply is streamed
+                    await uow.release()
+                    confirm_task = None
+                    confirm_call = llm_confirmation_call(turn, chat_data.message)
+                    if confirm_call:
+                        confirm_task = asyncio.create_task(pipeline.gather(confirm=confirm_call))
+                    
+                    chunks = []
+                    started = time.perf_counter()
+                    async for delta in turn['company_ai'].stream_product_recommendation(
+                        user_query=chat_data.message,
+                        history=turn['history'],
+                        language=turn['language'],
+                        company_id=company_id
+                    ):
+                        if not chunks:
+                            pipeline.record('first_token', (time.perf_counter() - started) * 1000)
+                        chunks.append(delta)
+                        yield sse_event('delta', {'text': delta})
+                    pipeline.record('reply', (time.perf_counter() - started) * 1000)
+                    ai_response = ''.join(chunks).strip()
+                    
+                    if confirm_task:
+                        apply_llm_confirmation(turn, chat_data.message, (await confirm_task)['confirm'])
+                    
+                    await finalize_chat_turn(uow, pipeline, company_id, chat_data, turn, ai_response)
+            
+            pipeline.finish()
+            yield sse_event('done', {'session_id': turn['session_id'], 'response': ai_response, 'action': 'continue'})
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            logging.error(f'Backend Stream Error: {e}')
+            yield sse_event('error', {'detail': f'Internal Server Error: {str(e)}'})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 
 
 
 @router.get('/all-leads')
-async def get_all_leads(limit: int = 20, db: AsyncSession = Depends(get_db)):
+async def get_all_leads(limit: int = 20, db: AsyncSession = Depends(get_read_db)):
     """Get ALL leads from all companies"""
     try:
         result = await db.execute(
@@ -745,6 +869,10 @@ async def upsert_company(data: dict, db: AsyncSession = Depends(get_db)):
     if 'admin_chat_id' in data:
         company.admin_chat_id = data['admin_chat_id']
         logging.info(f'👤 Updated admin_chat_id for company {company_id}: {data["admin_chat_id"]}')
+    if ('ai_endpoint' in data and data['ai_endpoint'] != company.ai_endpoint) or \
+       ('ai_api_key' in data and data['ai_api_key'] != company.ai_api_key):
+        # Credentials changed - drop the cached client built from the old ones
+        ai_client_registry.invalidate(company.ai_endpoint, company.ai_api_key)
     if 'ai_endpoint' in data:
         company.ai_endpoint = data['ai_endpoint']
         logging.info(f'🤖 Updated ai_endpoint for company {company_id}')
@@ -791,6 +919,7 @@ async def upsert_company(data: dict, db: AsyncSession = Depends(get_db)):
     
     await db.commit()
     await db.refresh(company)
+    tenant_cache.invalidate(company.id)
     
     # Создать дефолтные статусы для НОВОЙ компании
     if is_new_company:
@@ -842,6 +971,7 @@ async def upload_company_logo(company_id: int, file: UploadFile = File(...), db:
     if company:
         company.logo_url = logo_url
         await db.commit()
+        tenant_cache.invalidate(company_id)
         logging.info(f'📷 Logo uploaded for company {company_id}: {logo_url}')
         return {'status': 'ok', 'logo_url': logo_url}
     else:
@@ -890,6 +1020,7 @@ Telegram ID: {user_id}
     )
     db.add(interaction)
     await db.commit()
+    history_store.append(lead.id, interaction.content, interaction.outcome)
     
     logging.info(f'📧 Manager message sent for company {company_id}')
     return {'status': 'ok'}
@@ -953,7 +1084,7 @@ async def get_leads(company_id: int, limit: int = 10, db: AsyncSession = Depends
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get('/{company_id}/leads/count')
-async def get_lead_count(company_id: int, period: str = 'week', db: AsyncSession = Depends(get_db)):
+async def get_lead_count(company_id: int, period: str = 'week', db: AsyncSession = Depends(get_read_db)):
     """Get lead count for day/week/month"""
     from datetime import datetime, timedelta
     
@@ -1047,8 +1178,7 @@ async def get_widget_config(request: Request, db: AsyncSession = Depends(get_db)
         if not widget:
             raise HTTPException(status_code=404, detail=f'Widget not found for domain: {domain}')
         
-        result = await db.execute(select(Company).where(Company.id == widget.company_id))
-        company = result.scalars().first()
+        company = await tenant_cache.get(db, widget.company_id)
         
         if not company:
             raise HTTPException(status_code=404, detail='Company not found')
@@ -1128,6 +1258,7 @@ async def create_web_widget(company_id: int, request: Request, db: AsyncSession
         logging.info(f'✅ Auto-translated greeting for widget')
         
         db.add(widget)
+        await usage_counters.widgets_changed(db, company_id, web=1)
         await db.commit()
         await db.refresh(widget)
         
@@ -1152,6 +1283,8 @@ async def delete_web_widget(company_id: int, widget_id: int, db: AsyncSession =
         if not widget:
             raise HTTPException(status_code=404, detail='Widget not found')
         
+        if widget.is_active:
+            await usage_counters.widgets_changed(db, company_id, web=-1)
         await db.delete(widget)
         await db.commit()
         
@@ -1220,6 +1353,7 @@ async def toggle_web_widget(company_id: int, widget_id: int, db: AsyncSession =
             raise HTTPException(status_code=404, detail='Widget not found')
         
         widget.is_active = not widget.is_active
+        await usage_counters.widgets_changed(db, company_id, web=1 if widget.is_active else -1)
         await db.commit()
         
         return {'id': widget.id, 'domain': widget.domain, 'is_active': widget.is_active}
@@ -1251,6 +1385,7 @@ async def update_company_language(company_id: int, request: Request, db: AsyncSe
     if company:
         company.default_language = data.get('language', 'ru')
         await db.commit()
+        tenant_cache.invalidate(company_id)
         logging.info(f"✅ Company {company_id} language updated to {company.default_language}")
         return {"status": "ok", "language": company.default_language}
     raise HTTPException(status_code=404, detail="Company not found")
@@ -1273,41 +1408,49 @@ async def process_voice(request: Request, company_id: int, file: UploadFile = Fi
             db_lang = await get_user_language(db, user_id)
             if db_lang:
                 language = db_lang
+        await release_connection(db)
         transcribed_text = await voice_service.transcribe_audio(file_location, language=language)
     finally:
         if os.path.exists(file_location):
             os.remove(file_location)
 
-    lead = await get_or_create_lead(db, company_id, user_id, username)
-    lead_id = lead.id
+    async with TurnUnitOfWork(db, 'voice') as uow:
+        lead = await get_or_create_lead(db, company_id, user_id, username)
+        lead_id = lead.id
     
-    history = await get_conversation_history(db, lead_id, limit=20)
-    # 🏢 MULTITENANCY: Get company-specific AI
-    result = await db.execute(select(Company).where(Company.id == company_id))
-    company = result.scalars().first()
-    if company and company.ai_endpoint and company.ai_api_key:
-        company_ai = get_ai_service(company_id, company.ai_endpoint, company.ai_api_key)
-    else:
-        company_ai = ai_service
+        history = await get_conversation_history(db, lead_id, limit=20)
+        # 🏢 MULTITENANCY: Get company-specific AI
+        company = await tenant_cache.get(db, company_id)
+        if company and company.ai_endpoint and company.ai_api_key:
+            company_ai = get_ai_service(company.ai_endpoint, company.ai_api_key)
+        else:
+            company_ai = ai_service
     
-    catalog = []
+        catalog = []
     
-    ai_response = await company_ai.get_product_recommendation(
-        user_query=transcribed_text,
-        history=history,
-        product_catalog=catalog,
-        language=language
-    )
+        await uow.release()
+        ai_response = await company_ai.get_product_recommendation(
+            user_query=transcribed_text,
+            history=history,
+            product_catalog=catalog,
+            language=language,
+            company_id=company_id
+        )
 
-    interaction = Interaction(
-        company_id=company_id, 
-        lead_id=lead_id, 
-        type='voice', 
-        content=transcribed_text,
-        outcome=ai_response
-    )
-    db.add(interaction)
-    await db.commit()
+        interaction = Interaction(
+            company_id=company_id, 
+            lead_id=lead_id, 
+            type='voice', 
+            content=transcribed_text,
+            outcome=ai_response
+        )
+        uow.add(interaction)
+        uow.on_commit(lambda: history_store.append(lead_id, interaction.content, interaction.outcome))
+        
+        if not lead.contact_info:
+            lead.contact_info = {}
+        if entity_extractor.update(lead.contact_info, transcribed_text, ai_response):
+            uow.merge(lead, 'contact_info', CONTACT_KEYS)
 
     return {'text': transcribed_text, 'response': ai_response, 'language': language}
 
@@ -1316,6 +1459,7 @@ async def process_voice(request: Request, company_id: int, file: UploadFile = Fi
 @router.get('/companies/all')
 async def get_all_companies(db: AsyncSession = Depends(get_db)):
     """Get all companies for SuperAdmin"""
+    # Primary, not replica: the bots toggle company flags from this list right after upserts
     try:
         result = await db.execute(select(Company).order_by(Company.id))
         companies = result.scalars().all()
@@ -1372,6 +1516,7 @@ async def update_company_tier(company_id: int, tier_data: dict, db: AsyncSession
         if expiry and isinstance(expiry, str):
             company.tier_expiry = datetime.fromisoformat(expiry.replace('Z', '+00:00'))
     await db.commit()
+    tenant_cache.invalidate(company_id)
     return {'id': company.id, 'tier': company.tier, 'tier_expiry': str(company.tier_expiry) if company.tier_expiry else None}
 
 @router.get("/companies/{company_id}/widgets")
@@ -1379,28 +1524,22 @@ async def list_widgets(company_id:int,db:AsyncSession=Depends(get_db)):
     r=await db.execute(select(SocialWidget).where(SocialWidget.company_id==company_id,SocialWidget.is_active==True))
     return {"widgets":[{"id":w.id,"channel_name":w.channel_name,"greeting_message":w.greeting_message,"widget_type":getattr(w,"widget_type","classic"),"url":f"https://bizdnai.com/w/{company_id}/{w.id}"}for w in r.scalars().all()]}
 
-@router.post("/companies/{company_id}/widgets")
-async def create_widget(company_id:int,data:dict,db:AsyncSession=Depends(get_db)):
-    from sqlalchemy import func as sqlfunc
+async def check_widget_limit(db: AsyncSession, company_id: int, widget_type: str, lock: bool = False):
+    """Raise 400 when the company is at its avatar / social widget limit"""
     from models import TierSettings
     
-    ch=transliterate_to_english(data.get("channel_name",""))
-    if not ch:raise HTTPException(400,"channel_name required")
-    
-    widget_type = data.get("widget_type", "classic")
+    usage = await usage_counters.get(db, company_id, lock=lock)
     if widget_type == "avatar":
-        count_q = await db.execute(select(sqlfunc.count(SocialWidget.id)).where(SocialWidget.company_id==company_id, SocialWidget.widget_type=="avatar", SocialWidget.is_active==True))
-        current = count_q.scalar() or 0
+        current = usage.avatar_widgets if usage else 0
         
-        comp_q = await db.execute(select(Company).where(Company.id==company_id))
-        comp = comp_q.scalars().first()
+        comp_q = await db.execute(select(Company.avatar_limit, Company.tier).where(Company.id==company_id))
+        comp = comp_q.first()
         
         limit = 0
         if comp:
-            comp_limit = getattr(comp, 'avatar_limit', None)
-            if comp_limit is not None:
-                limit = comp_limit
-            elif hasattr(comp, 'tier') and comp.tier:
+            if comp.avatar_limit is not None:
+                limit = comp.avatar_limit
+            elif comp.tier:
                 tier_q = await db.execute(select(TierSettings).where(TierSettings.tier==comp.tier))
                 tier = tier_q.scalars().first()
                 limit = getattr(tier, 'avatar_limit', 0) if tier else 0
@@ -1409,24 +1548,32 @@ async def create_widget(company_id:int,data:dict,db:AsyncSession=Depends(get_db)
             raise HTTPException(400, f"Лимит аватаров ({limit}) достигнут. Обратитесь в поддержку для увеличения.")
     else:
         # Check social widgets limit for classic
-        count_q = await db.execute(select(sqlfunc.count(SocialWidget.id)).where(SocialWidget.company_id==company_id, SocialWidget.is_active==True))
-        current = count_q.scalar() or 0
+        current = usage.social_widgets if usage else 0
         
-        comp_q = await db.execute(select(Company).where(Company.id==company_id))
-        comp = comp_q.scalars().first()
+        comp = await tenant_cache.get(db, company_id)
         
         limit = 0
-        if comp and hasattr(comp, 'tier') and comp.tier:
+        if comp and comp.tier:
             tier_q = await db.execute(select(TierSettings).where(TierSettings.tier==comp.tier))
             tier = tier_q.scalars().first()
             limit = tier.social_widgets_limit if tier else 0
         
         if current >= limit:
             raise HTTPException(400, f"Лимит соц. виджетов ({limit}) достигнут. Обновите тариф.")
+
+@router.post("/companies/{company_id}/widgets")
+async def create_widget(company_id:int,data:dict,db:AsyncSession=Depends(get_db)):
+    ch=transliterate_to_english(data.get("channel_name",""))
+    if not ch:raise HTTPException(400,"channel_name required")
+    
+    widget_type = data.get("widget_type", "classic")
+    # Reject at the limit before spending LLM calls on translations
+    await check_widget_limit(db, company_id, widget_type)
+    await db.rollback()  # don't sit idle in a transaction during the translations
     
     # Allow multiple widgets per channel - no uniqueness check
-    w=SocialWidget(company_id=company_id,channel_name=ch,greeting_message=data.get("greeting_message","Здравствуйте!"),widget_type=data.get("widget_type","classic"),is_active=True)
-    # Auto-translate greeting
+    w=SocialWidget(company_id=company_id,channel_name=ch,greeting_message=data.get("greeting_message","Здравствуйте!"),widget_type=widget_type,is_active=True)
+    # Auto-translate greeting (outside the row lock below)
     base_greeting = data.get("greeting_message","Здравствуйте!")
     w.greeting_ru = base_greeting
     w.greeting_en = await translate_greeting(base_greeting, 'en')
@@ -1434,7 +1581,12 @@ async def create_widget(company_id:int,data:dict,db:AsyncSession=Depends(get_db)
     w.greeting_ky = await translate_greeting(base_greeting, 'ky')
     w.greeting_uz = await translate_greeting(base_greeting, 'uz')
     w.greeting_uk = await translate_greeting(base_greeting, 'uk')
+    
+    # Re-check with the counters locked until commit, so concurrent creates cannot both pass the limit
+    await check_widget_limit(db, company_id, widget_type, lock=True)
+    
     db.add(w)
+    await usage_counters.widgets_changed(db, company_id, social=1, avatar=1 if widget_type == "avatar" else 0)
     await db.commit()
     await db.refresh(w)
     return {"id":w.id,"channel_name":w.channel_name,"url":f"https://bizdnai.com/w/{company_id}/{w.id}"}
@@ -1442,7 +1594,7 @@ async def create_widget(company_id:int,data:dict,db:AsyncSession=Depends(get_db)
 
 
 @router.get("/{company_id}/leads/stats")
-async def get_leads_stats(company_id: int, db: AsyncSession = Depends(get_db)):
+async def get_leads_stats(company_id: int, db: AsyncSession = Depends(get_read_db)):
     """Get leads statistics for company"""
     from sqlalchemy import func
     
@@ -1468,6 +1620,83 @@ async def get_leads_stats(company_id: int, db: AsyncSession = Depends(get_db)):
         "by_source": sources
     }
 
+
+_REPORT_CONTACT_FILTERS = {
+    'any': "TRUE",
+    'name_or_phone': "(COALESCE(l.contact_info->>'name', '') <> '' OR COALESCE(l.contact_info->>'phone', '') <> '')",
+    'phone': "COALESCE(l.contact_info->>'phone', '') <> ''",
+}
+
+
+@router.get("/{company_id}/leads/report")
+async def get_leads_report(
+    company_id: int,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    contact: str = 'any',
+    latest: int = Query(default=10, ge=0, le=50),
+    latest_contact: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Lead counts by source plus the latest leads, with social widget channel names resolved.
+    contact filters counted leads (any | name_or_phone | phone); latest_contact additionally filters the latest list.
+    One query: widget names are joined instead of looked up per source.
+    """
+    latest_contact = latest_contact or contact
+    if contact not in _REPORT_CONTACT_FILTERS or latest_contact not in _REPORT_CONTACT_FILTERS:
+        raise HTTPException(status_code=400, detail=f"contact must be one of: {', '.join(_REPORT_CONTACT_FILTERS)}")
+    where = ["l.company_id = :cid", _REPORT_CONTACT_FILTERS[contact]]
+    params = {'cid': company_id, 'latest': latest}
+    if date_from:
+        where.append("l.created_at >= :date_from")
+        params['date_from'] = date_from
+    if date_to:
+        where.append("l.created_at < :date_to")
+        params['date_to'] = date_to
+
+    # Numeric sources are social widget ids; CASE keeps non-numeric sources away from the cast
+    result = await db.execute(text(f"""
+        WITH scoped AS (
+            SELECT l.id, l.telegram_user_id, l.contact_info, l.status, l.created_at,
+                   COALESCE(NULLIF(l.source, ''), CASE WHEN l.telegram_user_id IS NOT NULL THEN 'Telegram' ELSE 'Web' END) AS source,
+                   {_REPORT_CONTACT_FILTERS[latest_contact]} AS listed
+            FROM leads l
+            WHERE {' AND '.join(where)}
+        ),
+        named AS (
+            SELECT s.*, w.channel_name
+            FROM scoped s
+            LEFT JOIN social_widgets w
+                   ON w.company_id = :cid AND w.is_active
+                  AND w.id = CASE WHEN s.source ~ '^[0-9]{{1,9}}$' THEN s.source::int END
+        )
+        SELECT
+            (SELECT COUNT(*) FROM named),
+            (SELECT COALESCE(json_agg(json_build_object('source', g.source, 'channel_name', g.channel_name, 'count', g.n)
+                                      ORDER BY g.n DESC, g.source), '[]'::json)
+             FROM (SELECT source, channel_name, COUNT(*) AS n FROM named GROUP BY source, channel_name) g),
+            (SELECT COALESCE(json_agg(json_build_object(
+                        'id', x.id, 'telegram_user_id', x.telegram_user_id, 'contact_info', x.contact_info,
+                        'status', x.status, 'source', x.source, 'channel_name', x.channel_name,
+                        'created_at', to_char(x.created_at, 'YYYY-MM-DD HH24:MI')
+                    ) ORDER BY x.created_at DESC, x.id DESC), '[]'::json)
+             FROM (SELECT * FROM named WHERE listed ORDER BY created_at DESC, id DESC LIMIT :latest) x)
+    """), params)
+    total, by_source, latest_leads = result.one()
+    # json columns come back as text from asyncpg
+    if isinstance(by_source, str):
+        by_source = json.loads(by_source)
+    if isinstance(latest_leads, str):
+        latest_leads = json.loads(latest_leads)
+    return {
+        "total": total,
+        "by_source": by_source,
+        "latest": latest_leads,
+        "date_from": date_from.isoformat() if date_from else None,
+        "date_to": date_to.isoformat() if date_to else None
+    }
+
 @router.delete("/companies/{company_id}/widgets/{widget_id:int}")
 async def delete_social_widget(
     company_id: int,
@@ -1488,6 +1717,9 @@ async def delete_social_widget(
             raise HTTPException(status_code=404, detail='Widget not found')
         
         # Soft delete - just deactivate
+        if widget.is_active:
+            is_avatar = widget.widget_type == 'avatar'
+            await usage_counters.widgets_changed(db, company_id, social=-1, avatar=-1 if is_avatar else 0)
         widget.is_active = False
         await db.commit()
         
@@ -1603,11 +1835,9 @@ async def get_ai_packages(db: AsyncSession = Depends(get_db)):
 async def get_tier_usage(company_id: int, db: AsyncSession = Depends(get_db)):
     """Get company tier and usage stats"""
     from models import TierSettings
-    from datetime import datetime, timedelta
     
     # Get company
-    result = await db.execute(select(Company).where(Company.id == company_id))
-    company = result.scalars().first()
+    company = await tenant_cache.get(db, company_id)
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
     
@@ -1615,19 +1845,8 @@ async def get_tier_usage(company_id: int, db: AsyncSession = Depends(get_db)):
     tier_result = await db.execute(select(TierSettings).where(TierSettings.tier == (company.tier or 'free')))
     tier = tier_result.scalars().first()
     
-    # Count leads this month
-    month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    leads_result = await db.execute(
-        select(Lead).where(Lead.company_id == company_id, Lead.created_at >= month_start)
-    )
-    leads_this_month = len(leads_result.scalars().all())
-    
-    # Count widgets
-    web_widgets_result = await db.execute(select(WebWidget).where(WebWidget.company_id == company_id, WebWidget.is_active == True))
-    web_widgets_count = len(web_widgets_result.scalars().all())
-    
-    social_widgets_result = await db.execute(select(SocialWidget).where(SocialWidget.company_id == company_id, SocialWidget.is_active == True))
-    social_widgets_count = len(social_widgets_result.scalars().all())
+    # Leads this month and active widgets (maintained counters, one row read)
+    usage = await usage_counters.get(db, company_id)
     
     return {
         'company_id': company_id,
@@ -1635,11 +1854,11 @@ async def get_tier_usage(company_id: int, db: AsyncSession = Depends(get_db)):
         'current_tier': company.tier or 'free',
         'tier_name': tier.name_ru if tier else '🆓 FREE',
         'tier_expiry': company.tier_expiry.isoformat() if company.tier_expiry else None,
-        'leads_used': leads_this_month,
+        'leads_used': usage.leads_this_month,
         'leads_limit': tier.leads_limit if tier else 20,
-        'web_widgets_used': web_widgets_count,
+        'web_widgets_used': usage.web_widgets,
         'web_widgets_limit': tier.web_widgets_limit if tier else 1,
-        'social_widgets_used': social_widgets_count,
+        'social_widgets_used': usage.social_widgets,
         'social_widgets_limit': tier.social_widgets_limit if tier else 0,
         'ai_package': company.ai_package or 'basic'
     }
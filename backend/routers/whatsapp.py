@@ -17,6 +17,7 @@ import io
 import base64
 
 from database import get_db_session
+from services.http_clients import http_clients
 
 logger = logging.getLogger(__name__)
 
@@ -147,30 +148,30 @@ async def create_pairing_session(
             # 3. Call OpenClaw Gateway to start pairing
             # IMPORTANT: QR must come from Baileys, not generated locally
             try:
-                async with httpx.AsyncClient() as client:
-                    gateway_response = await client.post(
-                        f"{GATEWAY_URL}/api/whatsapp/pairing/start",
-                        json={
-                            "company_id": company_id,
-                            "phone": phone
-                        },
-                        headers={
-                            "Authorization": f"Bearer {GATEWAY_TOKEN}"
-                        },
-                        timeout=30.0  # Wait for Baileys to generate QR
-                    )
-                    
-                    if gateway_response.status_code != 200:
-                        logger.error(f"Gateway error: {gateway_response.status_code}")
-                        raise HTTPException(status_code=503, detail="Gateway unavailable")
-                    
-                    gateway_data = gateway_response.json()
-                    qr_code = gateway_data.get('qr_code', '')  # From Baileys
-                    pairing_code = gateway_data.get('pairing_code', '')
-                    
-                    if not qr_code:
-                        raise HTTPException(status_code=503, detail="No QR from gateway")
-                    
+                client = http_clients.get('whatsapp_gateway')
+                gateway_response = await client.post(
+                    "/api/whatsapp/pairing/start",
+                    json={
+                        "company_id": company_id,
+                        "phone": phone
+                    },
+                    headers={
+                        "Authorization": f"Bearer {GATEWAY_TOKEN}"
+                    },
+                    timeout=30.0  # Wait for Baileys to generate QR
+                )
+                
+                if gateway_response.status_code != 200:
+                    logger.error(f"Gateway error: {gateway_response.status_code}")
+                    raise HTTPException(status_code=503, detail="Gateway unavailable")
+                
+                gateway_data = gateway_response.json()
+                qr_code = gateway_data.get('qr_code', '')  # From Baileys
+                pairing_code = gateway_data.get('pairing_code', '')
+                
+                if not qr_code:
+                    raise HTTPException(status_code=503, detail="No QR from gateway")
+                
             except httpx.TimeoutException:
                 logger.error("Gateway timeout - QR generation took too long")
                 raise HTTPException(status_code=503, detail="Gateway timeout")
@@ -392,16 +393,15 @@ async def send_telegram_notification(chat_id: str, message: str):
         else:
             token_part = TELEGRAM_BOT_TOKEN
         
-        async with httpx.AsyncClient() as client:
-            await client.post(
-                f"https://api.telegram.org/bot{token_part}/sendMessage",
-                json={
-                    "chat_id": chat_id,
-                    "text": message,
-                    "parse_mode": "HTML"
-                },
-                timeout=5.0
-            )
+        await http_clients.get('telegram').post(
+            f"/bot{token_part}/sendMessage",
+            json={
+                "chat_id": chat_id,
+                "text": message,
+                "parse_mode": "HTML"
+            },
+            timeout=5.0
+        )
     except Exception as e:
         logger.error(f"Telegram notification error: {e}")
         # Don't fail the webhook if Telegram is down
@@ -9,11 +9,14 @@ from typing import Optional, Dict, Any
 import uuid
 import logging
 import os
-import re
 from services.ai_service import ai_service
 from services.voice_service import voice_service
 from services.telegram_service import telegram_service
 from services.email_service import email_service
+from services.intent_classifier import intent_classifier, YES
+from services.history_store import load_window, to_messages
+from services.entity_extraction import entity_extractor
+from services.usage_counters import usage_counters
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
@@ -35,47 +38,9 @@ class ChatMessage(BaseModel):
     language: Optional[str] = 'ru'
     callback_data: Optional[str] = None  # Для inline кнопок
 
-def extract_phone_number(text: str) -> Optional[str]:
-    phone_pattern = re.compile(r'\b(?:\+?7|8)?[\s\-]?\(?\d{3}\)?[\s\-]?\d{3}[\s\-]?\d{2}[\s\-]?\d{2}\b')
-    match = phone_pattern.search(text)
-    if match:
-        return re.sub(r'\D', '', match.group())
-    return None
-
-def extract_name(text: str) -> Optional[str]:
-    clean_text = text.strip()
-    
-    ignore_words = {
-        'привет', 'здравствуйте', 'добрый', 'день', 'утро', 'вечер',
-        'маркетинг', 'продажи', 'финансы', 'управление', 'sales', 'marketing', 
-        'finance', 'management', 'нет', 'да', 'yes', 'no', 'хорошо', 'ok'
-    }
-    
-    phone_match = re.search(r'\b\d{10,12}\b', clean_text)
-    if phone_match:
-        name_part = clean_text[:phone_match.start()].strip()
-        if name_part and 2 <= len(name_part) <= 30:
-            words = name_part.split()
-            if 1 <= len(words) <= 3:
-                words_lower = [w.lower() for w in words]
-                if not any(w in ignore_words for w in words_lower):
-                    return name_part
-        return None
-    
-    words_lower = [w.lower() for w in clean_text.split()]
-    if any(w in ignore_words for w in words_lower):
-        return None
-    
-    if len(clean_text) > 30 or len(clean_text) < 2:
-        return None
-    if any(char.isdigit() for char in clean_text):
-        return None
-    
-    words = clean_text.split()
-    if 1 <= len(words) <= 2:
-        return clean_text
-    
-    return None
+# Precompiled patterns shared with the web chat/voice paths; the phone keeps this flow's RU format
+extract_phone_number = entity_extractor.phone_ru
+extract_name = entity_extractor.guess_name
 
 @router.post('/{company_id}/config')
 async def configure_sales_agent(request: Request, company_id: int, config: SalesConfigUpdate, db: AsyncSession = Depends(get_db)):
@@ -108,6 +73,7 @@ async def get_or_create_lead(db: AsyncSession, company_id: int, user_id: str, us
         contact_info = {'username': username} if username else {}
         lead = Lead(company_id=company_id, telegram_user_id=uid_val, contact_info=contact_info, status='new')
         db.add(lead)
+        await usage_counters.lead_created(db, company_id)
         await db.commit()
         await db.refresh(lead)
     return lead
@@ -120,18 +86,8 @@ async def get_user_language(db: AsyncSession, user_id: str, fallback: str = 'ru'
     return pref.language_code if pref else fallback
 
 async def get_conversation_history(db: AsyncSession, lead_id: int, limit: int = 20):
-    result = await db.execute(
-        select(Interaction)
-        .where(Interaction.lead_id == lead_id)
-        .order_by(Interaction.created_at.asc())
-    )
-    interactions = result.scalars().all()
-    history = []
-    for interaction in interactions:
-        if interaction.content and interaction.content not in ['received', 'sent', '[system: request confirmation]']:
-            history.append({'sender': 'user', 'text': interaction.content})
-        if interaction.outcome and interaction.outcome not in ['received', 'sent']:
-            history.append({'sender': 'bot', 'text': interaction.outcome})
+    # Tail window only; this module commits interactions directly, so it bypasses the shared cache
+    history = to_messages(await load_window(db, lead_id))
     logging.info(f'📚 Loaded history: {len(history)} messages for lead {lead_id}')
     return history[-limit:]
 
@@ -229,7 +185,8 @@ async def sales_chat(request: Request, company_id: int, chat_data: ChatMessage,
         
         # Обработка текстовых сообщений в режиме подтверждения
         if confirmation_status == 'pending':
-            if message_lower in ['да', 'yes', 'верно', 'correct', 'да все верно', 'все верно']:
+            intent = intent_classifier.classify(chat_data.message, language)
+            if intent.label == YES and intent.confident:
                 lead.contact_info['confirmation_status'] = 'confirmed'
                 lead.status = 'contacted'
                 attributes.flag_modified(lead, 'contact_info')
@@ -558,6 +515,10 @@ async def process_voice(request: Request, company_id: int, file: UploadFile = Fi
 
     interaction = Interaction(company_id=company_id, lead_id=lead_id, type='voice', content=transcribed_text, outcome=ai_response)
     db.add(interaction)
+    if not isinstance(lead.contact_info, dict):
+        lead.contact_info = {}
+    if entity_extractor.update(lead.contact_info, transcribed_text, ai_response):
+        attributes.flag_modified(lead, 'contact_info')
     await db.commit()
 
     return {'text': transcribed_text, 'response': ai_response, 'language': language}
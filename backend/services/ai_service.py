@@ -1,39 +1,41 @@
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator
+from collections import OrderedDict
+import hashlib
 import os
-import aiohttp
+import time
 from openai import AsyncOpenAI
 
+from services.http_clients import http_clients
+
 # OpenRouter для анализа (не Flowise)
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 OPENROUTER_MODEL = "openai/gpt-oss-120b:exacto" 
 
+# Per-tenant AI client registry settings
+AI_CLIENT_CACHE_SIZE = int(os.getenv("AI_CLIENT_CACHE_SIZE", "64"))
+AI_CLIENT_IDLE_TTL = int(os.getenv("AI_CLIENT_IDLE_TTL", "900"))  # seconds
+
 class AIService:
-    def __init__(self, company_id: int = None, ai_endpoint: str = None, ai_api_key: str = None):
+    def __init__(self, ai_endpoint: str = None, ai_api_key: str = None):
         # Priority: 1) Provided params 2) .env fallback
+        # One instance serves every tenant sharing these credentials: the company is passed per request
         self.agent_url = ai_endpoint or os.getenv("AI_AGENT_URL")
         self.agent_key = ai_api_key or os.getenv("AI_AGENT_KEY")
-        self.company_id = company_id
+        self.source = "DB" if (ai_endpoint and ai_api_key) else ".env"
         
         if self.agent_url and self.agent_key:
             self.client = AsyncOpenAI(
                 api_key=self.agent_key, 
-                base_url=self.agent_url + "/api/v1/"
+                base_url=self.agent_url + "/api/v1/",
+                http_client=http_clients.get('ai_agent')
             )
-            source = "DB" if (ai_endpoint and ai_api_key) else ".env"
-            print(f"✅ AI Agent configured from {source}: {self.agent_url[:50]}...")
+            print(f"✅ AI Agent configured from {self.source}: {self.agent_url[:50]}...")
         else:
             self.client = None
             print("⚠️ AI Agent not configured - check company AI settings or .env")
 
-    async def get_product_recommendation(self, user_query: str, history: List[Dict[str, str]], product_catalog: List[Dict[str, Any]], system_prompt: str = None, language: str = "ru") -> str:
-        # 🤖 MULTITENANCY LOG для КАЖДОГО запроса
-        source = "DB" if self.company_id else ".env"
-        logging.info(f"🤖 MULTITENANCY AI REQUEST from {source}, company_id={self.company_id}")
-        
-        if not self.client:
-            return "AI Agent not configured."
-        
+    def _build_messages(self, user_query: str, history: List[Dict[str, str]], language: str) -> list:
         # Build messages for agent - send ONLY user messages
         # Agent has its own flow, don't confuse it with our bot responses
         messages = []
@@ -63,6 +65,16 @@ class AIService:
             role = msg.get('role', '?')
             text = msg.get('content', '')[:100]  # First 100 chars
             logging.info(f"   [{i}] {role}: {text}")
+        return messages
+
+    async def get_product_recommendation(self, user_query: str, history: List[Dict[str, str]], product_catalog: List[Dict[str, Any]], system_prompt: str = None, language: str = "ru", company_id: int = None) -> str:
+        # 🤖 MULTITENANCY LOG для КАЖДОГО запроса
+        logging.info(f"🤖 MULTITENANCY AI REQUEST from {self.source}, company_id={company_id}")
+        
+        if not self.client:
+            return "AI Agent not configured."
+        
+        messages = self._build_messages(user_query, history, language)
         
         try:
             response = await self.client.chat.completions.create(
@@ -83,6 +95,37 @@ class AIService:
             print(f"❌ AI Error: {e}")
             return "Какую сферу хотели бы автоматизировать?"
 
+    async def stream_product_recommendation(self, user_query: str, history: List[Dict[str, str]], language: str = "ru", company_id: int = None) -> AsyncIterator[str]:
+        """Same request as get_product_recommendation, but yields text deltas as they arrive"""
+        logging.info(f"🤖 MULTITENANCY AI STREAM from {self.source}, company_id={company_id}")
+        
+        if not self.client:
+            yield "AI Agent not configured."
+            return
+        
+        messages = self._build_messages(user_query, history, language)
+        
+        sent_any = False
+        try:
+            stream = await self.client.chat.completions.create(
+                model="n/a",
+                messages=messages,
+                stream=True,
+                extra_body={"include_retrieval_info": False}
+            )
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content if chunk.choices[0].delta else None
+                if delta:
+                    sent_any = True
+                    yield delta
+        except Exception as e:
+            print(f"❌ AI Stream Error: {e}")
+        
+        if not sent_any:
+            yield "Какую сферу хотели бы автоматизировать?"
+
     async def generate_conversation_summary(self, history: List[Dict[str, str]], language: str = "ru", manager_language: str = "ru") -> str:
         """Generate summary using OpenRouter API (not Flowise agent)"""
         if not history:
@@ -158,45 +201,105 @@ class AIService:
         
         logging.info(f"🔍 OpenRouter: Sending summary request, lang={manager_language}")
         
-        # Используем OpenRouter напрямую через aiohttp
+        # Используем OpenRouter напрямую (shared keep-alive client)
         if not OPENROUTER_API_KEY:
             logging.error("❌ OPENROUTER_API_KEY not set!")
             return "Ошибка: OpenRouter API не настроен"
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": OPENROUTER_MODEL,
-                        "messages": messages,
-                        "max_tokens": 1000
-                    },
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as resp:
-                    if resp.status != 200:
-                        error_text = await resp.text()
-                        logging.error(f"❌ OpenRouter error: {resp.status} - {error_text[:200]}")
-                        return f"Ошибка API: {resp.status}"
-                    
-                    data = await resp.json()
-                    summary = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-                    print(f"✅ Summary via OpenRouter: {len(summary) if summary else 0} chars")
-                    return summary.strip() if summary else "Нет данных"
+            resp = await http_clients.get('openrouter').post(
+                "/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": OPENROUTER_MODEL,
+                    "messages": messages,
+                    "max_tokens": 1000
+                },
+                timeout=30.0
+            )
+            if resp.status_code != 200:
+                logging.error(f"❌ OpenRouter error: {resp.status_code} - {resp.text[:200]}")
+                return f"Ошибка API: {resp.status_code}"
+            
+            data = resp.json()
+            summary = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+            print(f"✅ Summary via OpenRouter: {len(summary) if summary else 0} chars")
+            return summary.strip() if summary else "Нет данных"
                     
         except Exception as e:
             print(f"❌ Summary Error: {e}")
             return f"Ошибка генерации: {str(e)}"
 
+class AIClientRegistry:
+    """
+    Bounded LRU of tenant AIService instances keyed by (endpoint, key hash).
+    Entries idle longer than idle_ttl are evicted; the HTTP pool itself is shared,
+    so evicting a client never closes connections other tenants are using.
+    """
+    def __init__(self, max_size: int = AI_CLIENT_CACHE_SIZE, idle_ttl: int = AI_CLIENT_IDLE_TTL):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self._entries = OrderedDict()  # key -> [AIService, last_used]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(ai_endpoint: str, ai_api_key: str):
+        return (ai_endpoint.rstrip('/'), hashlib.sha256(ai_api_key.encode()).hexdigest())
+
+    def _evict_idle(self, now: float):
+        while self._entries:
+            key, (_, last_used) = next(iter(self._entries.items()))
+            if now - last_used < self.idle_ttl:
+                break
+            del self._entries[key]
+            self.evictions += 1
+
+    def get(self, ai_endpoint: str, ai_api_key: str) -> AIService:
+        now = time.monotonic()
+        self._evict_idle(now)
+        key = self._key(ai_endpoint, ai_api_key)
+        entry = self._entries.get(key)
+        if entry:
+            self.hits += 1
+            entry[1] = now
+            self._entries.move_to_end(key)
+            return entry[0]
+        
+        self.misses += 1
+        service = AIService(ai_endpoint=ai_endpoint, ai_api_key=ai_api_key)
+        self._entries[key] = [service, now]
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return service
+
+    def invalidate(self, ai_endpoint: str = None, ai_api_key: str = None):
+        """Drop the client for old credentials (called when a company changes them)"""
+        if ai_endpoint and ai_api_key:
+            if self._entries.pop(self._key(ai_endpoint, ai_api_key), None):
+                logging.info(f"♻️ AI client invalidated for {ai_endpoint[:50]}")
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'idle_ttl': self.idle_ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
 # Default AI service instance (uses .env)
 ai_service = AIService()
+ai_client_registry = AIClientRegistry()
 
-def get_ai_service(company_id: int = None, ai_endpoint: str = None, ai_api_key: str = None):
-    """Get AI service instance with company-specific or default settings"""
+def get_ai_service(ai_endpoint: str = None, ai_api_key: str = None):
+    """Get AI service instance with company-specific or default settings (cached per credentials)"""
     if ai_endpoint and ai_api_key:
-        return AIService(company_id=company_id, ai_endpoint=ai_endpoint, ai_api_key=ai_api_key)
+        return ai_client_registry.get(ai_endpoint, ai_api_key)
     return ai_service
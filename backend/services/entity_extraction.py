@@ -0,0 +1,147 @@
+"""
+Incremental contact extraction (name, phone, confirmation question).
+
+Each turn feeds only its new messages (user message + bot reply) to the
+extractor, and the results are kept in lead.contact_info. Later turns read
+that state instead of re-scanning the whole history. The chat, voice and
+telegram paths all use the same precompiled patterns.
+
+Extraction state lives under contact_info['extraction']:
+    name_source   - 'bot' (AI confirmation "Вас зовут: X") or 'user' (direct answer)
+    confirm_q_age - bot replies since the last confirmation question (0 = latest reply, capped)
+"""
+import re
+from typing import Optional, List, Dict
+
+from services.intent_classifier import is_confirmation_question
+
+# "Вас зовут: Имя" / "зовут: Имя" in the AI confirmation message (most reliable)
+BOT_NAME_RE = re.compile(r'(?:Вас\s+)?зовут[:\s]+([А-ЯЁA-Z][а-яёa-z]+)', re.IGNORECASE)
+# Only simple user patterns to avoid false positives
+USER_NAME_PATTERNS = (
+    (re.compile(r'меня зовут\s+([А-ЯЁA-Z][а-яёa-z]+)'), 'меня зовут'),
+    (re.compile(r'^([А-ЯЁA-Z][а-яёa-z]{2,})$'), 'single name'),
+)
+NAME_STOPWORDS = {'да', 'нет', 'ок', 'уже', 'три', 'раза', 'хорошо', 'спасибо', 'привет'}
+
+_PHONE_SEPARATORS = re.compile(r'[\s\-\(\)]')
+PHONE_PATTERNS = (re.compile(r'\+?\d{10,15}'), re.compile(r'\d{3,4}\d{6,7}'))
+
+# Free-form name guess for the telegram flow ("Иван" / "Иван 87011234567")
+GUESS_IGNORE_WORDS = {
+    'привет', 'здравствуйте', 'добрый', 'день', 'утро', 'вечер',
+    'маркетинг', 'продажи', 'финансы', 'управление', 'sales', 'marketing',
+    'finance', 'management', 'нет', 'да', 'yes', 'no', 'хорошо', 'ok'
+}
+_BARE_PHONE = re.compile(r'\b\d{10,12}\b')
+# Telegram flow: RU/KZ-formatted number ("+7 (701) 123-45-67"), stored as digits only
+RU_PHONE_RE = re.compile(r'\b(?:\+?7|8)?[\s\-]?\(?\d{3}\)?[\s\-]?\d{3}[\s\-]?\d{2}[\s\-]?\d{2}\b')
+_NON_DIGITS = re.compile(r'\D')
+
+# A pending confirmation question counts for this many bot replies (last 3 messages)
+CONFIRM_Q_MAX_AGE = 1
+
+# contact_info keys update() writes
+CONTACT_KEYS = ('name', 'phone', 'extraction')
+
+
+class EntityExtractor:
+    """Precompiled name/phone patterns applied to the new messages of a turn"""
+
+    def phone(self, text: str) -> Optional[str]:
+        if not text:
+            return None
+        cleaned = _PHONE_SEPARATORS.sub('', text)
+        for pattern in PHONE_PATTERNS:
+            match = pattern.search(cleaned)
+            if match:
+                return match.group(0)
+        return None
+
+    def phone_ru(self, text: str) -> Optional[str]:
+        match = RU_PHONE_RE.search(text or '')
+        return _NON_DIGITS.sub('', match.group()) if match else None
+
+    def name_from_bot(self, text: str) -> Optional[str]:
+        match = BOT_NAME_RE.search(text or '')
+        return match.group(1).capitalize() if match else None
+
+    def name_from_user(self, text: str) -> Optional[str]:
+        text = (text or '').strip()
+        for pattern, _ in USER_NAME_PATTERNS:
+            match = pattern.search(text)
+            if match:
+                candidate = match.group(1).capitalize()
+                if len(candidate) > 2 and candidate.lower() not in NAME_STOPWORDS:
+                    return candidate
+        return None
+
+    def guess_name(self, text: str) -> Optional[str]:
+        """Looser heuristic for flows that just asked for the name"""
+        clean_text = (text or '').strip()
+        phone_match = _BARE_PHONE.search(clean_text)
+        if phone_match:
+            name_part = clean_text[:phone_match.start()].strip()
+            if name_part and 2 <= len(name_part) <= 30:
+                words = name_part.split()
+                if 1 <= len(words) <= 3 and not any(w.lower() in GUESS_IGNORE_WORDS for w in words):
+                    return name_part
+            return None
+
+        words = clean_text.split()
+        if any(w.lower() in GUESS_IGNORE_WORDS for w in words):
+            return None
+        if len(clean_text) > 30 or len(clean_text) < 2:
+            return None
+        if any(char.isdigit() for char in clean_text):
+            return None
+        return clean_text if 1 <= len(words) <= 2 else None
+
+    def update(self, contact_info: dict, user_text: str, bot_text: str, phone: str = None) -> dict:
+        """
+        Apply one turn to contact_info in place.
+        Returns the changed fields ({} if nothing changed) so the caller can mark the lead dirty.
+        """
+        state = dict(contact_info.get('extraction') or {})
+        changes = {}
+
+        name = self.name_from_bot(bot_text)
+        if name:
+            source = 'bot'
+        elif state.get('name_source') != 'bot':
+            # A bot-confirmed name is never overridden by a later user guess
+            name, source = self.name_from_user(user_text), 'user'
+        if name and (contact_info.get('name') != name or state.get('name_source') != source):
+            contact_info['name'] = name
+            state['name_source'] = source
+            changes['name'] = name
+
+        phone = phone or self.phone(user_text)
+        if phone and 'phone' not in contact_info:
+            contact_info['phone'] = phone
+            changes['phone'] = phone
+
+        if bot_text is not None:
+            # Capped so turns without a confirmation question stop writing the lead
+            age = 0 if is_confirmation_question(bot_text) else min(state.get('confirm_q_age', CONFIRM_Q_MAX_AGE) + 1, CONFIRM_Q_MAX_AGE + 1)
+            if state.get('confirm_q_age') != age:
+                state['confirm_q_age'] = age
+                changes['confirm_q_age'] = age
+
+        if changes:
+            contact_info['extraction'] = state
+        return changes
+
+    def has_confirmation_question(self, contact_info: dict, history: List[Dict[str, str]]) -> bool:
+        """Whether one of the last bot replies asked to confirm contact data"""
+        state = (contact_info or {}).get('extraction') or {}
+        if 'confirm_q_age' in state:
+            return state['confirm_q_age'] <= CONFIRM_Q_MAX_AGE
+        # Leads from before incremental extraction: scan the recent tail once
+        return any(
+            msg.get('sender') == 'bot' and is_confirmation_question(msg.get('text', ''))
+            for msg in history[-3:]
+        )
+
+
+entity_extractor = EntityExtractor()
@@ -0,0 +1,111 @@
+"""
+Conversation history store for chat/voice turns.
+
+Only the tail of a lead's conversation is ever sent to the AI, so history is
+read with a descending, limited query instead of loading every Interaction.
+The tail is kept in a per-lead ring buffer (bounded LRU over leads) that is
+updated write-through when a turn commits a new Interaction. When the hot
+table holds less than a window, the rest comes from the archived conversation.
+"""
+import logging
+import os
+from collections import OrderedDict, deque
+from typing import List, Dict, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Interaction
+from services.interaction_archive import unpack
+
+# Interactions kept per lead (one interaction = user message + bot reply)
+HISTORY_WINDOW = int(os.getenv('HISTORY_WINDOW', '30'))
+HISTORY_CACHE_SIZE = int(os.getenv('HISTORY_CACHE_SIZE', '5000'))
+
+# Service markers that are stored in interactions but are not conversation
+SKIP_MARKERS = ('received', 'sent', '[system: request confirmation]')
+
+
+def to_messages(rows, skip=SKIP_MARKERS) -> List[Dict[str, str]]:
+    """(content, outcome) rows in chronological order -> [{'sender', 'text'}]"""
+    history = []
+    for content, outcome in rows:
+        if content and content not in skip:
+            history.append({'sender': 'user', 'text': content})
+        if outcome and outcome not in ('received', 'sent'):
+            history.append({'sender': 'bot', 'text': outcome})
+    return history
+
+
+async def load_window(db: AsyncSession, lead_id: int, window: int = HISTORY_WINDOW) -> list:
+    """Last `window` interactions of a lead as (content, outcome), oldest first"""
+    result = await db.execute(
+        select(Interaction.content, Interaction.outcome)
+        .where(Interaction.lead_id == lead_id)
+        .order_by(Interaction.created_at.desc(), Interaction.id.desc())
+        .limit(window)
+    )
+    rows = list(reversed(result.all()))
+    if len(rows) < window:
+        # A lead that went quiet and came back has its earlier turns in interactions_archive
+        archived = await db.execute(text(
+            "SELECT payload FROM interactions_archive WHERE lead_id = :lid"
+        ), {'lid': lead_id})
+        payload = archived.scalar()
+        if payload:
+            rows = [(m[0], m[1]) for m in unpack(payload)[-(window - len(rows)):]] + rows
+    return rows
+
+
+class HistoryStore:
+    """Per-lead ring buffers of recent interactions with LRU eviction over leads"""
+
+    def __init__(self, window: int = HISTORY_WINDOW, max_leads: int = HISTORY_CACHE_SIZE):
+        self.window = window
+        self.max_leads = max_leads
+        self._buffers = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, db: AsyncSession, lead_id: int, limit: int = 20, skip=SKIP_MARKERS) -> List[Dict[str, str]]:
+        buffer = self._buffers.get(lead_id)
+        if buffer is not None:
+            self._buffers.move_to_end(lead_id)
+            self.hits += 1
+        else:
+            self.misses += 1
+            buffer = deque(await load_window(db, lead_id, self.window), maxlen=self.window)
+            self._put(lead_id, buffer)
+        history = to_messages(buffer, skip)
+        logging.info(f'📚 Loaded history: {len(history)} messages for lead {lead_id}')
+        return history[-limit:]
+
+    def append(self, lead_id: int, content: Optional[str], outcome: Optional[str]):
+        """Write-through for a committed Interaction. Leads not in cache are loaded on next read"""
+        buffer = self._buffers.get(lead_id)
+        if buffer is not None:
+            buffer.append((content, outcome))
+            self._buffers.move_to_end(lead_id)
+
+    def invalidate(self, lead_id: int):
+        self._buffers.pop(lead_id, None)
+
+    def _put(self, lead_id: int, buffer: deque):
+        self._buffers[lead_id] = buffer
+        self._buffers.move_to_end(lead_id)
+        while len(self._buffers) > self.max_leads:
+            self._buffers.popitem(last=False)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'leads': len(self._buffers),
+            'max_leads': self.max_leads,
+            'window': self.window,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+history_store = HistoryStore()
@@ -0,0 +1,121 @@
+"""
+Long-lived outbound HTTP clients, one per upstream.
+
+Every outbound call (OpenRouter, Telegram Bot API, Bitrix24, WhatsApp gateway,
+tenant AI agents) goes through a shared httpx.AsyncClient instead of opening a
+new session, so DNS/TLS/TCP setup is paid once per connection, not per request.
+Each upstream has its own connection limits, keep-alive and timeouts. Clients
+are created lazily and closed on app shutdown.
+"""
+import logging
+import os
+import time
+from typing import NamedTuple, Optional
+
+import httpx
+
+
+class Upstream(NamedTuple):
+    base_url: Optional[str]
+    max_connections: int
+    max_keepalive: int
+    timeout: float
+    connect_timeout: float = 5.0
+    keepalive_expiry: float = 60.0
+
+
+UPSTREAMS = {
+    'openrouter': Upstream('https://openrouter.ai/api/v1', 50, 20, 30.0),
+    'telegram': Upstream('https://api.telegram.org', 50, 20, 15.0),
+    # Per-tenant webhook URLs: absolute URLs, httpx keeps a pool per host
+    'bitrix24': Upstream(None, 20, 10, 15.0),
+    'whatsapp_gateway': Upstream(os.getenv('GATEWAY_URL', 'http://localhost:18789'), 10, 5, 30.0),
+    # Tenant AI agents (AsyncOpenAI clients share this pool)
+    'ai_agent': Upstream(None, 200, 50, 120.0, connect_timeout=10.0, keepalive_expiry=120.0),
+}
+
+
+class _UpstreamStats:
+    def __init__(self):
+        self.requests = 0
+        self.responses = 0
+        self.errors = 0
+        self.total_ms = 0.0
+
+
+class HTTPClientRegistry:
+    """Lazily created httpx clients keyed by upstream name"""
+
+    def __init__(self, upstreams: dict = UPSTREAMS):
+        self.upstreams = upstreams
+        self._clients = {}
+        self._stats = {name: _UpstreamStats() for name in upstreams}
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._clients[name] = self._create(name)
+        return client
+
+    def _create(self, name: str) -> httpx.AsyncClient:
+        cfg = self.upstreams[name]
+        stats = self._stats[name]
+
+        async def on_request(request):
+            stats.requests += 1
+            request.extensions['started'] = time.perf_counter()
+
+        async def on_response(response):
+            stats.responses += 1
+            stats.total_ms += (time.perf_counter() - response.request.extensions.get('started', time.perf_counter())) * 1000
+            if response.status_code >= 400:
+                stats.errors += 1
+
+        kwargs = {
+            'limits': httpx.Limits(
+                max_connections=cfg.max_connections,
+                max_keepalive_connections=cfg.max_keepalive,
+                keepalive_expiry=cfg.keepalive_expiry
+            ),
+            'timeout': httpx.Timeout(cfg.timeout, connect=cfg.connect_timeout),
+            'event_hooks': {'request': [on_request], 'response': [on_response]},
+        }
+        if cfg.base_url:
+            kwargs['base_url'] = cfg.base_url
+        logging.info(f'🌐 HTTP client created: {name}')
+        return httpx.AsyncClient(**kwargs)
+
+    async def aclose(self):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+    @staticmethod
+    def _pool_stats(client: httpx.AsyncClient) -> dict:
+        # httpcore pool internals; reported best-effort
+        pool = getattr(getattr(client, '_transport', None), '_pool', None)
+        connections = getattr(pool, 'connections', None)
+        if connections is None:
+            return {}
+        idle = sum(1 for c in connections if c.is_idle())
+        return {'open_connections': len(connections), 'idle_connections': idle}
+
+    def stats(self) -> dict:
+        report = {}
+        for name, cfg in self.upstreams.items():
+            s = self._stats[name]
+            client = self._clients.get(name)
+            report[name] = {
+                'active': client is not None and not client.is_closed,
+                'max_connections': cfg.max_connections,
+                'requests': s.requests,
+                # requests without a response yet (in flight or transport errors)
+                'pending_or_failed': s.requests - s.responses,
+                'http_errors': s.errors,
+                'avg_ms': round(s.total_ms / s.responses, 1) if s.responses else 0.0,
+                **(self._pool_stats(client) if client is not None else {}),
+            }
+        return report
+
+
+http_clients = HTTPClientRegistry()
@@ -0,0 +1,182 @@
+"""
+Local yes/no intent classifier for the six widget languages (ru/en/kz/ky/uz/uk).
+
+Replaces the "ДА или НЕТ" LLM round trip in sales_chat for the common case.
+Only when the lexicon is not confident enough (including when nothing in the
+message matched) the caller falls back to the LLM.
+"""
+import re
+from typing import NamedTuple, Optional
+
+YES, NO, OTHER = 'yes', 'no', 'other'
+
+# Single tokens per language (after normalization: lowercase, ё->е, unified apostrophes)
+YES_WORDS = {
+    'ru': {'да', 'ага', 'угу', 'конечно', 'верно', 'правильно', 'подтверждаю', 'согласен',
+           'согласна', 'ок', 'окей', 'хорошо', 'точно', 'именно', 'давайте', 'отлично'},
+    'en': {'yes', 'yeah', 'yep', 'yup', 'sure', 'correct', 'right', 'ok', 'okay', 'confirm',
+           'confirmed', 'exactly', 'agree', 'fine'},
+    'kz': {'иә', 'ия', 'иа', 'дұрыс', 'рас', 'әрине', 'жарайды', 'мақұл', 'растаймын'},
+    'ky': {'ооба', 'туура', 'макул', 'албетте', 'мейли', 'ырастайм'},
+    'uz': {'ha', 'xa', 'to\'g\'ri', 'togri', 'albatta', 'mayli', 'xo\'p', 'xop', 'tasdiqlayman'},
+    'uk': {'так', 'вірно', 'правильно', 'звісно', 'згоден', 'згодна', 'підтверджую', 'авжеж', 'добре'},
+}
+NO_WORDS = {
+    'ru': {'нет', 'неа', 'неверно', 'неправильно', 'ошибка', 'исправить', 'отмена', 'неточно'},
+    'en': {'no', 'nope', 'nah', 'wrong', 'incorrect', 'cancel', 'fix'},
+    'kz': {'жоқ', 'қате', 'түзету'},
+    'ky': {'жок', 'ката', 'оңдоо'},
+    'uz': {'yo\'q', 'yoq', 'noto\'g\'ri', 'notogri', 'xato'},
+    'uk': {'ні', 'невірно', 'неправильно', 'помилка', 'виправити'},
+}
+# Multi-token phrases are matched before single tokens: affirmative idioms with a
+# negation word ("нет проблем" must not count as "нет") and negations ("не верно" as "верно")
+YES_PHRASES = {
+    'ru': ('нет проблем', 'без проблем', 'не против', 'не возражаю'),
+    'en': ('no problem', 'no worries', 'of course', 'not a problem'),
+    'kz': ('қарсы емеспін',),
+    'ky': ('каршы эмесмин',),
+    'uz': ('muammo yo\'q', 'muammo yoq'),
+    'uk': ('без проблем', 'не проти', 'не заперечую'),
+}
+NO_PHRASES = {
+    'ru': ('не верно', 'не правильно', 'не так', 'не надо', 'не нужно', 'не то'),
+    'en': ('not correct', 'not right', 'is wrong'),
+    'kz': ('дұрыс емес', 'олай емес'),
+    'ky': ('туура эмес', 'андай эмес'),
+    'uz': ('to\'g\'ri emas', 'togri emas'),
+    'uk': ('не вірно', 'не правильно', 'не так', 'не треба'),
+}
+YES_SYMBOLS = {'+', '👍', '✅', '👌', '🙂'}
+NO_SYMBOLS = {'👎', '❌'}
+
+# Words that are yes/no only in one language and mean something else in others
+LANGUAGE_BOUND = {'так': 'uk', 'рас': 'kz', 'ha': 'uz', 'xa': 'uz'}
+
+# Keywords a bot message contains when it asks the user to confirm name/phone
+CONFIRM_QUESTION_KEYWORDS = ('верно', 'правильно', 'подтвердите', 'correct', 'confirm',
+                             'дұрыс', 'рас', 'туура', 'to\'g\'ri', 'вірно')
+
+CONFIDENCE_THRESHOLD = 0.7
+
+_APOSTROPHES = re.compile(r'[’ʻʼ`‘]')
+_TOKEN = re.compile(r"[\w']+|[+\-]|[^\w\s]", re.UNICODE)
+_PHONE_IN_TEXT = re.compile(r'\+?\d[\d\s()-]{7,}')
+
+
+class Intent(NamedTuple):
+    label: str
+    confidence: float
+    language: Optional[str] = None
+
+    @property
+    def confident(self) -> bool:
+        return self.confidence >= CONFIDENCE_THRESHOLD
+
+
+def normalize(text: str) -> str:
+    text = _APOSTROPHES.sub("'", (text or '').lower().replace('ё', 'е'))
+    return ' '.join(text.split())
+
+
+class IntentClassifier:
+    """Lexicon-based yes/no/other classifier with a confidence score"""
+
+    def __init__(self):
+        self._yes = self._index(YES_WORDS)
+        self._no = self._index(NO_WORDS)
+        self._yes_phrases = self._phrases(YES_PHRASES)
+        self._no_phrases = self._phrases(NO_PHRASES)
+
+    @staticmethod
+    def _index(lexicon: dict) -> dict:
+        index = {}
+        for lang, words in lexicon.items():
+            for w in words:
+                index.setdefault(w, lang)
+        return index
+
+    @staticmethod
+    def _phrases(lexicon: dict) -> list:
+        return [(lang, re.compile(rf'(?<!\w){re.escape(p)}(?!\w)'), len(p.split()))
+                for lang, phrases in lexicon.items() for p in phrases]
+
+    def _lookup(self, index: dict, token: str, language: str):
+        lang = index.get(token)
+        if lang is None:
+            return None, 0.0
+        bound = LANGUAGE_BOUND.get(token)
+        if bound and bound != language:
+            return None, 0.0
+        # Words from another language still count (users mix languages), but weigh less
+        return lang, 1.0 if lang in (language, 'en') else 0.85
+
+    def classify(self, text: str, language: str = 'ru') -> Intent:
+        norm = normalize(text)
+        if not norm:
+            return Intent(OTHER, 0.0)
+        if norm in ('-', '—'):
+            return Intent(NO, 1.0)
+
+        yes_score = no_score = 0.0
+        matched = 0
+        hit_lang = None
+
+        for lang, pattern, size in self._yes_phrases:
+            norm, hits = pattern.subn(' ', norm)
+            if hits:
+                yes_score += 1.0 if lang == language else 0.85
+                matched += size
+                hit_lang = hit_lang or lang
+        for lang, pattern, size in self._no_phrases:
+            norm, hits = pattern.subn(' ', norm)
+            if hits:
+                no_score += 1.0 if lang == language else 0.85
+                matched += size
+                hit_lang = hit_lang or lang
+
+        tokens = _TOKEN.findall(norm)
+        words = [t for t in tokens if t.isalnum() or "'" in t or t in YES_SYMBOLS or t in NO_SYMBOLS]
+        total = max(len(words) + matched, 1)
+        for tok in tokens:
+            if tok in YES_SYMBOLS:
+                yes_score += 1.0
+                matched += 1
+                continue
+            if tok in NO_SYMBOLS:
+                no_score += 1.0
+                matched += 1
+                continue
+            lang, weight = self._lookup(self._yes, tok, language)
+            if lang:
+                yes_score += weight
+                matched += 1
+                hit_lang = hit_lang or lang
+                continue
+            lang, weight = self._lookup(self._no, tok, language)
+            if lang:
+                no_score += weight
+                matched += 1
+                hit_lang = hit_lang or lang
+
+        if yes_score == 0 and no_score == 0:
+            # Nothing matched: free text ("пишите, жду звонка"), dialects or typos; the LLM decides
+            return Intent(OTHER, 0.3)
+        if yes_score and no_score:
+            return Intent(OTHER, 0.2, hit_lang)
+
+        label = YES if yes_score else NO
+        coverage = min(matched / total, 1.0)
+        confidence = min(max(yes_score, no_score), 1.0) * (0.55 + 0.45 * coverage)
+        if '?' in norm:
+            confidence *= 0.6  # "да?" is a question, not an answer
+        return Intent(label, round(confidence, 2), hit_lang)
+
+
+def is_confirmation_question(bot_text: str) -> bool:
+    """True if a bot message asks the user to confirm their contact data"""
+    text = normalize(bot_text)
+    return any(kw in text for kw in CONFIRM_QUESTION_KEYWORDS) or bool(_PHONE_IN_TEXT.search(text))
+
+
+intent_classifier = IntentClassifier()
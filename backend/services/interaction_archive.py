@@ -0,0 +1,193 @@
+"""
+Hot/cold split for conversation history.
+
+interactions keeps only conversations that were active within the last
+ARCHIVE_AFTER_DAYS days. Conversations that went quiet are moved by a
+periodic job, whole, into interactions_archive: one row per lead with the
+messages as zlib-compressed JSON. Bitrix24 export and notifications only
+touch the hot table. The CRM full report reads through both (conversation()),
+and chat history falls back to the archived tail when the hot part is short.
+
+Splitting by conversation rather than by month keeps lookups by lead_id to a
+single index probe and never splits a conversation that is still active.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import zlib
+from datetime import datetime
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db_session
+
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '90'))
+ARCHIVE_INTERVAL = float(os.getenv('ARCHIVE_INTERVAL', '21600'))
+ARCHIVE_BATCH = int(os.getenv('ARCHIVE_BATCH', '200'))
+# pg_try_advisory_xact_lock key: one archiver at a time across workers
+_LOCK_KEY = 7410022
+
+
+def pack(messages: list) -> bytes:
+    return zlib.compress(json.dumps(messages, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 6)
+
+
+def unpack(payload: bytes) -> list:
+    return json.loads(zlib.decompress(payload).decode('utf-8'))
+
+
+class InteractionArchive:
+    """Archival loop plus read-through of archived conversations"""
+
+    def __init__(self, after_days: int = ARCHIVE_AFTER_DAYS, interval: float = ARCHIVE_INTERVAL, batch: int = ARCHIVE_BATCH):
+        self.after_days = after_days
+        self.interval = interval
+        self.batch = batch
+        self._task = None
+        self.runs = 0
+        self.archived_leads = 0
+        self.archived_messages = 0
+        self.last_run = None
+
+    async def conversation(self, db: AsyncSession, lead_id: int) -> List[Tuple[str, str]]:
+        """Full conversation as (content, outcome), oldest first: archived part + hot part"""
+        archived = await db.execute(text(
+            "SELECT payload FROM interactions_archive WHERE lead_id = :lid"
+        ), {'lid': lead_id})
+        payload = archived.scalar()
+        rows = [(m[0], m[1]) for m in unpack(payload)] if payload else []
+        hot = await db.execute(text("""
+            SELECT content, outcome FROM interactions
+            WHERE lead_id = :lid ORDER BY created_at, id
+        """), {'lid': lead_id})
+        rows.extend((r[0], r[1]) for r in hot.fetchall())
+        return rows
+
+    async def archive_batch(self) -> Tuple[int, int]:
+        """Move up to `batch` quiet conversations; returns (leads, messages) moved"""
+        async with get_db_session() as db:
+            locked = await db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {'key': _LOCK_KEY})
+            if not locked.scalar():
+                return 0, 0
+            result = await db.execute(text("""
+                SELECT DISTINCT i.lead_id FROM interactions i
+                WHERE i.created_at < now() - make_interval(days => :days)
+                  AND NOT EXISTS (
+                      SELECT 1 FROM interactions r
+                      WHERE r.lead_id = i.lead_id AND r.created_at >= now() - make_interval(days => :days)
+                  )
+                LIMIT :lim
+            """), {'days': self.after_days, 'lim': self.batch})
+            lead_ids = [r[0] for r in result.fetchall() if r[0] is not None]
+
+            moved = 0
+            for lead_id in lead_ids:
+                moved += await self._archive_lead(db, lead_id)
+            await db.commit()
+
+        if lead_ids:
+            # Archived leads drop out of this process's history buffers too
+            from services.history_store import history_store
+            for lead_id in lead_ids:
+                history_store.invalidate(lead_id)
+        return len(lead_ids), moved
+
+    async def _archive_lead(self, db: AsyncSession, lead_id: int) -> int:
+        result = await db.execute(text("""
+            SELECT id, company_id, type, content, outcome, created_at FROM interactions
+            WHERE lead_id = :lid ORDER BY created_at NULLS FIRST, id
+            FOR UPDATE
+        """), {'lid': lead_id})
+        rows = result.fetchall()
+        if not rows:
+            return 0
+        await db.execute(text(
+            "DELETE FROM interactions WHERE id = ANY(:ids)"
+        ), {'ids': [r[0] for r in rows]})
+        messages = [[r[3], r[4], r[2], r[5].isoformat() if r[5] else None] for r in rows]
+
+        existing = await db.execute(text(
+            "SELECT payload FROM interactions_archive WHERE lead_id = :lid FOR UPDATE"
+        ), {'lid': lead_id})
+        payload = existing.scalar()
+        if payload:
+            # Lead came back after an earlier archival: append to its cold conversation
+            messages = unpack(payload) + messages
+
+        await db.execute(text("""
+            INSERT INTO interactions_archive (lead_id, company_id, message_count, first_at, last_at, payload)
+            VALUES (:lid, :cid, :count, :first_at, :last_at, :payload)
+            ON CONFLICT (lead_id) DO UPDATE SET
+                message_count = EXCLUDED.message_count,
+                last_at = EXCLUDED.last_at,
+                payload = EXCLUDED.payload,
+                archived_at = now()
+        """), {
+            'lid': lead_id, 'cid': rows[0][1], 'count': len(messages),
+            'first_at': rows[0][5], 'last_at': rows[-1][5], 'payload': pack(messages)
+        })
+        return len(rows)
+
+    async def run(self):
+        """Archive until no quiet conversations are left"""
+        leads = messages = 0
+        while True:
+            batch_leads, batch_messages = await self.archive_batch()
+            leads += batch_leads
+            messages += batch_messages
+            if batch_leads < self.batch:
+                break
+        self.runs += 1
+        self.archived_leads += leads
+        self.archived_messages += messages
+        self.last_run = time.time()
+        if leads:
+            logging.info(f'🗄 Archived {messages} interactions of {leads} quiet conversations')
+
+    async def start(self):
+        if self._task:
+            return
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run()
+            except Exception as e:
+                logging.error(f'❌ Interaction archival error: {e}')
+            await asyncio.sleep(self.interval)
+
+    async def stats(self) -> dict:
+        async with get_db_session() as db:
+            result = await db.execute(text("""
+                SELECT COUNT(*), COALESCE(SUM(message_count), 0), COALESCE(SUM(octet_length(payload)), 0)
+                FROM interactions_archive
+            """))
+            leads, messages, size = result.fetchone()
+        return {
+            'after_days': self.after_days,
+            'interval_s': self.interval,
+            'runs': self.runs,
+            'archived_leads_this_process': self.archived_leads,
+            'archived_messages_this_process': self.archived_messages,
+            'last_run': datetime.fromtimestamp(self.last_run).isoformat() if self.last_run else None,
+            'archive_leads': leads,
+            'archive_messages': messages,
+            'archive_bytes': size,
+        }
+
+
+interaction_archive = InteractionArchive()
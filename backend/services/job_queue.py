@@ -0,0 +1,231 @@
+"""
+Durable background job queue backed by the background_jobs table.
+
+Jobs are enqueued in the same transaction as the change that caused them (e.g.
+a lead confirmation), so they survive a restart. A dispatcher inside the
+backend process claims due jobs with FOR UPDATE SKIP LOCKED, runs them with a
+per-type concurrency limit and retries failures with exponential backoff.
+Jobs stuck in 'running' longer than JOB_VISIBILITY_TIMEOUT (worker crashed)
+go back to 'pending'. A handler that raises PermanentJobError is not retried;
+handlers with several external side effects can checkpoint() their payload so
+a retry skips the steps that already succeeded.
+"""
+import asyncio
+import json
+import logging
+import os
+from typing import Callable, NamedTuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db_session
+from models import BackgroundJob
+
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '2'))
+JOB_VISIBILITY_TIMEOUT = int(os.getenv('JOB_VISIBILITY_TIMEOUT', '300'))
+JOB_BACKOFF_BASE = float(os.getenv('JOB_BACKOFF_BASE', '10'))
+JOB_BACKOFF_MAX = float(os.getenv('JOB_BACKOFF_MAX', '900'))
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying could repeat a side effect (outcome unknown)"""
+
+
+class JobContext(NamedTuple):
+    id: int
+    job_type: str
+    attempt: int
+    max_attempts: int
+
+    @property
+    def last_attempt(self) -> bool:
+        return self.attempt >= self.max_attempts
+
+
+class JobType(NamedTuple):
+    handler: Callable
+    concurrency: int
+    max_attempts: int
+
+
+class JobQueue:
+    """Registry of job handlers plus the in-process dispatcher"""
+
+    def __init__(self):
+        self.types = {}
+        self._running = {}
+        self._tasks = set()
+        self._wakeup = asyncio.Event()
+        self._dispatcher = None
+        self._stopping = False
+
+    def handler(self, job_type: str, concurrency: int = 2, max_attempts: int = 5):
+        """Register `async def fn(payload: dict, job: JobContext)` for a job type"""
+        def register(fn):
+            self.types[job_type] = JobType(fn, concurrency, max_attempts)
+            return fn
+        return register
+
+    async def enqueue(self, db: AsyncSession, job_type: str, payload: dict, delay: float = 0) -> BackgroundJob:
+        """Stage a job on the caller's session; it becomes visible when the caller commits"""
+        job = BackgroundJob(job_type=job_type, payload=payload, max_attempts=self.types[job_type].max_attempts)
+        db.add(job)
+        if delay:
+            await db.flush()
+            await db.execute(text(
+                "UPDATE background_jobs SET run_at = now() + make_interval(secs => :delay) WHERE id = :id"
+            ), {'delay': delay, 'id': job.id})
+        return job
+
+    async def submit(self, job_type: str, payload: dict, delay: float = 0):
+        """Enqueue in its own transaction (for code that has no session, e.g. other jobs)"""
+        async with get_db_session() as db:
+            await self.enqueue(db, job_type, payload, delay)
+            await db.commit()
+        self.wake()
+
+    def wake(self):
+        self._wakeup.set()
+
+    async def checkpoint(self, job_id: int, payload: dict):
+        """Persist a running job's payload so the next attempt sees the progress recorded in it"""
+        async with get_db_session() as db:
+            await db.execute(text(
+                "UPDATE background_jobs SET payload = CAST(:payload AS jsonb) WHERE id = :id"
+            ), {'payload': json.dumps(payload, ensure_ascii=False), 'id': job_id})
+            await db.commit()
+
+    # --- dispatcher ---
+
+    async def start(self):
+        if self._dispatcher:
+            return
+        self._stopping = False
+        await self._requeue_stale()
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
+        logging.info(f'🧵 Job queue started: {", ".join(f"{t}x{c.concurrency}" for t, c in self.types.items())}')
+
+    async def stop(self, timeout: float = 10):
+        self._stopping = True
+        self.wake()
+        if self._dispatcher:
+            await self._dispatcher
+            self._dispatcher = None
+        if self._tasks:
+            # Unfinished jobs stay 'running' and are re-queued after the visibility timeout
+            await asyncio.wait(self._tasks, timeout=timeout)
+
+    def _free_types(self) -> list:
+        return [t for t, cfg in self.types.items() if self._running.get(t, 0) < cfg.concurrency]
+
+    async def _dispatch_loop(self):
+        last_requeue = asyncio.get_running_loop().time()
+        while not self._stopping:
+            try:
+                claimed = await self._claim(self._free_types())
+                if claimed:
+                    continue
+                now = asyncio.get_running_loop().time()
+                if now - last_requeue > JOB_VISIBILITY_TIMEOUT / 2:
+                    await self._requeue_stale()
+                    last_requeue = now
+            except Exception as e:
+                logging.error(f'❌ Job dispatcher error: {e}')
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim(self, job_types: list) -> bool:
+        if not job_types:
+            return False
+        async with get_db_session() as db:
+            result = await db.execute(text("""
+                UPDATE background_jobs SET status = 'running', locked_at = now(), attempts = attempts + 1
+                WHERE id = (
+                    SELECT id FROM background_jobs
+                    WHERE status = 'pending' AND run_at <= now() AND job_type = ANY(:types)
+                    ORDER BY run_at
+                    FOR UPDATE SKIP LOCKED
+                    LIMIT 1
+                )
+                RETURNING id, job_type, payload, attempts, max_attempts
+            """), {'types': job_types})
+            row = result.fetchone()
+            await db.commit()
+        if not row:
+            return False
+        job = JobContext(row[0], row[1], row[3], row[4])
+        self._running[job.job_type] = self._running.get(job.job_type, 0) + 1
+        task = asyncio.create_task(self._run(job, row[2] or {}))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _run(self, job: JobContext, payload: dict):
+        try:
+            await self.types[job.job_type].handler(payload, job)
+            await self._finish(job.id, 'done')
+            logging.info(f'✅ Job {job.job_type}#{job.id} done (attempt {job.attempt})')
+        except Exception as e:
+            if job.last_attempt or isinstance(e, PermanentJobError):
+                await self._finish(job.id, 'failed', error=str(e))
+                logging.error(f'❌ Job {job.job_type}#{job.id} failed permanently: {e}')
+            else:
+                delay = min(JOB_BACKOFF_BASE * 2 ** (job.attempt - 1), JOB_BACKOFF_MAX)
+                await self._retry(job.id, delay, str(e))
+                logging.warning(f'🔁 Job {job.job_type}#{job.id} attempt {job.attempt} failed, retry in {delay:.0f}s: {e}')
+        finally:
+            self._running[job.job_type] -= 1
+            self.wake()
+
+    async def _finish(self, job_id: int, status: str, error: str = None):
+        async with get_db_session() as db:
+            await db.execute(text("""
+                UPDATE background_jobs SET status = :status, finished_at = now(), locked_at = NULL,
+                       last_error = COALESCE(:error, last_error)
+                WHERE id = :id
+            """), {'status': status, 'error': error, 'id': job_id})
+            await db.commit()
+
+    async def _retry(self, job_id: int, delay: float, error: str):
+        async with get_db_session() as db:
+            await db.execute(text("""
+                UPDATE background_jobs SET status = 'pending', locked_at = NULL, last_error = :error,
+                       run_at = now() + make_interval(secs => :delay)
+                WHERE id = :id
+            """), {'delay': delay, 'error': error, 'id': job_id})
+            await db.commit()
+
+    async def _requeue_stale(self):
+        async with get_db_session() as db:
+            result = await db.execute(text("""
+                UPDATE background_jobs SET status = 'pending', locked_at = NULL
+                WHERE status = 'running' AND locked_at < now() - make_interval(secs => :timeout)
+            """), {'timeout': JOB_VISIBILITY_TIMEOUT})
+            await db.commit()
+        if result.rowcount:
+            logging.warning(f'♻️ Re-queued {result.rowcount} stale job(s)')
+
+    async def stats(self) -> dict:
+        """Queue depth per type/status plus in-process running counts"""
+        async with get_db_session() as db:
+            result = await db.execute(text("""
+                SELECT job_type, status, COUNT(*), MIN(run_at) FILTER (WHERE status = 'pending')
+                FROM background_jobs
+                WHERE status IN ('pending', 'running') OR finished_at > now() - interval '1 day'
+                GROUP BY job_type, status
+            """))
+            rows = result.fetchall()
+        report = {t: {'concurrency': cfg.concurrency, 'in_process': self._running.get(t, 0)} for t, cfg in self.types.items()}
+        for job_type, status, count, oldest_pending in rows:
+            entry = report.setdefault(job_type, {})
+            entry[status] = count
+            if oldest_pending:
+                entry['oldest_pending'] = oldest_pending.isoformat()
+        return report
+
+
+job_queue = JobQueue()
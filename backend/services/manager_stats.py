@@ -0,0 +1,140 @@
+"""
+Manager performance aggregates for the CRM leaderboard.
+
+Coins, completed deals and deal amounts are added to per-day buckets
+(manager_daily_stats) in the same transaction as the change that earned them,
+so a week/month leaderboard sums at most ~30 rows per manager instead of
+grouping lead_deals. All-time totals stay on company_managers. Responses are
+cached for LEADERBOARD_CACHE_TTL seconds per (company, period, sort) and
+dropped when this process records a change for the company. For
+REPLICA_MAX_LAG seconds after such a change the leaderboard is read from the
+primary, so a lagging replica can't put the old numbers back in the cache.
+"""
+import os
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import REPLICA_MAX_LAG
+
+LEADERBOARD_CACHE_TTL = float(os.getenv('LEADERBOARD_CACHE_TTL', '30'))
+LEADERBOARD_SIZE = 10
+
+# Buckets per period, today included
+PERIOD_DAYS = {'week': 7, 'month': 30}
+_SORT_COLUMNS = {'coins': 'coins', 'amount': 'total_deal_amount', 'deals': 'deals_count'}
+
+
+class ManagerStats:
+    """Daily bucket writes plus the cached leaderboard read"""
+
+    def __init__(self, ttl: float = LEADERBOARD_CACHE_TTL):
+        self.ttl = ttl
+        self._cache = {}
+        self._changed_at = {}  # company_id -> monotonic time of the last invalidate()
+        self.hits = 0
+        self.misses = 0
+
+    async def record(self, db: AsyncSession, company_id: int, manager_id: Optional[int],
+                     coins: int = 0, deals: int = 0, amount: float = 0, deal_id: int = None):
+        """
+        Add to today's bucket (or to the deal's creation day when deal_id is given,
+        matching how period deals were counted before). The caller commits and
+        then calls invalidate(company_id).
+        """
+        if not manager_id or not (coins or deals or amount):
+            return
+        params = {'cid': company_id, 'mid': manager_id, 'coins': coins, 'deals': deals, 'amount': amount or 0}
+        day_sql = "CURRENT_DATE"
+        if deal_id:
+            day_sql = "COALESCE((SELECT created_at::date FROM lead_deals WHERE id = :did), CURRENT_DATE)"
+            params['did'] = deal_id
+        await db.execute(text(f"""
+            INSERT INTO manager_daily_stats (company_id, manager_id, day, coins, deals_count, deal_amount)
+            VALUES (:cid, :mid, {day_sql}, :coins, :deals, :amount)
+            ON CONFLICT (company_id, manager_id, day) DO UPDATE SET
+                coins = manager_daily_stats.coins + EXCLUDED.coins,
+                deals_count = manager_daily_stats.deals_count + EXCLUDED.deals_count,
+                deal_amount = manager_daily_stats.deal_amount + EXCLUDED.deal_amount
+        """), params)
+
+    def invalidate(self, company_id: int):
+        self._changed_at[company_id] = time.monotonic()
+        for key in [k for k in self._cache if k[0] == company_id]:
+            del self._cache[key]
+
+    def needs_primary(self, company_id: int) -> bool:
+        """True while a replica may still miss the company's latest change"""
+        changed_at = self._changed_at.get(company_id)
+        if changed_at is None:
+            return False
+        if time.monotonic() - changed_at < REPLICA_MAX_LAG:
+            return True
+        del self._changed_at[company_id]
+        return False
+
+    async def leaderboard(self, db: AsyncSession, company_id: int, period: str = 'all', sort: str = 'coins') -> list:
+        sort_column = _SORT_COLUMNS.get(sort, 'coins')
+        days = PERIOD_DAYS.get(period)
+        key = (company_id, days, sort_column)
+        entry = self._cache.get(key)
+        if entry and time.monotonic() - entry[1] < self.ttl:
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        started = time.monotonic()
+
+        if days:
+            result = await db.execute(text(f"""
+                SELECT m.user_id, m.full_name,
+                       COALESCE(s.coins, 0) AS coins,
+                       COALESCE(s.deals_count, 0) AS deals_count,
+                       COALESCE(s.total_deal_amount, 0) AS total_deal_amount
+                FROM company_managers m
+                LEFT JOIN (
+                    SELECT manager_id, SUM(coins) AS coins, SUM(deals_count) AS deals_count,
+                           SUM(deal_amount) AS total_deal_amount
+                    FROM manager_daily_stats
+                    WHERE company_id = :cid AND day > CURRENT_DATE - CAST(:days AS INTEGER)
+                    GROUP BY manager_id
+                ) s ON s.manager_id = m.user_id
+                WHERE m.company_id = :cid AND m.is_active = TRUE
+                ORDER BY {sort_column} DESC LIMIT :lim
+            """), {'cid': company_id, 'days': days, 'lim': LEADERBOARD_SIZE})
+        else:
+            result = await db.execute(text(f"""
+                SELECT user_id, full_name,
+                       COALESCE(coins, 0) AS coins,
+                       COALESCE(deals_count, 0) AS deals_count,
+                       COALESCE(total_deal_amount, 0) AS total_deal_amount
+                FROM company_managers
+                WHERE company_id = :cid AND is_active = TRUE
+                ORDER BY {sort_column} DESC LIMIT :lim
+            """), {'cid': company_id, 'lim': LEADERBOARD_SIZE})
+
+        board = [{
+            "user_id": r[0],
+            "full_name": r[1],
+            "coins": r[2],
+            "deals_count": r[3],
+            "total_deal_amount": float(r[4])
+        } for r in result.fetchall()]
+        # A change committed while this read ran makes the result stale already
+        if self._changed_at.get(company_id, 0) < started:
+            self._cache[key] = (board, time.monotonic())
+        return board
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'cached_boards': len(self._cache),
+            'ttl_s': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+manager_stats = ManagerStats()
@@ -0,0 +1,159 @@
+"""
+Per-company lead status graph for the CRM status button.
+
+A company's lead_status_settings rows (id, sort order, coins, emoji, name)
+are loaded once into a StatusGraph that answers "is this transition allowed
+and how many coins does it award" without touching the database. Graphs are
+cached for STATUS_GRAPH_TTL seconds and invalidated by update_status_coins
+(in this process; other workers pick changes up on TTL).
+
+Transition rules (by sort_order):
+    6  (Отказ)             - allowed from anywhere
+    21 (Повторная сделка)  - only from 5 or 6; the lead goes back to sort 2 (В работе)
+    from 5 (Завершён)      - only to 6 or 21
+    from 6                 - only to 21
+    otherwise              - one step forward or back
+"""
+import os
+import time
+from typing import NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+STATUS_GRAPH_TTL = float(os.getenv('STATUS_GRAPH_TTL', '300'))
+
+SORT_IN_PROGRESS = 2
+SORT_COMPLETED = 5
+SORT_REJECTED = 6
+SORT_REPEAT_DEAL = 21
+
+# Legacy text statuses stored on leads before status ids
+LEGACY_STATUS_IDS = {'new': 4, 'in_progress': 8, 'negotiation': 12, 'awaiting_payment': 16, 'completed': 20, 'rejected': 24}
+DEFAULT_STATUS_ID = 4
+
+
+class Status(NamedTuple):
+    id: int
+    sort_order: int
+    coins: int
+    emoji: Optional[str]
+    name: Optional[str]
+
+
+_UNKNOWN = Status(0, 0, 0, '🆕', 'Новый')
+
+
+class Transition(NamedTuple):
+    status_id: int      # status the lead ends up in
+    emoji: str
+    name: str
+    coins: int          # coins awarded (negative = deducted)
+    creates_deal: bool  # lead became "Завершён": open a deal awaiting its amount
+
+
+class TransitionError(Exception):
+    """Transition not allowed; the message is shown to the manager"""
+
+
+class StatusGraph:
+    def __init__(self, statuses: list):
+        self.by_id = {s.id: s for s in statuses}
+        self.by_sort = {}
+        for s in statuses:
+            self.by_sort.setdefault(s.sort_order, s)
+
+    @staticmethod
+    def status_id(value) -> int:
+        value = str(value) if value is not None else ''
+        if value.isdigit():
+            return int(value)
+        return LEGACY_STATUS_IDS.get(value, DEFAULT_STATUS_ID)
+
+    def get(self, status_id: int) -> Status:
+        return self.by_id.get(status_id, _UNKNOWN)
+
+    def transition(self, current_value, requested_value) -> Optional[Transition]:
+        """None if the lead is already in that status; raises TransitionError if not allowed"""
+        requested = self.get(self.status_id(requested_value)) if str(requested_value).isdigit() else _UNKNOWN
+        target_id = self.status_id(requested_value)
+        if requested.sort_order == SORT_REPEAT_DEAL and SORT_IN_PROGRESS in self.by_sort:
+            target_id = self.by_sort[SORT_IN_PROGRESS].id
+
+        current_id = self.status_id(current_value or DEFAULT_STATUS_ID)
+        if target_id == current_id:
+            return None
+
+        current = self.get(current_id)
+        target = self.get(target_id)
+
+        if requested.sort_order == SORT_REJECTED:
+            pass
+        elif requested.sort_order == SORT_REPEAT_DEAL:
+            if current.sort_order not in (SORT_COMPLETED, SORT_REJECTED):
+                raise TransitionError("Повторная сделка только после Завершён или Отказ")
+        elif current.sort_order == SORT_COMPLETED:
+            if requested.sort_order not in (SORT_REJECTED, SORT_REPEAT_DEAL):
+                raise TransitionError("Из Завершён только Отказ или Повторная")
+        elif current.sort_order == SORT_REJECTED:
+            raise TransitionError("Из Отказа только Повторная сделка")
+        elif abs(target.sort_order - current.sort_order) > 1:
+            raise TransitionError("Нельзя перепрыгивать статусы")
+
+        if requested.sort_order == SORT_REPEAT_DEAL:
+            coins = self.by_sort[SORT_REPEAT_DEAL].coins or 0
+        elif target.sort_order > current.sort_order:
+            coins = target.coins or 0
+        else:
+            coins = -(current.coins or 0)
+
+        return Transition(
+            status_id=target_id,
+            emoji=target.emoji or '🆕',
+            name=target.name or 'Новый',
+            coins=coins,
+            creates_deal=target.sort_order == SORT_COMPLETED
+        )
+
+
+class StatusGraphCache:
+    """company_id -> (StatusGraph, loaded_at) with TTL and explicit invalidation"""
+
+    def __init__(self, ttl: float = STATUS_GRAPH_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, db: AsyncSession, company_id: int) -> StatusGraph:
+        entry = self._entries.get(company_id)
+        if entry and time.monotonic() - entry[1] < self.ttl:
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        result = await db.execute(text("""
+            SELECT id, sort_order, coins, emoji, name FROM lead_status_settings
+            WHERE company_id = :cid ORDER BY sort_order, id
+        """), {'cid': company_id})
+        statuses = [Status(r[0], r[1] or 0, r[2] or 0, r[3], r[4]) for r in result.fetchall()]
+        graph = StatusGraph(statuses)
+        # Companies whose statuses are not created yet are not cached
+        if statuses:
+            self._entries[company_id] = (graph, time.monotonic())
+        return graph
+
+    def invalidate(self, company_id: int):
+        self._entries.pop(company_id, None)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'companies': len(self._entries),
+            'ttl_s': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+status_graphs = StatusGraphCache()
@@ -2,6 +2,7 @@
 Step detection and dynamic prompt for lead collection.
 Upload to server and run to fix the looping issue.
 """
+from services.intent_classifier import intent_classifier, YES, NO
 
 STEP_PROMPTS = {
     'ask_sphere': """Ты консультант BizDNAi. Спроси клиента какую сферу бизнеса он хочет автоматизировать.
@@ -49,13 +50,11 @@ def detect_step(history, user_message):
     import re
     has_phone = bool(re.search(r'\d{6,}', user_message))
     
-    # Check for "no" answers
-    no_words = ['нет', 'больше нет', 'никакую', 'не нужно', 'хватит', 'достаточно']
-    is_no = any(w in user_message.lower() for w in no_words)
-    
-    # Check for "yes" confirmation
-    yes_words = ['да', 'верно', 'правильно', 'ок', 'yes']
-    is_yes = any(w in user_message.lower() for w in yes_words)
+    # Check for "no" / "yes" answers (shared multilingual lexicon)
+    intent = intent_classifier.classify(user_message)
+    no_more_words = ['никакую', 'хватит', 'достаточно']
+    is_no = intent.label == NO or any(w in user_message.lower() for w in no_more_words)
+    is_yes = intent.label == YES
     
     # Detect step
     if not history or len(history) <= 1:
@@ -1,9 +1,10 @@
 import os
 import logging
-import aiohttp
 import re
 from typing import List, Dict
 
+from services.http_clients import http_clients
+
 class TelegramService:
     def __init__(self):
         self.bot_token = os.getenv('BOT_TOKEN')
@@ -36,7 +37,7 @@ class TelegramService:
 
         try:
             logging.info(f'📱 Sending Telegram notification to {chat_id}...')
-            api_url = f'https://api.telegram.org/bot{token}'
+            api_path = f'/bot{token}'
             
             # Clean AI summary from HTML tags
             clean_summary = self._clean_html_tags(ai_summary)
@@ -60,22 +61,20 @@ class TelegramService:
 ---
 <i>Отправлено автоматически от BizDNAi Sales Agent</i>'''
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f'{api_url}/sendMessage',
-                    json={
-                        'chat_id': chat_id,
-                        'text': message,
-                        'parse_mode': 'HTML'
-                    }
-                ) as resp:
-                    if resp.status == 200:
-                        logging.info(f'✅ Telegram notification sent successfully')
-                        return True
-                    else:
-                        error_text = await resp.text()
-                        logging.error(f'❌ Telegram API error: {resp.status} - {error_text}')
-                        return False
+            resp = await http_clients.get('telegram').post(
+                f'{api_path}/sendMessage',
+                json={
+                    'chat_id': chat_id,
+                    'text': message,
+                    'parse_mode': 'HTML'
+                }
+            )
+            if resp.status_code == 200:
+                logging.info(f'✅ Telegram notification sent successfully')
+                return True
+            else:
+                logging.error(f'❌ Telegram API error: {resp.status_code} - {resp.text}')
+                return False
             
         except Exception as e:
             logging.error(f'❌ Failed to send Telegram notification: {e}')
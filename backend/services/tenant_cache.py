@@ -0,0 +1,86 @@
+"""
+Tenant configuration cache.
+
+Hot paths (chat, voice, notifications, widget config) only need a handful of
+Company columns. They get an immutable TenantConfig snapshot from this cache
+instead of loading the full Company row every time. Entries expire after
+TENANT_CACHE_TTL seconds and are invalidated explicitly by the endpoints that
+modify a company (in this process; other workers pick changes up on TTL).
+"""
+import logging
+import os
+import time
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Company
+
+TENANT_CACHE_TTL = float(os.getenv('TENANT_CACHE_TTL', '60'))
+
+
+class TenantConfig(NamedTuple):
+    id: int
+    name: Optional[str]
+    email: Optional[str]
+    logo_url: Optional[str]
+    bot_token: Optional[str]
+    admin_chat_id: Optional[int]
+    ai_endpoint: Optional[str]
+    ai_api_key: Optional[str]
+    default_language: Optional[str]
+    tier: Optional[str]
+    tier_expiry: Optional[datetime]
+    ai_package: Optional[str]
+    web_avatar_enabled: Optional[bool]
+    crm_type: Optional[str]
+    integration_enabled: Optional[bool]
+    integration_type: Optional[str]
+    bitrix24_webhook_url: Optional[str]
+
+
+_COLUMNS = [getattr(Company, field) for field in TenantConfig._fields]
+
+
+class TenantConfigCache:
+    """company_id -> (TenantConfig, loaded_at) with TTL and explicit invalidation"""
+
+    def __init__(self, ttl: float = TENANT_CACHE_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, db: AsyncSession, company_id: int) -> Optional[TenantConfig]:
+        entry = self._entries.get(company_id)
+        if entry and time.monotonic() - entry[1] < self.ttl:
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        result = await db.execute(select(*_COLUMNS).where(Company.id == company_id))
+        row = result.first()
+        if row is None:
+            self._entries.pop(company_id, None)
+            return None
+        config = TenantConfig(*row)
+        self._entries[company_id] = (config, time.monotonic())
+        return config
+
+    def invalidate(self, company_id: int):
+        if self._entries.pop(company_id, None):
+            logging.info(f'♻️ Tenant config cache invalidated for company {company_id}')
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'companies': len(self._entries),
+            'ttl_s': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+tenant_cache = TenantConfigCache()
@@ -0,0 +1,81 @@
+"""
+Chat turn pipeline helpers: per-stage timings and bounded concurrent AI calls.
+
+Independent AI calls of one turn (main reply, confirmation check) are started
+together instead of one after another. A process-wide semaphore caps the number
+of in-flight AI requests so a burst of turns cannot open unbounded connections.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+AI_MAX_CONCURRENCY = int(os.getenv('AI_MAX_CONCURRENCY', '32'))
+_ai_semaphore = asyncio.Semaphore(AI_MAX_CONCURRENCY)
+
+# Last N durations (ms) per "<pipeline>.<stage>" for p50/p95 reporting
+STAGE_SAMPLES = {}
+_SAMPLE_SIZE = 500
+
+
+def _record(key: str, ms: float):
+    STAGE_SAMPLES.setdefault(key, deque(maxlen=_SAMPLE_SIZE)).append(ms)
+
+
+class TurnPipeline:
+    """Collects stage timings of one turn and runs AI calls concurrently"""
+
+    def __init__(self, label: str = 'chat'):
+        self.label = label
+        self.timings = {}
+        self._started = time.perf_counter()
+
+    @asynccontextmanager
+    async def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - started) * 1000)
+
+    def record(self, name: str, ms: float):
+        """Add a duration measured outside of stage(), e.g. time to first streamed token"""
+        self.timings[name] = self.timings.get(name, 0) + ms
+        _record(f'{self.label}.{name}', ms)
+
+    async def _timed(self, name: str, coro):
+        async with _ai_semaphore:
+            async with self.stage(name):
+                return await coro
+
+    async def gather(self, **calls) -> dict:
+        """Run named coroutines concurrently; a failed call yields its exception as the result"""
+        names = list(calls)
+        results = await asyncio.gather(
+            *(self._timed(name, calls[name]) for name in names),
+            return_exceptions=True
+        )
+        return dict(zip(names, results))
+
+    def finish(self):
+        total = (time.perf_counter() - self._started) * 1000
+        _record(f'{self.label}.total', total)
+        stages = ' '.join(f'{k}={v:.0f}ms' for k, v in self.timings.items())
+        logging.info(f'⏱ {self.label} turn {total:.0f}ms: {stages}')
+        return total
+
+
+def _percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[idx], 1)
+
+
+def get_stage_stats() -> dict:
+    """p50/p95 per pipeline stage over the last samples"""
+    return {
+        key: {'count': len(v), 'p50_ms': _percentile(v, 50), 'p95_ms': _percentile(v, 95)}
+        for key, v in STAGE_SAMPLES.items() if v
+    }
@@ -0,0 +1,154 @@
+"""
+Turn-scoped unit of work.
+
+One chat/voice turn = one transaction: handlers stage lead/interaction/session
+mutations on the session and the unit of work commits them once at the end.
+Every SQL statement and COMMIT issued while a turn is active is counted so the
+number of round trips per turn shows up in logs and in TURN_STATS.
+"""
+import json
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import flag_modified
+
+from database import engine, DB_RELEASE_DURING_AI
+
+_current_turn: ContextVar[Optional["TurnUnitOfWork"]] = ContextVar('_current_turn', default=None)
+
+# Aggregated per-endpoint counters: {'chat': {'turns': .., 'statements': .., 'commits': ..}}
+TURN_STATS = {}
+
+
+@event.listens_for(engine.sync_engine, 'before_cursor_execute')
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    uow = _current_turn.get()
+    if uow is not None:
+        uow.statements += 1
+
+
+class TurnUnitOfWork:
+    """Accumulate all mutations of one turn and flush them in a single transaction"""
+
+    def __init__(self, db: AsyncSession, label: str = 'chat'):
+        self.db = db
+        self.label = label
+        self.statements = 0
+        self.commits = 0
+        self._token = None
+        self._started = 0.0
+        self._commit_callbacks = []
+        self._pre_commit = []
+
+    def _on_commit(self, session):
+        self.commits += 1
+
+    async def __aenter__(self):
+        self._started = time.perf_counter()
+        self._token = _current_turn.set(self)
+        event.listen(self.db.sync_session, 'after_commit', self._on_commit)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                await self._commit()
+            else:
+                await self.db.rollback()
+        finally:
+            event.remove(self.db.sync_session, 'after_commit', self._on_commit)
+            _current_turn.reset(self._token)
+            self._record(failed=exc_type is not None)
+        return False
+
+    async def _commit(self):
+        for statement in self._pre_commit:
+            await statement()
+        await self.db.commit()
+        for callback in self._commit_callbacks:
+            callback()
+        self._pre_commit.clear()
+        self._commit_callbacks.clear()
+
+    async def release(self):
+        """
+        Commit what the turn has staged so far and return the connection to the
+        pool before a slow AI call (only with DB_RELEASE_DURING_AI). The rest of
+        the turn runs in a new transaction on the same session.
+        """
+        if DB_RELEASE_DURING_AI and self.db.in_transaction():
+            await self._commit()
+
+    def add(self, obj):
+        self.db.add(obj)
+        return obj
+
+    def touch(self, obj, *attrs: str):
+        """Mark mutated JSONB attributes dirty so they are part of the final flush"""
+        for attr in attrs:
+            flag_modified(obj, attr)
+
+    def merge(self, obj, attr: str, keys):
+        """
+        Write `keys` of a JSONB attribute mutated in place as a merge into the stored
+        value (`attr || changes`) at commit, instead of flushing the whole dict loaded
+        at the start of the turn: background jobs set other keys of the same document.
+        """
+        async def statement():
+            await self.db.flush()  # a lead created this turn needs its id
+            value = getattr(obj, attr) or {}
+            await self.db.execute(text(f"""
+                UPDATE {obj.__table__.name} SET {attr} = COALESCE({attr}, '{{}}'::jsonb) || CAST(:changes AS jsonb)
+                WHERE id = :id
+            """), {'changes': json.dumps({k: value[k] for k in keys if k in value}, ensure_ascii=False), 'id': obj.id})
+        self.before_commit(statement)
+
+    def on_commit(self, callback):
+        """Run callback (e.g. a cache write-through) only once the turn is committed"""
+        self._commit_callbacks.append(callback)
+
+    def before_commit(self, statement):
+        """
+        Run `async statement()` as the last step of the turn transaction.
+        For updates of shared rows (e.g. per-company counters): the row lock is
+        then held only until the commit, not for the rest of the turn.
+        """
+        self._pre_commit.append(statement)
+
+    async def flush(self):
+        """Flush pending rows when generated ids are needed mid-turn (no commit)"""
+        await self.db.flush()
+
+    def _record(self, failed: bool = False):
+        elapsed_ms = (time.perf_counter() - self._started) * 1000
+        stats = TURN_STATS.setdefault(self.label, {'turns': 0, 'failed': 0, 'statements': 0, 'commits': 0})
+        stats['turns'] += 1
+        stats['failed'] += int(failed)
+        stats['statements'] += self.statements
+        stats['commits'] += self.commits
+        logging.info(
+            f'🧾 UoW {self.label}: {self.statements} statements, {self.commits} commit(s), '
+            f'{elapsed_ms:.0f}ms{" (rolled back)" if failed else ""}'
+        )
+
+
+def current_turn() -> Optional[TurnUnitOfWork]:
+    """Unit of work of the turn running in this context, if any"""
+    return _current_turn.get()
+
+
+def get_turn_stats() -> dict:
+    """Average round trips per turn for each endpoint"""
+    report = {}
+    for label, s in TURN_STATS.items():
+        turns = s['turns'] or 1
+        report[label] = {
+            **s,
+            'avg_statements_per_turn': round(s['statements'] / turns, 2),
+            'avg_commits_per_turn': round(s['commits'] / turns, 2),
+        }
+    return report
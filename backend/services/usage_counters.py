@@ -0,0 +1,192 @@
+"""
+Per-company usage counters for tier limits.
+
+Counters live on the companies row (leads_used_this_month, web_widgets_used,
+social_widgets_used, avatar_widgets_used) and are updated in the same
+transaction as the lead/widget change, so tier checks and the usage report are
+a single primary-key read instead of counting leads and widgets.
+
+The monthly lead counter belongs to the period in leads_reset_date (UTC month
+start); a counter from an older period reads as 0 and restarts on the next
+increment. A periodic reconcile recounts the source tables to correct drift
+from out-of-band changes (scripts, manual SQL).
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db_session
+from services.unit_of_work import current_turn
+
+USAGE_RECONCILE_INTERVAL = float(os.getenv('USAGE_RECONCILE_INTERVAL', '3600'))
+
+# Current period (naive UTC month start, same type as companies.leads_reset_date)
+_PERIOD = "date_trunc('month', now() AT TIME ZONE 'UTC')"
+
+_WIDGET_COLUMNS = {'web': 'web_widgets_used', 'social': 'social_widgets_used', 'avatar': 'avatar_widgets_used'}
+
+
+class Usage(NamedTuple):
+    leads_this_month: int
+    web_widgets: int
+    social_widgets: int
+    avatar_widgets: int
+
+
+def month_start() -> datetime:
+    return datetime.now(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+class UsageCounters:
+    """Transactional counter updates, O(1) reads and the reconcile loop"""
+
+    def __init__(self, interval: float = USAGE_RECONCILE_INTERVAL):
+        self.interval = interval
+        self._task = None
+        self.reconciles = 0
+        self.corrected = 0
+        self.last_reconcile = None
+
+    async def get(self, db: AsyncSession, company_id: int, lock: bool = False) -> Optional[Usage]:
+        """
+        Current usage. lock=True takes the companies row lock, so a limit check
+        followed by a create in the same transaction cannot be raced past the limit.
+        """
+        result = await db.execute(text(f"""
+            SELECT CASE WHEN leads_reset_date = {_PERIOD} THEN COALESCE(leads_used_this_month, 0) ELSE 0 END,
+                   COALESCE(web_widgets_used, 0), COALESCE(social_widgets_used, 0), COALESCE(avatar_widgets_used, 0)
+            FROM companies WHERE id = :cid
+            {'FOR UPDATE' if lock else ''}
+        """), {'cid': company_id})
+        row = result.first()
+        return Usage(*row) if row else None
+
+    async def lead_created(self, db: AsyncSession, company_id: int):
+        await self._add_leads(db, company_id, 1)
+
+    async def lead_deleted(self, db: AsyncSession, lead):
+        """Call before deleting the lead; only leads of the current period are counted"""
+        created_at = lead.created_at
+        if created_at is None:
+            return
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        if created_at >= month_start():
+            await self._add_leads(db, lead.company_id, -1)
+
+    async def _add_leads(self, db: AsyncSession, company_id: int, delta: int):
+        async def apply():
+            await db.execute(text(f"""
+                UPDATE companies SET
+                    leads_used_this_month = CASE WHEN leads_reset_date = {_PERIOD}
+                        THEN GREATEST(COALESCE(leads_used_this_month, 0) + :delta, 0)
+                        ELSE GREATEST(:delta, 0) END,
+                    leads_reset_date = {_PERIOD}
+                WHERE id = :cid
+            """), {'delta': delta, 'cid': company_id})
+
+        # Inside a chat/voice turn the transaction spans the LLM call:
+        # update the shared companies row right before the commit instead
+        turn = current_turn()
+        if turn is not None and turn.db is db:
+            turn.before_commit(apply)
+        else:
+            await apply()
+
+    async def widgets_changed(self, db: AsyncSession, company_id: int, web: int = 0, social: int = 0, avatar: int = 0):
+        """Apply active-widget deltas (an avatar widget is also a social widget)"""
+        deltas = {'web': web, 'social': social, 'avatar': avatar}
+        assignments = [
+            f"{_WIDGET_COLUMNS[kind]} = GREATEST(COALESCE({_WIDGET_COLUMNS[kind]}, 0) + :{kind}, 0)"
+            for kind, delta in deltas.items() if delta
+        ]
+        if not assignments:
+            return
+        await db.execute(
+            text(f"UPDATE companies SET {', '.join(assignments)} WHERE id = :cid"),
+            {'cid': company_id, **{kind: delta for kind, delta in deltas.items() if delta}}
+        )
+
+    # --- reconcile ---
+
+    async def reconcile(self) -> int:
+        """Recount all companies from the source tables; returns how many were corrected"""
+        async with get_db_session() as db:
+            result = await db.execute(text("SELECT id FROM companies ORDER BY id"))
+            company_ids = [row[0] for row in result.fetchall()]
+
+        corrected = 0
+        for company_id in company_ids:
+            async with get_db_session() as db:
+                # Row lock first: concurrent increments wait, so the recount below sees them
+                await db.execute(text("SELECT 1 FROM companies WHERE id = :cid FOR UPDATE"), {'cid': company_id})
+                result = await db.execute(text(f"""
+                    UPDATE companies c SET
+                        leads_used_this_month = a.leads,
+                        leads_reset_date = {_PERIOD},
+                        web_widgets_used = a.web,
+                        social_widgets_used = a.social,
+                        avatar_widgets_used = a.avatar
+                    FROM (
+                        SELECT
+                            (SELECT COUNT(*) FROM leads
+                             WHERE company_id = :cid AND created_at >= {_PERIOD} AT TIME ZONE 'UTC') AS leads,
+                            (SELECT COUNT(*) FROM web_widgets WHERE company_id = :cid AND is_active = TRUE) AS web,
+                            (SELECT COUNT(*) FROM social_widgets WHERE company_id = :cid AND is_active = TRUE) AS social,
+                            (SELECT COUNT(*) FROM social_widgets
+                             WHERE company_id = :cid AND is_active = TRUE AND widget_type = 'avatar') AS avatar
+                    ) a
+                    WHERE c.id = :cid AND (
+                        c.leads_reset_date IS DISTINCT FROM {_PERIOD}
+                        OR (c.leads_used_this_month, c.web_widgets_used, c.social_widgets_used, c.avatar_widgets_used)
+                           IS DISTINCT FROM (a.leads, a.web, a.social, a.avatar)
+                    )
+                """), {'cid': company_id})
+                await db.commit()
+                corrected += result.rowcount or 0
+
+        self.reconciles += 1
+        self.corrected += corrected
+        self.last_reconcile = time.time()
+        if corrected:
+            logging.warning(f'🔢 Usage counters reconciled: {corrected}/{len(company_ids)} companies corrected')
+        return corrected
+
+    async def start(self):
+        if self._task:
+            return
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logging.error(f'❌ Usage reconcile error: {e}')
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        return {
+            'reconcile_interval_s': self.interval,
+            'reconciles': self.reconciles,
+            'corrected': self.corrected,
+            'last_reconcile': datetime.fromtimestamp(self.last_reconcile, timezone.utc).isoformat() if self.last_reconcile else None,
+        }
+
+
+usage_counters = UsageCounters()
@@ -0,0 +1,101 @@
+"""
+Reference data cache for the bot.
+
+Manager lists, status settings and the company list are read on almost every
+button press but change rarely. BackendAPI serves them from this cache:
+entries expire after a per-kind TTL, concurrent misses for the same key share
+one backend request, and the mutating API methods invalidate what they change
+(in this process; other processes pick changes up on TTL).
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Hashable
+
+CACHE_TTL_MANAGERS = float(os.getenv('API_CACHE_TTL_MANAGERS', '60'))
+CACHE_TTL_STATUSES = float(os.getenv('API_CACHE_TTL_STATUSES', '300'))
+CACHE_TTL_COMPANIES = float(os.getenv('API_CACHE_TTL_COMPANIES', '60'))
+
+DEFAULT_TTLS = {
+    'managers': CACHE_TTL_MANAGERS,
+    'statuses': CACHE_TTL_STATUSES,
+    'companies': CACHE_TTL_COMPANIES,
+}
+
+
+class ReferenceCache:
+    """(kind, company_id) -> (ApiResponse, loaded_at) with per-kind TTL and request coalescing"""
+
+    def __init__(self, ttls: dict = None):
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self._entries = {}
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get(self, key: Hashable, fetch: Callable[[], Awaitable]):
+        """Cached response for key = (kind, ...); only successful responses are stored"""
+        ttl = self.ttls.get(key[0], 0)
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[1] < ttl:
+            self.hits += 1
+            return entry[0]
+
+        pending = self._inflight.get(key)
+        if pending:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise  # this waiter was cancelled
+                # The leading request was cancelled (its handler or a shutdown), not this one: fetch again
+                return await self.get(key, fetch)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            resp = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()  # waiters must not hang on a request nobody will finish
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        else:
+            future.set_result(resp)
+            if resp.ok and ttl > 0 and self._inflight.get(key) is future:
+                self._entries[key] = (resp, time.monotonic())
+            return resp
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def invalidate(self, kind: str, company_id: int = None):
+        """Drop one company's entry of a kind, or every entry of it when company_id is None"""
+        keys = [k for k in self._entries if k[0] == kind and (company_id is None or k[1] == company_id)]
+        for key in keys:
+            del self._entries[key]
+        # A request already in flight may carry pre-mutation data: don't let it be stored
+        for key in [k for k in self._inflight if k[0] == kind and (company_id is None or k[1] == company_id)]:
+            del self._inflight[key]
+        if keys:
+            logging.info(f'♻️ Bot cache invalidated: {kind} {company_id if company_id is not None else "*"}')
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'ttl_s': self.ttls,
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }
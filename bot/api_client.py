@@ -0,0 +1,336 @@
+"""
+Backend API client shared by all bot handlers.
+
+One long-lived aiohttp session (connection pool with keep-alive) per process
+instead of a new ClientSession and TCP connection per button tap. Every call
+returns ApiResponse(status, data) with the body already read; network errors
+raise as before, so handlers keep their try/except. Idempotent requests (GET,
+PATCH/DELETE by id) are retried on connection errors and 502/503/504.
+Manager lists, statuses and the company list are served from ReferenceCache.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, NamedTuple, Optional
+
+import aiohttp
+
+from api_cache import ReferenceCache
+from config import API_BASE_URL
+
+API_TIMEOUT = float(os.getenv('API_TIMEOUT', '15'))
+API_CHAT_TIMEOUT = float(os.getenv('API_CHAT_TIMEOUT', '120'))  # chat/voice wait for the LLM
+API_RETRIES = int(os.getenv('API_RETRIES', '2'))
+API_POOL_LIMIT = int(os.getenv('API_POOL_LIMIT', '100'))
+API_SLOW_MS = float(os.getenv('API_SLOW_MS', '2000'))
+
+_RETRY_STATUSES = (502, 503, 504)
+
+
+class ApiResponse(NamedTuple):
+    status: int
+    data: Any  # parsed JSON, or text if the body is not JSON
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+
+class BackendAPI:
+    def __init__(self, base_url: str = API_BASE_URL, timeout: float = API_TIMEOUT, retries: int = API_RETRIES,
+                 cache_ttls: dict = None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.retries = retries
+        self.cache = ReferenceCache(cache_ttls)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._timings = {}  # name -> [calls, errors, total_ms, max_ms]
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=API_POOL_LIMIT, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def request(self, method: str, path: str, name: str = None, *, params: dict = None, json: Any = None,
+                      data: Any = None, timeout: float = None, retries: int = None) -> ApiResponse:
+        """Send one request to the backend; `name` labels it in stats (defaults to the path)"""
+        name = name or path
+        attempts = 1 + (self.retries if retries is None else retries)
+        session = self._get_session()
+        started = time.perf_counter()
+        try:
+            for attempt in range(attempts):
+                try:
+                    async with session.request(
+                        method, f'{self.base_url}{path}', params=params, json=json, data=data,
+                        timeout=aiohttp.ClientTimeout(total=timeout or self.timeout)
+                    ) as resp:
+                        if resp.status in _RETRY_STATUSES and attempt + 1 < attempts:
+                            await asyncio.sleep(0.3 * (attempt + 1))
+                            continue
+                        if resp.content_type == 'application/json':
+                            body = await resp.json()
+                        else:
+                            body = await resp.text()
+                        self._record(name, started, ok=resp.status < 500)
+                        return ApiResponse(resp.status, body)
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    if attempt + 1 >= attempts:
+                        raise
+                    logging.warning(f'⚠️ API {method} {name}: {e!r}, retrying')
+                    await asyncio.sleep(0.3 * (attempt + 1))
+        except Exception:
+            self._record(name, started, ok=False)
+            raise
+
+    def _record(self, name: str, started: float, ok: bool):
+        ms = (time.perf_counter() - started) * 1000
+        entry = self._timings.setdefault(name, [0, 0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += 0 if ok else 1
+        entry[2] += ms
+        entry[3] = max(entry[3], ms)
+        if ms > API_SLOW_MS:
+            logging.warning(f'🐢 API {name}: {ms:.0f} ms')
+
+    def stats(self) -> dict:
+        return {
+            name: {'calls': n, 'errors': errors, 'avg_ms': round(total / n, 1), 'max_ms': round(peak, 1)}
+            for name, (n, errors, total, peak) in sorted(self._timings.items())
+        }
+
+    async def get(self, path: str, name: str = None, **kwargs) -> ApiResponse:
+        return await self.request('GET', path, name, **kwargs)
+
+    async def post(self, path: str, name: str = None, **kwargs) -> ApiResponse:
+        kwargs.setdefault('retries', 0)  # not idempotent
+        return await self.request('POST', path, name, **kwargs)
+
+    async def patch(self, path: str, name: str = None, **kwargs) -> ApiResponse:
+        return await self.request('PATCH', path, name, **kwargs)
+
+    async def delete(self, path: str, name: str = None, **kwargs) -> ApiResponse:
+        return await self.request('DELETE', path, name, **kwargs)
+
+    # === Sales agent ===
+
+    async def chat(self, company_id: int, payload: dict, timeout: float = API_CHAT_TIMEOUT) -> ApiResponse:
+        return await self.post(f'/sales/{company_id}/chat', 'chat', json=payload, timeout=timeout)
+
+    async def voice(self, company_id: int, form: aiohttp.FormData) -> ApiResponse:
+        return await self.post(f'/sales/{company_id}/voice', 'voice', data=form, timeout=API_CHAT_TIMEOUT)
+
+    async def sales_leads(self, company_id: int, limit: int = 100, timeout: float = None) -> ApiResponse:
+        return await self.get(f'/sales/{company_id}/leads', 'sales_leads', params={'limit': limit}, timeout=timeout)
+
+    async def lead_report(self, company_id: int, date_from: str = None, contact: str = 'any', latest: int = 10,
+                          latest_contact: str = None, timeout: float = None) -> ApiResponse:
+        params = {'contact': contact, 'latest': latest}
+        if date_from:
+            params['date_from'] = date_from
+        if latest_contact:
+            params['latest_contact'] = latest_contact
+        return await self.get(f'/sales/{company_id}/leads/report', 'lead_report', params=params, timeout=timeout)
+
+    async def all_leads(self, limit: int, timeout: float = None) -> ApiResponse:
+        return await self.get('/sales/all-leads', 'all_leads', params={'limit': limit}, timeout=timeout)
+
+    async def tier_usage(self, company_id: int) -> ApiResponse:
+        return await self.get(f'/sales/{company_id}/tier-usage', 'tier_usage')
+
+    async def send_pricing_email(self, company_id: int) -> ApiResponse:
+        return await self.post(f'/sales/{company_id}/send-pricing-email', 'send_pricing_email')
+
+    # === Companies ===
+
+    async def companies(self, timeout: float = None) -> ApiResponse:
+        return await self.cache.get(('companies', None),
+                                    lambda: self.get('/sales/companies/all', 'companies', timeout=timeout))
+
+    async def upsert_company(self, data: dict) -> ApiResponse:
+        # Upsert by id is idempotent; without an id it creates a company, so no retry.
+        # Long timeout: the backend translates the greeting (several LLM calls) when description is set
+        try:
+            return await self.post('/sales/company/upsert', 'upsert_company', json=data,
+                                   timeout=API_CHAT_TIMEOUT, retries=self.retries if 'id' in data else 0)
+        finally:
+            self.cache.invalidate('companies')
+
+    async def upload_logo(self, company_id: int, form: aiohttp.FormData) -> ApiResponse:
+        try:
+            return await self.post(f'/sales/company/{company_id}/upload-logo', 'upload_logo', data=form)
+        finally:
+            self.cache.invalidate('companies')
+
+    async def set_company_tier(self, company_id: int, data: dict, timeout: float = None) -> ApiResponse:
+        try:
+            return await self.patch(f'/sales/companies/{company_id}/tier', 'set_company_tier', json=data, timeout=timeout)
+        finally:
+            self.cache.invalidate('companies')
+
+    async def set_company_language(self, company_id: int, language: str) -> ApiResponse:
+        try:
+            return await self.patch(f'/sales/companies/{company_id}/language', 'set_company_language',
+                                    json={'language': language}, timeout=10)
+        finally:
+            self.cache.invalidate('companies')
+
+    async def tiers(self) -> ApiResponse:
+        return await self.get('/sales/tiers', 'tiers')
+
+    async def update_tier(self, tier: str, data: dict) -> ApiResponse:
+        return await self.patch(f'/sales/tiers/{tier}', 'update_tier', json=data)
+
+    async def ai_packages(self) -> ApiResponse:
+        return await self.get('/sales/ai-packages', 'ai_packages')
+
+    async def update_ai_package(self, package: str, data: dict) -> ApiResponse:
+        return await self.patch(f'/sales/ai-packages/{package}', 'update_ai_package', json=data)
+
+    # === Widgets ===
+
+    async def social_widgets(self, company_id: int) -> ApiResponse:
+        return await self.get(f'/sales/companies/{company_id}/widgets', 'social_widgets')
+
+    async def social_widget(self, company_id: int, widget_id) -> ApiResponse:
+        return await self.get(f'/sales/companies/{company_id}/widgets/{widget_id}', 'social_widget')
+
+    async def create_social_widget(self, company_id: int, data: dict) -> ApiResponse:
+        return await self.post(f'/sales/companies/{company_id}/widgets', 'create_social_widget', json=data, timeout=30)
+
+    async def update_social_widget(self, company_id: int, widget_id, data: dict) -> ApiResponse:
+        return await self.patch(f'/sales/companies/{company_id}/widgets/{widget_id}', 'update_social_widget', json=data)
+
+    async def delete_social_widget(self, company_id: int, widget_id) -> ApiResponse:
+        # Deleting frees a tier slot; a retry after a lost response would report 404
+        return await self.delete(f'/sales/companies/{company_id}/widgets/{widget_id}', 'delete_social_widget',
+                                 timeout=10, retries=0)
+
+    async def web_widgets(self, company_id: int) -> ApiResponse:
+        return await self.get(f'/sales/{company_id}/web-widgets', 'web_widgets')
+
+    async def create_web_widget(self, company_id: int, data: dict) -> ApiResponse:
+        return await self.post(f'/sales/{company_id}/web-widgets', 'create_web_widget', json=data, timeout=30)
+
+    async def update_web_widget(self, company_id: int, widget_id, data: dict) -> ApiResponse:
+        return await self.patch(f'/sales/{company_id}/web-widgets/{widget_id}', 'update_web_widget', json=data, timeout=30)
+
+    async def toggle_web_widget(self, company_id: int, widget_id) -> ApiResponse:
+        # Toggling twice undoes it: never retried
+        return await self.patch(f'/sales/{company_id}/web-widgets/{widget_id}/toggle', 'toggle_web_widget', retries=0)
+
+    async def delete_web_widget(self, company_id: int, widget_id) -> ApiResponse:
+        return await self.delete(f'/sales/{company_id}/web-widgets/{widget_id}', 'delete_web_widget', retries=0)
+
+    # === CRM: managers and statuses ===
+
+    async def managers(self, company_id: int) -> ApiResponse:
+        return await self.cache.get(('managers', company_id), lambda: self.get(f'/crm/{company_id}/managers', 'managers'))
+
+    async def manager(self, company_id: int, user_id: int) -> ApiResponse:
+        return await self.get(f'/crm/{company_id}/managers/{user_id}', 'manager')
+
+    async def add_manager(self, company_id: int, data: dict) -> ApiResponse:
+        try:
+            return await self.post(f'/crm/{company_id}/managers', 'add_manager', json=data)
+        finally:
+            self.cache.invalidate('managers', company_id)
+
+    async def delete_manager(self, company_id: int, user_id: int) -> ApiResponse:
+        try:
+            return await self.delete(f'/crm/{company_id}/managers/{user_id}', 'delete_manager')
+        finally:
+            self.cache.invalidate('managers', company_id)
+
+    async def statuses(self, company_id: int) -> ApiResponse:
+        return await self.cache.get(('statuses', company_id), lambda: self.get(f'/crm/{company_id}/statuses', 'statuses'))
+
+    async def update_status_coins(self, company_id: int, status_id, coins: int) -> ApiResponse:
+        try:
+            return await self.patch(f'/crm/{company_id}/statuses/{status_id}', 'update_status_coins', json={'coins': coins})
+        finally:
+            self.cache.invalidate('statuses', company_id)
+
+    async def leaderboard(self, company_id: int, period: str, sort: str) -> ApiResponse:
+        return await self.get(f'/crm/{company_id}/leaderboard', 'leaderboard', params={'period': period, 'sort': sort})
+
+    async def crm_stats(self, company_id: int) -> ApiResponse:
+        return await self.get(f'/crm/{company_id}/stats', 'crm_stats')
+
+    # === CRM: leads ===
+
+    async def crm_leads(self, company_id: int, limit: int = 50) -> ApiResponse:
+        return await self.get(f'/crm/{company_id}/leads', 'crm_leads', params={'limit': limit})
+
+    async def leads_page(self, company_id: int, params: dict) -> ApiResponse:
+        return await self.get(f'/crm/{company_id}/leads/page', 'leads_page', params=params)
+
+    async def lead(self, company_id: int, lead_id: int) -> ApiResponse:
+        return await self.get(f'/crm/{company_id}/leads/{lead_id}', 'lead')
+
+    async def full_report(self, company_id: int, lead_id: int) -> ApiResponse:
+        return await self.get(f'/crm/{company_id}/leads/{lead_id}/full_report', 'full_report')
+
+    async def assign_lead(self, company_id: int, lead_id: int, data: dict) -> ApiResponse:
+        # A repeated assign would be refused as "already taken": never retried
+        return await self.patch(f'/crm/{company_id}/leads/{lead_id}/assign', 'assign_lead', json=data, retries=0)
+
+    async def set_lead_status(self, company_id: int, lead_id: int, data: dict) -> ApiResponse:
+        # Coins are awarded per transition: never retried
+        return await self.patch(f'/crm/{company_id}/leads/{lead_id}/status', 'set_lead_status', json=data, retries=0)
+
+    async def save_deal_amount(self, company_id: int, lead_id: int, deal_id: int, data: dict) -> ApiResponse:
+        # Completing a deal awards coins: never retried
+        return await self.patch(f'/crm/{company_id}/leads/{lead_id}/deal/{deal_id}', 'save_deal_amount', json=data, retries=0)
+
+    async def confirm_deal(self, company_id: int, deal_id: int) -> ApiResponse:
+        # Confirmation awards coins: never retried
+        return await self.patch(f'/crm/{company_id}/deals/{deal_id}/confirm', 'confirm_deal', retries=0)
+
+    async def set_deal_document(self, company_id: int, deal_id: int, data: dict) -> ApiResponse:
+        return await self.patch(f'/crm/{company_id}/deals/{deal_id}/document', 'set_deal_document', json=data)
+
+    async def add_note(self, company_id: int, lead_id: int, data: dict) -> ApiResponse:
+        return await self.post(f'/crm/{company_id}/leads/{lead_id}/notes', 'add_note', json=data)
+
+    # === CRM: events ===
+
+    async def events(self, company_id: int, user_id: int = None, limit: int = None, offset: int = None,
+                     event_type: str = None) -> ApiResponse:
+        params = {k: v for k, v in (('user_id', user_id), ('limit', limit), ('offset', offset), ('event_type', event_type))
+                  if v is not None}
+        return await self.get(f'/crm/{company_id}/events', 'events', params=params or None)
+
+    async def events_history(self, company_id: int, user_id: int, offset: int, limit: int = 5) -> ApiResponse:
+        return await self.get(f'/crm/{company_id}/events/history', 'events_history',
+                              params={'user_id': user_id, 'offset': offset, 'limit': limit})
+
+    async def lead_events(self, company_id: int, lead_id: int) -> ApiResponse:
+        return await self.get(f'/crm/{company_id}/leads/{lead_id}/events', 'lead_events')
+
+    async def create_event(self, company_id: int, data: dict) -> ApiResponse:
+        return await self.post(f'/crm/{company_id}/events', 'create_event', json=data)
+
+    async def update_event(self, company_id: int, event_id: int, data: dict) -> ApiResponse:
+        return await self.patch(f'/crm/{company_id}/events/{event_id}', 'update_event', json=data)
+
+    async def delete_event(self, company_id: int, event_id: int) -> ApiResponse:
+        return await self.delete(f'/crm/{company_id}/events/{event_id}', 'delete_event')
+
+    async def pending_reminders(self) -> ApiResponse:
+        return await self.get('/crm/pending-reminders', 'pending_reminders')
+
+    async def mark_reminder_sent(self, event_id: int) -> ApiResponse:
+        return await self.patch(f'/crm/events/{event_id}/reminder-sent', 'mark_reminder_sent')
+
+
+api = BackendAPI()
@@ -4,13 +4,12 @@ from calendar_kb import get_calendar, get_hour_picker, get_minute_picker
 from states import EventStates
 from calendar_kb import get_calendar, get_hour_picker, get_minute_picker
 import logging
-import aiohttp
 from aiogram import Router, types, F
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton
-from config import API_BASE_URL
+from api_client import api
 
 crm_router = Router()
 
@@ -34,36 +33,31 @@ def get_manager_keyboard():
 async def get_manager_fullname(company_id: int, user_id: int) -> str:
     """Get manager full_name from DB"""
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/crm/{company_id}/managers/{user_id}') as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    return data.get('full_name', '')
+        resp = await api.manager(company_id, user_id)
+        if resp.status == 200:
+            return resp.data.get('full_name', '')
     except: pass
     return ''
 
 async def is_manager(user_id: int, company_id: int) -> bool:
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/crm/{company_id}/managers') as resp:
-                if resp.status == 200:
-                    return any(m.get('user_id') == user_id for m in await resp.json())
+        resp = await api.managers(company_id)
+        if resp.status == 200:
+            return any(m.get('user_id') == user_id for m in resp.data)
     except: pass
     return False
 
 async def get_lead_details(company_id: int, lead_id: int) -> dict:
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/crm/{company_id}/leads/{lead_id}') as resp:
-                if resp.status == 200: return await resp.json()
+        resp = await api.lead(company_id, lead_id)
+        if resp.status == 200: return resp.data
     except Exception as e: logging.error(f"Get lead: {e}")
     return None
 
 async def get_statuses(company_id: int) -> list:
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/crm/{company_id}/statuses') as resp:
-                if resp.status == 200: return await resp.json()
+        resp = await api.statuses(company_id)
+        if resp.status == 200: return resp.data
     except: pass
     return [{"code": "1", "emoji": "🆕", "name": "Новый"}, {"code": "2", "emoji": "📞", "name": "В работе"},
             {"code": "3", "emoji": "📅", "name": "Встреча"}, {"code": "4", "emoji": "✅", "name": "Сделка"},
@@ -230,10 +224,9 @@ def get_lead_keyboard(lead_id: int, lead: dict, statuses: list) -> InlineKeyboar
 async def cmd_reset(message: types.Message, state: FSMContext):
     company_id = message.bot.company_id
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.delete(f'{API_BASE_URL}/crm/{company_id}/managers/{message.from_user.id}') as resp:
-                await state.clear()
-                await message.answer("✅ Данные сброшены.\n\nНапишите /join")
+        await api.delete_manager(company_id, message.from_user.id)
+        await state.clear()
+        await message.answer("✅ Данные сброшены.\n\nНапишите /join")
     except:
         await message.answer("❌ Ошибка")
 
@@ -268,12 +261,10 @@ async def join_phone(message: types.Message, state: FSMContext):
     full_name = f"{data.get('firstname', '')} {data.get('lastname', '')}"
     company_id = message.bot.company_id
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f'{API_BASE_URL}/crm/{company_id}/managers',
-                json={'telegram_id': message.from_user.id, 'telegram_username': message.from_user.username or '',
-                      'full_name': full_name, 'update_existing': True}) as resp:
-                if resp.status == 200:
-                    await message.answer(f"🎉 <b>Готово, {full_name}!</b>", parse_mode='HTML', reply_markup=get_manager_keyboard())
+        resp = await api.add_manager(company_id, {'telegram_id': message.from_user.id, 'telegram_username': message.from_user.username or '',
+                                                  'full_name': full_name, 'update_existing': True})
+        if resp.status == 200:
+            await message.answer(f"🎉 <b>Готово, {full_name}!</b>", parse_mode='HTML', reply_markup=get_manager_keyboard())
     except:
         await message.answer("❌ Ошибка")
     await state.clear()
@@ -281,16 +272,19 @@ async def join_phone(message: types.Message, state: FSMContext):
 # === Лиды (все) ===
 @crm_router.message(F.text == "📋 Лиды")
 async def all_leads_handler(message: types.Message, state: FSMContext):
-    await state.update_data(leads_mode='all', leads_offset=0)
-    await show_leads_page(message, 0, 'all')
+    await state.update_data(leads_mode='all')
+    await show_leads_page(message, 'all')
 
 # === Мои лиды ===
 @crm_router.message(F.text == "📁 Мои лиды")
 async def my_leads_handler(message: types.Message, state: FSMContext):
-    await state.update_data(leads_mode='my', leads_offset=0)
-    await show_leads_page(message, 0, 'my', message.from_user.id)
+    await state.update_data(leads_mode='my')
+    await show_leads_page(message, 'my', message.from_user.id)
 
-async def show_leads_page(message_or_callback, offset: int, mode: str = 'all', filter_user_id: int = None):
+LEADS_PAGE_SIZE = 5
+
+async def show_leads_page(message_or_callback, mode: str = 'all', filter_user_id: int = None, cursor: str = None, direction: str = 'next'):
+    """One page of leads; the backend filters and pages with (created_at, id) cursors"""
     if isinstance(message_or_callback, types.CallbackQuery):
         message = message_or_callback.message
         company_id = message_or_callback.bot.company_id
@@ -306,59 +300,55 @@ async def show_leads_page(message_or_callback, offset: int, mode: str = 'all', f
         await message.answer("❌ Напишите /join")
         return
     
+    params = {'limit': LEADS_PAGE_SIZE, 'has_contact': 'true', 'direction': direction}
+    if cursor:
+        params['cursor'] = cursor
+    # Фильтр: Мои лиды
+    if mode == 'my' and filter_user_id:
+        params['assigned_user_id'] = filter_user_id
+    
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/crm/{company_id}/leads', params={'limit': 200}) as resp:
-                if resp.status == 200:
-                    all_leads = await resp.json()
-                    all_leads = [l for l in all_leads if l.get('contact_info') and (l['contact_info'].get('name') or l['contact_info'].get('phone'))]
+        resp = await api.leads_page(company_id, params)
+        if resp.status == 200:
+            page = resp.data
+            leads = page.get('items', [])
                     
-                    # Фильтр: Мои лиды
-                    if mode == 'my' and filter_user_id:
-                        all_leads = [l for l in all_leads if l.get('assigned_user_id') == filter_user_id]
+            if not leads:
+                await message.answer("📋 Лидов пока нет" if not cursor else "📋 Больше лидов нет")
+                return
                     
-                    if not all_leads:
-                        await message.answer("📋 Лидов пока нет")
-                        return
+            title = "📁 <b>Мои лиды</b>" if mode == 'my' else "📋 <b>Лиды</b>"
+            text = f"{title}\n\n"
+            buttons = []
                     
-                    page_size = 5
-                    total = len(all_leads)
-                    offset = max(0, min(offset, total - 1))
-                    leads = all_leads[offset:offset+page_size]
-                    
-                    title = "📁 <b>Мои лиды</b>" if mode == 'my' else "📋 <b>Лиды</b>"
-                    text = f"{title} ({offset+1}-{min(offset+page_size, total)} из {total})\n\n"
-                    buttons = []
-                    
-                    for lead in leads:
-                        contact = lead.get('contact_info', {}) or {}
-                        name = contact.get('name', 'Без имени')
-                        phone = contact.get('phone', '')
-                        lead_id = lead.get('id', 0)
-                        assigned = lead.get('assigned_user_id')
-                        # Иконки: мой/чужой/новый
-                        if not assigned:
-                            icon = "🆕"
-                        elif assigned == user_id:
-                            icon = "👨‍💼"
-                        else:
-                            icon = "👤"
-                        buttons.append([InlineKeyboardButton(text=f"{icon} #{lead_id} {name} {phone}", callback_data=f"vld:{lead_id}")])
+            for lead in leads:
+                name = lead.get('name') or 'Без имени'
+                phone = lead.get('phone') or ''
+                lead_id = lead.get('id', 0)
+                assigned = lead.get('assigned_user_id')
+                # Иконки: мой/чужой/новый
+                if not assigned:
+                    icon = "🆕"
+                elif assigned == user_id:
+                    icon = "👨‍💼"
+                else:
+                    icon = "👤"
+                buttons.append([InlineKeyboardButton(text=f"{icon} #{lead_id} {name} {phone}", callback_data=f"vld:{lead_id}")])
                     
-                    # Навигация
-                    nav_row = []
-                    if offset > 0:
-                        nav_row.append(InlineKeyboardButton(text="⬆️", callback_data=f"lp:{mode}:{offset-1}"))
-                    if offset + page_size < total:
-                        nav_row.append(InlineKeyboardButton(text="⬇️", callback_data=f"lp:{mode}:{offset+1}"))
-                    if nav_row:
-                        buttons.append(nav_row)
+            # Навигация (курсоры: ⬆️ новее, ⬇️ старше)
+            nav_row = []
+            if page.get('prev_cursor'):
+                nav_row.append(InlineKeyboardButton(text="⬆️", callback_data=f"lp:{mode}:p:{page['prev_cursor']}"))
+            if page.get('next_cursor'):
+                nav_row.append(InlineKeyboardButton(text="⬇️", callback_data=f"lp:{mode}:n:{page['next_cursor']}"))
+            if nav_row:
+                buttons.append(nav_row)
                     
-                    kb = InlineKeyboardMarkup(inline_keyboard=buttons)
-                    if is_callback:
-                        await message.edit_text(text, parse_mode='HTML', reply_markup=kb)
-                    else:
-                        await message.answer(text, parse_mode='HTML', reply_markup=kb)
+            kb = InlineKeyboardMarkup(inline_keyboard=buttons)
+            if is_callback:
+                await message.edit_text(text, parse_mode='HTML', reply_markup=kb)
+            else:
+                await message.answer(text, parse_mode='HTML', reply_markup=kb)
     except Exception as e:
         logging.error(f"Leads: {e}")
         await message.answer("❌ Ошибка")
@@ -366,9 +356,13 @@ async def show_leads_page(message_or_callback, offset: int, mode: str = 'all', f
 @crm_router.callback_query(F.data.startswith("lp:"))
 async def leads_page_callback(callback: types.CallbackQuery, state: FSMContext):
     parts = callback.data.split(":")
-    mode, offset = parts[1], int(parts[2])
+    mode = parts[1]
     filter_uid = callback.from_user.id if mode == 'my' else None
-    await show_leads_page(callback, offset, mode, filter_uid)
+    # lp:<mode>:<n|p>:<cursor>; older offset buttons (lp:<mode>:<offset>) restart from the first page
+    if len(parts) == 4:
+        await show_leads_page(callback, mode, filter_uid, cursor=parts[3], direction='prev' if parts[2] == 'p' else 'next')
+    else:
+        await show_leads_page(callback, mode, filter_uid)
     await callback.answer()
 
 # === Рейтинг ===
@@ -379,17 +373,16 @@ async def my_rating_handler(message: types.Message):
         await message.answer("❌ Напишите /join")
         return
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/crm/{company_id}/managers/{message.from_user.id}') as resp:
-                m = await resp.json() if resp.status == 200 else {}
-                amount = m.get('total_deal_amount', 0)
-                formatted_amount = f"{amount:,.0f}".replace(',', ' ')
-                text = f"📊 <b>Ваш рейтинг</b>\n\n"
-                text += f"💰 Монетки: {m.get('coins', 0)}\n"
-                text += f"📋 Лидов: {m.get('leads_count', 0)}\n"
-                text += f"✅ Сделок: {m.get('deals_count', 0)}\n"
-                text += f"💵 Сумма: {formatted_amount} ₸"
-                await message.answer(text, parse_mode='HTML')
+        resp = await api.manager(company_id, message.from_user.id)
+        m = resp.data if resp.status == 200 else {}
+        amount = m.get('total_deal_amount', 0)
+        formatted_amount = f"{amount:,.0f}".replace(',', ' ')
+        text = f"📊 <b>Ваш рейтинг</b>\n\n"
+        text += f"💰 Монетки: {m.get('coins', 0)}\n"
+        text += f"📋 Лидов: {m.get('leads_count', 0)}\n"
+        text += f"✅ Сделок: {m.get('deals_count', 0)}\n"
+        text += f"💵 Сумма: {formatted_amount} ₸"
+        await message.answer(text, parse_mode='HTML')
     except:
         await message.answer("📊 💰 0")
 
@@ -409,55 +402,53 @@ async def show_leaderboard(message_or_callback, period='all', sort='coins'):
         is_callback = False
     
     try:
-        async with aiohttp.ClientSession() as session:
-            url = f'{API_BASE_URL}/crm/{company_id}/leaderboard?period={period}&sort={sort}'
-            async with session.get(url) as resp:
-                leaders = await resp.json() if resp.status == 200 else []
-                if not leaders:
-                    text = "🏆 Пусто"
-                else:
-                    # Заголовок с текущим фильтром
-                    period_name = {'week': 'Неделя', 'month': 'Месяц', 'all': 'Всё время'}[period]
-                    sort_name = {'coins': '💰', 'amount': '💵', 'deals': '✅'}[sort]
-                    text = f"🏆 <b>Лидерборд</b> ({period_name}, {sort_name})\n\n"
+        resp = await api.leaderboard(company_id, period, sort)
+        leaders = resp.data if resp.status == 200 else []
+        if not leaders:
+            text = "🏆 Пусто"
+        else:
+            # Заголовок с текущим фильтром
+            period_name = {'week': 'Неделя', 'month': 'Месяц', 'all': 'Всё время'}[period]
+            sort_name = {'coins': '💰', 'amount': '💵', 'deals': '✅'}[sort]
+            text = f"🏆 <b>Лидерборд</b> ({period_name}, {sort_name})\n\n"
                     
-                    medals = ['🥇', '🥈', '🥉']
-                    for i, m in enumerate(leaders[:10]):
-                        medal = medals[i] if i < 3 else f"{i+1}."
-                        name = m.get('full_name', '?')
-                        coins = m.get('coins', 0)
-                        deals = m.get('deals_count', 0)
-                        amount = m.get('total_deal_amount', 0)
-                        formatted = f"{amount:,.0f}".replace(',', ' ')
+            medals = ['🥇', '🥈', '🥉']
+            for i, m in enumerate(leaders[:10]):
+                medal = medals[i] if i < 3 else f"{i+1}."
+                name = m.get('full_name', '?')
+                coins = m.get('coins', 0)
+                deals = m.get('deals_count', 0)
+                amount = m.get('total_deal_amount', 0)
+                formatted = f"{amount:,.0f}".replace(',', ' ')
                         
-                        text += f"{medal} {name}\n"
-                        if sort == 'coins':
-                            text += f"   💰 Монеты: {coins}\n\n"
-                        elif sort == 'amount':
-                            text += f"   💵 Деньги: {formatted}₸\n\n"
-                        elif sort == 'deals':
-                            text += f"   ✅ Сделки: {deals}\n\n"
-                        else:
-                            text += f"   💰 Монеты: {coins}\n   💵 Деньги: {formatted}₸\n   ✅ Сделки: {deals}\n\n"
+                text += f"{medal} {name}\n"
+                if sort == 'coins':
+                    text += f"   💰 Монеты: {coins}\n\n"
+                elif sort == 'amount':
+                    text += f"   💵 Деньги: {formatted}₸\n\n"
+                elif sort == 'deals':
+                    text += f"   ✅ Сделки: {deals}\n\n"
+                else:
+                    text += f"   💰 Монеты: {coins}\n   💵 Деньги: {formatted}₸\n   ✅ Сделки: {deals}\n\n"
                 
-                # Кнопки периода и сортировки
-                kb = InlineKeyboardMarkup(inline_keyboard=[
-                    [
-                        InlineKeyboardButton(text="📅 Неделя" + (" ✓" if period=='week' else ""), callback_data=f"lb:week:{sort}"),
-                        InlineKeyboardButton(text="📅 Месяц" + (" ✓" if period=='month' else ""), callback_data=f"lb:month:{sort}"),
-                        InlineKeyboardButton(text="📅 Всё" + (" ✓" if period=='all' else ""), callback_data=f"lb:all:{sort}")
-                    ],
-                    [
-                        InlineKeyboardButton(text="💰 Монеты" + (" ✓" if sort=='coins' else ""), callback_data=f"lb:{period}:coins"),
-                        InlineKeyboardButton(text="💵 Сумма" + (" ✓" if sort=='amount' else ""), callback_data=f"lb:{period}:amount"),
-                        InlineKeyboardButton(text="✅ Сделки" + (" ✓" if sort=='deals' else ""), callback_data=f"lb:{period}:deals")
-                    ]
-                ])
+        # Кнопки периода и сортировки
+        kb = InlineKeyboardMarkup(inline_keyboard=[
+            [
+                InlineKeyboardButton(text="📅 Неделя" + (" ✓" if period=='week' else ""), callback_data=f"lb:week:{sort}"),
+                InlineKeyboardButton(text="📅 Месяц" + (" ✓" if period=='month' else ""), callback_data=f"lb:month:{sort}"),
+                InlineKeyboardButton(text="📅 Всё" + (" ✓" if period=='all' else ""), callback_data=f"lb:all:{sort}")
+            ],
+            [
+                InlineKeyboardButton(text="💰 Монеты" + (" ✓" if sort=='coins' else ""), callback_data=f"lb:{period}:coins"),
+                InlineKeyboardButton(text="💵 Сумма" + (" ✓" if sort=='amount' else ""), callback_data=f"lb:{period}:amount"),
+                InlineKeyboardButton(text="✅ Сделки" + (" ✓" if sort=='deals' else ""), callback_data=f"lb:{period}:deals")
+            ]
+        ])
                 
-                if is_callback:
-                    await message.edit_text(text, parse_mode='HTML', reply_markup=kb)
-                else:
-                    await message.answer(text, parse_mode='HTML', reply_markup=kb)
+        if is_callback:
+            await message.edit_text(text, parse_mode='HTML', reply_markup=kb)
+        else:
+            await message.answer(text, parse_mode='HTML', reply_markup=kb)
     except Exception as e:
         logging.error(f"Leaderboard: {e}")
         if is_callback:
@@ -482,14 +473,13 @@ async def view_lead(callback: types.CallbackQuery):
     lead = await get_lead_details(company_id, lead_id)
     # Загружаем события лида
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/crm/{company_id}/leads/{lead_id}/events') as resp:
-                if resp.status == 200:
-                    from datetime import datetime
-                    events = await resp.json()
-                    now = datetime.now()
-                    future = [e for e in events if datetime.fromisoformat(e['scheduled_at'].replace('Z', '+00:00')) > now]
-                    lead['events'] = sorted(future, key=lambda x: x['scheduled_at'])[:3]
+        resp = await api.lead_events(company_id, lead_id)
+        if resp.status == 200:
+            from datetime import datetime
+            events = resp.data
+            now = datetime.now()
+            future = [e for e in events if datetime.fromisoformat(e['scheduled_at'].replace('Z', '+00:00')) > now]
+            lead['events'] = sorted(future, key=lambda x: x['scheduled_at'])[:3]
     except Exception as e:
         logging.error(f"Load events error: {e}")
         lead['events'] = []
@@ -510,19 +500,17 @@ async def take_lead(callback: types.CallbackQuery):
     # Брать имя из БД
     user_name = await get_manager_fullname(company_id, user_id) or callback.from_user.full_name
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(f'{API_BASE_URL}/crm/{company_id}/leads/{lead_id}/assign',
-                json={'user_id': user_id, 'user_name': user_name}) as resp:
-                if resp.status == 200:
-                    result = await resp.json()
-                    coins = result.get('coins_earned', 0)
-                    await callback.answer(f"✅ Лид ваш! +{coins}💰", show_alert=True)
-                    lead = await get_lead_details(company_id, lead_id)
-                    statuses = await get_statuses(company_id)
-                    if lead:
-                        await callback.message.edit_text(format_lead_card(lead, statuses), parse_mode='HTML', reply_markup=get_lead_keyboard(lead_id, lead, statuses))
-                else:
-                    await callback.answer("❌ Ошибка", show_alert=True)
+        resp = await api.assign_lead(company_id, lead_id, {'user_id': user_id, 'user_name': user_name})
+        if resp.status == 200:
+            result = resp.data
+            coins = result.get('coins_earned', 0)
+            await callback.answer(f"✅ Лид ваш! +{coins}💰", show_alert=True)
+            lead = await get_lead_details(company_id, lead_id)
+            statuses = await get_statuses(company_id)
+            if lead:
+                await callback.message.edit_text(format_lead_card(lead, statuses), parse_mode='HTML', reply_markup=get_lead_keyboard(lead_id, lead, statuses))
+        else:
+            await callback.answer("❌ Ошибка", show_alert=True)
     except Exception as e:
         logging.error(f"Take: {e}")
         await callback.answer("❌ Ошибка", show_alert=True)
@@ -534,32 +522,30 @@ async def change_status(callback: types.CallbackQuery, state: FSMContext):
     lead_id, new_status = int(parts[1]), parts[2]
     company_id = callback.bot.company_id
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(f'{API_BASE_URL}/crm/{company_id}/leads/{lead_id}/status',
-                json={'status': new_status, 'manager_id': callback.from_user.id}) as resp:
-                if resp.status == 200:
-                    result = await resp.json()
-                    coins = result.get('coins_earned', 0)
-                    name = result.get('status_name', 'OK')
+        resp = await api.set_lead_status(company_id, lead_id, {'status': new_status, 'manager_id': callback.from_user.id})
+        if resp.status == 200:
+            result = resp.data
+            coins = result.get('coins_earned', 0)
+            name = result.get('status_name', 'OK')
                     
-                    # Если требуется ввод суммы (статус "Завершён")
-                    if result.get('requires_amount'):
-                        await state.set_state(CRMStates.waiting_for_deal_amount)
-                        await state.update_data(
-                            deal_lead_id=lead_id,
-                            deal_id=result.get('deal_id'),
-                            deal_currency=result.get('currency', 'KZT')
-                        )
-                        currency = result.get('currency', 'KZT')
-                        await callback.message.answer(f"💰 Введите сумму сделки ({currency}):")
-                        await callback.answer(f"✅ {name}" + (f" +{coins}💰" if coins > 0 else ""))
-                        return
+            # Если требуется ввод суммы (статус "Завершён")
+            if result.get('requires_amount'):
+                await state.set_state(CRMStates.waiting_for_deal_amount)
+                await state.update_data(
+                    deal_lead_id=lead_id,
+                    deal_id=result.get('deal_id'),
+                    deal_currency=result.get('currency', 'KZT')
+                )
+                currency = result.get('currency', 'KZT')
+                await callback.message.answer(f"💰 Введите сумму сделки ({currency}):")
+                await callback.answer(f"✅ {name}" + (f" +{coins}💰" if coins > 0 else ""))
+                return
                     
-                    await callback.answer(f"✅ {name}" + (f" +{coins}💰" if coins > 0 else ""), show_alert=coins > 0)
-                    lead = await get_lead_details(company_id, lead_id)
-                    statuses = await get_statuses(company_id)
-                    if lead:
-                        await callback.message.edit_text(format_lead_card(lead, statuses), parse_mode='HTML', reply_markup=get_lead_keyboard(lead_id, lead, statuses))
+            await callback.answer(f"✅ {name}" + (f" +{coins}💰" if coins > 0 else ""), show_alert=coins > 0)
+            lead = await get_lead_details(company_id, lead_id)
+            statuses = await get_statuses(company_id)
+            if lead:
+                await callback.message.edit_text(format_lead_card(lead, statuses), parse_mode='HTML', reply_markup=get_lead_keyboard(lead_id, lead, statuses))
     except Exception as e:
         logging.error(f"Status: {e}")
         await callback.answer("❌ Ошибка", show_alert=True)
@@ -603,13 +589,11 @@ async def note_save(message: types.Message, state: FSMContext):
     user_name = data.get('note_user_name')
     company_id = message.bot.company_id
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f'{API_BASE_URL}/crm/{company_id}/leads/{lead_id}/notes',
-                json={'text': message.text, 'manager_id': message.from_user.id, 'user_name': user_name}) as resp:
-                if resp.status == 200:
-                    await message.answer("✅ Сохранено")
-                else:
-                    await message.answer("❌ Ошибка")
+        resp = await api.add_note(company_id, lead_id, {'text': message.text, 'manager_id': message.from_user.id, 'user_name': user_name})
+        if resp.status == 200:
+            await message.answer("✅ Сохранено")
+        else:
+            await message.answer("❌ Ошибка")
     except:
         await message.answer("❌ Ошибка")
     await state.clear()
@@ -622,42 +606,41 @@ async def new_lead_callback(callback: types.CallbackQuery):
     company_id = callback.bot.company_id
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/crm/{company_id}/leads/{lead_id}/full_report') as resp:
-                if resp.status == 200:
-                    data = await resp.json()
+        resp = await api.full_report(company_id, lead_id)
+        if resp.status == 200:
+            data = resp.data
                     
-                    # Форматировать как в email
-                    text = f"🆕 <b>Новый лид от BizDNAi</b>\n\n"
-                    text += f"👤 <b>Имя:</b> {data['name']}\n"
-                    text += f"📞 <b>Телефон:</b> {data['phone']}\n\n"
+            # Форматировать как в email
+            text = f"🆕 <b>Новый лид от BizDNAi</b>\n\n"
+            text += f"👤 <b>Имя:</b> {data['name']}\n"
+            text += f"📞 <b>Телефон:</b> {data['phone']}\n\n"
                     
-                    if data.get('temperature'):
-                        text += f"🌡 <b>Температура:</b> {data['temperature']}\n\n"
+            if data.get('temperature'):
+                text += f"🌡 <b>Температура:</b> {data['temperature']}\n\n"
                     
-                    if data.get('ai_summary'):
-                        text += f"🤖 <b>Анализ AI:</b>\n{data['ai_summary'][:2000]}\n\n"
+            if data.get('ai_summary'):
+                text += f"🤖 <b>Анализ AI:</b>\n{data['ai_summary'][:2000]}\n\n"
                     
-                    # История диалога
-                    if data.get('conversation_history'):
-                        text += "💬 <b>История диалога:</b>\n"
-                        for msg in data['conversation_history'][-10:]:
-                            sender_icon = "🧑" if msg['sender'] == 'user' else "🤖"
-                            text += f"{sender_icon} {msg['text'][:100]}\n\n"
+            # История диалога
+            if data.get('conversation_history'):
+                text += "💬 <b>История диалога:</b>\n"
+                for msg in data['conversation_history'][-10:]:
+                    sender_icon = "🧑" if msg['sender'] == 'user' else "🤖"
+                    text += f"{sender_icon} {msg['text'][:100]}\n\n"
                     
-                    kb = InlineKeyboardMarkup(inline_keyboard=[[
-                        InlineKeyboardButton(text="📋 Открыть карточку", callback_data=f"vld:{lead_id}")
-                    ]])
+            kb = InlineKeyboardMarkup(inline_keyboard=[[
+                InlineKeyboardButton(text="📋 Открыть карточку", callback_data=f"vld:{lead_id}")
+            ]])
                     
-                    # Разбить на куски если длинное
-                    if len(text) > 4000:
-                        await callback.message.edit_text(text[:4000], parse_mode='HTML')
-                        await callback.message.answer(text[4000:8000], parse_mode='HTML', reply_markup=kb)
-                    else:
-                        await callback.message.edit_text(text, parse_mode='HTML', reply_markup=kb)
-                    await callback.answer()
-                else:
-                    await callback.answer("❌ Ошибка загрузки", show_alert=True)
+            # Разбить на куски если длинное
+            if len(text) > 4000:
+                await callback.message.edit_text(text[:4000], parse_mode='HTML')
+                await callback.message.answer(text[4000:8000], parse_mode='HTML', reply_markup=kb)
+            else:
+                await callback.message.edit_text(text, parse_mode='HTML', reply_markup=kb)
+            await callback.answer()
+        else:
+            await callback.answer("❌ Ошибка загрузки", show_alert=True)
     except Exception as e:
         logging.error(f"New lead callback: {e}")
         await callback.answer("❌ Ошибка", show_alert=True)
@@ -683,48 +666,44 @@ async def process_deal_amount(message: types.Message, state: FSMContext):
     company_id = message.bot.company_id
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(
-                f'{API_BASE_URL}/crm/{company_id}/leads/{lead_id}/deal/{deal_id}',
-                json={'amount': amount, 'manager_id': message.from_user.id}
-            ) as resp:
-                if resp.status == 200:
-                    result = await resp.json()
-                    deal_num = result.get('deal_number', 1)
-                    formatted = f"{amount:,.0f}".replace(',', ' ')
-                    await message.answer(f"✅ Сумма: {formatted} {currency}")
+        resp = await api.save_deal_amount(company_id, lead_id, deal_id, {'amount': amount, 'manager_id': message.from_user.id})
+        if resp.status == 200:
+            result = resp.data
+            deal_num = result.get('deal_number', 1)
+            formatted = f"{amount:,.0f}".replace(',', ' ')
+            await message.answer(f"✅ Сумма: {formatted} {currency}")
                     
-                    # Сохранить данные и запросить номер документа
-                    await state.update_data(deal_amount=amount, deal_number=deal_num, deal_result=result)
-                    await message.answer("📄 Введите номер документа оплаты:")
-                    await state.set_state(CRMStates.waiting_for_doc_number)
-                    return
+            # Сохранить данные и запросить номер документа
+            await state.update_data(deal_amount=amount, deal_number=deal_num, deal_result=result)
+            await message.answer("📄 Введите номер документа оплаты:")
+            await state.set_state(CRMStates.waiting_for_doc_number)
+            return
                     
-                    # (уведомление админу перенесено в waiting_for_payment_date)
-                    if False and result.get('notify_admin'):
-                        try:
-                            admin_id = message.bot.admin_chat_id
-                            deal_id = result.get('deal_id')
-                            client = result.get('client_name', 'Клиент')
-                            mgr = result.get('manager_name', 'Менеджер')
-                            lead_id_val = result.get('lead_id', lead_id)
+            # (уведомление админу перенесено в waiting_for_payment_date)
+            if False and result.get('notify_admin'):
+                try:
+                    admin_id = message.bot.admin_chat_id
+                    deal_id = result.get('deal_id')
+                    client = result.get('client_name', 'Клиент')
+                    mgr = result.get('manager_name', 'Менеджер')
+                    lead_id_val = result.get('lead_id', lead_id)
                             
-                            notify_text = (
-                                f"💰 <b>Новая сделка!</b>\n\n"
-                                f"Лид #{lead_id_val}\n"
-                                f"👤 Клиент: {client}\n"
-                                f"👨‍💼 Менеджер: {mgr}\n"
-                                f"💵 Сумма: {formatted} {currency}"
-                            )
-                            from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-                            kb = InlineKeyboardMarkup(inline_keyboard=[
-                                [InlineKeyboardButton(text="✅ Подтвердить", callback_data=f"confirm_deal:{deal_id}")]
-                            ])
-                            await message.bot.send_message(admin_id, notify_text, parse_mode='HTML', reply_markup=kb)
-                        except Exception as e:
-                            logging.error(f"Admin notify: {e}")
-                else:
-                    await message.answer("❌ Ошибка сохранения")
+                    notify_text = (
+                        f"💰 <b>Новая сделка!</b>\n\n"
+                        f"Лид #{lead_id_val}\n"
+                        f"👤 Клиент: {client}\n"
+                        f"👨‍💼 Менеджер: {mgr}\n"
+                        f"💵 Сумма: {formatted} {currency}"
+                    )
+                    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+                    kb = InlineKeyboardMarkup(inline_keyboard=[
+                        [InlineKeyboardButton(text="✅ Подтвердить", callback_data=f"confirm_deal:{deal_id}")]
+                    ])
+                    await message.bot.send_message(admin_id, notify_text, parse_mode='HTML', reply_markup=kb)
+                except Exception as e:
+                    logging.error(f"Admin notify: {e}")
+        else:
+            await message.answer("❌ Ошибка сохранения")
     except Exception as e:
         logging.error(f"Deal save: {e}")
         await message.answer("❌ Ошибка")
@@ -772,40 +751,36 @@ async def process_payment_date(message: types.Message, state: FSMContext):
     
     # Сохранить документ и дату в БД
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(
-                f'{API_BASE_URL}/crm/{company_id}/deals/{deal_id}/document',
-                json={'payment_doc_number': doc_number, 'payment_date': payment_date_db}
-            ) as resp:
-                if resp.status == 200:
-                    formatted = f"{deal_amount:,.0f}".replace(',', ' ')
-                    await message.answer(f"✅ Сделка {deal_num}: {formatted} {currency}\n📄 Документ: {doc_number}\n📅 Дата: {date_str}")
+        resp = await api.set_deal_document(company_id, deal_id, {'payment_doc_number': doc_number, 'payment_date': payment_date_db})
+        if resp.status == 200:
+            formatted = f"{deal_amount:,.0f}".replace(',', ' ')
+            await message.answer(f"✅ Сделка {deal_num}: {formatted} {currency}\n📄 Документ: {doc_number}\n📅 Дата: {date_str}")
                     
-                    # Отправить уведомление админу
-                    try:
-                        admin_id = message.bot.admin_chat_id
-                        client = deal_result.get('client_name', 'Клиент')
-                        mgr = deal_result.get('manager_name', 'Менеджер')
-                        lead_id = deal_result.get('lead_id', 0)
+            # Отправить уведомление админу
+            try:
+                admin_id = message.bot.admin_chat_id
+                client = deal_result.get('client_name', 'Клиент')
+                mgr = deal_result.get('manager_name', 'Менеджер')
+                lead_id = deal_result.get('lead_id', 0)
                         
-                        notify_text = (
-                            f"💰 <b>Новая сделка!</b>\n\n"
-                            f"Лид #{lead_id}\n"
-                            f"👤 Клиент: {client}\n"
-                            f"👨‍💼 Менеджер: {mgr}\n"
-                            f"💵 Сумма: {formatted} {currency}\n"
-                            f"📄 Документ: {doc_number}\n"
-                            f"📅 Дата оплаты: {date_str}"
-                        )
-                        from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-                        kb = InlineKeyboardMarkup(inline_keyboard=[
-                            [InlineKeyboardButton(text="✅ Подтвердить", callback_data=f"confirm_deal:{deal_id}")]
-                        ])
-                        await message.bot.send_message(admin_id, notify_text, parse_mode='HTML', reply_markup=kb)
-                    except Exception as e:
-                        logging.error(f"Admin notify: {e}")
-                else:
-                    await message.answer("❌ Ошибка сохранения документа")
+                notify_text = (
+                    f"💰 <b>Новая сделка!</b>\n\n"
+                    f"Лид #{lead_id}\n"
+                    f"👤 Клиент: {client}\n"
+                    f"👨‍💼 Менеджер: {mgr}\n"
+                    f"💵 Сумма: {formatted} {currency}\n"
+                    f"📄 Документ: {doc_number}\n"
+                    f"📅 Дата оплаты: {date_str}"
+                )
+                from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+                kb = InlineKeyboardMarkup(inline_keyboard=[
+                    [InlineKeyboardButton(text="✅ Подтвердить", callback_data=f"confirm_deal:{deal_id}")]
+                ])
+                await message.bot.send_message(admin_id, notify_text, parse_mode='HTML', reply_markup=kb)
+            except Exception as e:
+                logging.error(f"Admin notify: {e}")
+        else:
+            await message.answer("❌ Ошибка сохранения документа")
     except Exception as e:
         logging.error(f"Save doc: {e}")
         await message.answer("❌ Ошибка")
@@ -819,32 +794,31 @@ async def view_dialog_callback(callback: types.CallbackQuery):
     company_id = callback.bot.company_id
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/crm/{company_id}/leads/{lead_id}/full_report') as resp:
-                if resp.status == 200:
-                    data = await resp.json()
+        resp = await api.full_report(company_id, lead_id)
+        if resp.status == 200:
+            data = resp.data
                     
-                    text = f"📜 <b>Диалог с {data.get('name', 'клиентом')}</b>\n\n"
+            text = f"📜 <b>Диалог с {data.get('name', 'клиентом')}</b>\n\n"
                     
-                    if data.get('ai_summary'):
-                        text += f"🤖 <b>AI-анализ:</b>\n{data['ai_summary'][:2000]}\n\n"
+            if data.get('ai_summary'):
+                text += f"🤖 <b>AI-анализ:</b>\n{data['ai_summary'][:2000]}\n\n"
                     
-                    if data.get('conversation_history'):
-                        text += "💬 <b>История:</b>\n"
-                        for msg in data['conversation_history'][-15:]:
-                            sender_icon = "🧑" if msg.get('sender') == 'user' else "🤖"
-                            text += f"{sender_icon} {msg.get('text', '')[:150]}\n\n"
+            if data.get('conversation_history'):
+                text += "💬 <b>История:</b>\n"
+                for msg in data['conversation_history'][-15:]:
+                    sender_icon = "🧑" if msg.get('sender') == 'user' else "🤖"
+                    text += f"{sender_icon} {msg.get('text', '')[:150]}\n\n"
                     
-                    kb = InlineKeyboardMarkup(inline_keyboard=[[
-                        InlineKeyboardButton(text="⬅️ Назад к карточке", callback_data=f"vld:{lead_id}")
-                    ]])
+            kb = InlineKeyboardMarkup(inline_keyboard=[[
+                InlineKeyboardButton(text="⬅️ Назад к карточке", callback_data=f"vld:{lead_id}")
+            ]])
                     
-                    if len(text) > 4000:
-                        text = text[:4000] + "..."
-                    await callback.message.edit_text(text, parse_mode='HTML', reply_markup=kb)
-                    await callback.answer()
-                else:
-                    await callback.answer("❌ Ошибка загрузки", show_alert=True)
+            if len(text) > 4000:
+                text = text[:4000] + "..."
+            await callback.message.edit_text(text, parse_mode='HTML', reply_markup=kb)
+            await callback.answer()
+        else:
+            await callback.answer("❌ Ошибка загрузки", show_alert=True)
     except Exception as e:
         logging.error(f"Dialog: {e}")
         await callback.answer("❌ Ошибка", show_alert=True)
@@ -977,8 +951,7 @@ async def minute_confirmed(callback: types.CallbackQuery, state: FSMContext):
     if data.get('is_editing') and data.get('editing_event_id'):
         event_id = data.get('editing_event_id')
         company_id = getattr(callback.bot, 'company_id', 1)
-        async with aiohttp.ClientSession() as session:
-            await session.patch(f'{API_BASE_URL}/crm/{company_id}/events/{event_id}', json={'scheduled_at': scheduled_at})
+        await api.update_event(company_id, event_id, {'scheduled_at': scheduled_at})
         await state.clear()
         kb = InlineKeyboardMarkup(inline_keyboard=[
             [InlineKeyboardButton(text="✏️ Редактировать", callback_data=f"edit_event:{event_id}"),
@@ -1065,57 +1038,53 @@ async def save_event(callback: types.CallbackQuery, state: FSMContext):
     company_id = callback.bot.company_id
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f'{API_BASE_URL}/crm/{company_id}/events',
-                json={
-                    'lead_id': int(data['event_lead_id']) if data.get('event_lead_id') else None,
-                    'user_id': callback.from_user.id,
-                    'event_type': data['event_type'],
-                    'description': data.get('event_description', ''),
-                    'scheduled_at': data['scheduled_at'],
-                    'remind_before_minutes': remind
-                }
-            ) as resp:
-                if resp.status == 200:
-                    event_type = EVENT_TYPES.get(data['event_type'], data['event_type'])
-                    result = await resp.json()
-                    event_id = result.get('id', 0)
+        resp = await api.create_event(company_id, {
+            'lead_id': int(data['event_lead_id']) if data.get('event_lead_id') else None,
+            'user_id': callback.from_user.id,
+            'event_type': data['event_type'],
+            'description': data.get('event_description', ''),
+            'scheduled_at': data['scheduled_at'],
+            'remind_before_minutes': remind
+        })
+        if resp.status == 200:
+            event_type = EVENT_TYPES.get(data['event_type'], data['event_type'])
+            result = resp.data
+            event_id = result.get('id', 0)
                     
-                    # Если из меню — спрашиваем про повторение
-                    if data.get('from_menu'):
-                        await state.update_data(created_event_id=event_id)
-                        kb = InlineKeyboardMarkup(inline_keyboard=[
-                            [InlineKeyboardButton(text="🔁 Ежедневно", callback_data=f"recur:daily:{event_id}")],
-                            [InlineKeyboardButton(text="🔁 Еженедельно", callback_data=f"recur:weekly:{event_id}")],
-                            [InlineKeyboardButton(text="🔁 Ежемесячно", callback_data=f"recur:monthly:{event_id}")],
-                            [InlineKeyboardButton(text="❌ Не повторять", callback_data=f"recur:none:{event_id}")]
-                        ])
-                        await callback.message.edit_text(
-                            f"✅ Событие создано!\n\n"
-                            f"{event_type}\n"
-                            f"📅 {data.get('selected_date', '')[8:10]}.{data.get('selected_date', '')[5:7]}.{data.get('selected_date', '')[:4]} "
-                            f"{data.get('selected_hour', 0):02d}:{data.get('selected_minute', 0):02d}\n"
-                            f"⏰ Напоминание за {remind} мин\n\n"
-                            f"🔁 Повторять событие?",
-                            reply_markup=kb
-                        )
-                        await state.clear()
-                        return
-                    kb = InlineKeyboardMarkup(inline_keyboard=[
-                        [InlineKeyboardButton(text="✏️ Редактировать", callback_data=f"edit_event:{event_id}"),
-                         InlineKeyboardButton(text="🗑 Удалить", callback_data=f"del_event:{event_id}")],
-                        [InlineKeyboardButton(text="✅ Сохранить", callback_data=f"save_event:{event_id}")]
-                    ])
-                    await callback.message.edit_text(
-                        f"✅ Событие создано!\n\n"
-                        f"{event_type}\n"
-                        f"📅 {data.get('selected_date', '')[8:10]}.{data.get('selected_date', '')[5:7]}.{data.get('selected_date', '')[:4]} {data.get('selected_hour', 0):02d}:{data.get('selected_minute', 0):02d}\n"
-                        f"⏰ Напоминание за {remind} мин",
-                        reply_markup=kb
-                    )
-                else:
-                    await callback.message.edit_text("❌ Ошибка создания события")
+            # Если из меню — спрашиваем про повторение
+            if data.get('from_menu'):
+                await state.update_data(created_event_id=event_id)
+                kb = InlineKeyboardMarkup(inline_keyboard=[
+                    [InlineKeyboardButton(text="🔁 Ежедневно", callback_data=f"recur:daily:{event_id}")],
+                    [InlineKeyboardButton(text="🔁 Еженедельно", callback_data=f"recur:weekly:{event_id}")],
+                    [InlineKeyboardButton(text="🔁 Ежемесячно", callback_data=f"recur:monthly:{event_id}")],
+                    [InlineKeyboardButton(text="❌ Не повторять", callback_data=f"recur:none:{event_id}")]
+                ])
+                await callback.message.edit_text(
+                    f"✅ Событие создано!\n\n"
+                    f"{event_type}\n"
+                    f"📅 {data.get('selected_date', '')[8:10]}.{data.get('selected_date', '')[5:7]}.{data.get('selected_date', '')[:4]} "
+                    f"{data.get('selected_hour', 0):02d}:{data.get('selected_minute', 0):02d}\n"
+                    f"⏰ Напоминание за {remind} мин\n\n"
+                    f"🔁 Повторять событие?",
+                    reply_markup=kb
+                )
+                await state.clear()
+                return
+            kb = InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="✏️ Редактировать", callback_data=f"edit_event:{event_id}"),
+                 InlineKeyboardButton(text="🗑 Удалить", callback_data=f"del_event:{event_id}")],
+                [InlineKeyboardButton(text="✅ Сохранить", callback_data=f"save_event:{event_id}")]
+            ])
+            await callback.message.edit_text(
+                f"✅ Событие создано!\n\n"
+                f"{event_type}\n"
+                f"📅 {data.get('selected_date', '')[8:10]}.{data.get('selected_date', '')[5:7]}.{data.get('selected_date', '')[:4]} {data.get('selected_hour', 0):02d}:{data.get('selected_minute', 0):02d}\n"
+                f"⏰ Напоминание за {remind} мин",
+                reply_markup=kb
+            )
+        else:
+            await callback.message.edit_text("❌ Ошибка создания события")
     except Exception as e:
         logging.error(f"Event create error: {e}")
         await callback.message.edit_text("❌ Ошибка")
@@ -1129,11 +1098,7 @@ async def event_done(callback: types.CallbackQuery):
     event_id = callback.data.split(":")[1]
     company_id = callback.bot.company_id
     
-    async with aiohttp.ClientSession() as session:
-        await session.patch(
-            f'{API_BASE_URL}/crm/{company_id}/events/{event_id}',
-            json={'status': 'done'}
-        )
+    await api.update_event(company_id, event_id, {'status': 'done'})
     await callback.message.edit_text("✅ Событие выполнено!")
 
 
@@ -1151,11 +1116,7 @@ async def event_delay(callback: types.CallbackQuery):
     else:
         new_time = datetime.now() + timedelta(minutes=15)
     
-    async with aiohttp.ClientSession() as session:
-        await session.patch(
-            f'{API_BASE_URL}/crm/{company_id}/events/{event_id}',
-            json={'scheduled_at': new_time.isoformat()}
-        )
+    await api.update_event(company_id, event_id, {'scheduled_at': new_time.isoformat()})
     await callback.message.edit_text(f"⏰ Отложено на 15 минут (до {new_time.strftime('%H:%M')})")
 
 
@@ -1165,11 +1126,7 @@ async def event_cancel(callback: types.CallbackQuery):
     event_id = callback.data.split(":")[1]
     company_id = callback.bot.company_id
     
-    async with aiohttp.ClientSession() as session:
-        await session.patch(
-            f'{API_BASE_URL}/crm/{company_id}/events/{event_id}',
-            json={'status': 'cancelled'}
-        )
+    await api.update_event(company_id, event_id, {'status': 'cancelled'})
     await callback.message.edit_text("❌ Событие отменено")
 
 # === РЕДАКТИРОВАНИЕ И УДАЛЕНИЕ СОБЫТИЙ ===
@@ -1181,9 +1138,8 @@ async def edit_event(callback: types.CallbackQuery, state: FSMContext):
     company_id = callback.bot.company_id
     
     # Получить событие
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f'{API_BASE_URL}/crm/{company_id}/events?user_id={callback.from_user.id}') as resp:
-            events = await resp.json() if resp.status == 200 else []
+    resp = await api.events(company_id, user_id=callback.from_user.id)
+    events = resp.data if resp.status == 200 else []
     
     event = next((e for e in events if str(e.get('id')) == event_id), None)
     if not event:
@@ -1191,8 +1147,7 @@ async def edit_event(callback: types.CallbackQuery, state: FSMContext):
         return
     
     # Удалить старое событие
-    async with aiohttp.ClientSession() as session:
-        await session.patch(f'{API_BASE_URL}/crm/{company_id}/events/{event_id}', json={'status': 'cancelled'})
+    await api.update_event(company_id, event_id, {'status': 'cancelled'})
     
     # Начать создание нового
     await state.update_data(event_lead_id=event.get('lead_id'))
@@ -1212,8 +1167,7 @@ async def delete_event(callback: types.CallbackQuery):
     event_id = callback.data.split(":")[1]
     company_id = callback.bot.company_id
     
-    async with aiohttp.ClientSession() as session:
-        await session.patch(f'{API_BASE_URL}/crm/{company_id}/events/{event_id}', json={'status': 'cancelled'})
+    await api.update_event(company_id, event_id, {'status': 'cancelled'})
     
     await callback.answer("🗑 Событие удалено", show_alert=True)
     # Обновить список
@@ -1270,8 +1224,7 @@ async def set_event_type(callback: types.CallbackQuery):
     parts = callback.data.split(":")
     new_type, event_id = parts[1], int(parts[2])
     company_id = getattr(callback.bot, 'company_id', 1)
-    async with aiohttp.ClientSession() as session:
-        await session.patch(f'{API_BASE_URL}/crm/{company_id}/events/{event_id}', json={'event_type': new_type})
+    await api.update_event(company_id, event_id, {'event_type': new_type})
     types_map = {'call': '📞 Звонок', 'meeting': '🤝 Встреча', 'email': '📧 Письмо', 'task': '📋 Задача'}
     kb = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="✏️ Редактировать", callback_data=f"edit_event:{event_id}"),
@@ -1309,8 +1262,7 @@ async def process_desc_edit(message: types.Message, state: FSMContext):
     data = await state.get_data()
     event_id = data.get('editing_event_id')
     company_id = getattr(message.bot, 'company_id', 1)
-    async with aiohttp.ClientSession() as session:
-        await session.patch(f'{API_BASE_URL}/crm/{company_id}/events/{event_id}', json={'description': message.text or ''})
+    await api.update_event(company_id, event_id, {'description': message.text or ''})
     kb = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="✏️ Редактировать", callback_data=f"edit_event:{event_id}"),
          InlineKeyboardButton(text="🗑 Удалить", callback_data=f"del_event:{event_id}")],
@@ -1324,8 +1276,7 @@ async def save_empty_desc(callback: types.CallbackQuery, state: FSMContext):
     """Сохранить пустое описание"""
     event_id = int(callback.data.split(":")[1])
     company_id = getattr(callback.bot, 'company_id', 1)
-    async with aiohttp.ClientSession() as session:
-        await session.patch(f'{API_BASE_URL}/crm/{company_id}/events/{event_id}', json={'description': ''})
+    await api.update_event(company_id, event_id, {'description': ''})
     await state.clear()
     kb = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="✏️ Редактировать", callback_data=f"edit_event:{event_id}"),
@@ -1354,8 +1305,7 @@ async def set_event_rem(callback: types.CallbackQuery):
     parts = callback.data.split(":")
     mins, event_id = int(parts[1]), int(parts[2])
     company_id = getattr(callback.bot, 'company_id', 1)
-    async with aiohttp.ClientSession() as session:
-        await session.patch(f'{API_BASE_URL}/crm/{company_id}/events/{event_id}', json={'remind_before_minutes': mins})
+    await api.update_event(company_id, event_id, {'remind_before_minutes': mins})
     kb = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="✏️ Редактировать", callback_data=f"edit_event:{event_id}"),
          InlineKeyboardButton(text="🗑 Удалить", callback_data=f"del_event:{event_id}")],
@@ -1380,8 +1330,7 @@ async def del_event_yes(callback: types.CallbackQuery):
     """Удалить событие"""
     event_id = int(callback.data.split(":")[1])
     company_id = getattr(callback.bot, 'company_id', 1)
-    async with aiohttp.ClientSession() as session:
-        await session.delete(f'{API_BASE_URL}/crm/{company_id}/events/{event_id}')
+    await api.delete_event(company_id, event_id)
     await callback.message.edit_text(f"✅ Событие #{event_id} удалено!")
     await callback.answer()
 
@@ -1413,13 +1362,8 @@ async def show_events_list(msg_or_cb, offset=0, filter_type=None, filter_period=
         user_id = msg_or_cb.from_user.id
     
     # Получаем события
-    url = f'{API_BASE_URL}/crm/{company_id}/events?user_id={user_id}&offset={offset}&limit=50'
-    if filter_type:
-        url += f'&event_type={filter_type}'
-    
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as resp:
-            events = await resp.json() if resp.status == 200 else []
+    resp = await api.events(company_id, user_id=user_id, limit=50, offset=offset, event_type=filter_type)
+    events = resp.data if resp.status == 200 else []
     
     # Фильтр по периоду (клиентская сторона пока)
     from datetime import datetime, timedelta
@@ -1546,10 +1490,9 @@ async def view_event_detail(callback: types.CallbackQuery):
     event_id = int(callback.data.split(":")[1])
     company_id = getattr(callback.bot, 'company_id', 1)
     
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f'{API_BASE_URL}/crm/{company_id}/events') as resp:
-            events = await resp.json() if resp.status == 200 else []
-            ev = next((e for e in events if e.get('id') == event_id), None)
+    resp = await api.events(company_id)
+    events = resp.data if resp.status == 200 else []
+    ev = next((e for e in events if e.get('id') == event_id), None)
     
     if ev:
         types_map = {'call': '📞 Звонок', 'meeting': '🤝 Встреча', 'email': '📧 Письмо', 'task': '📋 Задача'}
@@ -1604,9 +1547,8 @@ async def show_event_history(callback: types.CallbackQuery):
     company_id = getattr(callback.bot, 'company_id', 1)
     user_id = callback.from_user.id
     
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f'{API_BASE_URL}/crm/{company_id}/events/history?user_id={user_id}&offset={offset}&limit=5') as resp:
-            events = await resp.json() if resp.status == 200 else []
+    resp = await api.events_history(company_id, user_id, offset)
+    events = resp.data if resp.status == 200 else []
     
     type_icons = {'call': '📞', 'meeting': '🤝', 'email': '📧', 'task': '📋'}
     status_icons = {'done': '✅', 'missed': '⚠️', 'cancelled': '❌'}
@@ -1675,11 +1617,7 @@ async def set_recurring(callback: types.CallbackQuery):
         await callback.message.edit_text(f"✅ Событие #{event_id} создано!", reply_markup=kb)
     else:
         # Устанавливаем повторение в БД
-        async with aiohttp.ClientSession() as session:
-            await session.patch(
-                f'{API_BASE_URL}/crm/{company_id}/events/{event_id}',
-                json={'is_recurring': True, 'recurring_pattern': pattern}
-            )
+        await api.update_event(company_id, event_id, {'is_recurring': True, 'recurring_pattern': pattern})
         
         pattern_names = {'daily': 'Ежедневно', 'weekly': 'Еженедельно', 'monthly': 'Ежемесячно'}
         kb = InlineKeyboardMarkup(inline_keyboard=[
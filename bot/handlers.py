@@ -6,7 +6,7 @@ from aiogram import Router, types, F
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
-from config import API_BASE_URL
+from api_client import api
 from states import SalesFlow, ManagerFlow
 from keyboards import get_start_keyboard
 
@@ -37,20 +37,18 @@ def is_admin(user_id: int, bot) -> bool:
 
 async def start_session(user_id: int, company_id: int, new_session: bool = True):
     """Start session for specific company"""
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.post(f'{API_BASE_URL}/sales/{company_id}/chat', json={
-                'message': 'start_session',
-                'user_id': str(user_id),
-                'username': f'user_{user_id}',
-                'source': 'telegram',
-                'new_session': new_session
-            }) as resp:
-                data = await resp.json()
-                return data.get("session_id")
-        except Exception as e:
-            logging.error(f'Session start error: {e}')
-            return None
+    try:
+        resp = await api.chat(company_id, {
+            'message': 'start_session',
+            'user_id': str(user_id),
+            'username': f'user_{user_id}',
+            'source': 'telegram',
+            'new_session': new_session
+        })
+        return resp.data.get("session_id")
+    except Exception as e:
+        logging.error(f'Session start error: {e}')
+        return None
 
 async def process_backend_response(message: types.Message, response_text: str):
     """
@@ -136,27 +134,25 @@ async def handle_contact(message: types.Message, state: FSMContext):
     
     status_msg = await message.answer("⏳ Обрабатываю контакт...")
     
-    async with aiohttp.ClientSession() as session:
-        try:
-            company_id = getattr(message.bot, 'company_id', 1)
-            async with session.post(f'{API_BASE_URL}/sales/{company_id}/chat', json={
-                'message': phone,
-                'user_id': user_id,
-                'username': username,
-                'phone': phone
-            }) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    response_text = data.get('response', 'Спасибо! Номер получен.')
-                    await status_msg.delete()
-                    await message.answer(response_text, reply_markup=get_start_keyboard())
-                else:
-                    await status_msg.delete()
-                    await message.answer("Ошибка при отправке контакта.", reply_markup=get_start_keyboard())
-        except Exception as e:
-            logging.error(f'Backend error: {e}')
+    try:
+        company_id = getattr(message.bot, 'company_id', 1)
+        resp = await api.chat(company_id, {
+            'message': phone,
+            'user_id': user_id,
+            'username': username,
+            'phone': phone
+        })
+        if resp.status == 200:
+            response_text = resp.data.get('response', 'Спасибо! Номер получен.')
+            await status_msg.delete()
+            await message.answer(response_text, reply_markup=get_start_keyboard())
+        else:
             await status_msg.delete()
-            await message.answer("Ошибка соединения с сервером.")
+            await message.answer("Ошибка при отправке контакта.", reply_markup=get_start_keyboard())
+    except Exception as e:
+        logging.error(f'Backend error: {e}')
+        await status_msg.delete()
+        await message.answer("Ошибка соединения с сервером.")
 
 @router.message(F.voice)
 async def handle_voice(message: types.Message, state: FSMContext):
@@ -213,36 +209,35 @@ async def handle_voice(message: types.Message, state: FSMContext):
         data_form.add_field('language', language)
         
         company_id = getattr(message.bot, 'company_id', 1)
-        async with aiohttp.ClientSession() as session:
-             async with session.post(f'{API_BASE_URL}/sales/{company_id}/voice', data=data_form) as resp:
-                 if resp.status == 200:
-                     result = await resp.json()
-                     ai_response = result.get('response', '')
-                     transcribed_text = result.get('text', '')
+        resp = await api.voice(company_id, data_form)
+        if resp.status == 200:
+            result = resp.data
+            ai_response = result.get('response', '')
+            transcribed_text = result.get('text', '')
                      
-                     try:
-                        await status_msg.delete()
-                     except Exception:
-                        pass
+            try:
+               await status_msg.delete()
+            except Exception:
+               pass
                      
-                     if transcribed_text:
-                        you_said_text = {
-                            'ru': '🗣 Вы сказали:',
-                            'en': '🗣 You said:',
-                            'kz': '🗣 Сіз айттыңыз:',
-                            'ky': '🗣 Сиз айттыңыз:',
-                            'uz': '🗣 Siz aytdingiz:',
-                            'uk': '🗣 Ви сказали:'
-                        }
-                        await message.answer(f"{you_said_text.get(language, '🗣 Вы сказали:')} {transcribed_text}")
+            if transcribed_text:
+               you_said_text = {
+                   'ru': '🗣 Вы сказали:',
+                   'en': '🗣 You said:',
+                   'kz': '🗣 Сіз айттыңыз:',
+                   'ky': '🗣 Сиз айттыңыз:',
+                   'uz': '🗣 Siz aytdingiz:',
+                   'uk': '🗣 Ви сказали:'
+               }
+               await message.answer(f"{you_said_text.get(language, '🗣 Вы сказали:')} {transcribed_text}")
                         
-                     await process_backend_response(message, ai_response)
-                 else:
-                     try:
-                        await status_msg.delete()
-                     except Exception:
-                        pass
-                     await message.answer("Ошибка обработки голосового сообщения.")
+            await process_backend_response(message, ai_response)
+        else:
+            try:
+               await status_msg.delete()
+            except Exception:
+               pass
+            await message.answer("Ошибка обработки голосового сообщения.")
     except Exception as e:
         logging.error(f"Voice error: {e}")
         try:
@@ -271,30 +266,29 @@ async def handle_admin_voice(message: types.Message, state: FSMContext):
         data_form.add_field('language', 'ru')  # Manager default language
         
         company_id = getattr(message.bot, 'company_id', 1)
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f'{API_BASE_URL}/sales/{company_id}/voice', data=data_form) as resp:
-                if resp.status == 200:
-                    result = await resp.json()
-                    transcribed_text = result.get('text', '')
+        resp = await api.voice(company_id, data_form)
+        if resp.status == 200:
+            result = resp.data
+            transcribed_text = result.get('text', '')
                     
-                    try:
-                        await status_msg.delete()
-                    except:
-                        pass
+            try:
+                await status_msg.delete()
+            except:
+                pass
                     
-                    if transcribed_text:
-                        # Show transcription
-                        await message.answer(f"🗣 {transcribed_text}")
-                        # Process as manager command
-                        await process_admin_command(message, transcribed_text, state)
-                    else:
-                        await message.answer("❌ Не удалось распознать голос")
-                else:
-                    try:
-                        await status_msg.delete()
-                    except:
-                        pass
-                    await message.answer("❌ Ошибка обработки голоса")
+            if transcribed_text:
+                # Show transcription
+                await message.answer(f"🗣 {transcribed_text}")
+                # Process as manager command
+                await process_admin_command(message, transcribed_text, state)
+            else:
+                await message.answer("❌ Не удалось распознать голос")
+        else:
+            try:
+                await status_msg.delete()
+            except:
+                pass
+            await message.answer("❌ Ошибка обработки голоса")
     except Exception as e:
         logging.error(f"Manager voice error: {e}")
         try:
@@ -303,6 +297,47 @@ async def handle_admin_voice(message: types.Message, state: FSMContext):
             pass
         await message.answer(f"❌ Ошибка: {str(e)}")
 
+def widget_source_name(source: str, channel_name: str = None) -> str:
+    """Display name of a social widget source (lead source = widget id)"""
+    return f"{(channel_name or 'Widget').capitalize()} #{source}"
+
+def source_sort_key(row: dict):
+    """Named sources first (alphabetically), then widget ids in order"""
+    source = row['source']
+    if source.isdigit():
+        return (1, int(source))
+    return (0, source.lower())
+
+async def send_period_leads(message: types.Message, company_id: int, days: int, title: str, log_label: str):
+    """Leads of the last `days` days by source plus the latest 10, from one report request"""
+    try:
+        from datetime import datetime, timedelta
+        since = (datetime.utcnow() - timedelta(days=days)).isoformat()
+        resp = await api.lead_report(company_id, date_from=since, contact='name_or_phone', latest=10, timeout=10)
+        if resp.status == 200:
+            report = resp.data
+            msg = f"📊 <b>{title}</b>\n\nВсего: {report.get('total', 0)}\n\n<b>По источникам:</b>\n"
+            for row in sorted(report.get('by_source', []), key=source_sort_key):
+                source = row['source']
+                if source.isdigit():
+                    msg += f"📸 {widget_source_name(source, row.get('channel_name'))}: {row['count']}\n"
+                else:
+                    msg += f"• {source}: {row['count']}\n"
+            msg += "\n<b>Последние 10:</b>\n"
+            for lead in report.get('latest', []):
+                contact = lead.get('contact_info') or {}
+                name = contact.get('name', 'Не указано')
+                phone = contact.get('phone', 'Не указан')
+                source = lead.get('source', 'web')
+                source_name = widget_source_name(source, lead.get('channel_name')) if source.isdigit() else source
+                msg += f"• {name} ({phone}) - {source_name}\n"
+            await message.answer(msg, parse_mode='HTML')
+        else:
+            await message.answer("⚠️ Не удалось получить лиды")
+    except Exception as e:
+        logging.error(f"{log_label} leads error: {e}")
+        await message.answer("❌ Ошибка")
+
 async def process_admin_command(message: types.Message, text: str, state: FSMContext):
     """Process manager text commands"""
     text_lower = text.lower()
@@ -311,23 +346,22 @@ async def process_admin_command(message: types.Message, text: str, state: FSMCon
         from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
         company_id = getattr(message.bot, 'company_id', 1)
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f'{API_BASE_URL}/sales/companies/all') as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        company = next((c for c in data if c.get('id') == company_id), None)
-                        if company:
-                            enabled = company.get('integration_enabled', False)
-                            itype = company.get('integration_type', '')
-                            if enabled and itype:
-                                text = f"✅ <b>Внешняя CRM {itype.upper()} подключена</b>"
-                            else:
-                                text = "❌ <b>Внешняя CRM не подключена</b>"
-                            kb = InlineKeyboardMarkup(inline_keyboard=[
-                                [InlineKeyboardButton(text="📘 Bitrix24", callback_data="crm_ext:bitrix24")],
-                                [InlineKeyboardButton(text="🟣 Kommo", callback_data="crm_ext:kommo")]
-                            ])
-                            await message.answer(text, parse_mode='HTML', reply_markup=kb)
+            resp = await api.companies()
+            if resp.status == 200:
+                data = resp.data
+                company = next((c for c in data if c.get('id') == company_id), None)
+                if company:
+                    enabled = company.get('integration_enabled', False)
+                    itype = company.get('integration_type', '')
+                    if enabled and itype:
+                        text = f"✅ <b>Внешняя CRM {itype.upper()} подключена</b>"
+                    else:
+                        text = "❌ <b>Внешняя CRM не подключена</b>"
+                    kb = InlineKeyboardMarkup(inline_keyboard=[
+                        [InlineKeyboardButton(text="📘 Bitrix24", callback_data="crm_ext:bitrix24")],
+                        [InlineKeyboardButton(text="🟣 Kommo", callback_data="crm_ext:kommo")]
+                    ])
+                    await message.answer(text, parse_mode='HTML', reply_markup=kb)
         except Exception as e:
             await message.answer(f"❌ Ошибка: {str(e)[:30]}")
 
@@ -335,22 +369,21 @@ async def process_admin_command(message: types.Message, text: str, state: FSMCon
         from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
         company_id = getattr(message.bot, 'company_id', 1)
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f'{API_BASE_URL}/sales/companies/all') as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        company = next((c for c in data if c.get('id') == company_id), None)
-                        if company:
-                            crm_type = company.get('crm_type', '')
-                            if crm_type == 'internal':
-                                text = "✅ <b>Внутренняя CRM включена</b>"
-                            else:
-                                text = "❌ <b>Внутренняя CRM не подключена</b>"
-                            kb = InlineKeyboardMarkup(inline_keyboard=[
-                                [InlineKeyboardButton(text="✅ Включить" if crm_type != 'internal' else "❌ Отключить", callback_data="crm_int:toggle")],
-                                [InlineKeyboardButton(text="⚙️ Статусы", callback_data="crm_int:statuses")]
-                            ])
-                            await message.answer(text, parse_mode='HTML', reply_markup=kb)
+            resp = await api.companies()
+            if resp.status == 200:
+                data = resp.data
+                company = next((c for c in data if c.get('id') == company_id), None)
+                if company:
+                    crm_type = company.get('crm_type', '')
+                    if crm_type == 'internal':
+                        text = "✅ <b>Внутренняя CRM включена</b>"
+                    else:
+                        text = "❌ <b>Внутренняя CRM не подключена</b>"
+                    kb = InlineKeyboardMarkup(inline_keyboard=[
+                        [InlineKeyboardButton(text="✅ Включить" if crm_type != 'internal' else "❌ Отключить", callback_data="crm_int:toggle")],
+                        [InlineKeyboardButton(text="⚙️ Статусы", callback_data="crm_int:statuses")]
+                    ])
+                    await message.answer(text, parse_mode='HTML', reply_markup=kb)
         except Exception as e:
             await message.answer(f"❌ Ошибка: {str(e)[:30]}")
 
@@ -358,30 +391,29 @@ async def process_admin_command(message: types.Message, text: str, state: FSMCon
         company_id = getattr(message.bot, 'company_id', 1)
         try:
             from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f'{API_BASE_URL}/crm/{company_id}/managers') as resp:
-                    if resp.status == 200:
-                        managers = await resp.json()
-                        # Сортировка по монеткам (убывание)
-                        managers = sorted(managers, key=lambda x: x.get('coins', 0), reverse=True)
-                        text_msg = "👥 <b>Менеджеры компании</b>\n\n"
-                        buttons = []
-                        if managers:
-                            for i, m in enumerate(managers):
-                                coins = m.get('coins', 0)
-                                leads = m.get('leads_count', 0)
-                                name = m.get('full_name', 'Без имени')
-                                user_id = m.get('user_id', 0)
-                                medal = ['🥇', '🥈', '🥉'][i] if i < 3 else f"{i+1}."
-                                text_msg += f"{medal} {name} — {coins}💰\n"
-                                buttons.append([InlineKeyboardButton(text=f"📊 {name}", callback_data=f"mgr_card:{user_id}")])
-                        else:
-                            text_msg += "Пока нет менеджеров\n"
-                        text_msg += "\n<i>Нажмите для KPI</i>\n<b>Добавить:</b> /join"
-                        kb = InlineKeyboardMarkup(inline_keyboard=buttons) if buttons else None
-                        await message.answer(text_msg, parse_mode='HTML', reply_markup=kb)
-                    else:
-                        await message.answer("📋 Менеджеры: 0\n\nЧтобы добавить: /join")
+            resp = await api.managers(company_id)
+            if resp.status == 200:
+                managers = resp.data
+                # Сортировка по монеткам (убывание)
+                managers = sorted(managers, key=lambda x: x.get('coins', 0), reverse=True)
+                text_msg = "👥 <b>Менеджеры компании</b>\n\n"
+                buttons = []
+                if managers:
+                    for i, m in enumerate(managers):
+                        coins = m.get('coins', 0)
+                        leads = m.get('leads_count', 0)
+                        name = m.get('full_name', 'Без имени')
+                        user_id = m.get('user_id', 0)
+                        medal = ['🥇', '🥈', '🥉'][i] if i < 3 else f"{i+1}."
+                        text_msg += f"{medal} {name} — {coins}💰\n"
+                        buttons.append([InlineKeyboardButton(text=f"📊 {name}", callback_data=f"mgr_card:{user_id}")])
+                else:
+                    text_msg += "Пока нет менеджеров\n"
+                text_msg += "\n<i>Нажмите для KPI</i>\n<b>Добавить:</b> /join"
+                kb = InlineKeyboardMarkup(inline_keyboard=buttons) if buttons else None
+                await message.answer(text_msg, parse_mode='HTML', reply_markup=kb)
+            else:
+                await message.answer("📋 Менеджеры: 0\n\nЧтобы добавить: /join")
         except Exception as e:
             logging.error(f"Managers error: {e}")
             await message.answer("📋 Менеджеры: 0\n\nЧтобы добавить: /join")
@@ -390,41 +422,40 @@ async def process_admin_command(message: types.Message, text: str, state: FSMCon
         company_id = getattr(message.bot, 'company_id', 1)
         user_id = message.from_user.id
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f'{API_BASE_URL}/crm/{company_id}/events?user_id={user_id}') as resp:
-                    if resp.status == 200:
-                        events = await resp.json()
-                        if not events:
-                            await message.answer("📅 У вас нет предстоящих событий\n\n💡 Создать событие можно из карточки лида")
-                            return
+            resp = await api.events(company_id, user_id=user_id)
+            if resp.status == 200:
+                events = resp.data
+                if not events:
+                    await message.answer("📅 У вас нет предстоящих событий\n\n💡 Создать событие можно из карточки лида")
+                    return
                         
-                        text = "📅 <b>Ваши события:</b>\n\n"
-                        buttons = []
-                        for e in events[:10]:
-                            emoji = {'call': '📞', 'meeting': '🤝', 'email': '📧', 'task': '📋'}.get(e.get('event_type', ''), '📋')
-                            dt_raw = e.get('scheduled_at', '')
-                            if dt_raw and len(dt_raw) >= 16:
-                                dt = f"{dt_raw[8:10]}.{dt_raw[5:7]}.{dt_raw[:4]} {dt_raw[11:16]}"
-                            else:
-                                dt = dt_raw[:16].replace('T', ' ') if dt_raw else ''
-                            client = e.get('client_name', 'Клиент')
-                            desc = e.get('description', '')[:30] if e.get('description') else ''
-                            event_id = e.get('id')
+                text = "📅 <b>Ваши события:</b>\n\n"
+                buttons = []
+                for e in events[:10]:
+                    emoji = {'call': '📞', 'meeting': '🤝', 'email': '📧', 'task': '📋'}.get(e.get('event_type', ''), '📋')
+                    dt_raw = e.get('scheduled_at', '')
+                    if dt_raw and len(dt_raw) >= 16:
+                        dt = f"{dt_raw[8:10]}.{dt_raw[5:7]}.{dt_raw[:4]} {dt_raw[11:16]}"
+                    else:
+                        dt = dt_raw[:16].replace('T', ' ') if dt_raw else ''
+                    client = e.get('client_name', 'Клиент')
+                    desc = e.get('description', '')[:30] if e.get('description') else ''
+                    event_id = e.get('id')
                             
-                            text += f"{emoji} {dt}\n   👤 {client}"
-                            if desc:
-                                text += f" — {desc}"
-                            text += "\n\n"
+                    text += f"{emoji} {dt}\n   👤 {client}"
+                    if desc:
+                        text += f" — {desc}"
+                    text += "\n\n"
                             
-                            buttons.append([
-                                InlineKeyboardButton(text=f"✏️ {emoji} {dt[:5]}", callback_data=f"ev_edit:{event_id}"),
-                                InlineKeyboardButton(text="🗑", callback_data=f"ev_del:{event_id}")
-                            ])
+                    buttons.append([
+                        InlineKeyboardButton(text=f"✏️ {emoji} {dt[:5]}", callback_data=f"ev_edit:{event_id}"),
+                        InlineKeyboardButton(text="🗑", callback_data=f"ev_del:{event_id}")
+                    ])
                         
-                        kb = InlineKeyboardMarkup(inline_keyboard=buttons) if buttons else None
-                        await message.answer(text, parse_mode='HTML', reply_markup=kb)
-                    else:
-                        await message.answer("❌ Ошибка загрузки")
+                kb = InlineKeyboardMarkup(inline_keyboard=buttons) if buttons else None
+                await message.answer(text, parse_mode='HTML', reply_markup=kb)
+            else:
+                await message.answer("❌ Ошибка загрузки")
         except Exception as e:
             logging.error(f"Events error: {e}")
             await message.answer("❌ Ошибка")
@@ -433,34 +464,32 @@ async def process_admin_command(message: types.Message, text: str, state: FSMCon
         company_id = getattr(message.bot, 'company_id', 1)
         try:
             from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-            async with aiohttp.ClientSession() as session:
-                url = f'{API_BASE_URL}/crm/{company_id}/leaderboard?period=all&sort=coins'
-                async with session.get(url) as resp:
-                    leaders = await resp.json() if resp.status == 200 else []
-                    if not leaders:
-                        await message.answer("🏆 Пусто")
-                        return
-                    text_msg = "🏆 <b>Лидерборд</b> (Всё время, 💰)\n\n"
-                    medals = ['🥇', '🥈', '🥉']
-                    for i, m in enumerate(leaders[:10]):
-                        medal = medals[i] if i < 3 else f"{i+1}."
-                        name = m.get('full_name', '?')
-                        coins = m.get('coins', 0)
-                        text_msg += f"{medal} {name}\n   💰 Монеты: {coins}\n\n"
+            resp = await api.leaderboard(company_id, 'all', 'coins')
+            leaders = resp.data if resp.status == 200 else []
+            if not leaders:
+                await message.answer("🏆 Пусто")
+                return
+            text_msg = "🏆 <b>Лидерборд</b> (Всё время, 💰)\n\n"
+            medals = ['🥇', '🥈', '🥉']
+            for i, m in enumerate(leaders[:10]):
+                medal = medals[i] if i < 3 else f"{i+1}."
+                name = m.get('full_name', '?')
+                coins = m.get('coins', 0)
+                text_msg += f"{medal} {name}\n   💰 Монеты: {coins}\n\n"
                     
-                    kb = InlineKeyboardMarkup(inline_keyboard=[
-                        [
-                            InlineKeyboardButton(text="📅 Неделя", callback_data="alb:week:coins"),
-                            InlineKeyboardButton(text="📅 Месяц", callback_data="alb:month:coins"),
-                            InlineKeyboardButton(text="📅 Всё ✓", callback_data="alb:all:coins")
-                        ],
-                        [
-                            InlineKeyboardButton(text="💰 Монеты ✓", callback_data="alb:all:coins"),
-                            InlineKeyboardButton(text="💵 Сумма", callback_data="alb:all:amount"),
-                            InlineKeyboardButton(text="✅ Сделки", callback_data="alb:all:deals")
-                        ]
-                    ])
-                    await message.answer(text_msg, parse_mode='HTML', reply_markup=kb)
+            kb = InlineKeyboardMarkup(inline_keyboard=[
+                [
+                    InlineKeyboardButton(text="📅 Неделя", callback_data="alb:week:coins"),
+                    InlineKeyboardButton(text="📅 Месяц", callback_data="alb:month:coins"),
+                    InlineKeyboardButton(text="📅 Всё ✓", callback_data="alb:all:coins")
+                ],
+                [
+                    InlineKeyboardButton(text="💰 Монеты ✓", callback_data="alb:all:coins"),
+                    InlineKeyboardButton(text="💵 Сумма", callback_data="alb:all:amount"),
+                    InlineKeyboardButton(text="✅ Сделки", callback_data="alb:all:deals")
+                ]
+            ])
+            await message.answer(text_msg, parse_mode='HTML', reply_markup=kb)
         except Exception as e:
             await message.answer(f"❌ Ошибка: {str(e)[:50]}")
 
@@ -471,16 +500,11 @@ async def process_admin_command(message: types.Message, text: str, state: FSMCon
         status_parts = ["📊 <b>Статус системы</b>\n"]
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f'{API_BASE_URL}/sales/{company_id}/chat',
-                    json={'message': 'ping', 'user_id': 'healthcheck'},
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as resp:
-                    if resp.status == 200:
-                        status_parts.append("✅ AI Агент - работает")
-                    else:
-                        status_parts.append(f"⚠️ AI Агент - код {resp.status}")
+            resp = await api.chat(company_id, {'message': 'ping', 'user_id': 'healthcheck'}, timeout=10)
+            if resp.status == 200:
+                status_parts.append("✅ AI Агент - работает")
+            else:
+                status_parts.append(f"⚠️ AI Агент - код {resp.status}")
         except Exception as e:
             logging.error(f"AI status check failed: {e}")
             status_parts.append("❌ AI Агент - недоступен")
@@ -491,222 +515,74 @@ async def process_admin_command(message: types.Message, text: str, state: FSMCon
     
     elif 'лиды за неделю' in text_lower:
         company_id = getattr(message.bot, 'company_id', 1)
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f'{API_BASE_URL}/sales/{company_id}/leads',params={'limit':100},timeout=aiohttp.ClientTimeout(total=10)) as resp:
-                    if resp.status==200:
-                        data=await resp.json()
-                        leads=data.get('leads',[])
-                        from datetime import datetime,timedelta
-                        week_ago=datetime.now()-timedelta(days=7)
-                        week_leads=[l for l in leads if datetime.fromisoformat(l['created_at'].replace('Z','+00:00'))>week_ago and l.get('contact_info') and (l['contact_info'].get('name') or l['contact_info'].get('phone'))]
-                        from collections import Counter
-                        sources=Counter(l.get('source','web') for l in week_leads)
-                        msg=f"📊 <b>Лиды за неделю</b>\n\nВсего: {len(week_leads)}\n\n<b>По источникам:</b>\n"
-                        for source,count in sorted(sources.items(), key=lambda x: (1, int(x[0])) if x[0].isdigit() else (0, x[0].lower())):
-                            if source.isdigit():
-                                # Get widget name from database
-                                try:
-                                    async with aiohttp.ClientSession() as sess:
-                                        async with sess.get(f'{API_BASE_URL}/sales/companies/{company_id}/widgets/{source}') as r:
-                                            if r.status == 200:
-                                                w = await r.json()
-                                                name = w.get('channel_name', f'Widget #{source}').capitalize()
-                                                msg+=f"📸 {name} #{source}: {count}\n"
-                                            else:
-                                                msg+=f"📸 Widget #{source}: {count}\n"
-                                except:
-                                    msg+=f"📸 Widget #{source}: {count}\n"
-                            else:
-                                msg+=f"• {source}: {count}\n"
-                        msg+="\n<b>Последние 10:</b>\n"
-                        for lead in week_leads[:10]:
-                            contact=lead.get('contact_info',{})
-                            name=contact.get('name','Не указано')
-                            phone=contact.get('phone','Не указан')
-                            source=lead.get('source','web')
-                            # Get channel name if source is ID
-                            if source.isdigit():
-                                try:
-                                    async with aiohttp.ClientSession() as s:
-                                        async with s.get(f'{API_BASE_URL}/sales/companies/{company_id}/widgets/{source}') as r:
-                                            if r.status == 200:
-                                                wd = await r.json()
-                                                source_name = f"{wd.get('channel_name','Widget').capitalize()} #{source}"
-                                            else:
-                                                source_name = f"Widget #{source}"
-                                except:
-                                    source_name = f"Widget #{source}"
-                            else:
-                                source_name = source
-                            msg+=f"• {name} ({phone}) - {source_name}\n"
-                        await message.answer(msg,parse_mode='HTML')
-                    else:
-                        await message.answer("⚠️ Не удалось получить лиды")
-        except Exception as e:
-            logging.error(f"Week leads error: {e}")
-            await message.answer("❌ Ошибка")
+        await send_period_leads(message, company_id, 7, "Лиды за неделю", "Week")
     elif 'лиды за месяц' in text_lower:
         company_id = getattr(message.bot, 'company_id', 1)
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f'{API_BASE_URL}/sales/{company_id}/leads',params={'limit':200},timeout=aiohttp.ClientTimeout(total=10)) as resp:
-                    if resp.status==200:
-                        data=await resp.json()
-                        leads=data.get('leads',[])
-                        from datetime import datetime,timedelta
-                        month_ago=datetime.now()-timedelta(days=30)
-                        month_leads=[l for l in leads if datetime.fromisoformat(l['created_at'].replace('Z','+00:00'))>month_ago and l.get('contact_info') and (l['contact_info'].get('name') or l['contact_info'].get('phone'))]
-                        from collections import Counter
-                        sources=Counter(l.get('source','web') for l in month_leads)
-                        msg=f"📊 <b>Лиды за месяц</b>\n\nВсего: {len(month_leads)}\n\n<b>По источникам:</b>\n"
-                        for source,count in sorted(sources.items(), key=lambda x: (1, int(x[0])) if x[0].isdigit() else (0, x[0].lower())):
-                            if source.isdigit():
-                                # Get widget name from database
-                                try:
-                                    async with aiohttp.ClientSession() as sess:
-                                        async with sess.get(f'{API_BASE_URL}/sales/companies/{company_id}/widgets/{source}') as r:
-                                            if r.status == 200:
-                                                w = await r.json()
-                                                name = w.get('channel_name', f'Widget #{source}').capitalize()
-                                                msg+=f"📸 {name} #{source}: {count}\n"
-                                            else:
-                                                msg+=f"📸 Widget #{source}: {count}\n"
-                                except:
-                                    msg+=f"📸 Widget #{source}: {count}\n"
-                            else:
-                                msg+=f"• {source}: {count}\n"
-                        msg+="\n<b>Последние 10:</b>\n"
-                        for lead in month_leads[:10]:
-                            contact=lead.get('contact_info',{})
-                            name=contact.get('name','Не указано')
-                            phone=contact.get('phone','Не указан')
-                            source=lead.get('source','web')
-                            # Get channel name if source is ID
-                            if source.isdigit():
-                                try:
-                                    async with aiohttp.ClientSession() as s:
-                                        async with s.get(f'{API_BASE_URL}/sales/companies/{company_id}/widgets/{source}') as r:
-                                            if r.status == 200:
-                                                wd = await r.json()
-                                                source_name = f"{wd.get('channel_name','Widget').capitalize()} #{source}"
-                                            else:
-                                                source_name = f"Widget #{source}"
-                                except:
-                                    source_name = f"Widget #{source}"
-                            else:
-                                source_name = source
-                            msg+=f"• {name} ({phone}) - {source_name}\n"
-                        await message.answer(msg,parse_mode='HTML')
-                    else:
-                        await message.answer("⚠️ Не удалось получить лиды")
-        except Exception as e:
-            logging.error(f"Month leads error: {e}")
-            await message.answer("❌ Ошибка")
+        await send_period_leads(message, company_id, 30, "Лиды за месяц", "Month")
     
     elif 'лиды' in text_lower or 'leads' in text_lower or 'лід' in text_lower:
         company_id = getattr(message.bot, 'company_id', 1)
         logging.info(f"🏢 MULTITENANCY: Manager viewing leads for company {company_id}")
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f'{API_BASE_URL}/sales/{company_id}/leads?limit=50',
-                    timeout=aiohttp.ClientTimeout(total=5)
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        leads = data.get('leads', [])
-                        # Filter out empty leads (no name and no phone)
-                        leads = [l for l in leads if l.get('contact_info') and l['contact_info'].get('phone')]
-                        
-                        if not leads:
-                            await message.answer("📊 Лидов пока нет")
-                            return
+            # All-time counts by source; latest 5 only among leads with a phone
+            resp = await api.lead_report(company_id, latest=5, latest_contact='phone', timeout=5)
+            if resp.status == 200:
+                report = resp.data
+                leads = report.get('latest', [])
                         
-                        async with session.get(
-                            f'{API_BASE_URL}/sales/{company_id}/leads/stats',
-                            timeout=aiohttp.ClientTimeout(total=5)
-                        ) as stats_resp:
-                            stats_data = await stats_resp.json() if stats_resp.status == 200 else {}
+                if not leads:
+                    await message.answer("📊 Лидов пока нет")
+                    return
                         
-                        total = stats_data.get('total', len(leads))
-                        by_source = stats_data.get('by_source', {})
+                stats_text = "📊 <b>Статистика лидов</b>\n"
+                stats_text += f"Всего: {report.get('total', len(leads))} (все время)\n\n"
                         
-                        stats_text = "📊 <b>Статистика лидов</b>\n"
-                        stats_text += f"Всего: {total} (все время)\n\n"
+                source_emojis = {
+                    'telegram': '📱 Telegram',
+                    'web': '🌐 Веб-сайт',
+                    'instagram': '📸 Instagram',
+                    'facebook': '📘 Facebook',
+                    'vk': '🔵 ВКонтакте'
+                }
                         
-                        source_emojis = {
-                            'telegram': '📱 Telegram',
-                            'web': '🌐 Веб-сайт',
-                            'instagram': '📸 Instagram',
-                            'facebook': '📘 Facebook',
-                            'vk': '🔵 ВКонтакте'
-                        }
-                        
-                        def sort_key(item):
-                            source = item[0]
-                            if source.isdigit():
-                                return (1, int(source))
-                            return (0, source.lower())
-                        
-                        for source, count in sorted(by_source.items(), key=sort_key):
-                            if source.isdigit():
-                                # Get widget name from database
-                                try:
-                                    async with aiohttp.ClientSession() as sess:
-                                        async with sess.get(f'{API_BASE_URL}/sales/companies/{company_id}/widgets/{source}') as r:
-                                            if r.status == 200:
-                                                w = await r.json()
-                                                name = w.get('channel_name', f'Widget #{source}').capitalize()
-                                                emoji_name = f'📸 {name} #{source}'
-                                            else:
-                                                emoji_name = f'📸 Widget #{source}'
-                                except:
-                                    emoji_name = f'📸 Widget #{source}'
-                            else:
-                                emoji_name = source_emojis.get(source, f'📍 {source.capitalize()}')
-                            stats_text += f"{emoji_name}: {count}\n"
+                for row in sorted(report.get('by_source', []), key=source_sort_key):
+                    source = row['source']
+                    if source.isdigit():
+                        emoji_name = f"📸 {widget_source_name(source, row.get('channel_name'))}"
+                    else:
+                        emoji_name = source_emojis.get(source, f'📍 {source.capitalize()}')
+                    stats_text += f"{emoji_name}: {row['count']}\n"
                         
-                        leads_text = [stats_text + "\n<b>Последние 5 лидов:</b>\n"]
-                        for i, lead in enumerate(leads[:5], 1):
-                            contact = lead.get('contact_info', {})
-                            name = contact.get('name') if isinstance(contact, dict) else None
-                            telegram_id = lead.get('telegram_user_id', '?')
-                            phone = contact.get('phone', 'нет') if isinstance(contact, dict) else 'нет'
+                leads_text = [stats_text + "\n<b>Последние 5 лидов:</b>\n"]
+                for i, lead in enumerate(leads, 1):
+                    contact = lead.get('contact_info', {})
+                    name = contact.get('name') if isinstance(contact, dict) else None
+                    telegram_id = lead.get('telegram_user_id', '?')
+                    phone = contact.get('phone', 'нет') if isinstance(contact, dict) else 'нет'
                             
-                            display_name = name if name else f"User {telegram_id}"
+                    display_name = name if name else f"User {telegram_id}"
                             
-                            status = lead.get('status', 'new')
-                            source = lead.get('source', 'unknown')
-                            # Get channel name if source is ID
-                            if source.isdigit():
-                                try:
-                                    async with aiohttp.ClientSession() as s:
-                                        async with s.get(f'{API_BASE_URL}/sales/companies/{company_id}/widgets/{source}') as r:
-                                            if r.status == 200:
-                                                wd = await r.json()
-                                                source = f"{wd.get('channel_name','Widget').capitalize()} #{source}"
-                                            else:
-                                                source = f"Widget #{source}"
-                                except:
-                                    source = f"Widget #{source}"
-                            created = lead.get('created_at', '')[:16]
+                    status = lead.get('status', 'new')
+                    source = lead.get('source', 'unknown')
+                    if source.isdigit():
+                        source = widget_source_name(source, lead.get('channel_name'))
+                    created = lead.get('created_at', '')[:16]
                             
-                            temp = contact.get('temperature', '🌤 теплый') if isinstance(contact, dict) else '🌤 теплый'
+                    temp = contact.get('temperature', '🌤 теплый') if isinstance(contact, dict) else '🌤 теплый'
                             
-                            leads_text.append(
-                                f"{i}. ID: {lead.get('id', '?')}\n"
-                                f"   Клиент: {display_name}\n"
-                                f"   Телефон: {phone}\n"
-                                f"   Температура: {temp}\n"
-                                f"   Статус: {status} | {source}\n"
-                                f"   Создан: {created}\n"
-                            )
+                    leads_text.append(
+                        f"{i}. ID: {lead.get('id', '?')}\n"
+                        f"   Клиент: {display_name}\n"
+                        f"   Телефон: {phone}\n"
+                        f"   Температура: {temp}\n"
+                        f"   Статус: {status} | {source}\n"
+                        f"   Создан: {created}\n"
+                    )
                         
-                        await message.answer('\n'.join(leads_text), parse_mode='HTML')
-                    else:
-                        await message.answer(f"⚠️ Не удалось получить лиды (код {resp.status})")
+                await message.answer('\n'.join(leads_text), parse_mode='HTML')
+            else:
+                await message.answer(f"⚠️ Не удалось получить лиды (код {resp.status})")
         except Exception as e:
             await message.answer(f"❌ Ошибка получения лидов: {str(e)[:50]}")
     
@@ -714,50 +590,49 @@ async def process_admin_command(message: types.Message, text: str, state: FSMCon
         company_id = message.bot.company_id
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f'{API_BASE_URL}/sales/companies/{company_id}/widgets') as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        widgets = data.get('widgets', [])
+            resp = await api.social_widgets(company_id)
+            if resp.status == 200:
+                data = resp.data
+                widgets = data.get('widgets', [])
                         
-                        msg_parts = ["📢 <b>Каналы распространения</b>\n"]
-                        msg_parts.append("📱 Telegram: ✅ Активен")
-                        msg_parts.append("🌐 Widget: ✅ Работает\n")
+                msg_parts = ["📢 <b>Каналы распространения</b>\n"]
+                msg_parts.append("📱 Telegram: ✅ Активен")
+                msg_parts.append("🌐 Widget: ✅ Работает\n")
                         
-                        from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-                        buttons = []
+                from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+                buttons = []
                         
-                        if widgets:
-                            msg_parts.append("<b>Социальные сети:</b>")
-                            for w in widgets:
-                                channel_name = w['channel_name']
-                                channel_display = channel_name.capitalize()
-                                widget_id = w['id']
-                                wtype = w.get('widget_type', 'classic')
-                                url_path = 'avatar' if wtype == 'avatar' else 'w'
-                                widget_url = f"https://bizdnai.com/{url_path}/{company_id}/{widget_id}"
+                if widgets:
+                    msg_parts.append("<b>Социальные сети:</b>")
+                    for w in widgets:
+                        channel_name = w['channel_name']
+                        channel_display = channel_name.capitalize()
+                        widget_id = w['id']
+                        wtype = w.get('widget_type', 'classic')
+                        url_path = 'avatar' if wtype == 'avatar' else 'w'
+                        widget_url = f"https://bizdnai.com/{url_path}/{company_id}/{widget_id}"
                                 
-                                msg_parts.append(f"• {channel_display} (ID: {widget_id})")
-                                msg_parts.append(f"  🔗 {widget_url}")
+                        msg_parts.append(f"• {channel_display} (ID: {widget_id})")
+                        msg_parts.append(f"  🔗 {widget_url}")
                                 
-                                buttons.append([
-                                    InlineKeyboardButton(text=f"✏️ Edit #{widget_id}", callback_data=f"edit_widget_{widget_id}"),
-                                    InlineKeyboardButton(text=f"🗑 Delete #{widget_id}", callback_data=f"delete_widget_{widget_id}")
-                                ])
-                                buttons.append([
-                                    InlineKeyboardButton(text=f"📲 QR код #{widget_id}", callback_data=f"qr_widget_{widget_id}")
-                                ])
-                        else:
-                            msg_parts.append("<i>Социальных каналов пока нет</i>")
-                        
                         buttons.append([
-                            InlineKeyboardButton(text="➕ Создать канал", callback_data=f"create_widget_{company_id}")
+                            InlineKeyboardButton(text=f"✏️ Edit #{widget_id}", callback_data=f"edit_widget_{widget_id}"),
+                            InlineKeyboardButton(text=f"🗑 Delete #{widget_id}", callback_data=f"delete_widget_{widget_id}")
                         ])
+                        buttons.append([
+                            InlineKeyboardButton(text=f"📲 QR код #{widget_id}", callback_data=f"qr_widget_{widget_id}")
+                        ])
+                else:
+                    msg_parts.append("<i>Социальных каналов пока нет</i>")
                         
-                        keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
-                        await message.answer('\n'.join(msg_parts), reply_markup=keyboard, parse_mode='HTML')
-                    else:
-                        await message.answer("⚠️ Не удалось получить список каналов")
+                buttons.append([
+                    InlineKeyboardButton(text="➕ Создать канал", callback_data=f"create_widget_{company_id}")
+                ])
+                        
+                keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
+                await message.answer('\n'.join(msg_parts), reply_markup=keyboard, parse_mode='HTML')
+            else:
+                await message.answer("⚠️ Не удалось получить список каналов")
         except Exception as e:
             logging.error(f"Channels command error: {e}")
             await message.answer(f"❌ Ошибка: {str(e)[:50]}")
@@ -785,34 +660,33 @@ async def process_admin_command(message: types.Message, text: str, state: FSMCon
     elif ('интеграция' in text_lower or 'integration' in text_lower) and 'внешняя' not in text_lower and 'внутренняя' not in text_lower:
         company_id = getattr(message.bot, 'company_id', 1)
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f'{API_BASE_URL}/sales/companies/all') as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        companies = data if isinstance(data, list) else []
-                        company = next((c for c in companies if c.get('id') == company_id), None)
+            resp = await api.companies()
+            if resp.status == 200:
+                data = resp.data
+                companies = data if isinstance(data, list) else []
+                company = next((c for c in companies if c.get('id') == company_id), None)
                         
-                        if company:
-                            enabled = company.get('integration_enabled', False)
-                            itype = company.get('integration_type', 'CRM')
+                if company:
+                    enabled = company.get('integration_enabled', False)
+                    itype = company.get('integration_type', 'CRM')
                             
-                            if enabled:
-                                text = f"✅ <b>Интеграция {itype.upper()} активна</b>\n\n"
-                                text += "Лиды из виджетов автоматически отправляются в CRM."
-                                btn_text = "❌ Выключить интеграцию"
-                            else:
-                                text = "❌ <b>Внутренняя CRM не подключена</b>\n\n"
-                                text += "Лиды сохраняются, но не обрабатываются!\nПодключите CRM для автоматизации."
-                                btn_text = "✅ Включить интеграцию"
+                    if enabled:
+                        text = f"✅ <b>Интеграция {itype.upper()} активна</b>\n\n"
+                        text += "Лиды из виджетов автоматически отправляются в CRM."
+                        btn_text = "❌ Выключить интеграцию"
+                    else:
+                        text = "❌ <b>Внутренняя CRM не подключена</b>\n\n"
+                        text += "Лиды сохраняются, но не обрабатываются!\nПодключите CRM для автоматизации."
+                        btn_text = "✅ Включить интеграцию"
                             
-                            from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-                            kb = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text=btn_text, callback_data="toggle_crm_integration")]])
+                    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+                    kb = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text=btn_text, callback_data="toggle_crm_integration")]])
                             
-                            await message.answer(text, parse_mode='HTML', reply_markup=kb)
-                        else:
-                            await message.answer("⚠️ Компания не найдена")
-                    else:
-                        await message.answer("⚠️ Ошибка получения данных")
+                    await message.answer(text, parse_mode='HTML', reply_markup=kb)
+                else:
+                    await message.answer("⚠️ Компания не найдена")
+            else:
+                await message.answer("⚠️ Ошибка получения данных")
         except Exception as e:
             logging.error(f"Integration check error: {e}")
             await message.answer(f"❌ Ошибка: {str(e)[:50]}")
@@ -820,39 +694,38 @@ async def process_admin_command(message: types.Message, text: str, state: FSMCon
     elif 'виджет' in text_lower or 'widget' in text_lower:
         company_id = getattr(message.bot, 'company_id', 1)
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f'{API_BASE_URL}/sales/{company_id}/web-widgets') as resp:
-                    if resp.status == 200:
-                        from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-                        widgets = await resp.json()
-                        msg = "🌐 <b>Веб-виджеты</b>\n\n"
-                        buttons = []
+            resp = await api.web_widgets(company_id)
+            if resp.status == 200:
+                from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+                widgets = resp.data
+                msg = "🌐 <b>Веб-виджеты</b>\n\n"
+                buttons = []
                         
-                        if widgets:
-                            for w in widgets:
-                                status = '✅' if w.get('is_active') else '❌'
-                                wid = w['id']
-                                domain = w['domain']
-                                greeting = w.get('greeting_ru', 'Не установлено')[:30]
-                                msg += f"{status} <b>{domain}</b> (ID: {wid})\n"
-                                msg += f"   {greeting}...\n\n"
+                if widgets:
+                    for w in widgets:
+                        status = '✅' if w.get('is_active') else '❌'
+                        wid = w['id']
+                        domain = w['domain']
+                        greeting = w.get('greeting_ru', 'Не установлено')[:30]
+                        msg += f"{status} <b>{domain}</b> (ID: {wid})\n"
+                        msg += f"   {greeting}...\n\n"
                                 
-                                # Button shows current status
-                                toggle_text = "✅ ON" if w.get('is_active') else "❌ OFF"
+                        # Button shows current status
+                        toggle_text = "✅ ON" if w.get('is_active') else "❌ OFF"
                                 
-                                buttons.append([
-                                    InlineKeyboardButton(text=f"✏️ {domain}", callback_data=f"editwidget_{wid}"),
-                                    InlineKeyboardButton(text=toggle_text, callback_data=f"togglewidget_{wid}"),
-                                    InlineKeyboardButton(text="🗑", callback_data=f"delwidget_{wid}")
-                                ])
-                        else:
-                            msg += "Виджетов пока нет\n"
+                        buttons.append([
+                            InlineKeyboardButton(text=f"✏️ {domain}", callback_data=f"editwidget_{wid}"),
+                            InlineKeyboardButton(text=toggle_text, callback_data=f"togglewidget_{wid}"),
+                            InlineKeyboardButton(text="🗑", callback_data=f"delwidget_{wid}")
+                        ])
+                else:
+                    msg += "Виджетов пока нет\n"
                         
-                        buttons.append([InlineKeyboardButton(text="➕ Создать виджет", callback_data=f"createwidget_{company_id}")])
-                        keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
-                        await message.answer(msg, reply_markup=keyboard, parse_mode='HTML')
-                    else:
-                        await message.answer("⚠️ Ошибка получения виджетов")
+                buttons.append([InlineKeyboardButton(text="➕ Создать виджет", callback_data=f"createwidget_{company_id}")])
+                keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
+                await message.answer(msg, reply_markup=keyboard, parse_mode='HTML')
+            else:
+                await message.answer("⚠️ Ошибка получения виджетов")
         except Exception as e:
             await message.answer(f"❌ Ошибка: {str(e)[:50]}")
     
@@ -901,37 +774,32 @@ async def process_greeting(message: types.Message, state: FSMContext):
     await message.answer("⏳ Создаю канал...")
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f'{API_BASE_URL}/sales/companies/{company_id}/widgets',
-                json={
-                    'channel_name': channel_name_raw,
-                    'greeting_message': greeting,
-                    'widget_type': widget_type
-                },
-                timeout=aiohttp.ClientTimeout(total=30)
-            ) as resp:
-                if resp.status == 200:
-                    result = await resp.json()
-                    wid = result.get('id', '')
-                    url_path = 'avatar' if widget_type == 'avatar' else 'w'
-                    url = f"https://bizdnai.com/{url_path}/{company_id}/{wid}"
-                    type_icon = "🎭" if widget_type == 'avatar' else "📱"
+        resp = await api.create_social_widget(company_id, {
+            'channel_name': channel_name_raw,
+            'greeting_message': greeting,
+            'widget_type': widget_type
+        })
+        if resp.status == 200:
+            result = resp.data
+            wid = result.get('id', '')
+            url_path = 'avatar' if widget_type == 'avatar' else 'w'
+            url = f"https://bizdnai.com/{url_path}/{company_id}/{wid}"
+            type_icon = "🎭" if widget_type == 'avatar' else "📱"
                     
-                    await message.answer(
-                        f"🎉 <b>Канал создан!</b>\n\n"
-                        f"{type_icon} Тип: {'Аватар' if widget_type == 'avatar' else 'Классический'}\n"
-                        f"📱 Название: {channel_name_raw}\n"
-                        f"🔗 URL: {url}\n"
-                        f"💬 Приветствие: {greeting or 'стандартное'}\n\n"
-                        f"Разместите эту ссылку в {channel_name_raw}!",
-                        parse_mode='HTML'
-                    )
-                elif resp.status == 400:
-                    error = await resp.json()
-                    await message.answer(f"⚠️ {error.get('detail', 'Ошибка')}")
-                else:
-                    await message.answer(f"❌ Ошибка {resp.status}")
+            await message.answer(
+                f"🎉 <b>Канал создан!</b>\n\n"
+                f"{type_icon} Тип: {'Аватар' if widget_type == 'avatar' else 'Классический'}\n"
+                f"📱 Название: {channel_name_raw}\n"
+                f"🔗 URL: {url}\n"
+                f"💬 Приветствие: {greeting or 'стандартное'}\n\n"
+                f"Разместите эту ссылку в {channel_name_raw}!",
+                parse_mode='HTML'
+            )
+        elif resp.status == 400:
+            error = resp.data
+            await message.answer(f"⚠️ {error.get('detail', 'Ошибка')}")
+        else:
+            await message.answer(f"❌ Ошибка {resp.status}")
     except Exception as e:
         logging.error(f"Create widget error: {e}")
         await message.answer(f"❌ Ошибка: {str(e)[:50]}")
@@ -976,25 +844,20 @@ async def process_widget_greeting(message: types.Message, state: FSMContext):
     status_msg = await message.answer("⏳ Создаю виджет...")
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f'{API_BASE_URL}/sales/{company_id}/web-widgets',
-                json={'domain': domain, 'greeting_ru': greeting_ru},
-                timeout=aiohttp.ClientTimeout(total=30)
-            ) as resp:
-                if resp.status == 200:
-                    result = await resp.json()
-                    await status_msg.delete()
-                    await message.answer(
-                        f"🎉 <b>Виджет создан!</b>\n\n"
-                        f"🌐 Домен: {domain}\n"
-                        f"💬 Приветствие: {greeting_ru}\n\n"
-                        f"✅ Виджет активен на {domain}",
-                        parse_mode='HTML'
-                    )
-                else:
-                    await status_msg.delete()
-                    await message.answer("❌ Ошибка создания виджета")
+        resp = await api.create_web_widget(company_id, {'domain': domain, 'greeting_ru': greeting_ru})
+        if resp.status == 200:
+            result = resp.data
+            await status_msg.delete()
+            await message.answer(
+                f"🎉 <b>Виджет создан!</b>\n\n"
+                f"🌐 Домен: {domain}\n"
+                f"💬 Приветствие: {greeting_ru}\n\n"
+                f"✅ Виджет активен на {domain}",
+                parse_mode='HTML'
+            )
+        else:
+            await status_msg.delete()
+            await message.answer("❌ Ошибка создания виджета")
     except Exception as e:
         await status_msg.delete()
         await message.answer(f"❌ Ошибка: {str(e)[:100]}")
@@ -1020,23 +883,18 @@ async def process_edit_greeting(message: types.Message, state: FSMContext):
     status_msg = await message.answer("⏳ Обновляю...")
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(
-                f'{API_BASE_URL}/sales/{company_id}/web-widgets/{widget_id}',
-                json={'greeting_ru': greeting_ru},
-                timeout=aiohttp.ClientTimeout(total=30)
-            ) as resp:
-                if resp.status == 200:
-                    result = await resp.json()
-                    await status_msg.delete()
-                    await message.answer(
-                        f"✅ <b>Виджет обновлён!</b>\n\n"
-                        f"💬 Новое приветствие: {greeting_ru}",
-                        parse_mode='HTML'
-                    )
-                else:
-                    await status_msg.delete()
-                    await message.answer("❌ Ошибка обновления")
+        resp = await api.update_web_widget(company_id, widget_id, {'greeting_ru': greeting_ru})
+        if resp.status == 200:
+            result = resp.data
+            await status_msg.delete()
+            await message.answer(
+                f"✅ <b>Виджет обновлён!</b>\n\n"
+                f"💬 Новое приветствие: {greeting_ru}",
+                parse_mode='HTML'
+            )
+        else:
+            await status_msg.delete()
+            await message.answer("❌ Ошибка обновления")
     except Exception as e:
         await status_msg.delete()
         await message.answer(f"❌ Ошибка: {str(e)[:100]}")
@@ -1059,19 +917,15 @@ async def process_social_greeting(message: types.Message, state: FSMContext):
     new_greeting = message.text
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(
-                f'{API_BASE_URL}/sales/companies/{company_id}/widgets/{widget_id}',
-                json={'greeting_message': new_greeting}
-            ) as resp:
-                if resp.status == 200:
-                    await message.answer(
-                        f"✅ Приветствие канала #{widget_id} обновлено!\n\n"
-                        "AI переводит на все языки...",
-                        parse_mode='HTML'
-                    )
-                else:
-                    await message.answer(f"❌ Ошибка обновления (код {resp.status})")
+        resp = await api.update_social_widget(company_id, widget_id, {'greeting_message': new_greeting})
+        if resp.status == 200:
+            await message.answer(
+                f"✅ Приветствие канала #{widget_id} обновлено!\n\n"
+                "AI переводит на все языки...",
+                parse_mode='HTML'
+            )
+        else:
+            await message.answer(f"❌ Ошибка обновления (код {resp.status})")
     except Exception as e:
         logging.error(f"Update social greeting error: {e}")
         await message.answer(f"❌ Ошибка: {str(e)[:50]}")
@@ -1091,15 +945,11 @@ async def process_social_name(message: types.Message, state: FSMContext):
     new_name = message.text
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(
-                f'{API_BASE_URL}/sales/companies/{company_id}/widgets/{widget_id}',
-                json={'channel_name': new_name}
-            ) as resp:
-                if resp.status == 200:
-                    await message.answer(f"✅ Название канала изменено на: {new_name}")
-                else:
-                    await message.answer(f"❌ Ошибка обновления (код {resp.status})")
+        resp = await api.update_social_widget(company_id, widget_id, {'channel_name': new_name})
+        if resp.status == 200:
+            await message.answer(f"✅ Название канала изменено на: {new_name}")
+        else:
+            await message.answer(f"❌ Ошибка обновления (код {resp.status})")
     except Exception as e:
         logging.error(f"Update social name error: {e}")
         await message.answer(f"❌ Ошибка: {str(e)[:50]}")
@@ -1142,16 +992,11 @@ async def set_manager_language_callback(callback: types.CallbackQuery):
     }
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(
-                f'{API_BASE_URL}/sales/companies/{company_id}/language',
-                json={"language": lang},
-                timeout=aiohttp.ClientTimeout(total=10)
-            ) as resp:
-                if resp.status == 200:
-                    await callback.message.edit_text(f"✅ Язык отчётов изменён на: {lang_names.get(lang, lang)}")
-                else:
-                    await callback.message.edit_text("❌ Ошибка при смене языка")
+        resp = await api.set_company_language(company_id, lang)
+        if resp.status == 200:
+            await callback.message.edit_text(f"✅ Язык отчётов изменён на: {lang_names.get(lang, lang)}")
+        else:
+            await callback.message.edit_text("❌ Ошибка при смене языка")
     except Exception as e:
         logging.error(f"Language change error: {e}")
         await callback.message.edit_text(f"❌ Ошибка: {str(e)[:50]}")
@@ -1180,23 +1025,18 @@ async def process_edit_domain(message: types.Message, state: FSMContext):
     status_msg = await message.answer("⏳ Обновляю домен...")
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(
-                f'{API_BASE_URL}/sales/{company_id}/web-widgets/{widget_id}',
-                json={'domain': domain},
-                timeout=aiohttp.ClientTimeout(total=30)
-            ) as resp:
-                if resp.status == 200:
-                    result = await resp.json()
-                    await status_msg.delete()
-                    await message.answer(
-                        f"✅ <b>Домен обновлён!</b>\n\n"
-                        f"🌐 Новый домен: {domain}",
-                        parse_mode='HTML'
-                    )
-                else:
-                    await status_msg.delete()
-                    await message.answer("❌ Ошибка обновления домена")
+        resp = await api.update_web_widget(company_id, widget_id, {'domain': domain})
+        if resp.status == 200:
+            result = resp.data
+            await status_msg.delete()
+            await message.answer(
+                f"✅ <b>Домен обновлён!</b>\n\n"
+                f"🌐 Новый домен: {domain}",
+                parse_mode='HTML'
+            )
+        else:
+            await status_msg.delete()
+            await message.answer("❌ Ошибка обновления домена")
     except Exception as e:
         await status_msg.delete()
         await message.answer(f"❌ Ошибка: {str(e)[:100]}")
@@ -1219,12 +1059,11 @@ async def handle_external_crm(callback: types.CallbackQuery):
     
     # Получаем текущий статус
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/sales/companies/all') as resp:
-                data = await resp.json()
-                company = next((c for c in data if c.get('id') == company_id), None)
-                current_enabled = company.get('integration_enabled', False) if company else False
-                current_type = company.get('integration_type', '') if company else ''
+        resp = await api.companies()
+        data = resp.data
+        company = next((c for c in data if c.get('id') == company_id), None)
+        current_enabled = company.get('integration_enabled', False) if company else False
+        current_type = company.get('integration_type', '') if company else ''
     except:
         current_enabled = False
         current_type = ''
@@ -1234,9 +1073,7 @@ async def handle_external_crm(callback: types.CallbackQuery):
         if current_enabled and current_type == 'bitrix24':
             # Выключаем
             try:
-                async with aiohttp.ClientSession() as session:
-                    await session.post(f'{API_BASE_URL}/sales/company/upsert',
-                        json={'id': company_id, 'integration_enabled': False})
+                await api.upsert_company({'id': company_id, 'integration_enabled': False})
                 await callback.answer("❌ Bitrix24 выключен")
                 kb = InlineKeyboardMarkup(inline_keyboard=[
                     [InlineKeyboardButton(text="✅ Включить Bitrix24", callback_data="crm_ext:bitrix24")],
@@ -1248,9 +1085,7 @@ async def handle_external_crm(callback: types.CallbackQuery):
         else:
             # Включаем
             try:
-                async with aiohttp.ClientSession() as session:
-                    await session.post(f'{API_BASE_URL}/sales/company/upsert',
-                        json={'id': company_id, 'integration_type': 'bitrix24', 'integration_enabled': True})
+                await api.upsert_company({'id': company_id, 'integration_type': 'bitrix24', 'integration_enabled': True})
                 await callback.answer("✅ Bitrix24 включён!")
                 kb = InlineKeyboardMarkup(inline_keyboard=[
                     [InlineKeyboardButton(text="❌ Выключить Bitrix24", callback_data="crm_ext:bitrix24")],
@@ -1264,9 +1099,7 @@ async def handle_external_crm(callback: types.CallbackQuery):
         # Toggle для Kommo
         if current_enabled and current_type == 'kommo':
             try:
-                async with aiohttp.ClientSession() as session:
-                    await session.post(f'{API_BASE_URL}/sales/company/upsert',
-                        json={'id': company_id, 'integration_enabled': False})
+                await api.upsert_company({'id': company_id, 'integration_enabled': False})
                 await callback.answer("❌ Kommo выключен")
                 kb = InlineKeyboardMarkup(inline_keyboard=[
                     [InlineKeyboardButton(text="📘 Bitrix24", callback_data="crm_ext:bitrix24")],
@@ -1277,9 +1110,7 @@ async def handle_external_crm(callback: types.CallbackQuery):
                 await callback.answer(f"❌ Ошибка: {str(e)[:30]}", show_alert=True)
         else:
             try:
-                async with aiohttp.ClientSession() as session:
-                    await session.post(f'{API_BASE_URL}/sales/company/upsert',
-                        json={'id': company_id, 'integration_type': 'kommo', 'integration_enabled': True})
+                await api.upsert_company({'id': company_id, 'integration_type': 'kommo', 'integration_enabled': True})
                 await callback.answer("✅ Kommo включён!")
                 kb = InlineKeyboardMarkup(inline_keyboard=[
                     [InlineKeyboardButton(text="📘 Bitrix24", callback_data="crm_ext:bitrix24")],
@@ -1291,9 +1122,7 @@ async def handle_external_crm(callback: types.CallbackQuery):
     
     elif action == "disable":
         try:
-            async with aiohttp.ClientSession() as session:
-                await session.post(f'{API_BASE_URL}/sales/company/upsert',
-                    json={'id': company_id, 'integration_enabled': False})
+            await api.upsert_company({'id': company_id, 'integration_enabled': False})
             await callback.answer("❌ Внешняя CRM отключена")
             await callback.message.edit_text("❌ <b>Внешняя CRM отключена</b>\n\nЛиды сохраняются только в BizDNAi.", parse_mode='HTML')
         except Exception as e:
@@ -1309,43 +1138,39 @@ async def toggle_crm_integration_callback(callback: types.CallbackQuery):
     company_id = getattr(callback.bot, 'company_id', 1)
     
     try:
-        async with aiohttp.ClientSession() as session:
-            # Get current status
-            async with session.get(f'{API_BASE_URL}/sales/companies/all') as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    companies = data if isinstance(data, list) else []
-                    company = next((c for c in companies if c.get('id') == company_id), None)
+        # Get current status
+        resp = await api.companies()
+        if resp.status == 200:
+            data = resp.data
+            companies = data if isinstance(data, list) else []
+            company = next((c for c in companies if c.get('id') == company_id), None)
                     
-                    if company:
-                        new_status = not company.get('integration_enabled', False)
+            if company:
+                new_status = not company.get('integration_enabled', False)
                         
-                        # Update in DB
-                        async with session.post(
-                            f'{API_BASE_URL}/sales/company/upsert',
-                            json={'id': company_id, 'integration_enabled': new_status}
-                        ) as update_resp:
-                            if update_resp.status == 200:
-                                status_text = "включена ✅" if new_status else "выключена ❌"
-                                await callback.answer(f"Интеграция {status_text}")
+                # Update in DB
+                update_resp = await api.upsert_company({'id': company_id, 'integration_enabled': new_status})
+                if update_resp.status == 200:
+                    status_text = "включена ✅" if new_status else "выключена ❌"
+                    await callback.answer(f"Интеграция {status_text}")
                                 
-                                # Update message
-                                itype = company.get('integration_type', 'CRM')
-                                if new_status:
-                                    text = f"✅ <b>Интеграция {itype.upper()} активна</b>\n\nЛиды из виджетов автоматически отправляются в CRM."
-                                    btn_text = "❌ Выключить интеграцию"
-                                else:
-                                    text = "❌ <b>Интеграция CRM выключена</b>\n\nЛиды сохраняются только в BizDNAi."
-                                    btn_text = "✅ Включить интеграцию"
+                    # Update message
+                    itype = company.get('integration_type', 'CRM')
+                    if new_status:
+                        text = f"✅ <b>Интеграция {itype.upper()} активна</b>\n\nЛиды из виджетов автоматически отправляются в CRM."
+                        btn_text = "❌ Выключить интеграцию"
+                    else:
+                        text = "❌ <b>Интеграция CRM выключена</b>\n\nЛиды сохраняются только в BizDNAi."
+                        btn_text = "✅ Включить интеграцию"
                                 
-                                from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-                                kb = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text=btn_text, callback_data="toggle_crm_integration")]])
+                    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+                    kb = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text=btn_text, callback_data="toggle_crm_integration")]])
                                 
-                                await callback.message.edit_text(text, parse_mode='HTML', reply_markup=kb)
-                            else:
-                                await callback.answer("❌ Ошибка обновления", show_alert=True)
-                    else:
-                        await callback.answer("❌ Компания не найдена", show_alert=True)
+                    await callback.message.edit_text(text, parse_mode='HTML', reply_markup=kb)
+                else:
+                    await callback.answer("❌ Ошибка обновления", show_alert=True)
+            else:
+                await callback.answer("❌ Компания не найдена", show_alert=True)
     except Exception as e:
         logging.error(f"Toggle CRM integration error: {e}")
         await callback.answer("❌ Ошибка", show_alert=True)
@@ -1365,18 +1190,14 @@ async def process_status_coins_input(message: types.Message, state: FSMContext):
     company_id = data.get('editing_company_id')
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(
-                f'{API_BASE_URL}/crm/{company_id}/statuses/{status_id}',
-                json={'coins': coins}
-            ) as resp:
-                if resp.status == 200:
-                    await message.answer(
-                        f"✅ Монетки обновлены: {coins} 💰",
-                        reply_markup=get_admin_keyboard()
-                    )
-                else:
-                    await message.answer("❌ Ошибка обновления")
+        resp = await api.update_status_coins(company_id, status_id, coins)
+        if resp.status == 200:
+            await message.answer(
+                f"✅ Монетки обновлены: {coins} 💰",
+                reply_markup=get_admin_keyboard()
+            )
+        else:
+            await message.answer("❌ Ошибка обновления")
     except Exception as e:
         logging.error(f"Update coins: {e}")
         await message.answer("❌ Ошибка сохранения")
@@ -1391,24 +1212,23 @@ async def edit_status_coins(callback: types.CallbackQuery, state: FSMContext):
     company_id = getattr(callback.bot, 'company_id', 1)
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/crm/{company_id}/statuses') as resp:
-                if resp.status == 200:
-                    statuses = await resp.json()
-                    status = next((s for s in statuses if str(s.get('id', s.get('code'))) == status_code), None)
-                    if status:
-                        await state.update_data(
-                            editing_status_code=status_code, 
-                            editing_company_id=company_id
-                        )
-                        await state.set_state(ManagerFlow.editing_status_coins)
-                        await callback.message.edit_text(
-                            f"Введите новое количество монеток для статуса "
-                            f"\"{status['emoji']} {status['name']}\":\n\n"
-                            f"Текущее значение: {status['coins']} 💰"
-                        )
-                        await callback.answer()
-                        return
+        resp = await api.statuses(company_id)
+        if resp.status == 200:
+            statuses = resp.data
+            status = next((s for s in statuses if str(s.get('id', s.get('code'))) == status_code), None)
+            if status:
+                await state.update_data(
+                    editing_status_code=status_code, 
+                    editing_company_id=company_id
+                )
+                await state.set_state(ManagerFlow.editing_status_coins)
+                await callback.message.edit_text(
+                    f"Введите новое количество монеток для статуса "
+                    f"\"{status['emoji']} {status['name']}\":\n\n"
+                    f"Текущее значение: {status['coins']} 💰"
+                )
+                await callback.answer()
+                return
     except Exception as e:
         logging.error(f"Edit status: {e}")
     await callback.answer("❌ Ошибка")
@@ -1425,17 +1245,14 @@ async def confirm_deal_callback(callback: types.CallbackQuery):
     company_id = getattr(callback.bot, 'company_id', 1)
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(
-                f'{API_BASE_URL}/crm/{company_id}/deals/{deal_id}/confirm'
-            ) as resp:
-                if resp.status == 200:
-                    # Обновить сообщение
-                    new_text = callback.message.text + "\n\n✅ <b>Сделка подтверждена!</b>"
-                    await callback.message.edit_text(new_text, parse_mode='HTML')
-                    await callback.answer("✅ Подтверждено!")
-                else:
-                    await callback.answer("❌ Ошибка", show_alert=True)
+        resp = await api.confirm_deal(company_id, deal_id)
+        if resp.status == 200:
+            # Обновить сообщение
+            new_text = callback.message.text + "\n\n✅ <b>Сделка подтверждена!</b>"
+            await callback.message.edit_text(new_text, parse_mode='HTML')
+            await callback.answer("✅ Подтверждено!")
+        else:
+            await callback.answer("❌ Ошибка", show_alert=True)
     except Exception as e:
         logging.error(f"Confirm deal: {e}")
         await callback.answer("❌ Ошибка", show_alert=True)
@@ -1477,40 +1294,38 @@ async def handle_text(message: types.Message, state: FSMContext):
             await state.update_data(session_id=session_id)
     
     company_id = getattr(message.bot, 'company_id', 1)
-    async with aiohttp.ClientSession() as session:
-        try:
-            state_data = await state.get_data()
-            language = state_data.get('language', 'ru')
-            
-            async with session.post(f'{API_BASE_URL}/sales/{company_id}/chat', json={
-                'message': message.text,
-                'user_id': user_id,
-                'username': username,
-                'session_id': session_id,
-                'source': 'telegram',
-                'language': language
-            }) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    ai_response = data.get('response', '')
-                    try:
-                        await status_msg.delete()
-                    except Exception:
-                        pass
-                    await process_backend_response(message, ai_response)
-                else:
-                    try:
-                        await status_msg.delete()
-                    except Exception:
-                        pass
-                    await message.answer("Не удалось связаться с сервером.")
-        except Exception as e:
-            logging.error(f'Backend connection error: {e}')
+    try:
+        state_data = await state.get_data()
+        language = state_data.get('language', 'ru')
+        
+        resp = await api.chat(company_id, {
+            'message': message.text,
+            'user_id': user_id,
+            'username': username,
+            'session_id': session_id,
+            'source': 'telegram',
+            'language': language
+        })
+        if resp.status == 200:
+            ai_response = resp.data.get('response', '')
             try:
                 await status_msg.delete()
             except Exception:
                 pass
-            await message.answer("Ошибка соединения.")
+            await process_backend_response(message, ai_response)
+        else:
+            try:
+                await status_msg.delete()
+            except Exception:
+                pass
+            await message.answer("Не удалось связаться с сервером.")
+    except Exception as e:
+        logging.error(f'Backend connection error: {e}')
+        try:
+            await status_msg.delete()
+        except Exception:
+            pass
+        await message.answer("Ошибка соединения.")
 
 
 # === Callback Handlers ===
@@ -1549,30 +1364,29 @@ async def edit_widget_callback(callback: types.CallbackQuery, state: FSMContext)
     company_id = getattr(callback.bot, 'company_id', 1)
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/sales/companies/{company_id}/widgets/{widget_id}') as resp:
-                if resp.status == 200:
-                    widget = await resp.json()
-                    channel_name = widget.get('channel_name', 'Unknown')
-                    greeting = (widget.get('greeting_message') or 'Не задано')[:50]
+        resp = await api.social_widget(company_id, widget_id)
+        if resp.status == 200:
+            widget = resp.data
+            channel_name = widget.get('channel_name', 'Unknown')
+            greeting = (widget.get('greeting_message') or 'Не задано')[:50]
                     
-                    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-                    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                        [InlineKeyboardButton(text="💬 Изменить приветствие", callback_data=f"editsocialgreeting_{widget_id}")],
-                        [InlineKeyboardButton(text="📛 Изменить название", callback_data=f"editsocialname_{widget_id}")],
-                        [InlineKeyboardButton(text="« Назад к каналам", callback_data="back_to_channels")]
-                    ])
+            from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+            keyboard = InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="💬 Изменить приветствие", callback_data=f"editsocialgreeting_{widget_id}")],
+                [InlineKeyboardButton(text="📛 Изменить название", callback_data=f"editsocialname_{widget_id}")],
+                [InlineKeyboardButton(text="« Назад к каналам", callback_data="back_to_channels")]
+            ])
                     
-                    await callback.message.edit_text(
-                        f"✏️ <b>Редактирование канала #{widget_id}</b>\n\n"
-                        f"📛 Название: {channel_name}\n"
-                        f"💬 Приветствие: {greeting}...\n\n"
-                        "Выберите что хотите изменить:",
-                        reply_markup=keyboard,
-                        parse_mode='HTML'
-                    )
-                else:
-                    await callback.message.answer("❌ Канал не найден")
+            await callback.message.edit_text(
+                f"✏️ <b>Редактирование канала #{widget_id}</b>\n\n"
+                f"📛 Название: {channel_name}\n"
+                f"💬 Приветствие: {greeting}...\n\n"
+                "Выберите что хотите изменить:",
+                reply_markup=keyboard,
+                parse_mode='HTML'
+            )
+        else:
+            await callback.message.answer("❌ Канал не найден")
     except Exception as e:
         logging.error(f"Edit widget error: {e}")
         await callback.message.answer(f"❌ Ошибка: {str(e)[:50]}")
@@ -1592,9 +1406,8 @@ async def qr_widget_callback(callback: types.CallbackQuery):
     company_id = getattr(callback.bot, 'company_id', 1)
     # Get widget type
     try:
-        async with aiohttp.ClientSession() as sess:
-            async with sess.get(f'{API_BASE_URL}/sales/companies/{company_id}/widgets/{widget_id}') as r:
-                wdata = await r.json() if r.status == 200 else {}
+        r = await api.social_widget(company_id, widget_id)
+        wdata = r.data if r.status == 200 else {}
         wtype = wdata.get('widget_type', 'classic')
     except:
         wtype = 'classic'
@@ -1638,16 +1451,12 @@ async def delete_widget_callback(callback: types.CallbackQuery):
     company_id = callback.bot.company_id
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.delete(
-                f'{API_BASE_URL}/sales/companies/{company_id}/widgets/{channel_name}',
-                timeout=aiohttp.ClientTimeout(total=10)
-            ) as resp:
-                if resp.status == 200:
-                    await callback.message.answer("✅ Канал удалён")
-                    await callback.message.delete()
-                else:
-                    await callback.message.answer(f"❌ Ошибка удаления (код {resp.status})")
+        resp = await api.delete_social_widget(company_id, channel_name)
+        if resp.status == 200:
+            await callback.message.answer("✅ Канал удалён")
+            await callback.message.delete()
+        else:
+            await callback.message.answer(f"❌ Ошибка удаления (код {resp.status})")
     except Exception as e:
         logging.error(f"Delete widget error: {e}")
         await callback.message.answer(f"❌ Ошибка: {str(e)[:50]}")
@@ -1741,48 +1550,47 @@ async def toggle_webwidget_callback(callback: types.CallbackQuery):
     company_id = getattr(callback.bot, 'company_id', 1)
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(f'{API_BASE_URL}/sales/{company_id}/web-widgets/{widget_id}/toggle') as resp:
-                if resp.status == 200:
-                    result = await resp.json()
-                    status = '✅ Включен' if result.get('is_active') else '❌ Выключен'
-                    await callback.answer(f"Статус: {status}", show_alert=True)
+        resp = await api.toggle_web_widget(company_id, widget_id)
+        if resp.status == 200:
+            result = resp.data
+            status = '✅ Включен' if result.get('is_active') else '❌ Выключен'
+            await callback.answer(f"Статус: {status}", show_alert=True)
                     
-                    # Refresh widget list with updated status
-                    async with session.get(f'{API_BASE_URL}/sales/{company_id}/web-widgets') as resp2:
-                        if resp2.status == 200:
-                            from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-                            widgets = await resp2.json()
-                            msg = "🌐 <b>Веб-виджеты</b>\n\n"
-                            buttons = []
+            # Refresh widget list with updated status
+            resp2 = await api.web_widgets(company_id)
+            if resp2.status == 200:
+                from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+                widgets = resp2.data
+                msg = "🌐 <b>Веб-виджеты</b>\n\n"
+                buttons = []
                             
-                            if widgets:
-                                for w in widgets:
-                                    status_icon = '✅' if w.get('is_active') else '❌'
-                                    wid = w['id']
-                                    domain = w['domain']
-                                    greeting = w.get('greeting_ru', 'Не установлено')[:30]
-                                    msg += f"{status_icon} <b>{domain}</b> (ID: {wid})\n"
-                                    msg += f"   {greeting}...\n\n"
+                if widgets:
+                    for w in widgets:
+                        status_icon = '✅' if w.get('is_active') else '❌'
+                        wid = w['id']
+                        domain = w['domain']
+                        greeting = w.get('greeting_ru', 'Не установлено')[:30]
+                        msg += f"{status_icon} <b>{domain}</b> (ID: {wid})\n"
+                        msg += f"   {greeting}...\n\n"
                                     
-                                    # Button shows current status
-                                    toggle_text = "✅ ON" if w.get('is_active') else "❌ OFF"
+                        # Button shows current status
+                        toggle_text = "✅ ON" if w.get('is_active') else "❌ OFF"
                                     
-                                    buttons.append([
-                                        InlineKeyboardButton(text=f"✏️ {domain}", callback_data=f"editwidget_{wid}"),
-                                        InlineKeyboardButton(text=toggle_text, callback_data=f"togglewidget_{wid}"),
-                                        InlineKeyboardButton(text="🗑", callback_data=f"delwidget_{wid}")
-                                    ])
-                            else:
-                                msg += "Виджетов пока нет\n"
+                        buttons.append([
+                            InlineKeyboardButton(text=f"✏️ {domain}", callback_data=f"editwidget_{wid}"),
+                            InlineKeyboardButton(text=toggle_text, callback_data=f"togglewidget_{wid}"),
+                            InlineKeyboardButton(text="🗑", callback_data=f"delwidget_{wid}")
+                        ])
+                else:
+                    msg += "Виджетов пока нет\n"
                             
-                            buttons.append([InlineKeyboardButton(text="➕ Создать виджет", callback_data=f"createwidget_{company_id}")])
-                            keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
+                buttons.append([InlineKeyboardButton(text="➕ Создать виджет", callback_data=f"createwidget_{company_id}")])
+                keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
                             
-                            # Update message with new buttons
-                            await callback.message.edit_text(msg, reply_markup=keyboard, parse_mode='HTML')
-                else:
-                    await callback.answer("❌ Ошибка", show_alert=True)
+                # Update message with new buttons
+                await callback.message.edit_text(msg, reply_markup=keyboard, parse_mode='HTML')
+        else:
+            await callback.answer("❌ Ошибка", show_alert=True)
     except Exception as e:
         await callback.answer("❌ Ошибка", show_alert=True)
 
@@ -1797,13 +1605,12 @@ async def delete_webwidget_callback(callback: types.CallbackQuery):
     company_id = getattr(callback.bot, 'company_id', 1)
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.delete(f'{API_BASE_URL}/sales/{company_id}/web-widgets/{widget_id}') as resp:
-                if resp.status == 200:
-                    await callback.answer("✅ Виджет удалён", show_alert=True)
-                    await callback.message.delete()
-                else:
-                    await callback.answer("❌ Ошибка", show_alert=True)
+        resp = await api.delete_web_widget(company_id, widget_id)
+        if resp.status == 200:
+            await callback.answer("✅ Виджет удалён", show_alert=True)
+            await callback.message.delete()
+        else:
+            await callback.answer("❌ Ошибка", show_alert=True)
     except Exception as e:
         await callback.answer("❌ Ошибка", show_alert=True)
 
@@ -1879,15 +1686,11 @@ async def process_social_greeting(message: types.Message, state: FSMContext):
     company_id = getattr(message.bot, 'company_id', 1)
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(
-                f'{API_BASE_URL}/sales/companies/{company_id}/widgets/{widget_id}',
-                json={'greeting_message': message.text}
-            ) as resp:
-                if resp.status == 200:
-                    await message.answer(f"✅ Приветствие канала #{widget_id} обновлено!")
-                else:
-                    await message.answer(f"❌ Ошибка обновления (код {resp.status})")
+        resp = await api.update_social_widget(company_id, widget_id, {'greeting_message': message.text})
+        if resp.status == 200:
+            await message.answer(f"✅ Приветствие канала #{widget_id} обновлено!")
+        else:
+            await message.answer(f"❌ Ошибка обновления (код {resp.status})")
     except Exception as e:
         logging.error(f"Update social greeting error: {e}")
         await message.answer(f"❌ Ошибка: {str(e)[:50]}")
@@ -1906,15 +1709,11 @@ async def process_social_name(message: types.Message, state: FSMContext):
     company_id = getattr(message.bot, 'company_id', 1)
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(
-                f'{API_BASE_URL}/sales/companies/{company_id}/widgets/{widget_id}',
-                json={'channel_name': message.text}
-            ) as resp:
-                if resp.status == 200:
-                    await message.answer(f"✅ Название канала изменено на: {message.text}")
-                else:
-                    await message.answer(f"❌ Ошибка обновления (код {resp.status})")
+        resp = await api.update_social_widget(company_id, widget_id, {'channel_name': message.text})
+        if resp.status == 200:
+            await message.answer(f"✅ Название канала изменено на: {message.text}")
+        else:
+            await message.answer(f"❌ Ошибка обновления (код {resp.status})")
     except Exception as e:
         logging.error(f"Update social name error: {e}")
         await message.answer(f"❌ Ошибка: {str(e)[:50]}")
@@ -1926,11 +1725,10 @@ async def process_social_name(message: types.Message, state: FSMContext):
 async def format_tier_info(company_id: int) -> str:
     """Format tier info for manager - current tier and usage only"""
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/sales/{company_id}/tier-usage') as resp:
-                if resp.status != 200:
-                    return "❌ Ошибка получения данных"
-                usage = await resp.json()
+        resp = await api.tier_usage(company_id)
+        if resp.status != 200:
+            return "❌ Ошибка получения данных"
+        usage = resp.data
         
         text = f"💳 <b>Ваш тариф</b>\n\n"
         text += f"📦 <b>Тариф:</b> {usage['tier_name']}\n"
@@ -1951,8 +1749,7 @@ async def format_tier_info(company_id: int) -> str:
         
         # Send pricing email
         try:
-            async with aiohttp.ClientSession() as session:
-                await session.post(f'{API_BASE_URL}/sales/{company_id}/send-pricing-email')
+            await api.send_pricing_email(company_id)
         except:
             pass
         
@@ -1997,14 +1794,13 @@ async def admin_internal_crm(message: types.Message):
     
     # Get current CRM status
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/crm/{company_id}/stats') as resp:
-                if resp.status == 200:
-                    stats = await resp.json()
-                    total = stats.get('total', 0)
-                    today = stats.get('today', 0)
-                else:
-                    total, today = 0, 0
+        resp = await api.crm_stats(company_id)
+        if resp.status == 200:
+            stats = resp.data
+            total = stats.get('total', 0)
+            today = stats.get('today', 0)
+        else:
+            total, today = 0, 0
     except:
         total, today = 0, 0
     
@@ -2037,28 +1833,26 @@ async def handle_internal_crm(callback: types.CallbackQuery):
     if action == "toggle":
         # Переключить статус
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f'{API_BASE_URL}/sales/companies/all') as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        company = next((c for c in data if c.get('id') == company_id), None)
-                        current = company.get('crm_type') if company else None
-                        new_type = None if current == 'internal' else 'internal'
-                        await session.post(f'{API_BASE_URL}/sales/company/upsert', json={'id': company_id, 'crm_type': new_type})
-                        if new_type == 'internal':
-                            await callback.answer("✅ Внутренняя CRM включена!")
-                            await callback.message.edit_text("✅ <b>Внутренняя CRM включена!</b>", parse_mode='HTML')
-                        else:
-                            await callback.answer("❌ Внутренняя CRM отключена")
-                            await callback.message.edit_text("❌ <b>Внутренняя CRM отключена</b>", parse_mode='HTML')
+            resp = await api.companies()
+            if resp.status == 200:
+                data = resp.data
+                company = next((c for c in data if c.get('id') == company_id), None)
+                current = company.get('crm_type') if company else None
+                new_type = None if current == 'internal' else 'internal'
+                await api.upsert_company({'id': company_id, 'crm_type': new_type})
+                if new_type == 'internal':
+                    await callback.answer("✅ Внутренняя CRM включена!")
+                    await callback.message.edit_text("✅ <b>Внутренняя CRM включена!</b>", parse_mode='HTML')
+                else:
+                    await callback.answer("❌ Внутренняя CRM отключена")
+                    await callback.message.edit_text("❌ <b>Внутренняя CRM отключена</b>", parse_mode='HTML')
         except Exception as e:
             await callback.answer(f"❌ Ошибка: {str(e)[:30]}")
         return
     
     if action == "enable":
         try:
-            async with aiohttp.ClientSession() as session:
-                await session.post(f'{API_BASE_URL}/sales/company/upsert', json={'id': company_id, 'crm_type': 'internal'})
+            await api.upsert_company({'id': company_id, 'crm_type': 'internal'})
             await callback.answer("✅ Внутренняя CRM включена!")
             await callback.message.edit_text("✅ <b>Внутренняя CRM включена!</b>\n\nТеперь менеджеры могут работать с лидами через /join", parse_mode='HTML')
         except:
@@ -2066,8 +1860,7 @@ async def handle_internal_crm(callback: types.CallbackQuery):
     
     elif action == "disable":
         try:
-            async with aiohttp.ClientSession() as session:
-                await session.post(f'{API_BASE_URL}/sales/company/upsert', json={'id': company_id, 'crm_type': None})
+            await api.upsert_company({'id': company_id, 'crm_type': None})
             await callback.answer("❌ Внутренняя CRM отключена")
             await callback.message.edit_text("❌ <b>Внутренняя CRM отключена</b>", parse_mode='HTML')
         except:
@@ -2075,34 +1868,33 @@ async def handle_internal_crm(callback: types.CallbackQuery):
     
     elif action == "statuses":
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f'{API_BASE_URL}/crm/{company_id}/statuses') as resp:
-                    if resp.status == 200:
-                        statuses = await resp.json()
-                        text = "⚙️ <b>Настройки монеток статусов</b>\n\n"
-                        for s in statuses:
-                            coins = f"+{s['coins']}" if s['coins'] > 0 else str(s['coins'])
-                            text += f"{s['emoji']} {s['name']}: {coins} 💰\n"
-                        text += "\n<i>Нажмите для редактирования:</i>"
+            resp = await api.statuses(company_id)
+            if resp.status == 200:
+                statuses = resp.data
+                text = "⚙️ <b>Настройки монеток статусов</b>\n\n"
+                for s in statuses:
+                    coins = f"+{s['coins']}" if s['coins'] > 0 else str(s['coins'])
+                    text += f"{s['emoji']} {s['name']}: {coins} 💰\n"
+                text += "\n<i>Нажмите для редактирования:</i>"
                         
-                        from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-                        buttons = []
+                from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+                buttons = []
+                row = []
+                for s in statuses:
+                    row.append(InlineKeyboardButton(
+                        text=f"{s['emoji']} ({s['coins']})",
+                        callback_data=f"status_edit:{s.get('id', s.get('code'))}"
+                    ))
+                    if len(row) == 3:
+                        buttons.append(row)
                         row = []
-                        for s in statuses:
-                            row.append(InlineKeyboardButton(
-                                text=f"{s['emoji']} ({s['coins']})",
-                                callback_data=f"status_edit:{s.get('id', s.get('code'))}"
-                            ))
-                            if len(row) == 3:
-                                buttons.append(row)
-                                row = []
-                        if row:
-                            buttons.append(row)
-                        buttons.append([InlineKeyboardButton(text="⬅️ Назад", callback_data="crm_int:back")])
-                        kb = InlineKeyboardMarkup(inline_keyboard=buttons)
-                        await callback.message.edit_text(text, parse_mode='HTML', reply_markup=kb)
-                    else:
-                        await callback.answer("❌ Ошибка загрузки")
+                if row:
+                    buttons.append(row)
+                buttons.append([InlineKeyboardButton(text="⬅️ Назад", callback_data="crm_int:back")])
+                kb = InlineKeyboardMarkup(inline_keyboard=buttons)
+                await callback.message.edit_text(text, parse_mode='HTML', reply_markup=kb)
+            else:
+                await callback.answer("❌ Ошибка загрузки")
         except Exception as e:
             logging.error(f"Statuses: {e}")
             await callback.answer("❌ Ошибка")
@@ -2124,60 +1916,59 @@ async def show_manager_card(callback: types.CallbackQuery):
     company_id = getattr(callback.bot, 'company_id', 1)
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/crm/{company_id}/managers/{user_id}') as resp:
-                if resp.status == 200:
-                    manager = await resp.json()
+        resp = await api.manager(company_id, user_id)
+        if resp.status == 200:
+            manager = resp.data
                     
-                    name = manager.get('full_name', 'Без имени')
-                    username = manager.get('telegram_username', '')
-                    coins = manager.get('coins', 0)
-                    leads_count = manager.get('leads_count', 0)
-                    deals_count = manager.get('deals_count', 0)
+            name = manager.get('full_name', 'Без имени')
+            username = manager.get('telegram_username', '')
+            coins = manager.get('coins', 0)
+            leads_count = manager.get('leads_count', 0)
+            deals_count = manager.get('deals_count', 0)
                     
-                    # Получаем события менеджера
-                    events_text = ""
-                    async with session.get(f'{API_BASE_URL}/crm/{company_id}/events?user_id={user_id}&limit=20') as ev_resp:
-                        if ev_resp.status == 200:
-                            events = await ev_resp.json()
-                            from datetime import datetime
-                            now = datetime.now().isoformat()[:10]
-                            from datetime import datetime
-                            now = datetime.now().isoformat()[:10]
-                            admin_events = [e for e in events 
-                                if e.get('created_by_user_id') 
-                                and e.get('created_by_user_id') != user_id
-                                and e.get('scheduled_at', '')[:10] >= now
-                                and e.get('status') == 'pending']
-                            if admin_events:
-                                events_text = "\n\n📅 <b>Назначенные задачи:</b>"
-                                for ev in admin_events[:3]:
-                                    ev_type = {'call': '📞', 'meeting': '🤝', 'email': '📧', 'task': '📋'}.get(ev.get('event_type', ''), '📅')
-                                    sched = ev.get('scheduled_at', '')[:10]
-                                    if sched:
-                                        sched = f"{sched[8:10]}.{sched[5:7]}.{sched[:4]}"
-                                    desc = (ev.get('description') or ev.get('title') or '')[:20]
-                                    events_text += f"\n{ev_type} {sched} {desc}"
-                                if len(admin_events) > 3:
-                                    events_text += f"\n... и ещё {len(admin_events) - 3}"
-                            else:
-                                events_text = "\n\n📅 <b>Задачи:</b> Нет будущих событий"
+            # Получаем события менеджера
+            events_text = ""
+            ev_resp = await api.events(company_id, user_id=user_id, limit=20)
+            if ev_resp.status == 200:
+                events = ev_resp.data
+                from datetime import datetime
+                now = datetime.now().isoformat()[:10]
+                from datetime import datetime
+                now = datetime.now().isoformat()[:10]
+                admin_events = [e for e in events 
+                    if e.get('created_by_user_id') 
+                    and e.get('created_by_user_id') != user_id
+                    and e.get('scheduled_at', '')[:10] >= now
+                    and e.get('status') == 'pending']
+                if admin_events:
+                    events_text = "\n\n📅 <b>Назначенные задачи:</b>"
+                    for ev in admin_events[:3]:
+                        ev_type = {'call': '📞', 'meeting': '🤝', 'email': '📧', 'task': '📋'}.get(ev.get('event_type', ''), '📅')
+                        sched = ev.get('scheduled_at', '')[:10]
+                        if sched:
+                            sched = f"{sched[8:10]}.{sched[5:7]}.{sched[:4]}"
+                        desc = (ev.get('description') or ev.get('title') or '')[:20]
+                        events_text += f"\n{ev_type} {sched} {desc}"
+                    if len(admin_events) > 3:
+                        events_text += f"\n... и ещё {len(admin_events) - 3}"
+                else:
+                    events_text = "\n\n📅 <b>Задачи:</b> Нет будущих событий"
                     
-                    text = f"""👤 <b>{name}</b>
+            text = f"""👤 <b>{name}</b>
 📞 @{username if username else 'не указан'}
 💰 Монеток: {coins}
 📊 Лидов: {leads_count} | Сделок: {deals_count}{events_text}"""
-                    
-                    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-                    kb = InlineKeyboardMarkup(inline_keyboard=[
-                        [InlineKeyboardButton(text="📅 Создать событие", callback_data=f"create_event_mgr:{user_id}")],
-                        [InlineKeyboardButton(text="🗑 Удалить менеджера", callback_data=f"delete_mgr_confirm:{user_id}")],
-                        [InlineKeyboardButton(text="◀️ Назад", callback_data="back_to_managers")]
-                    ])
-                    
-                    await callback.message.edit_text(text, parse_mode='HTML', reply_markup=kb)
-                else:
-                    await callback.answer("❌ Ошибка загрузки данных", show_alert=True)
+            
+            from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+            kb = InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="📅 Создать событие", callback_data=f"create_event_mgr:{user_id}")],
+                [InlineKeyboardButton(text="🗑 Удалить менеджера", callback_data=f"delete_mgr_confirm:{user_id}")],
+                [InlineKeyboardButton(text="◀️ Назад", callback_data="back_to_managers")]
+            ])
+            
+            await callback.message.edit_text(text, parse_mode='HTML', reply_markup=kb)
+        else:
+            await callback.answer("❌ Ошибка загрузки данных", show_alert=True)
     except Exception as e:
         logging.error(f"Manager card error: {e}")
         await callback.answer("❌ Ошибка", show_alert=True)
@@ -2189,23 +1980,22 @@ async def back_to_managers_list(callback: types.CallbackQuery):
     company_id = getattr(callback.bot, 'company_id', 1)
     try:
         from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/crm/{company_id}/managers') as resp:
-                if resp.status == 200:
-                    managers = await resp.json()
-                    managers = sorted(managers, key=lambda x: x.get('coins', 0), reverse=True)
-                    text_msg = "👥 <b>Менеджеры компании</b>\n\n"
-                    buttons = []
-                    for i, m in enumerate(managers):
-                        name = m.get('full_name', 'Без имени')
-                        coins = m.get('coins', 0)
-                        user_id = m.get('user_id', 0)
-                        medal = ['🥇', '🥈', '🥉'][i] if i < 3 else f"{i+1}."
-                        text_msg += f"{medal} {name} — {coins}💰\n"
-                        buttons.append([InlineKeyboardButton(text=f"📊 {name}", callback_data=f"mgr_card:{user_id}")])
-                    text_msg += "\n<i>Нажмите для просмотра</i>"
-                    kb = InlineKeyboardMarkup(inline_keyboard=buttons)
-                    await callback.message.edit_text(text_msg, parse_mode='HTML', reply_markup=kb)
+        resp = await api.managers(company_id)
+        if resp.status == 200:
+            managers = resp.data
+            managers = sorted(managers, key=lambda x: x.get('coins', 0), reverse=True)
+            text_msg = "👥 <b>Менеджеры компании</b>\n\n"
+            buttons = []
+            for i, m in enumerate(managers):
+                name = m.get('full_name', 'Без имени')
+                coins = m.get('coins', 0)
+                user_id = m.get('user_id', 0)
+                medal = ['🥇', '🥈', '🥉'][i] if i < 3 else f"{i+1}."
+                text_msg += f"{medal} {name} — {coins}💰\n"
+                buttons.append([InlineKeyboardButton(text=f"📊 {name}", callback_data=f"mgr_card:{user_id}")])
+            text_msg += "\n<i>Нажмите для просмотра</i>"
+            kb = InlineKeyboardMarkup(inline_keyboard=buttons)
+            await callback.message.edit_text(text_msg, parse_mode='HTML', reply_markup=kb)
     except Exception as e:
         logging.error(f"Back to managers: {e}")
 
@@ -2217,41 +2007,40 @@ async def create_event_for_manager_start(callback: types.CallbackQuery, state: F
     
     try:
         # Получаем имя менеджера
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/crm/{company_id}/managers/{manager_id}') as resp:
-                if resp.status == 200:
-                    manager = await resp.json()
-                    manager_name = manager.get('full_name', 'Менеджер')
+        resp = await api.manager(company_id, manager_id)
+        if resp.status == 200:
+            manager = resp.data
+            manager_name = manager.get('full_name', 'Менеджер')
                     
-                    # Сохраняем данные в state
-                    await state.update_data(
-                        target_manager_id=manager_id,
-                        target_manager_name=manager_name,
-                        created_by_admin=True,
-                        company_id=company_id,
-                        admin_user_id=callback.from_user.id
-                    )
+            # Сохраняем данные в state
+            await state.update_data(
+                target_manager_id=manager_id,
+                target_manager_name=manager_name,
+                created_by_admin=True,
+                company_id=company_id,
+                admin_user_id=callback.from_user.id
+            )
                     
-                    # Показываем выбор типа события
-                    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-                    kb = InlineKeyboardMarkup(inline_keyboard=[
-                        [InlineKeyboardButton(text="📞 Звонок", callback_data=f"etype_mgr:call:{manager_id}")],
-                        [InlineKeyboardButton(text="🤝 Встреча", callback_data=f"etype_mgr:meeting:{manager_id}")],
-                        [InlineKeyboardButton(text="📧 Email", callback_data=f"etype_mgr:email:{manager_id}")],
-                        [InlineKeyboardButton(text="📋 Задача", callback_data=f"etype_mgr:task:{manager_id}")]
-                    ])
+            # Показываем выбор типа события
+            from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+            kb = InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="📞 Звонок", callback_data=f"etype_mgr:call:{manager_id}")],
+                [InlineKeyboardButton(text="🤝 Встреча", callback_data=f"etype_mgr:meeting:{manager_id}")],
+                [InlineKeyboardButton(text="📧 Email", callback_data=f"etype_mgr:email:{manager_id}")],
+                [InlineKeyboardButton(text="📋 Задача", callback_data=f"etype_mgr:task:{manager_id}")]
+            ])
                     
-                    await callback.message.edit_text(
-                        f"📅 <b>Создание события для {manager_name}</b>\n\nВыберите тип:",
-                        parse_mode='HTML',
-                        reply_markup=kb
-                    )
+            await callback.message.edit_text(
+                f"📅 <b>Создание события для {manager_name}</b>\n\nВыберите тип:",
+                parse_mode='HTML',
+                reply_markup=kb
+            )
                     
-                    # Переходим в состояние выбора типа
-                    from states import EventStates
-                    await state.set_state(EventStates.selecting_type)
-                else:
-                    await callback.answer("❌ Ошибка загрузки данных", show_alert=True)
+            # Переходим в состояние выбора типа
+            from states import EventStates
+            await state.set_state(EventStates.selecting_type)
+        else:
+            await callback.answer("❌ Ошибка загрузки данных", show_alert=True)
     except Exception as e:
         logging.error(f"Create event for manager: {e}")
         await callback.answer("❌ Ошибка", show_alert=True)
@@ -2263,27 +2052,26 @@ async def delete_manager_confirm(callback: types.CallbackQuery):
     company_id = getattr(callback.bot, 'company_id', 1)
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/crm/{company_id}/managers/{user_id}') as resp:
-                if resp.status == 200:
-                    manager = await resp.json()
-                    name = manager.get('full_name', 'Менеджер')
-                    leads = manager.get('leads_count', 0)
+        resp = await api.manager(company_id, user_id)
+        if resp.status == 200:
+            manager = resp.data
+            name = manager.get('full_name', 'Менеджер')
+            leads = manager.get('leads_count', 0)
                     
-                    text = f"""⚠️ <b>Удалить менеджера?</b>
+            text = f"""⚠️ <b>Удалить менеджера?</b>
 
 👤 {name}
 📊 Активных лидов: {leads}
 
 Все его лиды станут неназначенными."""
-                    
-                    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-                    kb = InlineKeyboardMarkup(inline_keyboard=[
-                        [InlineKeyboardButton(text="✅ Да, удалить", callback_data=f"delete_mgr_do:{user_id}")],
-                        [InlineKeyboardButton(text="❌ Отмена", callback_data=f"mgr_card:{user_id}")]
-                    ])
-                    
-                    await callback.message.edit_text(text, parse_mode='HTML', reply_markup=kb)
+            
+            from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+            kb = InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="✅ Да, удалить", callback_data=f"delete_mgr_do:{user_id}")],
+                [InlineKeyboardButton(text="❌ Отмена", callback_data=f"mgr_card:{user_id}")]
+            ])
+            
+            await callback.message.edit_text(text, parse_mode='HTML', reply_markup=kb)
     except Exception as e:
         logging.error(f"Delete confirm: {e}")
 
@@ -1,9 +1,12 @@
 import os
 import asyncio
+import signal
 from scheduler import reminder_scheduler
 import logging
-import aiohttp
-from aiogram import Bot, Dispatcher
+from aiogram import Dispatcher
+from api_client import api
+from tenants import TenantRegistry
+from webhook import BOT_MODE, WebhookServer
 from handlers import router
 from crm_handlers import crm_router
 
@@ -12,98 +15,59 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
-API_BASE_URL = os.getenv('API_BASE_URL', 'http://backend:8000')
-
-async def get_companies_with_bots():
-    """Get all companies that have bot tokens configured"""
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f'{API_BASE_URL}/sales/companies/all',
-                timeout=aiohttp.ClientTimeout(total=10)
-            ) as resp:
-                if resp.status == 200:
-                    companies = await resp.json()
-                    # Filter only companies with bot_token
-                    return [c for c in companies if c.get('bot_token')]
-                else:
-                    logging.error(f"Failed to get companies: {resp.status}")
-                    return []
-    except Exception as e:
-        logging.error(f"Error getting companies: {e}")
-        return []
-
 async def main():
     logging.info("🚀 Starting BizDNAi Multi-Tenant Bot System...")
     
     # Check for local mode (BOT_TOKEN in .env)
     local_bot_token = os.getenv('BOT_TOKEN')
     
-    # Load companies from database
-    companies = await get_companies_with_bots()
-    
-    if not companies:
-        logging.error("❌ No companies with bot tokens found!")
-        logging.info("💡 Add bot tokens via SuperAdmin bot")
-        return
-    
-    # LOCAL MODE: Filter to only the bot specified in .env
-    if local_bot_token:
-        companies = [c for c in companies if c.get('bot_token') == local_bot_token]
-        if companies:
-            logging.info(f"🔧 LOCAL MODE: Running only {companies[0]['name']}")
-        else:
-            logging.error(f"❌ Bot token from .env not found in database!")
-            return
-    
-    logging.info(f"📋 Found {len(companies)} companies with bots")
-    
-    # Create Bot instances for each company
-    bots = []
-    for company in companies:
-        try:
-            bot = Bot(token=company['bot_token'])
-            
-            # Attach company metadata to bot instance
-            bot.company_id = company['id']
-            bot.company_name = company.get('name', f"Company {company['id']}")
-            bot.admin_chat_id = company.get('admin_chat_id')
-            
-            bots.append(bot)
-            logging.info(
-                f"🤖 Bot #{company['id']}: {company['name']} "
-                f"(Manager: {company.get('admin_chat_id', 'not set')})"
-            )
-        except Exception as e:
-            logging.error(f"❌ Failed to create bot for company {company['id']}: {e}")
-    
-    if not bots:
-        logging.error("❌ No valid bots created!")
-        return
-    
     # Create single dispatcher for all bots
     dp = Dispatcher()
     dp.include_router(crm_router)
     dp.include_router(router)
     
-    logging.info(f"✅ Starting polling for {len(bots)} bot(s)...")
-    
+    webhook_server = None
+    registry = None
     try:
-        # Start polling all bots simultaneously
-        # Create bots dictionary for scheduler
-        bots_dict = {bot.company_id: bot for bot in bots}
+        if BOT_MODE == 'webhook':
+            webhook_server = WebhookServer(dp)
+            await webhook_server.start()
+        
+        # Bots are created, replaced and stopped as companies change; no restart needed
+        registry = TenantRegistry(dp, webhook_server, only_token=local_bot_token)
+        if not await registry.refresh():
+            logging.error("❌ Could not load companies!")
+            return
+        if local_bot_token:
+            if registry.bots:
+                logging.info(f"🔧 LOCAL MODE: Running only {next(iter(registry.bots.values())).company_name}")
+            else:
+                logging.error(f"❌ Bot token from .env not found in database!")
+                return
+        if not registry.bots:
+            logging.warning("⚠️ No companies with bot tokens yet, waiting for them")
+            logging.info("💡 Add bot tokens via SuperAdmin bot")
+        await registry.start()
+        logging.info(f"✅ {BOT_MODE.capitalize()} mode: {len(registry.bots)} bot(s), company list re-read every {registry.interval:.0f}s")
         
-        # Start reminder scheduler
-        asyncio.create_task(reminder_scheduler(bots_dict))
+        # Start reminder scheduler (registry.bots stays current)
+        asyncio.create_task(reminder_scheduler(registry.bots))
         logging.info("📅 Reminder scheduler started")
         
-        await dp.start_polling(*bots, drop_pending_updates=True)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await stop.wait()
     except Exception as e:
-        logging.error(f"❌ Polling error: {e}")
+        logging.error(f"❌ {BOT_MODE.capitalize()} error: {e}")
     finally:
         # Cleanup
-        for bot in bots:
-            await bot.session.close()
+        if webhook_server:
+            await webhook_server.stop()
+        if registry:
+            await registry.stop()
+        await api.close()
         logging.info("Bot sessions closed")
 
 if __name__ == '__main__':
@@ -7,10 +7,12 @@ from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
-import subprocess
+
+from api_client import BackendAPI
 
 logging.basicConfig(level=logging.INFO)
 API_BASE_URL = 'http://localhost:8005'
+api = BackendAPI(API_BASE_URL)
 
 TOKEN = os.getenv('SUPER_ADMIN_CHAT_ID', '').strip()
 if not TOKEN or ':' not in TOKEN:
@@ -103,38 +105,37 @@ class TierEdit(StatesGroup):
 async def btn_tiers(message: types.Message, state: FSMContext):
     await state.clear()
     try:
-        async with aiohttp.ClientSession() as session:
-            # Тарифы подписки
-            async with session.get(f'{API_BASE_URL}/sales/tiers') as resp:
-                tiers = await resp.json() if resp.status == 200 else []
-            # Пакеты AI
-            async with session.get(f'{API_BASE_URL}/sales/ai-packages') as resp:
-                packages = await resp.json() if resp.status == 200 else []
+        # Тарифы подписки
+        resp = await api.tiers()
+        tiers = resp.data if resp.status == 200 else []
+        # Пакеты AI
+        resp = await api.ai_packages()
+        packages = resp.data if resp.status == 200 else []
             
-            lines = ["💳 <b>Месячные тарифы</b>", ""]
-            buttons = []
-            for t in tiers:
-                avatar_limit = t.get('avatar_limit', 0)
-                lines.append(f"<b>{t['name_ru']}</b> — ${t['price_usd']}/мес | {t['leads_limit']} лидов | 🎭{avatar_limit}")
-                buttons.append([
-                    InlineKeyboardButton(text=f"💰 {t['tier']}", callback_data=f"tierprice_{t['tier']}"),
-                    InlineKeyboardButton(text=f"👥 {t['tier']}", callback_data=f"tierleads_{t['tier']}"),
-                    InlineKeyboardButton(text=f"🎭 {t['tier']}", callback_data=f"tieravatar_{t['tier']}")
-                ])
+        lines = ["💳 <b>Месячные тарифы</b>", ""]
+        buttons = []
+        for t in tiers:
+            avatar_limit = t.get('avatar_limit', 0)
+            lines.append(f"<b>{t['name_ru']}</b> — ${t['price_usd']}/мес | {t['leads_limit']} лидов | 🎭{avatar_limit}")
+            buttons.append([
+                InlineKeyboardButton(text=f"💰 {t['tier']}", callback_data=f"tierprice_{t['tier']}"),
+                InlineKeyboardButton(text=f"👥 {t['tier']}", callback_data=f"tierleads_{t['tier']}"),
+                InlineKeyboardButton(text=f"🎭 {t['tier']}", callback_data=f"tieravatar_{t['tier']}")
+            ])
             
-            lines.append("")
-            lines.append("🤖 <b>Пакеты AI (разово)</b>")
-            lines.append("")
-            for p in packages:
-                lines.append(f"<b>{p['name_ru']}</b> — ${p['price_usd']}")
-                buttons.append([
-                    InlineKeyboardButton(text=f"🤖 {p['package']}", callback_data=f"aiprice_{p['package']}")
-                ])
+        lines.append("")
+        lines.append("🤖 <b>Пакеты AI (разово)</b>")
+        lines.append("")
+        for p in packages:
+            lines.append(f"<b>{p['name_ru']}</b> — ${p['price_usd']}")
+            buttons.append([
+                InlineKeyboardButton(text=f"🤖 {p['package']}", callback_data=f"aiprice_{p['package']}")
+            ])
             
-            lines.append("")
-            lines.append("<i>💰 цена, 👥 лиды, 🎭 аватары, 🤖 AI пакеты</i>")
-            kb = InlineKeyboardMarkup(inline_keyboard=buttons)
-            await message.answer("\n".join(lines), parse_mode='HTML', reply_markup=kb)
+        lines.append("")
+        lines.append("<i>💰 цена, 👥 лиды, 🎭 аватары, 🤖 AI пакеты</i>")
+        kb = InlineKeyboardMarkup(inline_keyboard=buttons)
+        await message.answer("\n".join(lines), parse_mode='HTML', reply_markup=kb)
     except Exception as e:
         await message.answer(f"❌ {str(e)[:50]}")
 
@@ -177,8 +178,7 @@ async def proc_price(message: types.Message, state: FSMContext):
     try:
         price = int(message.text.strip())
         data = await state.get_data()
-        async with aiohttp.ClientSession() as session:
-            await session.patch(f'{API_BASE_URL}/sales/tiers/{data["tier"]}', json={'price_usd': price})
+        await api.update_tier(data['tier'], {'price_usd': price})
         await message.answer(f"✅ Цена {data['tier'].upper()} = ${price}/мес", reply_markup=get_main_keyboard())
     except:
         await message.answer("❌ Введите число")
@@ -190,8 +190,7 @@ async def proc_leads(message: types.Message, state: FSMContext):
     try:
         limit = int(message.text.strip())
         data = await state.get_data()
-        async with aiohttp.ClientSession() as session:
-            await session.patch(f'{API_BASE_URL}/sales/tiers/{data["tier"]}', json={'leads_limit': limit})
+        await api.update_tier(data['tier'], {'leads_limit': limit})
         await message.answer(f"✅ Лимит {data['tier'].upper()} = {limit}/мес", reply_markup=get_main_keyboard())
     except:
         await message.answer("❌ Введите число")
@@ -204,8 +203,7 @@ async def proc_avatar_limit(message: types.Message, state: FSMContext):
     try:
         limit = int(message.text.strip())
         data = await state.get_data()
-        async with aiohttp.ClientSession() as session:
-            await session.patch(f'{API_BASE_URL}/sales/tiers/{data["tier"]}', json={'avatar_limit': limit})
+        await api.update_tier(data['tier'], {'avatar_limit': limit})
         await message.answer(f"✅ Аватаров {data['tier'].upper()} = {limit}", reply_markup=get_main_keyboard())
     except:
         await message.answer("❌ Введите число")
@@ -218,8 +216,7 @@ async def proc_ai_price(message: types.Message, state: FSMContext):
     try:
         price = int(message.text.strip())
         data = await state.get_data()
-        async with aiohttp.ClientSession() as session:
-            await session.patch(f'{API_BASE_URL}/sales/ai-packages/{data["pkg"]}', json={'price_usd': price})
+        await api.update_ai_package(data['pkg'], {'price_usd': price})
         await message.answer(f"✅ AI пакет {data['pkg'].upper()} = ${price}", reply_markup=get_main_keyboard())
     except:
         await message.answer("❌ Введите число")
@@ -248,24 +245,23 @@ async def btn_widget(message: types.Message, state: FSMContext):
 @dp.message(F.text == "📊 Компании")
 async def btn_companies(message: types.Message, state: FSMContext):
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/sales/companies/all', timeout=aiohttp.ClientTimeout(total=5)) as resp:
-                if resp.status == 200:
-                    companies = await resp.json()
-                    if not companies:
-                        text = "🏢 <b>Компании:</b>\n\nНет компаний."
-                    else:
-                        text = "🏢 <b>Компании:</b>\n\n"
-                        for c in sorted(companies, key=lambda x: x.get('id', 0)):
-                            cid = c.get('id', '?')
-                            name = c.get('name', 'Без названия')
-                            has_bot = '🤖' if c.get('bot_token') else '❌'
-                            tier = c.get('tier', 'free')
-                            tier_icon = '💎' if tier != 'free' else '🆓'
-                            web_avatar = '🎭' if c.get('web_avatar_enabled') else ''
-                            text += f"<b>ID: {cid}</b> — {name} {has_bot} {tier_icon}{tier} {web_avatar}\n"
-                    await message.answer(text, parse_mode='HTML', reply_markup=get_company_menu_keyboard())
-                    await state.set_state(CompanyFlow.viewing_list)
+        resp = await api.companies(timeout=5)
+        if resp.status == 200:
+            companies = resp.data
+            if not companies:
+                text = "🏢 <b>Компании:</b>\n\nНет компаний."
+            else:
+                text = "🏢 <b>Компании:</b>\n\n"
+                for c in sorted(companies, key=lambda x: x.get('id', 0)):
+                    cid = c.get('id', '?')
+                    name = c.get('name', 'Без названия')
+                    has_bot = '🤖' if c.get('bot_token') else '❌'
+                    tier = c.get('tier', 'free')
+                    tier_icon = '💎' if tier != 'free' else '🆓'
+                    web_avatar = '🎭' if c.get('web_avatar_enabled') else ''
+                    text += f"<b>ID: {cid}</b> — {name} {has_bot} {tier_icon}{tier} {web_avatar}\n"
+            await message.answer(text, parse_mode='HTML', reply_markup=get_company_menu_keyboard())
+            await state.set_state(CompanyFlow.viewing_list)
     except Exception as e:
         await message.answer(f"❌ Ошибка: {str(e)[:50]}", reply_markup=get_main_keyboard())
 
@@ -277,19 +273,18 @@ async def start_create_company(message: types.Message, state: FSMContext):
 
 @dp.message(CompanyFlow.viewing_list, F.text == "✏️ Редактировать компанию")
 async def start_edit_company(message: types.Message, state: FSMContext):
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(f'{API_BASE_URL}/sales/companies/all') as resp:
-                if resp.status == 200:
-                    companies = await resp.json()
-                    if not companies:
-                        await message.answer("📋 Нет компаний")
-                        return
-                    await state.update_data(companies=companies)
-                    await state.set_state(CompanyFlow.selecting_for_edit)
-                    await message.answer("🔍 <b>Редактирование</b>\n\nВведите ID компании:", parse_mode='HTML')
-        except Exception as e:
-            await message.answer(f"❌ Ошибка: {str(e)[:40]}")
+    try:
+        resp = await api.companies()
+        if resp.status == 200:
+            companies = resp.data
+            if not companies:
+                await message.answer("📋 Нет компаний")
+                return
+            await state.update_data(companies=companies)
+            await state.set_state(CompanyFlow.selecting_for_edit)
+            await message.answer("🔍 <b>Редактирование</b>\n\nВведите ID компании:", parse_mode='HTML')
+    except Exception as e:
+        await message.answer(f"❌ Ошибка: {str(e)[:40]}")
     await message.answer("🔍 <b>Редактирование</b>\n\nВведите ID компании:", parse_mode='HTML')
 
 @dp.message(CompanyFlow.selecting_for_edit)
@@ -382,12 +377,11 @@ async def process_logo(message: types.Message, state: FSMContext):
                 ext, ct = 'png', 'image/png'
             form_data = aiohttp.FormData()
             form_data.add_field('file', file_data, filename=f'logo.{ext}', content_type=ct)
-            async with aiohttp.ClientSession() as session:
-                async with session.post(f'{API_BASE_URL}/sales/company/{data.get("id") or 1}/upload-logo', data=form_data) as resp:
-                    if resp.status == 200:
-                        result = await resp.json()
-                        await state.update_data(logo_url=result.get('logo_url'))
-                        await message.answer("✅ Загружен")
+            resp = await api.upload_logo(data.get('id') or 1, form_data)
+            if resp.status == 200:
+                result = resp.data
+                await state.update_data(logo_url=result.get('logo_url'))
+                await message.answer("✅ Загружен")
         except: pass
     await state.set_state(CompanyFlow.editing_bot_token)
     token = data.get('bot_token') or 'нет'
@@ -435,67 +429,52 @@ async def process_currency(message: types.Message, state: FSMContext):
         return
     if message.text != '.': await state.update_data(currency=message.text.upper())
     data = await state.get_data()
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.post(f'{API_BASE_URL}/sales/company/upsert', json=data) as resp:
-                if resp.status == 200:
-                    result = await resp.json()
-                    await message.answer(f"✅ <b>Сохранено!</b>\n\nID: {result.get('id')}\nНазвание: {result.get('name')}", parse_mode='HTML', reply_markup=get_main_keyboard())
+    try:
+        resp = await api.upsert_company(data)
+        if resp.status == 200:
+            result = resp.data
+            await message.answer(f"✅ <b>Сохранено!</b>\n\nID: {result.get('id')}\nНазвание: {result.get('name')}", parse_mode='HTML', reply_markup=get_main_keyboard())
                     
-                    # Auto-restart Manager bot to load new company
-                    try:
-                        restart_result = subprocess.run(
-                            ['docker-compose', '-f', '/root/dnai-sales/docker-compose.yml', 'restart', 'bot'],
-                            cwd='/root/dnai-sales',
-                            capture_output=True,
-                            text=True,
-                            timeout=30
-                        )
-                        if restart_result.returncode == 0:
-                            await message.answer("🔄 Manager бот перезапущен. Компания активирована!")
-                        else:
-                            await message.answer(f"⚠️ Не удалось перезапустить Manager бот:\n{restart_result.stderr[:100]}")
-                    except Exception as restart_error:
-                        await message.answer(f"❌ Ошибка перезапуска: {str(restart_error)[:100]}")
-                else:
-                    await message.answer("❌ Ошибка", reply_markup=get_main_keyboard())
-        except:
-            await message.answer("❌ Ошибка соединения", reply_markup=get_main_keyboard())
+            # The Manager bot picks up new and changed companies on its own (TenantRegistry)
+            await message.answer("🔄 Бот компании подключится в течение минуты, перезапуск не нужен.")
+        else:
+            await message.answer("❌ Ошибка", reply_markup=get_main_keyboard())
+    except:
+        await message.answer("❌ Ошибка соединения", reply_markup=get_main_keyboard())
     await state.clear()
 
 @dp.message(F.text == "📈 Лиды")
 async def btn_leads(message: types.Message):
     try:
-        async with aiohttp.ClientSession() as session:
-            companies = {}
-            try:
-                async with session.get(f'{API_BASE_URL}/sales/companies/all', timeout=aiohttp.ClientTimeout(total=3)) as cr:
-                    if cr.status == 200:
-                        for c in await cr.json():
-                            companies[c['id']] = c['name']
-            except: pass
+        companies = {}
+        try:
+            cr = await api.companies(timeout=3)
+            if cr.status == 200:
+                for c in cr.data:
+                    companies[c['id']] = c['name']
+        except: pass
             
-            async with session.get(f'{API_BASE_URL}/sales/all-leads?limit=15', timeout=aiohttp.ClientTimeout(total=5)) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    leads = data.get('leads', [])
-                    if not leads:
-                        await message.answer("📊 Лидов нет")
-                        return
-                    text = "📊 <b>Последние лиды:</b>\n\n"
-                    for l in leads:
-                        contact = l.get('contact_info', {}) or {}
-                        phone = contact.get('phone') or '-'
-                        name = contact.get('name') or contact.get('username') or ''
-                        company_id = l.get('company_id', 0)
-                        company_name = companies.get(company_id, f'#{company_id}')
-                        temp_icon = get_temp_icon(l.get('temperature', 'warm'))
-                        src = '✈️' if 'telegram' in l.get('source', '').lower() else '🌐'
-                        if name:
-                            text += f"{src} <b>{company_name}</b> | {name} | 📱{phone} {temp_icon}\n"
-                        else:
-                            text += f"{src} <b>{company_name}</b> | 📱{phone} {temp_icon}\n"
-                    await message.answer(text, parse_mode='HTML')
+        resp = await api.all_leads(15, timeout=5)
+        if resp.status == 200:
+            data = resp.data
+            leads = data.get('leads', [])
+            if not leads:
+                await message.answer("📊 Лидов нет")
+                return
+            text = "📊 <b>Последние лиды:</b>\n\n"
+            for l in leads:
+                contact = l.get('contact_info', {}) or {}
+                phone = contact.get('phone') or '-'
+                name = contact.get('name') or contact.get('username') or ''
+                company_id = l.get('company_id', 0)
+                company_name = companies.get(company_id, f'#{company_id}')
+                temp_icon = get_temp_icon(l.get('temperature', 'warm'))
+                src = '✈️' if 'telegram' in l.get('source', '').lower() else '🌐'
+                if name:
+                    text += f"{src} <b>{company_name}</b> | {name} | 📱{phone} {temp_icon}\n"
+                else:
+                    text += f"{src} <b>{company_name}</b> | 📱{phone} {temp_icon}\n"
+            await message.answer(text, parse_mode='HTML')
     except Exception as e:
         await message.answer(f"❌ Ошибка: {str(e)[:40]}")
 
@@ -504,40 +483,36 @@ async def btn_status(message: types.Message):
     status = ["📈 <b>Статус системы:</b>\n"]
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/', timeout=aiohttp.ClientTimeout(total=3)) as resp:
-                status.append("✅ Backend API: Online" if resp.status == 200 else f"⚠️ Backend: {resp.status}")
+        resp = await api.get('/', 'health', timeout=3, retries=0)
+        status.append("✅ Backend API: Online" if resp.status == 200 else f"⚠️ Backend: {resp.status}")
     except: status.append("❌ Backend API: Offline")
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/docs', timeout=aiohttp.ClientTimeout(total=3)) as resp:
-                status.append("✅ FastAPI Docs: Online" if resp.status == 200 else f"⚠️ FastAPI: {resp.status}")
+        resp = await api.get('/docs', 'docs', timeout=3, retries=0)
+        status.append("✅ FastAPI Docs: Online" if resp.status == 200 else f"⚠️ FastAPI: {resp.status}")
     except: status.append("❌ FastAPI: Offline")
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/sales/all-leads?limit=1', timeout=aiohttp.ClientTimeout(total=3)) as resp:
-                status.append("✅ PostgreSQL: Online" if resp.status == 200 else f"⚠️ PostgreSQL: {resp.status}")
+        resp = await api.all_leads(1, timeout=3)
+        status.append("✅ PostgreSQL: Online" if resp.status == 200 else f"⚠️ PostgreSQL: {resp.status}")
     except: status.append("❌ PostgreSQL: Offline")
     
     status.append("✅ Whisper (голос): Ready")
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/sales/companies/all', timeout=aiohttp.ClientTimeout(total=3)) as resp:
-                if resp.status == 200:
-                    companies = await resp.json()
-                    active = sum(1 for c in companies if c.get('bot_token'))
-                    status.append(f"\n🏢 Компаний: {len(companies)}")
-                    status.append(f"🤖 С ботами: {active}")
-                    # Tier breakdown
-                    tiers = {}
-                    for c in companies:
-                        t = c.get('tier', 'free')
-                        tiers[t] = tiers.get(t, 0) + 1
-                    tier_str = ', '.join([f"{k}: {v}" for k, v in sorted(tiers.items())])
-                    status.append(f"💎 Тарифы: {tier_str}")
+        resp = await api.companies(timeout=3)
+        if resp.status == 200:
+            companies = resp.data
+            active = sum(1 for c in companies if c.get('bot_token'))
+            status.append(f"\n🏢 Компаний: {len(companies)}")
+            status.append(f"🤖 С ботами: {active}")
+            # Tier breakdown
+            tiers = {}
+            for c in companies:
+                t = c.get('tier', 'free')
+                tiers[t] = tiers.get(t, 0) + 1
+            tier_str = ', '.join([f"{k}: {v}" for k, v in sorted(tiers.items())])
+            status.append(f"💎 Тарифы: {tier_str}")
     except: pass
     
     await message.answer('\n'.join(status), parse_mode='HTML')
@@ -545,20 +520,19 @@ async def btn_status(message: types.Message):
 @dp.message(F.text == "🎭 Web Avatar")
 async def start_web_avatar(message: types.Message, state: FSMContext):
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/sales/companies/all', timeout=aiohttp.ClientTimeout(total=5)) as resp:
-                if resp.status == 200:
-                    companies = await resp.json()
-                    if not companies:
-                        await message.answer("📋 Нет компаний")
-                        return
-                    text = "🎭 <b>Web Avatar</b>\n\nВыберите компанию:\n\n"
-                    for i, c in enumerate(companies, 1):
-                        enabled = '✅' if c.get('web_avatar_enabled') else '❌'
-                        text += f"{i}. {c['name']} — {enabled}\n"
-                    await state.update_data(companies=companies)
-                    await state.set_state(CompanyFlow.selecting_for_web_avatar)
-                    await message.answer(text, parse_mode='HTML')
+        resp = await api.companies(timeout=5)
+        if resp.status == 200:
+            companies = resp.data
+            if not companies:
+                await message.answer("📋 Нет компаний")
+                return
+            text = "🎭 <b>Web Avatar</b>\n\nВыберите компанию:\n\n"
+            for i, c in enumerate(companies, 1):
+                enabled = '✅' if c.get('web_avatar_enabled') else '❌'
+                text += f"{i}. {c['name']} — {enabled}\n"
+            await state.update_data(companies=companies)
+            await state.set_state(CompanyFlow.selecting_for_web_avatar)
+            await message.answer(text, parse_mode='HTML')
     except Exception as e:
         await message.answer(f"❌ Ошибка: {str(e)[:40]}")
 
@@ -573,9 +547,8 @@ async def select_web_avatar(message: types.Message, state: FSMContext):
             current_status = company.get('web_avatar_enabled', False)
             tier = company.get('tier', 'free')
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f'{API_BASE_URL}/sales/tiers') as resp:
-                    tiers = await resp.json() if resp.status == 200 else []
+            resp = await api.tiers()
+            tiers = resp.data if resp.status == 200 else []
             
             tier_limit = next((t.get('avatar_limit', 0) for t in tiers if t.get('tier') == tier), 0)
             override_limit = company.get('avatar_limit')
@@ -610,8 +583,7 @@ async def enter_company_avatar_limit(message: types.Message, state: FSMContext):
     if message.text.strip() != '.':
         try:
             limit = int(message.text.strip())
-            async with aiohttp.ClientSession() as session:
-                await session.post(f'{API_BASE_URL}/sales/company/upsert', json={'id': data['company_id'], 'avatar_limit': limit})
+            await api.upsert_company({'id': data['company_id'], 'avatar_limit': limit})
             await message.answer(f"✅ Лимит аватаров для {data['company_name']} = {limit}", reply_markup=get_company_menu_keyboard())
         except ValueError:
             await message.answer("❌ Введите число или '.'")
@@ -624,42 +596,39 @@ async def enter_company_avatar_limit(message: types.Message, state: FSMContext):
 @dp.callback_query(lambda c: c.data.startswith('toggle_avatar_'))
 async def toggle_avatar_callback(callback: types.CallbackQuery):
     company_id = int(callback.data.split('_')[2])
-    async with aiohttp.ClientSession() as session:
-        # Получаем текущий статус
-        async with session.get(f'{API_BASE_URL}/sales/companies/all') as resp:
-            companies = await resp.json()
-            company = next((c for c in companies if c['id'] == company_id), None)
-            if company:
-                new_status = not company.get('web_avatar_enabled', False)
-                # Обновляем
-                await session.post(f'{API_BASE_URL}/sales/company/upsert', 
-                                  json={'id': company_id, 'web_avatar_enabled': new_status})
-                status_text = '✅ Включён' if new_status else '❌ Выключен'
-                await callback.answer(f"Web Avatar: {status_text}")
-                await callback.message.edit_text(
-                    f"🎭 Web Avatar для {company['name']}: {status_text}\n\nВведите лимит или '.' для пропуска:"
-                )
+    # Получаем текущий статус
+    resp = await api.companies()
+    companies = resp.data
+    company = next((c for c in companies if c['id'] == company_id), None)
+    if company:
+        new_status = not company.get('web_avatar_enabled', False)
+        # Обновляем
+        await api.upsert_company({'id': company_id, 'web_avatar_enabled': new_status})
+        status_text = '✅ Включён' if new_status else '❌ Выключен'
+        await callback.answer(f"Web Avatar: {status_text}")
+        await callback.message.edit_text(
+            f"🎭 Web Avatar для {company['name']}: {status_text}\n\nВведите лимит или '.' для пропуска:"
+        )
 
 @dp.message(F.text == "🎯 Установить тариф")
 async def start_set_tier(message: types.Message, state: FSMContext):
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/sales/companies/all', timeout=aiohttp.ClientTimeout(total=5)) as resp:
-                if resp.status == 200:
-                    companies = await resp.json()
-                    if not companies:
-                        await message.answer("📋 Нет компаний")
-                        return
-                    text = "🎯 <b>Установить тариф</b>\n\nВыберите компанию:\n\n"
-                    for i, c in enumerate(companies, 1):
-                        tier = c.get('tier', 'free')
-                        expiry = c.get('tier_expiry')
-                        if expiry and expiry != 'None': expiry = str(expiry)[:10]
-                        else: expiry = '∞' if tier == 'free' else 'N/A'
-                        text += f"{i}. {c['name']} — {tier} (до: {expiry})\n"
-                    await state.update_data(companies=companies)
-                    await state.set_state(CompanyFlow.selecting_company_for_tier)
-                    await message.answer(text, parse_mode='HTML')
+        resp = await api.companies(timeout=5)
+        if resp.status == 200:
+            companies = resp.data
+            if not companies:
+                await message.answer("📋 Нет компаний")
+                return
+            text = "🎯 <b>Установить тариф</b>\n\nВыберите компанию:\n\n"
+            for i, c in enumerate(companies, 1):
+                tier = c.get('tier', 'free')
+                expiry = c.get('tier_expiry')
+                if expiry and expiry != 'None': expiry = str(expiry)[:10]
+                else: expiry = '∞' if tier == 'free' else 'N/A'
+                text += f"{i}. {c['name']} — {tier} (до: {expiry})\n"
+            await state.update_data(companies=companies)
+            await state.set_state(CompanyFlow.selecting_company_for_tier)
+            await message.answer(text, parse_mode='HTML')
     except Exception as e:
         await message.answer(f"❌ Ошибка: {str(e)[:40]}")
 
@@ -703,12 +672,11 @@ async def enter_tier_days(message: types.Message, state: FSMContext):
         tier = data.get('new_tier', 'free')
         from datetime import datetime, timedelta
         expiry = (datetime.now() + timedelta(days=days)).isoformat()
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(f"{API_BASE_URL}/sales/companies/{company['id']}/tier", json={'tier': tier, 'tier_expiry': expiry}, timeout=aiohttp.ClientTimeout(total=5)) as resp:
-                if resp.status == 200:
-                    await message.answer(f"✅ Установлен!\n\n🏢 {company['name']}\n🎯 {tier}\n📅 {days} дней\n⏰ До: {expiry[:10]}", reply_markup=get_company_menu_keyboard())
-                else:
-                    await message.answer(f"⚠️ Ошибка: {resp.status}")
+        resp = await api.set_company_tier(company['id'], {'tier': tier, 'tier_expiry': expiry}, timeout=5)
+        if resp.status == 200:
+            await message.answer(f"✅ Установлен!\n\n🏢 {company['name']}\n🎯 {tier}\n📅 {days} дней\n⏰ До: {expiry[:10]}", reply_markup=get_company_menu_keyboard())
+        else:
+            await message.answer(f"⚠️ Ошибка: {resp.status}")
         await state.clear()
     except ValueError:
         await message.answer("❌ Введите число")
@@ -719,23 +687,22 @@ async def enter_tier_days(message: types.Message, state: FSMContext):
 @dp.message(F.text == "⏰ Продлить тариф")
 async def start_extend_tier(message: types.Message, state: FSMContext):
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/sales/companies/all', timeout=aiohttp.ClientTimeout(total=5)) as resp:
-                if resp.status == 200:
-                    companies = await resp.json()
-                    companies_with_tier = [c for c in companies if c.get('tier', 'free') != 'free']
-                    if not companies_with_tier:
-                        await message.answer("📋 Нет компаний с платным тарифом", reply_markup=get_company_menu_keyboard())
-                        return
-                    text = "⏰ <b>Продлить тариф</b>\n\n"
-                    for i, c in enumerate(companies_with_tier, 1):
-                        expiry = c.get('tier_expiry')
-                        if expiry and expiry != 'None': expiry = str(expiry)[:10]
-                        else: expiry = 'N/A'
-                        text += f"{i}. {c['name']} — {c.get('tier')} (до: {expiry})\n"
-                    await state.update_data(companies=companies_with_tier)
-                    await state.set_state(CompanyFlow.selecting_company_for_extend)
-                    await message.answer(text, parse_mode='HTML')
+        resp = await api.companies(timeout=5)
+        if resp.status == 200:
+            companies = resp.data
+            companies_with_tier = [c for c in companies if c.get('tier', 'free') != 'free']
+            if not companies_with_tier:
+                await message.answer("📋 Нет компаний с платным тарифом", reply_markup=get_company_menu_keyboard())
+                return
+            text = "⏰ <b>Продлить тариф</b>\n\n"
+            for i, c in enumerate(companies_with_tier, 1):
+                expiry = c.get('tier_expiry')
+                if expiry and expiry != 'None': expiry = str(expiry)[:10]
+                else: expiry = 'N/A'
+                text += f"{i}. {c['name']} — {c.get('tier')} (до: {expiry})\n"
+            await state.update_data(companies=companies_with_tier)
+            await state.set_state(CompanyFlow.selecting_company_for_extend)
+            await message.answer(text, parse_mode='HTML')
     except Exception as e:
         await message.answer(f"❌ Ошибка: {str(e)[:40]}")
 
@@ -772,12 +739,11 @@ async def enter_extend_days(message: types.Message, state: FSMContext):
                 if base.replace(tzinfo=None) < datetime.now(): base = datetime.now()
             except: pass
         new_expiry = (base + timedelta(days=days)).isoformat()
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(f"{API_BASE_URL}/sales/companies/{company['id']}/tier", json={'tier_expiry': new_expiry}, timeout=aiohttp.ClientTimeout(total=5)) as resp:
-                if resp.status == 200:
-                    await message.answer(f"✅ Продлён!\n\n🏢 {company['name']}\n➕ {days} дней\n⏰ До: {new_expiry[:10]}", reply_markup=get_company_menu_keyboard())
-                else:
-                    await message.answer(f"⚠️ Ошибка: {resp.status}")
+        resp = await api.set_company_tier(company['id'], {'tier_expiry': new_expiry}, timeout=5)
+        if resp.status == 200:
+            await message.answer(f"✅ Продлён!\n\n🏢 {company['name']}\n➕ {days} дней\n⏰ До: {new_expiry[:10]}", reply_markup=get_company_menu_keyboard())
+        else:
+            await message.answer(f"⚠️ Ошибка: {resp.status}")
         await state.clear()
     except ValueError:
         await message.answer("❌ Введите число")
@@ -791,21 +757,20 @@ async def btn_integrations(message: types.Message, state: FSMContext):
     """Manage integrations"""
     await state.clear()
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'{API_BASE_URL}/sales/companies/all') as resp:
-                if resp.status == 200:
-                    companies = await resp.json()
-                    if not companies:
-                        await message.answer("📋 Нет компаний")
-                        return
-                    text = "🔌 <b>Интеграции 1С-CRM</b>\n\nВыберите компанию:\n\n"
-                    for i, c in enumerate(companies, 1):
-                        enabled = '✅' if c.get('integration_enabled') else '❌'
-                        itype = c.get('integration_type') or 'нет'
-                        text += f"{i}. {c['name']} — {enabled} {itype}\n"
-                    await state.update_data(companies=companies)
-                    await state.set_state(IntegrationFlow.selecting_company)
-                    await message.answer(text, parse_mode='HTML')
+        resp = await api.companies()
+        if resp.status == 200:
+            companies = resp.data
+            if not companies:
+                await message.answer("📋 Нет компаний")
+                return
+            text = "🔌 <b>Интеграции 1С-CRM</b>\n\nВыберите компанию:\n\n"
+            for i, c in enumerate(companies, 1):
+                enabled = '✅' if c.get('integration_enabled') else '❌'
+                itype = c.get('integration_type') or 'нет'
+                text += f"{i}. {c['name']} — {enabled} {itype}\n"
+            await state.update_data(companies=companies)
+            await state.set_state(IntegrationFlow.selecting_company)
+            await message.answer(text, parse_mode='HTML')
     except Exception as e:
         await message.answer(f"❌ Ошибка: {str(e)[:40]}")
 
@@ -869,33 +834,31 @@ async def select_integration_company(message: types.Message, state: FSMContext):
 async def toggle_integration(callback: types.CallbackQuery):
     """Включить/выключить интеграцию"""
     company_id = int(callback.data.split('_')[2])
-    async with aiohttp.ClientSession() as session:
-        try:
-            # Получаем компанию
-            async with session.get(f'{API_BASE_URL}/sales/companies/all') as resp:
-                companies = await resp.json()
-                company = next((c for c in companies if c['id'] == company_id), None)
-                if company:
-                    new_status = not company.get('integration_enabled', False)
-                    # Обновляем
-                    await session.post(f'{API_BASE_URL}/sales/company/upsert', 
-                                      json={'id': company_id, 'integration_enabled': new_status})
-                    status_text = '✅ Включена' if new_status else '❌ Выключена'
-                    await callback.answer(f"Интеграция: {status_text}")
-                    # Показываем обновленный статус с кнопками
-                    kb = InlineKeyboardMarkup(inline_keyboard=[
-                        [InlineKeyboardButton(
-                            text="❌ Выключить" if new_status else "✅ Включить",
-                            callback_data=f"toggle_int_{company_id}"
-                        )],
-                        [InlineKeyboardButton(text="⚙️ Настроить", callback_data=f"setup_int_{company_id}")]
-                    ])
-                    await callback.message.edit_text(
-                        f"🔌 Интеграция для {company['name']}: {status_text}",
-                        reply_markup=kb
-                    )
-        except Exception as e:
-            await callback.answer(f"❌ Ошибка: {str(e)[:40]}")
+    try:
+        # Получаем компанию
+        resp = await api.companies()
+        companies = resp.data
+        company = next((c for c in companies if c['id'] == company_id), None)
+        if company:
+            new_status = not company.get('integration_enabled', False)
+            # Обновляем
+            await api.upsert_company({'id': company_id, 'integration_enabled': new_status})
+            status_text = '✅ Включена' if new_status else '❌ Выключена'
+            await callback.answer(f"Интеграция: {status_text}")
+            # Показываем обновленный статус с кнопками
+            kb = InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(
+                    text="❌ Выключить" if new_status else "✅ Включить",
+                    callback_data=f"toggle_int_{company_id}"
+                )],
+                [InlineKeyboardButton(text="⚙️ Настроить", callback_data=f"setup_int_{company_id}")]
+            ])
+            await callback.message.edit_text(
+                f"🔌 Интеграция для {company['name']}: {status_text}",
+                reply_markup=kb
+            )
+    except Exception as e:
+        await callback.answer(f"❌ Ошибка: {str(e)[:40]}")
 
 @dp.callback_query(lambda c: c.data.startswith('setup_int_'))
 async def setup_integration(callback: types.CallbackQuery, state: FSMContext):
@@ -1030,22 +993,21 @@ async def save_integration_settings(message: types.Message, state: FSMContext):
         save_data['kommo_client_secret'] = data.get('kommo_client_secret')
         save_data['kommo_refresh_token'] = data.get('kommo_refresh_token')
     
-    async with aiohttp.ClientSession() as session:
-        try:
-            await session.post(f'{API_BASE_URL}/sales/company/upsert', json=save_data)
-            itype = data.get('integration_type', '').upper()
-            await message.answer(
-                f"✅ <b>Интеграция настроена!</b>\n\n"
-                f"Тип: {itype}\n"
-                f"1С: {data.get('onec_base_url')}\n"
-                f"Статус: Активна\n\n"
-                f"Используйте /start для возврата в меню.",
-                parse_mode='HTML',
-                reply_markup=get_main_keyboard()
-            )
-            await state.clear()
-        except Exception as e:
-            await message.answer(f"❌ Ошибка сохранения: {str(e)[:100]}")
+    try:
+        await api.upsert_company(save_data)
+        itype = data.get('integration_type', '').upper()
+        await message.answer(
+            f"✅ <b>Интеграция настроена!</b>\n\n"
+            f"Тип: {itype}\n"
+            f"1С: {data.get('onec_base_url')}\n"
+            f"Статус: Активна\n\n"
+            f"Используйте /start для возврата в меню.",
+            parse_mode='HTML',
+            reply_markup=get_main_keyboard()
+        )
+        await state.clear()
+    except Exception as e:
+        await message.answer(f"❌ Ошибка сохранения: {str(e)[:100]}")
 
 
 @dp.message(F.text == "🏠 Меню")
@@ -1061,7 +1023,10 @@ async def handle_any(message: types.Message, state: FSMContext):
 
 async def main():
     logging.info("🔐 SuperAdmin Bot starting...")
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        await api.close()
 
 if __name__ == '__main__':
     asyncio.run(main())
@@ -0,0 +1,185 @@
+"""
+Live registry of tenant bots.
+
+Companies and their bot tokens used to be read once at startup, so a company
+added or edited through the SuperAdmin bot needed a restart (losing FSM state
+and reminder timing). TenantRegistry re-reads the company list every
+TENANT_REFRESH_INTERVAL seconds and diffs it against the running bots:
+new tokens get a Bot and start receiving updates (own getUpdates loop in
+polling mode, webhook registration in webhook mode), changed tokens replace
+their Bot, removed ones are stopped and their sessions closed, and name /
+admin chat changes are applied in place. `bots` is the company_id -> Bot dict
+the reminder scheduler reads, kept up to date in place.
+"""
+import asyncio
+import logging
+import os
+from typing import Dict, Optional
+
+from aiogram import Bot, Dispatcher
+
+from api_client import api
+from webhook import WebhookServer, create_bot
+
+TENANT_REFRESH_INTERVAL = float(os.getenv('TENANT_REFRESH_INTERVAL', '60'))
+POLLING_TIMEOUT = int(os.getenv('POLLING_TIMEOUT', '30'))
+
+
+class TenantRegistry:
+    def __init__(self, dp: Dispatcher, webhook_server: Optional[WebhookServer] = None,
+                 only_token: str = None, interval: float = TENANT_REFRESH_INTERVAL):
+        self.dp = dp
+        self.webhook_server = webhook_server
+        self.only_token = only_token  # local mode: run just this bot
+        self.interval = interval
+        self.bots: Dict[int, Bot] = {}
+        self._pollers: Dict[int, asyncio.Task] = {}
+        self._handlers = set()
+        self._task = None
+        self._loaded = False
+        self.added = 0
+        self.replaced = 0
+        self.removed = 0
+
+    async def refresh(self) -> bool:
+        """Sync running bots with the company list; False if the list could not be loaded"""
+        # The registry wants the current list; refreshing it helps every other reader too
+        api.cache.invalidate('companies')
+        resp = await api.companies(timeout=10)
+        if resp.status != 200:
+            logging.error(f"Failed to get companies: {resp.status}")
+            return False
+        wanted = {c['id']: c for c in resp.data if c.get('bot_token')}
+        if self.only_token:
+            wanted = {cid: c for cid, c in wanted.items() if c['bot_token'] == self.only_token}
+        # Like start_polling(drop_pending_updates=True) did: updates queued while the bot was down are skipped
+        drop_pending = not self._loaded
+
+        for company_id in [cid for cid in self.bots if cid not in wanted]:
+            await self._remove(company_id)
+            self.removed += 1
+        for company_id, company in wanted.items():
+            bot = self.bots.get(company_id)
+            if bot is None:
+                if await self._add(company, drop_pending):
+                    self.added += 1
+            elif bot.token != company['bot_token']:
+                await self._remove(company_id)
+                if await self._add(company, drop_pending):
+                    self.replaced += 1
+            else:
+                self._apply_metadata(bot, company)
+        self._loaded = True
+        return True
+
+    def _apply_metadata(self, bot: Bot, company: dict):
+        bot.company_id = company['id']
+        bot.company_name = company.get('name', f"Company {company['id']}")
+        bot.admin_chat_id = company.get('admin_chat_id')
+
+    async def _add(self, company: dict, drop_pending: bool = False) -> bool:
+        try:
+            bot = create_bot(company['bot_token'])
+        except Exception as e:
+            logging.error(f"❌ Failed to create bot for company {company['id']}: {e}")
+            return False
+        self._apply_metadata(bot, company)
+        try:
+            if self.webhook_server:
+                await self.webhook_server.add_bot(bot, drop_pending_updates=drop_pending)
+            else:
+                # A webhook left over from webhook mode would make getUpdates fail
+                await bot.delete_webhook(drop_pending_updates=drop_pending)
+                self._pollers[company['id']] = asyncio.create_task(self._poll(bot))
+        except Exception as e:
+            logging.error(f"❌ Failed to start bot for company {company['id']}: {e}")
+            await bot.session.close()
+            return False
+        self.bots[company['id']] = bot
+        logging.info(
+            f"🤖 Bot #{company['id']}: {company.get('name')} "
+            f"(Manager: {company.get('admin_chat_id', 'not set')})"
+        )
+        return True
+
+    async def _remove(self, company_id: int, unregister: bool = True):
+        bot = self.bots.pop(company_id, None)
+        poller = self._pollers.pop(company_id, None)
+        if poller:
+            poller.cancel()
+            try:
+                await poller
+            except asyncio.CancelledError:
+                pass
+        if bot:
+            if self.webhook_server:
+                await self.webhook_server.remove_bot(bot, delete_webhook=unregister)
+            await bot.session.close()
+            logging.info(f"🛑 Bot #{company_id} stopped")
+
+    async def _poll(self, bot: Bot):
+        """getUpdates loop for one bot; updates are handled as tasks like Dispatcher.start_polling does"""
+        offset = None
+        backoff = 1
+        allowed = self.dp.resolve_used_update_types()
+        while True:
+            try:
+                updates = await bot.get_updates(offset=offset, timeout=POLLING_TIMEOUT, allowed_updates=allowed)
+                backoff = 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"❌ Polling error for bot #{bot.company_id}: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+                continue
+            for update in updates:
+                offset = update.update_id + 1
+                task = asyncio.create_task(self._feed(bot, update))
+                self._handlers.add(task)
+                task.add_done_callback(self._handlers.discard)
+
+    async def _feed(self, bot: Bot, update):
+        try:
+            await self.dp.feed_update(bot, update)
+        except Exception as e:
+            logging.error(f"❌ Update {update.update_id} for bot #{bot.company_id}: {e}")
+
+    async def start(self):
+        if self._task:
+            return
+        self._task = asyncio.create_task(self._loop())
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logging.error(f"❌ Tenant refresh error: {e}")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for poller in self._pollers.values():
+            poller.cancel()
+        # Let handlers in progress reply before their bot sessions close
+        if self._handlers:
+            await asyncio.wait(list(self._handlers), timeout=10)
+        # Shutdown keeps webhooks registered; the next start drops what queued up meanwhile
+        for company_id in list(self.bots):
+            await self._remove(company_id, unregister=False)
+
+    def stats(self) -> dict:
+        return {
+            'bots': len(self.bots),
+            'interval_s': self.interval,
+            'added': self.added,
+            'replaced': self.replaced,
+            'removed': self.removed,
+        }
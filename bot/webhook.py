@@ -0,0 +1,166 @@
+"""
+Webhook ingestion for the multi-tenant bot.
+
+Polling keeps one getUpdates loop per company bot. In webhook mode Telegram
+pushes updates to one aiohttp server instead: every bot gets its own secret
+path (derived from WEBHOOK_SECRET and the bot token, so the token never shows
+up in URLs or access logs) plus a secret_token header check. Updates are
+acknowledged right away and handled in the background by the shared
+Dispatcher, at most WEBHOOK_CONCURRENCY at a time; when all slots are busy
+the request waits, which makes Telegram slow down instead of piling up tasks.
+
+TELEGRAM_API_URL points bots at another Bot API server (a local fake one for
+testing, or a self-hosted telegram-bot-api).
+"""
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import time
+from typing import Dict, Iterable
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiohttp import web
+
+BOT_MODE = os.getenv('BOT_MODE', 'polling').lower()  # polling | webhook
+WEBHOOK_BASE_URL = os.getenv('WEBHOOK_BASE_URL', '').rstrip('/')  # public https://host[:port] Telegram calls
+WEBHOOK_PATH = '/' + os.getenv('WEBHOOK_PATH', 'tg').strip('/')
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8080'))
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+WEBHOOK_CONCURRENCY = int(os.getenv('WEBHOOK_CONCURRENCY', '64'))
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', '').rstrip('/')
+
+
+def create_bot(token: str) -> Bot:
+    """Bot bound to TELEGRAM_API_URL when set, the public Bot API otherwise"""
+    if TELEGRAM_API_URL:
+        from aiogram.client.session.aiohttp import AiohttpSession
+        from aiogram.client.telegram import TelegramAPIServer
+        return Bot(token=token, session=AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL)))
+    return Bot(token=token)
+
+
+def _derive(token: str, purpose: str) -> str:
+    return hmac.new(WEBHOOK_SECRET.encode(), f'{purpose}:{token}'.encode(), hashlib.sha256).hexdigest()
+
+
+class WebhookServer:
+    """Receives updates for all tenant bots and feeds them to one Dispatcher"""
+
+    def __init__(self, dp: Dispatcher, concurrency: int = WEBHOOK_CONCURRENCY, **workflow_data):
+        if not WEBHOOK_SECRET:
+            raise RuntimeError('WEBHOOK_SECRET is required in webhook mode')
+        if not WEBHOOK_BASE_URL:
+            raise RuntimeError('WEBHOOK_BASE_URL is required in webhook mode')
+        self.dp = dp
+        self.workflow_data = workflow_data
+        self._slots = asyncio.Semaphore(concurrency)
+        self.concurrency = concurrency
+        self._bots: Dict[str, Bot] = {}  # path key -> bot
+        self._secrets: Dict[str, str] = {}  # path key -> secret_token
+        self._tasks = set()
+        self._runner = None
+        self.received = 0
+        self.rejected = 0
+        self.failed = 0
+        self.handled_ms = 0.0
+
+    def url_for(self, bot: Bot) -> str:
+        return f'{WEBHOOK_BASE_URL}{WEBHOOK_PATH}/{_derive(bot.token, "path")[:32]}'
+
+    async def add_bot(self, bot: Bot, drop_pending_updates: bool = False):
+        """Route this bot's path to it and register the webhook with Telegram"""
+        key = _derive(bot.token, 'path')[:32]
+        secret = _derive(bot.token, 'secret')
+        self._bots[key] = bot
+        self._secrets[key] = secret
+        await bot.set_webhook(
+            url=self.url_for(bot),
+            secret_token=secret,
+            allowed_updates=self.dp.resolve_used_update_types(),
+            max_connections=min(100, self.concurrency),
+            drop_pending_updates=drop_pending_updates
+        )
+        logging.info(f"🪝 Webhook set for bot #{getattr(bot, 'company_id', '?')}")
+
+    async def remove_bot(self, bot: Bot, delete_webhook: bool = True):
+        key = _derive(bot.token, 'path')[:32]
+        self._bots.pop(key, None)
+        self._secrets.pop(key, None)
+        if delete_webhook:
+            try:
+                await bot.delete_webhook()
+            except Exception as e:
+                logging.error(f"❌ delete_webhook for bot #{getattr(bot, 'company_id', '?')}: {e}")
+
+    async def start(self, bots: Iterable[Bot] = ()):
+        app = web.Application()
+        app.router.add_post(f'{WEBHOOK_PATH}/{{key}}', self._handle)
+        app.router.add_get('/healthz', self._health)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+        logging.info(f"🪝 Webhook server on {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}/…")
+        for bot in bots:
+            try:
+                await self.add_bot(bot)
+            except Exception as e:
+                logging.error(f"❌ set_webhook for bot #{getattr(bot, 'company_id', '?')}: {e}")
+
+    async def stop(self, drain_timeout: float = 10):
+        """Stop accepting updates and let the ones in progress finish"""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+        if self._tasks:
+            await asyncio.wait(list(self._tasks), timeout=drain_timeout)
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        key = request.match_info['key']
+        bot = self._bots.get(key)
+        secret = request.headers.get('X-Telegram-Bot-Api-Secret-Token', '')
+        if bot is None or not hmac.compare_digest(secret, self._secrets.get(key, '')):
+            self.rejected += 1
+            return web.Response(status=401)
+        try:
+            update = Update.model_validate(await request.json(), context={'bot': bot})
+        except Exception as e:
+            self.rejected += 1
+            logging.warning(f'⚠️ Bad webhook payload: {e}')
+            return web.Response(status=400)
+
+        self.received += 1
+        await self._slots.acquire()
+        task = asyncio.create_task(self._process(bot, update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.Response()
+
+    async def _process(self, bot: Bot, update: Update):
+        started = time.perf_counter()
+        try:
+            await self.dp.feed_update(bot, update, **self.workflow_data)
+        except Exception as e:
+            self.failed += 1
+            logging.error(f'❌ Update {update.update_id} for bot #{getattr(bot, "company_id", "?")}: {e}')
+        finally:
+            self.handled_ms += (time.perf_counter() - started) * 1000
+            self._slots.release()
+
+    async def _health(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+    def stats(self) -> dict:
+        handled = self.received - len(self._tasks)
+        return {
+            'bots': len(self._bots),
+            'concurrency': self.concurrency,
+            'in_progress': len(self._tasks),
+            'received': self.received,
+            'rejected': self.rejected,
+            'failed': self.failed,
+            'avg_handle_ms': round(self.handled_ms / handled, 1) if handled else 0.0,
+        }